@@ -0,0 +1,514 @@
+"""Load-balanced pool of Ollama hosts.
+
+Every process that runs use cases can spread its model calls over several
+Ollama hosts by listing them in the OLLAMA_HOSTS environment variable
+(comma-separated base URLs). Requests go to the healthy host with the fewest
+outstanding requests ("least_outstanding", the default) or the lowest
+expected wait ("latency": time to first token weighted by queue depth).
+
+A host that fails to connect or answers with a server error is skipped for
+the rest of that request, and after FAILURE_THRESHOLD consecutive failures
+it is taken out of rotation until a health check or its cooldown brings it
+back. Hosts can be drained for maintenance: they finish in-flight requests
+but get no new ones.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.request
+from typing import Dict, Any, AsyncIterator, Callable, Iterator, List, Optional, Tuple
+
+from langchain_community.llms import Ollama as LangchainOllama
+
+from projects.coalescing import COALESCER, request_key
+from projects.prefix_cache import PREFIX_AFFINITY, PREFIX_TRACKER, prefix_key
+from projects.resilience import (HostSelector, Resilience, aresilient_stream, attach_response, is_backend_failure,
+                                 resilient_stream)
+from projects.scheduling import LLMScheduler, scheduler_for
+
+DEFAULT_OLLAMA_URL = "http://localhost:11434"
+
+# Share one generation between identical concurrent requests; OLLAMA_COALESCE=0 turns it off
+COALESCE_REQUESTS = os.environ.get("OLLAMA_COALESCE", "1") != "0"
+
+STRATEGIES = ("least_outstanding", "latency")
+
+# Consecutive failures after which a host is taken out of rotation
+FAILURE_THRESHOLD = 3
+
+# Seconds an unhealthy host stays out of rotation before it is tried again
+FAILURE_COOLDOWN = 30.0
+
+# Seconds a single read from a host may block; the resilience deadlines are usually hit first
+REQUEST_TIMEOUT = 300
+
+# Extra outstanding requests a host may have over the least busy one and still get its prefixes
+AFFINITY_SLACK = 2
+
+# Weight of the newest sample in the moving average of time to first token
+LATENCY_SMOOTHING = 0.3
+
+_pools: Dict[Any, "BackendPool"] = {}
+_pools_lock = threading.Lock()
+
+_default_resilience: Optional[Resilience] = None
+
+
+class BackendUnavailableError(RuntimeError):
+    """Raised when no Ollama host can take a request."""
+
+
+def _affinity_score(key: str, url: str) -> int:
+    return int(hashlib.sha256(f"{key}|{url}".encode("utf-8")).hexdigest()[:16], 16)
+
+
+def ollama_hosts(default: Optional[str] = None) -> List[str]:
+    """Return the Ollama base URLs from OLLAMA_HOSTS, or [default] if it is not set."""
+    hosts = [host.strip().rstrip("/") for host in os.environ.get("OLLAMA_HOSTS", "").split(",") if host.strip()]
+    return hosts or [(default or DEFAULT_OLLAMA_URL).rstrip("/")]
+
+
+class Backend:
+    """One Ollama host and its routing statistics."""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.latency: Optional[float] = None
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.healthy = True
+        self.unhealthy_until = 0.0
+        self.draining = False
+
+    def available(self, now: float) -> bool:
+        """Whether the host is in rotation: not draining and healthy or past its cooldown."""
+        return not self.draining and (self.healthy or now >= self.unhealthy_until)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the host's statistics as a dictionary."""
+        return {
+            "url": self.url,
+            "outstanding": self.outstanding,
+            "latency": None if self.latency is None else round(self.latency, 4),
+            "requests": self.requests,
+            "errors": self.errors,
+            "healthy": self.healthy,
+            "draining": self.draining,
+        }
+
+
+class BackendPool:
+    """Route requests over several Ollama hosts with health checks and failover."""
+
+    def __init__(self, urls: List[str], strategy: str = "least_outstanding",
+                 failure_threshold: int = FAILURE_THRESHOLD, cooldown: float = FAILURE_COOLDOWN,
+                 health_timeout: float = 2.0):
+        """Initialize the pool.
+
+        Args:
+            urls: Base URLs of the Ollama hosts
+            strategy: "least_outstanding" or "latency"
+            failure_threshold: Consecutive failures after which a host leaves rotation
+            cooldown: Seconds before a host that left rotation is tried again
+            health_timeout: Timeout in seconds of a health check request
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"strategy must be one of {', '.join(STRATEGIES)}")
+        if not urls:
+            raise ValueError("A backend pool needs at least one host")
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.health_timeout = health_timeout
+        self.backends = [Backend(url) for url in dict.fromkeys(url.rstrip("/") for url in urls)]
+        self._lock = threading.Condition()
+        self._turn = 0
+        self._stop_checks: Optional[threading.Event] = None
+
+    def _find(self, url: str) -> Backend:
+        url = url.rstrip("/")
+        for backend in self.backends:
+            if backend.url == url:
+                return backend
+        raise KeyError(url)
+
+    def _score(self, backend: Backend):
+        if self.strategy == "latency":
+            # Expected wait: every queued request costs about one time to first token; unmeasured hosts go first
+            return ((backend.latency or 0.0) * (backend.outstanding + 1), backend.outstanding)
+        return (backend.outstanding, backend.latency or 0.0)
+
+    def acquire(self, exclude: Optional[List[Backend]] = None, affinity: Optional[str] = None) -> Backend:
+        """Pick a host for a request and count the request as outstanding on it.
+
+        Hosts that are out of rotation are only used when every other host is excluded
+        or out of rotation too, since an attempt beats failing outright.
+
+        Args:
+            exclude: Hosts that already failed this request
+            affinity: Key of requests that should go to the same host, such as a prompt
+                prefix; it is honored unless that host has AFFINITY_SLACK more outstanding
+                requests than the least busy one
+
+        Returns:
+            The chosen host; pass it to release() when the request ends
+        """
+        exclude = exclude or []
+        with self._lock:
+            now = time.monotonic()
+            candidates = [backend for backend in self.backends if not backend.draining and backend not in exclude]
+            if not candidates:
+                raise BackendUnavailableError("No Ollama host is available: all hosts failed or are draining")
+            candidates = [backend for backend in candidates if backend.available(now)] or candidates
+            # Rotate the starting point so ties are spread round-robin
+            self._turn = (self._turn + 1) % len(candidates)
+            rotated = candidates[self._turn:] + candidates[:self._turn]
+            backend = min(rotated, key=self._score)
+            if affinity is not None:
+                # Rendezvous hashing: the same key keeps its host as hosts come and go
+                preferred = max(candidates, key=lambda candidate: _affinity_score(affinity, candidate.url))
+                if preferred.outstanding <= backend.outstanding + AFFINITY_SLACK:
+                    backend = preferred
+            backend.outstanding += 1
+            backend.requests += 1
+            return backend
+
+    def release(self, backend: Backend, latency: Optional[float] = None, error: Optional[BaseException] = None):
+        """End a request on a host and update its statistics.
+
+        Args:
+            backend: Host returned by acquire()
+            latency: Seconds until the host's first response, if it answered
+            error: Exception the request ended with, if any
+        """
+        with self._lock:
+            backend.outstanding -= 1
+            if error is not None and is_backend_failure(error):
+                backend.errors += 1
+                backend.consecutive_failures += 1
+                if backend.consecutive_failures >= self.failure_threshold:
+                    backend.healthy = False
+                    backend.unhealthy_until = time.monotonic() + self.cooldown
+            elif latency is not None:
+                backend.consecutive_failures = 0
+                backend.healthy = True
+                backend.latency = latency if backend.latency is None else (
+                    LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * backend.latency)
+            self._lock.notify_all()
+
+    def _next(self, tried: List[Tuple[Backend, Exception]]) -> Backend:
+        """Acquire a host that has not failed this request yet, or re-raise the last failure."""
+        try:
+            return self.acquire([backend for backend, _ in tried])
+        except BackendUnavailableError:
+            if tried:
+                raise tried[-1][1]
+            raise
+
+    def call(self, func: Callable[[str], Any]) -> Any:
+        """Call func(base_url), failing over to another host when a host fails.
+
+        Args:
+            func: Function performing the request against a base URL
+
+        Returns:
+            The function's return value
+        """
+        tried: List[Tuple[Backend, Exception]] = []
+        while True:
+            backend = self._next(tried)
+            start = time.perf_counter()
+            try:
+                result = func(backend.url)
+            except Exception as e:
+                self.release(backend, error=e)
+                if not is_backend_failure(e):
+                    raise
+                tried.append((backend, e))
+                continue
+            self.release(backend, latency=time.perf_counter() - start)
+            return result
+
+    def stream(self, open_stream: Callable[[str], Iterator[str]]) -> Iterator[str]:
+        """Stream lines from a host, failing over while nothing has been received yet.
+
+        Once a host has sent part of a response, a failure is raised rather than
+        retried, since the caller has already consumed the partial output.
+
+        Args:
+            open_stream: Function starting the request against a base URL and returning its lines
+
+        Returns:
+            Iterator over the response lines
+        """
+        tried: List[Tuple[Backend, Exception]] = []
+        while True:
+            backend = self._next(tried)
+            start = time.perf_counter()
+            latency = None
+            try:
+                for line in open_stream(backend.url):
+                    if latency is None:
+                        latency = time.perf_counter() - start
+                    yield line
+            except Exception as e:
+                self.release(backend, error=e)
+                if latency is not None or not is_backend_failure(e):
+                    raise
+                tried.append((backend, e))
+                continue
+            except BaseException:
+                # The consumer stopped early; the host itself did not fail
+                self.release(backend)
+                raise
+            self.release(backend, latency=latency if latency is not None else time.perf_counter() - start)
+            return
+
+    async def astream(self, open_stream: Callable[[str], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """Asynchronous counterpart of stream()."""
+        tried: List[Tuple[Backend, Exception]] = []
+        while True:
+            backend = self._next(tried)
+            start = time.perf_counter()
+            latency = None
+            try:
+                async for line in open_stream(backend.url):
+                    if latency is None:
+                        latency = time.perf_counter() - start
+                    yield line
+            except Exception as e:
+                self.release(backend, error=e)
+                if latency is not None or not is_backend_failure(e):
+                    raise
+                tried.append((backend, e))
+                continue
+            except BaseException:
+                self.release(backend)
+                raise
+            self.release(backend, latency=latency if latency is not None else time.perf_counter() - start)
+            return
+
+    def add(self, url: str):
+        """Add a host to the pool, or return a draining host to rotation."""
+        with self._lock:
+            try:
+                self._find(url).draining = False
+            except KeyError:
+                self.backends.append(Backend(url))
+
+    def drain(self, url: str, timeout: Optional[float] = None) -> bool:
+        """Stop sending new requests to a host and wait for its in-flight requests.
+
+        Args:
+            url: Base URL of the host
+            timeout: Maximum seconds to wait, or None to wait until it is idle
+
+        Returns:
+            Whether the host finished all in-flight requests
+        """
+        with self._lock:
+            backend = self._find(url)
+            backend.draining = True
+            return self._lock.wait_for(lambda: backend.outstanding == 0, timeout)
+
+    def remove(self, url: str, timeout: Optional[float] = None) -> bool:
+        """Drain a host and remove it from the pool once it is idle.
+
+        Returns:
+            Whether the host was removed; it stays draining if the timeout expired first
+        """
+        if not self.drain(url, timeout):
+            return False
+        with self._lock:
+            if len(self.backends) == 1:
+                raise ValueError("Cannot remove the last host of a backend pool")
+            self.backends.remove(self._find(url))
+        return True
+
+    def probe(self, url: str) -> bool:
+        """Return whether a host answers Ollama's model list endpoint."""
+        try:
+            with urllib.request.urlopen(f"{url}/api/tags", timeout=self.health_timeout) as response:
+                json.load(response)
+                return response.status == 200
+        except (OSError, ValueError):
+            return False
+
+    def check_health(self) -> Dict[str, bool]:
+        """Probe every host and update whether it is in rotation.
+
+        Returns:
+            Health by host URL
+        """
+        results = {backend.url: self.probe(backend.url) for backend in list(self.backends)}
+        with self._lock:
+            now = time.monotonic()
+            for backend in self.backends:
+                if backend.url not in results:
+                    continue
+                backend.healthy = results[backend.url]
+                if backend.healthy:
+                    backend.consecutive_failures = 0
+                else:
+                    backend.unhealthy_until = now + self.cooldown
+        return results
+
+    def start_health_checks(self, interval: float = 15.0):
+        """Probe the hosts every interval seconds on a daemon thread until stop_health_checks()."""
+        if self._stop_checks is not None:
+            return
+        self._stop_checks = threading.Event()
+        stop = self._stop_checks
+
+        def loop():
+            while not stop.wait(interval):
+                self.check_health()
+
+        threading.Thread(target=loop, name="ollama-health", daemon=True).start()
+
+    def stop_health_checks(self):
+        """Stop the background health checks."""
+        if self._stop_checks is not None:
+            self._stop_checks.set()
+            self._stop_checks = None
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Return the statistics of every host."""
+        with self._lock:
+            return [backend.snapshot() for backend in self.backends]
+
+
+def get_pool(urls: List[str], strategy: Optional[str] = None) -> BackendPool:
+    """Return the process-wide pool for a list of hosts, creating it on first use.
+
+    The strategy defaults to OLLAMA_ROUTING, and background health checks run every
+    OLLAMA_HEALTH_INTERVAL seconds (15 by default, 0 disables them).
+
+    Args:
+        urls: Base URLs of the Ollama hosts
+        strategy: Routing strategy, see BackendPool
+
+    Returns:
+        The shared pool
+    """
+    strategy = strategy or os.environ.get("OLLAMA_ROUTING", "least_outstanding")
+    key = (tuple(urls), strategy)
+    with _pools_lock:
+        if key not in _pools:
+            pool = BackendPool(list(urls), strategy=strategy)
+            interval = float(os.environ.get("OLLAMA_HEALTH_INTERVAL", "15"))
+            if interval > 0:
+                pool.start_health_checks(interval)
+            _pools[key] = pool
+        return _pools[key]
+
+
+class Ollama(LangchainOllama):
+    """langchain's Ollama LLM with coalescing of identical concurrent requests.
+
+    Given a pool, requests are routed over its hosts, keeping prompts with the same
+    prefix on one host (see projects.prefix_cache); otherwise they go to base_url.
+    Every request waits for a slot of the hosts' LLMScheduler, runs under a Resilience
+    policy, the process default if none is set, and is metered against the RunBudget of
+    the use case's current run, if any.
+    """
+
+    pool: Any = None
+    coalesce: bool = True
+    resilience: Any = None
+    budget: Any = None
+    timeout: Optional[int] = REQUEST_TIMEOUT
+
+    def _request_key(self, prompt: str, stop: Optional[List[str]], images: Optional[List[str]],
+                     kwargs: Dict[str, Any]) -> str:
+        # The default params carry the model, format and sampling options, which all shape the response
+        return request_key(self._default_params, self.stop, prompt, stop, images, kwargs)
+
+    def _resilience(self) -> Resilience:
+        global _default_resilience
+        if self.resilience is not None:
+            return self.resilience
+        if _default_resilience is None:
+            _default_resilience = Resilience()
+        return _default_resilience
+
+    def _hosts(self, key: Optional[str]) -> HostSelector:
+        # Prompts sharing a prefix go to the host that already has the prefix's tokens cached
+        return HostSelector(self.pool, self.base_url, affinity=key if PREFIX_AFFINITY else None)
+
+    def _scheduler(self) -> LLMScheduler:
+        urls = [backend.url for backend in self.pool.backends] if self.pool is not None else [self.base_url]
+        return scheduler_for(urls)
+
+    def _create_generate_stream(self, prompt: str, stop: Optional[List[str]] = None,
+                                images: Optional[List[str]] = None, **kwargs: Any) -> Iterator[str]:
+        payload = {"prompt": prompt, "images": images}
+        key = prefix_key(self.model, prompt)
+
+        def open_stream():
+            # Coalesced followers share the leader's slot, since only the leader opens a stream
+            return self._scheduler().stream(lambda: resilient_stream(
+                lambda url: PREFIX_TRACKER.measure(url, key, lambda: _attach_response(self._create_stream(
+                    payload=payload, stop=stop, api_url=f"{url}/api/generate/", **kwargs))),
+                self._hosts(key), self._resilience(), self.model))
+
+        if not (self.coalesce and COALESCE_REQUESTS):
+            lines = open_stream()
+        else:
+            lines = COALESCER.stream(self._request_key(prompt, stop, images, kwargs), open_stream)
+        if self.budget is not None:
+            # Coalesced generations count against every run that reads them
+            lines = self.budget.meter(prompt, lines)
+        yield from lines
+
+    async def _acreate_generate_stream(self, prompt: str, stop: Optional[List[str]] = None,
+                                       images: Optional[List[str]] = None, **kwargs: Any) -> AsyncIterator[str]:
+        payload = {"prompt": prompt, "images": images}
+        key = prefix_key(self.model, prompt)
+
+        def open_stream():
+            return self._scheduler().astream(lambda: aresilient_stream(
+                lambda url: PREFIX_TRACKER.ameasure(url, key, lambda: self._acreate_stream(
+                    payload=payload, stop=stop, api_url=f"{url}/api/generate/", **kwargs)),
+                self._hosts(key), self._resilience(), self.model))
+
+        if not (self.coalesce and COALESCE_REQUESTS):
+            lines = open_stream()
+        else:
+            lines = COALESCER.astream(self._request_key(prompt, stop, images, kwargs), open_stream)
+        if self.budget is not None:
+            lines = self.budget.ameter(prompt, lines)
+        async for line in lines:
+            yield line
+
+
+def _attach_response(lines: Iterator[str]) -> Iterator[str]:
+    """Let the attempt reading lines close their HTTP response when it is cancelled, and return lines."""
+    # langchain streams requests' Response.iter_lines(), a generator that holds the response as self
+    frame = getattr(lines, "gi_frame", None)
+    response = frame.f_locals.get("self") if frame is not None else None
+    if callable(getattr(response, "close", None)):
+        attach_response(response)
+    return lines
+
+
+def create_llm(model_name: str, hosts: Optional[List[str]] = None):
+    """Create the Ollama LLM for a model.
+
+    Args:
+        model_name: Name of the Ollama model
+        hosts: Base URLs of the Ollama hosts, defaults to ollama_hosts()
+
+    Returns:
+        An Ollama LLM for a single host, or one routed over the shared pool of several hosts
+    """
+    hosts = hosts or ollama_hosts()
+    if len(hosts) == 1:
+        return Ollama(model=model_name, base_url=hosts[0])
+    pool = get_pool(hosts)
+    return Ollama(model=model_name, base_url=pool.backends[0].url, pool=pool)
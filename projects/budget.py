@@ -0,0 +1,279 @@
+"""Per-run token, call and wall-time budgets with usage reports.
+
+Every run of a use case (one crew kickoff, together with the LLM calls made
+while its tasks were set up) gets a RunBudget. The use case's LLMs meter
+each generation as it streams, and the crew reports every tool call, so a
+runaway agent loop is stopped while it runs: once a hard limit is passed
+BudgetExceeded is raised, which ends the generation in progress and the run.
+When usage reaches "warn_at" (a share of a limit) a warning is logged once
+per limit and recorded with the run.
+
+Limits default to BUDGET_DEFAULTS, overridden by the JSON object in
+CREW_AI_BUDGET and then by a use case's budget attribute; None removes a
+limit. Prompt tokens are estimated before a call so an oversized prompt is
+never sent, then replaced by the count Ollama reports, which leaves out
+prompt prefixes the host had cached. Finished runs are added to a usage
+report per use case.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BUDGET_DEFAULTS = {
+    # Prompt and output tokens of all generations of a run
+    "max_tokens": 200000,
+    "max_output_tokens": 50000,
+    "max_llm_calls": 150,
+    "max_tool_calls": 60,
+    "max_wall_seconds": 1800.0,
+    # Share of a limit at which a warning is logged
+    "warn_at": 0.8,
+}
+
+# Usage counters of a run and the limits they are checked against
+LIMITS = {
+    "tokens": "max_tokens",
+    "output_tokens": "max_output_tokens",
+    "llm_calls": "max_llm_calls",
+    "tool_calls": "max_tool_calls",
+    "wall_seconds": "max_wall_seconds",
+}
+
+# Characters per token of the prompt estimate
+CHARS_PER_TOKEN = 4
+
+_reports: Dict[str, "UsageReport"] = {}
+_reports_lock = threading.Lock()
+
+
+class BudgetExceeded(RuntimeError):
+    """Raised when a run passes one of its hard limits."""
+
+    def __init__(self, counter: str, used: float, limit: float):
+        super().__init__(f"Run budget exceeded: {counter} {used:g} > {limit:g}")
+        self.counter = counter
+        self.used = used
+        self.limit = limit
+
+
+def budget_settings(overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Merge BUDGET_DEFAULTS, CREW_AI_BUDGET and overrides into one settings dictionary."""
+    settings = dict(BUDGET_DEFAULTS)
+    configured = os.environ.get("CREW_AI_BUDGET")
+    for source in (json.loads(configured) if configured else {}, overrides or {}):
+        unknown = set(source) - set(BUDGET_DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown budget settings: {', '.join(sorted(unknown))}")
+        settings.update(source)
+    return settings
+
+
+def _final_counts(line: Optional[str]):
+    """Return Ollama's (prompt_eval_count, eval_count) from the final line of a response."""
+    try:
+        answer = json.loads(line)
+    except (TypeError, ValueError):
+        return None, None
+    if not isinstance(answer, dict) or not answer.get("done"):
+        return None, None
+    return answer.get("prompt_eval_count"), answer.get("eval_count")
+
+
+class UsageReport:
+    """Usage of the finished runs of one use case."""
+
+    def __init__(self):
+        self.runs = 0
+        self.terminated: Dict[str, int] = {}
+        self.warnings: Dict[str, int] = {}
+        self.totals = dict.fromkeys(LIMITS, 0)
+        self.peaks = dict.fromkeys(LIMITS, 0)
+        self._lock = threading.Lock()
+
+    def add(self, usage: Dict[str, Any]):
+        """Add the usage of a finished run."""
+        with self._lock:
+            self.runs += 1
+            for counter in LIMITS:
+                self.totals[counter] += usage[counter]
+                self.peaks[counter] = max(self.peaks[counter], usage[counter])
+            for counter in usage["warnings"]:
+                self.warnings[counter] = self.warnings.get(counter, 0) + 1
+            if usage["terminated"]:
+                self.terminated[usage["terminated"]] = self.terminated.get(usage["terminated"], 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return run counts with the mean and peak of every counter per run."""
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "terminated": dict(self.terminated),
+                "warnings": dict(self.warnings),
+                "mean": {counter: round(total / self.runs, 3) if self.runs else None
+                         for counter, total in self.totals.items()},
+                "peak": {counter: round(peak, 3) for counter, peak in self.peaks.items()},
+            }
+
+
+def usage_report(name: str) -> UsageReport:
+    """Return the process-wide usage report of a use case."""
+    with _reports_lock:
+        return _reports.setdefault(name, UsageReport())
+
+
+def usage_reports() -> Dict[str, Dict[str, Any]]:
+    """Return a snapshot of every use case's usage report."""
+    with _reports_lock:
+        reports = dict(_reports)
+    return {name: report.snapshot() for name, report in sorted(reports.items())}
+
+
+class RunBudget:
+    """Limits and usage of the current run of a use case."""
+
+    def __init__(self, name: str = "default", overrides: Optional[Dict[str, Any]] = None):
+        """Initialize the budget.
+
+        Args:
+            name: Name the usage is reported under, usually the use case class name
+            overrides: Settings overriding the defaults and CREW_AI_BUDGET
+        """
+        self.name = name
+        self.settings = budget_settings(overrides)
+        self._lock = threading.Lock()
+        self._reset()
+        self._started = time.monotonic()
+
+    def _reset(self):
+        self.usage = dict.fromkeys(LIMITS, 0)
+        self.usage.update(prompt_tokens=0, warnings=[], terminated=None)
+        self._started: Optional[float] = None
+        self._exceeded: Optional[BudgetExceeded] = None
+
+    def start(self):
+        """Start the run if nothing was metered since the last finished run.
+
+        Usage metered before, such as LLM calls made while the use case set up its
+        tasks, belongs to the run and is kept.
+        """
+        with self._lock:
+            if self._started is None:
+                self._started = time.monotonic()
+
+    def finish(self) -> Dict[str, Any]:
+        """End the run, add its usage to the use case's report and start counting the next run from zero.
+
+        Returns:
+            The run's usage
+        """
+        with self._lock:
+            self.usage["wall_seconds"] = round(time.monotonic() - (self._started or time.monotonic()), 3)
+            usage = dict(self.usage, warnings=list(self.usage["warnings"]))
+            self._reset()
+        usage_report(self.name).add(usage)
+        return usage
+
+    def _check(self):
+        """Raise BudgetExceeded past a hard limit and warn once per limit near it; holds the lock."""
+        usage = self.usage
+        if self._started is None:
+            self._started = time.monotonic()
+        usage["wall_seconds"] = round(time.monotonic() - self._started, 3)
+        for counter, setting in LIMITS.items():
+            limit = self.settings[setting]
+            if limit is None:
+                continue
+            if usage[counter] > limit:
+                usage["terminated"] = usage["terminated"] or counter
+                exceeded = BudgetExceeded(counter, usage[counter], limit)
+                self._exceeded = self._exceeded or exceeded
+                raise exceeded
+            warn_at = self.settings["warn_at"]
+            if warn_at is not None and usage[counter] >= limit * warn_at and counter not in usage["warnings"]:
+                usage["warnings"].append(counter)
+                logger.warning("%s run has used %g of its %g %s", self.name, usage[counter], limit, counter)
+
+    def raise_if_exceeded(self):
+        """Raise the first BudgetExceeded of the run again, wherever it was raised.
+
+        A limit passed on a thread of an asynchronous task only ends that thread,
+        so the run checks this once the crew is done.
+        """
+        with self._lock:
+            exceeded = self._exceeded
+        if exceeded is not None:
+            raise exceeded
+
+    def _add(self, **amounts: int):
+        with self._lock:
+            for counter, amount in amounts.items():
+                self.usage[counter] += amount
+            self._check()
+
+    def add_tool_call(self):
+        """Count a tool call of an agent."""
+        self._add(tool_calls=1)
+
+    def begin_call(self, prompt: str) -> int:
+        """Count a generation before it is sent and return its estimated prompt tokens."""
+        estimate = len(prompt) // CHARS_PER_TOKEN + 1
+        self._add(llm_calls=1, prompt_tokens=estimate, tokens=estimate)
+        return estimate
+
+    def end_call(self, estimate: int, counted: int, final_line: Optional[str]):
+        """Replace the estimates of a finished generation by the counts Ollama reported."""
+        prompt_tokens, output_tokens = _final_counts(final_line)
+        with self._lock:
+            if prompt_tokens is not None:
+                self.usage["prompt_tokens"] += prompt_tokens - estimate
+                self.usage["tokens"] += prompt_tokens - estimate
+            if output_tokens is not None:
+                self.usage["output_tokens"] += output_tokens - counted
+                self.usage["tokens"] += output_tokens - counted
+
+    def meter(self, prompt: str, lines: Iterator[str]) -> Iterator[str]:
+        """Pass the response lines of a generation through, counting one output token per line.
+
+        Raises:
+            BudgetExceeded: As soon as the run passes a limit, which ends the generation
+        """
+        estimate = self.begin_call(prompt)
+        counted, line = 0, None
+        for line in lines:
+            counted += 1
+            self._add(output_tokens=1, tokens=1)
+            yield line
+        self.end_call(estimate, counted, line)
+
+    async def ameter(self, prompt: str, lines: AsyncIterator[str]) -> AsyncIterator[str]:
+        """Asynchronous counterpart of meter()."""
+        estimate = self.begin_call(prompt)
+        counted, line = 0, None
+        async for line in lines:
+            counted += 1
+            self._add(output_tokens=1, tokens=1)
+            yield line
+        self.end_call(estimate, counted, line)
+
+
+def format_usage(reports: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Format usage reports as one line per use case."""
+    lines = []
+    for name, report in reports.items():
+        if not report["runs"]:
+            continue
+        mean = report["mean"]
+        line = (f"{name}: {report['runs']} runs, mean {mean['tokens']:.0f} tokens "
+                f"({mean['output_tokens']:.0f} output), {mean['llm_calls']:.1f} LLM calls, "
+                f"{mean['tool_calls']:.1f} tool calls, {mean['wall_seconds']:.1f}s")
+        if report["terminated"]:
+            line += ", stopped: " + ", ".join(f"{counter} x{count}"
+                                              for counter, count in sorted(report["terminated"].items()))
+        lines.append(line)
+    return lines
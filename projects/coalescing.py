@@ -0,0 +1,193 @@
+"""Single-flight coalescing of identical concurrent LLM requests.
+
+When several runs send the same prompt with the same model and options at
+the same time, only the first request (the leader) goes to Ollama. Every
+other caller (a follower) receives the leader's response lines as they
+arrive, replaying the lines already received, so streaming callers still
+stream and aggregating callers still get the full result. A leader error is
+raised in every follower. Requests that arrive after the response finished
+are sent again; caching finished responses is left to the callers' caches.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+from typing import Dict, Any, AsyncIterator, Callable, Iterator, List, Optional
+
+
+def request_key(*parts: Any) -> str:
+    """Hash everything that determines a response into a coalescing key."""
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SharedStream:
+    """Response lines of one upstream request, readable by any number of threads."""
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+        self._changed = threading.Condition()
+
+    def append(self, line: str):
+        with self._changed:
+            self.lines.append(line)
+            self._changed.notify_all()
+
+    def finish(self, error: Optional[BaseException] = None):
+        with self._changed:
+            self.done = True
+            self.error = error
+            self._changed.notify_all()
+
+    def follow(self) -> Iterator[str]:
+        """Yield every line from the first, waiting for new ones until the stream is done."""
+        index = 0
+        while True:
+            with self._changed:
+                self._changed.wait_for(lambda: index < len(self.lines) or self.done)
+                available = self.lines[index:]
+                done, error = self.done, self.error
+            for line in available:
+                yield line
+            index += len(available)
+            if done and index >= len(self.lines):
+                if error is not None:
+                    raise error
+                return
+
+
+class AsyncSharedStream:
+    """Response lines of one upstream request, readable by coroutines of one event loop."""
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+        self._changed = asyncio.Event()
+
+    def append(self, line: str):
+        self.lines.append(line)
+        self._signal()
+
+    def finish(self, error: Optional[BaseException] = None):
+        self.done = True
+        self.error = error
+        self._signal()
+
+    def _signal(self):
+        # Wake every waiting follower, then let later waits block until the next change
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def follow(self) -> AsyncIterator[str]:
+        """Asynchronous counterpart of SharedStream.follow()."""
+        index = 0
+        while True:
+            while index < len(self.lines):
+                yield self.lines[index]
+                index += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+
+class StreamCoalescer:
+    """Share one upstream stream between concurrent requests with the same key."""
+
+    def __init__(self):
+        self._inflight: Dict[str, SharedStream] = {}
+        self._ainflight: Dict[Any, AsyncSharedStream] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+
+    def stream(self, key: str, open_stream: Callable[[], Iterator[str]]) -> Iterator[str]:
+        """Stream a response, joining an identical request in flight if there is one.
+
+        Args:
+            key: Coalescing key, see request_key()
+            open_stream: Function sending the request and returning its response lines
+
+        Returns:
+            Iterator over the response lines
+        """
+        with self._lock:
+            shared = self._inflight.get(key)
+            leading = shared is None
+            if leading:
+                shared = self._inflight[key] = SharedStream()
+                self.leaders += 1
+            else:
+                shared.followers += 1
+                self.followers += 1
+        if not leading:
+            yield from shared.follow()
+            return
+
+        upstream = None
+        try:
+            upstream = open_stream()
+            for line in upstream:
+                shared.append(line)
+                yield line
+            self._release(key, shared)
+            shared.finish()
+        except GeneratorExit:
+            # The leader's caller stopped reading; finish the response for any followers first
+            if self._release(key, shared):
+                try:
+                    for line in upstream:
+                        shared.append(line)
+                    shared.finish()
+                except Exception as e:
+                    shared.finish(e)
+            else:
+                shared.finish(RuntimeError("The coalesced request was abandoned"))
+            raise
+        except BaseException as e:
+            self._release(key, shared)
+            shared.finish(e)
+            raise
+
+    def _release(self, key: str, shared: SharedStream) -> int:
+        """Stop new requests from joining a stream and return how many followers it has."""
+        with self._lock:
+            if self._inflight.get(key) is shared:
+                del self._inflight[key]
+            return shared.followers
+
+    async def astream(self, key: str, open_stream: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """Asynchronous counterpart of stream(); requests coalesce within one event loop."""
+        loop_key = (id(asyncio.get_running_loop()), key)
+        shared = self._ainflight.get(loop_key)
+        if shared is not None:
+            shared.followers += 1
+            self.followers += 1
+            async for line in shared.follow():
+                yield line
+            return
+
+        shared = self._ainflight[loop_key] = AsyncSharedStream()
+        self.leaders += 1
+        try:
+            async for line in open_stream():
+                shared.append(line)
+                yield line
+            shared.finish()
+        except BaseException as e:
+            shared.finish(e if isinstance(e, Exception) else RuntimeError("The coalesced request was abandoned"))
+            raise
+        finally:
+            if self._ainflight.get(loop_key) is shared:
+                del self._ainflight[loop_key]
+
+
+# Coalescer shared by every LLM of the process
+COALESCER = StreamCoalescer()
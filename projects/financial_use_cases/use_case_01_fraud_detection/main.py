@@ -13,6 +13,30 @@ from crewai import Agent, Task
 class FraudDetectionUseCase(UseCase):
     """Fraud Detection use case implementation."""
     
+    # Flagged cases feed case management systems, so the result is structured
+    output_schema = {
+        "type": "object",
+        "properties": {
+            "cases": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "transactions": {"type": "array", "items": {"type": ["string", "integer"]}},
+                        "pattern": {"type": "string"},
+                        "risk_level": {"enum": ["High", "Medium", "Low"]},
+                        "evidence": {"type": "string"},
+                        "recommended_action": {"type": "string"},
+                    },
+                    "required": ["pattern", "risk_level", "recommended_action"],
+                },
+            },
+            "overall_risk": {"enum": ["High", "Medium", "Low", "None"]},
+            "summary": {"type": "string"},
+        },
+        "required": ["cases", "overall_risk", "summary"],
+    }
+    
     def setup_agents(self):
         """Set up the specialist agents for the Fraud Detection use case."""
         
@@ -65,7 +89,7 @@ class FraudDetectionUseCase(UseCase):
         # Task 1: Detect Suspicious Patterns
         task_detect = Task(
             description=f"Analyze the following financial transactions for potential fraud: '{query}'. \n\n"
-                      f"Transaction Data: {transaction_data}\n\n"
+                      f"Transaction Data: {self.format_input(transaction_data)}\n\n"
                       f"Identify patterns that may indicate fraudulent activity such as unusual transaction amounts, "
                       f"suspicious timing, abnormal frequency, or unexpected geographical locations.",
             agent=self.fraud_analyst
@@ -91,25 +115,22 @@ class FraudDetectionUseCase(UseCase):
         
         # Add tasks to the list
         self.tasks = [task_detect, task_assess, task_investigate]
-    
-    def setup_crew(self):
-        self.crew = Crew(agents=self.agents, tasks=self.tasks)
 
 
-def run(input_data: Dict[str, Any]) -> str:
+def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
     """Run the Fraud Detection use case.
     
     Args:
         input_data (Dict[str, Any]): Input data containing transaction_data and optionally query.
         
     Returns:
-        str: The result of the use case execution.
+        Dict[str, Any]: The flagged cases, matching FraudDetectionUseCase.output_schema.
     """
     use_case = FraudDetectionUseCase()
     use_case.setup_agents()
     use_case.setup_tasks(input_data)
     use_case.setup_crew()
-    return use_case.crew.kickoff()
+    return use_case.kickoff()
 
 
 if __name__ == "__main__":
@@ -1,8 +1,7 @@
-"""Risk Management example using CrewAI with Ollama."""
+"""Risk Management example using CrewAI with Ollama."""
 
 import sys
 import os
-import json
 from typing import Dict, Any, Optional
 
 # Add the parent directory to sys.path to allow importing from projects
@@ -14,6 +13,28 @@ from projects.utils import UseCase
 class RiskManagementUseCase(UseCase):
     """Risk Management use case implementation."""
     
+    # Risk dashboards consume the stress test results directly, so the result is structured
+    output_schema = {
+        "type": "object",
+        "properties": {
+            "scenarios": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "scenario": {"type": "string"},
+                        "portfolio_impact": {"type": "string"},
+                        "severity": {"enum": ["High", "Medium", "Low"]},
+                    },
+                    "required": ["scenario", "portfolio_impact"],
+                },
+            },
+            "recommendations": {"type": "array", "items": {"type": "string"}},
+            "summary": {"type": "string"},
+        },
+        "required": ["scenarios", "recommendations", "summary"],
+    }
+    
     def setup_agents(self):
         """Set up agents for risk management."""
         self.risk_analyst = Agent(
@@ -64,7 +85,7 @@ class RiskManagementUseCase(UseCase):
         # Prepare portfolio data if provided
         portfolio_context = ""
         if input_data and "portfolio" in input_data:
-            portfolio_context = f"Use this portfolio data for analysis: {json.dumps(input_data['portfolio'])}"
+            portfolio_context = f"Use this portfolio data for analysis: {self.format_input(input_data['portfolio'])}"
         
         # Define tasks
         risk_analysis_task = Task(
@@ -96,14 +117,14 @@ class RiskManagementUseCase(UseCase):
 # Create instance for standalone usage
 risk_management = RiskManagementUseCase()
 
-def run(input_data: Optional[Dict[str, Any]] = None) -> str:
+def run(input_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Run the risk management use case.
     
     Args:
         input_data: Optional dictionary containing input data
         
     Returns:
-        The result of the risk management analysis
+        The result of the risk management analysis, matching RiskManagementUseCase.output_schema
     """
     # Create a new instance to ensure clean state
     use_case = RiskManagementUseCase()
@@ -112,7 +133,7 @@ def run(input_data: Optional[Dict[str, Any]] = None) -> str:
     use_case.setup_crew(Process.sequential)
     
     # Run the use case
-    result = use_case.crew.kickoff()
+    result = use_case.kickoff()
     return result
 
 if __name__ == "__main__":
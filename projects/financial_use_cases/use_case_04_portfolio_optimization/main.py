@@ -1,8 +1,7 @@
-"""Portfolio Optimization example using CrewAI with Ollama."""
+"""Portfolio Optimization example using CrewAI with Ollama."""
 
 import sys
 import os
-import json
 from typing import Dict, Any, Optional
 
 # Add the parent directory to sys.path to allow importing from projects
@@ -14,6 +13,38 @@ from projects.utils import UseCase
 class PortfolioOptimizationUseCase(UseCase):
     """Portfolio Optimization use case implementation."""
     
+    # Rebalancing tools consume the allocation directly, so the result is structured
+    output_schema = {
+        "type": "object",
+        "properties": {
+            "allocations": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "asset_class": {"type": "string"},
+                        "weight_percent": {"type": "number", "minimum": 0, "maximum": 100},
+                        "rationale": {"type": "string"},
+                    },
+                    "required": ["asset_class", "weight_percent"],
+                },
+            },
+            "actions": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "action": {"type": "string"},
+                        "timing": {"type": "string"},
+                    },
+                    "required": ["action"],
+                },
+            },
+            "summary": {"type": "string"},
+        },
+        "required": ["allocations", "actions", "summary"],
+    }
+    
     def setup_agents(self):
         """Set up agents for portfolio optimization."""
         self.market_analyst = Agent(
@@ -67,7 +98,7 @@ class PortfolioOptimizationUseCase(UseCase):
         # Prepare portfolio data if provided
         portfolio_context = ""
         if input_data and "portfolio" in input_data:
-            portfolio_context = f"Use this portfolio data for analysis: {json.dumps(input_data['portfolio'])}"
+            portfolio_context = f"Use this portfolio data for analysis: {self.format_input(input_data['portfolio'])}"
         
         # Define tasks
         market_analysis_task = Task(
@@ -105,14 +136,14 @@ class PortfolioOptimizationUseCase(UseCase):
 # Create instance for standalone usage
 portfolio_optimization = PortfolioOptimizationUseCase()
 
-def run(input_data: Optional[Dict[str, Any]] = None) -> str:
+def run(input_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Run the portfolio optimization use case.
     
     Args:
         input_data: Optional dictionary containing input data
         
     Returns:
-        The result of the portfolio optimization process
+        The result of the portfolio optimization process, matching PortfolioOptimizationUseCase.output_schema
     """
     # Create a new instance to ensure clean state
     use_case = PortfolioOptimizationUseCase()
@@ -121,7 +152,7 @@ def run(input_data: Optional[Dict[str, Any]] = None) -> str:
     use_case.setup_crew(Process.sequential)
     
     # Run the use case
-    result = use_case.crew.kickoff()
+    result = use_case.kickoff()
     return result
 
 if __name__ == "__main__":
@@ -1,8 +1,7 @@
-"""Bank Customer Service Chatbot example using CrewAI with Ollama."""
+"""Bank Customer Service Chatbot example using CrewAI with Ollama."""
 
 import sys
 import os
-import json
 from typing import Dict, Any, Optional
 
 # Add the parent directory to sys.path to allow importing from projects
@@ -14,6 +13,35 @@ from projects.utils import UseCase
 class BankChatbotUseCase(UseCase):
     """Bank Customer Service Chatbot use case implementation."""
     
+    # Chat front ends render the resources as links and buttons, so the result is structured
+    output_schema = {
+        "type": "object",
+        "properties": {
+            "resources": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "title": {"type": "string"},
+                        "description": {"type": "string"},
+                        "url": {"type": "string"},
+                    },
+                    "required": ["title"],
+                },
+            },
+            "suggestions": {"type": "array", "items": {"type": "string"}},
+            "summary": {"type": "string"},
+        },
+        "required": ["resources", "suggestions", "summary"],
+    }
+    
+    # Customers wait on the first answer, so general support can run on a small, fast model
+    agent_tiers = {"General Banking Support Specialist": "small"}
+    # A customer is waiting, so hedge slow answers early and give up sooner than batch use cases
+    resilience = {"deadline": 120.0, "first_token_timeout": 45.0, "hedge_percentile": 90.0}
+    # Answers are short; a run far beyond these is a loop, not a thorough answer
+    budget = {"max_output_tokens": 8000, "max_tool_calls": 15, "max_wall_seconds": 300.0}
+    
     def setup_agents(self):
         """Set up agents for bank customer service chatbot."""
         self.general_support_agent = Agent(
@@ -67,7 +95,7 @@ class BankChatbotUseCase(UseCase):
         # Prepare customer context if provided
         customer_context = ""
         if input_data and "customer_info" in input_data:
-            customer_context = f"Customer information: {json.dumps(input_data['customer_info'])}"
+            customer_context = f"Customer information: {self.format_input(input_data['customer_info'])}"
         
         # Define tasks
         query_categorization = Task(
@@ -108,14 +136,14 @@ class BankChatbotUseCase(UseCase):
 # Create instance for standalone usage
 bank_chatbot = BankChatbotUseCase()
 
-def run(input_data: Optional[Dict[str, Any]] = None) -> str:
+def run(input_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Run the bank chatbot use case.
     
     Args:
         input_data: Optional dictionary containing input data
         
     Returns:
-        The result of the bank chatbot process
+        The result of the bank chatbot process, matching BankChatbotUseCase.output_schema
     """
     # Create a new instance to ensure clean state
     use_case = BankChatbotUseCase()
@@ -124,7 +152,7 @@ def run(input_data: Optional[Dict[str, Any]] = None) -> str:
     use_case.setup_crew(Process.sequential)
     
     # Run the use case
-    result = use_case.crew.kickoff()
+    result = use_case.kickoff()
     return result
 
 if __name__ == "__main__":
@@ -1,8 +1,7 @@
-"""Compliance Monitoring example using CrewAI with Ollama."""
+"""Compliance Monitoring example using CrewAI with Ollama."""
 
 import sys
 import os
-import json
 from typing import Dict, Any, Optional
 
 # Add the parent directory to sys.path to allow importing from projects
@@ -14,6 +13,29 @@ from projects.utils import UseCase
 class ComplianceMonitoringUseCase(UseCase):
     """Compliance Monitoring use case implementation."""
     
+    # Recommendations are assigned and tracked by priority, so the result is structured
+    output_schema = {
+        "type": "object",
+        "properties": {
+            "risk_level": {"enum": ["High", "Medium", "Low"]},
+            "findings": {"type": "array", "items": {"type": "string"}},
+            "recommendations": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "recommendation": {"type": "string"},
+                        "priority": {"enum": ["High", "Medium", "Low"]},
+                        "regulation": {"type": "string"},
+                    },
+                    "required": ["recommendation", "priority"],
+                },
+            },
+            "summary": {"type": "string"},
+        },
+        "required": ["risk_level", "recommendations", "summary"],
+    }
+    
     def setup_agents(self):
         """Set up agents for compliance monitoring."""
         self.regulatory_expert = Agent(
@@ -69,7 +91,7 @@ class ComplianceMonitoringUseCase(UseCase):
         # Prepare transaction data if provided
         transaction_context = ""
         if input_data and "transactions" in input_data:
-            transaction_context = f"Review the following transaction data: {json.dumps(input_data['transactions'])}"
+            transaction_context = f"Review the following transaction data: {self.format_input(input_data['transactions'])}"
         
         # Define tasks
         regulatory_analysis_task = Task(
@@ -108,14 +130,14 @@ class ComplianceMonitoringUseCase(UseCase):
 # Create instance for standalone usage
 compliance_monitoring = ComplianceMonitoringUseCase()
 
-def run(input_data: Optional[Dict[str, Any]] = None) -> str:
+def run(input_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Run the compliance monitoring use case.
     
     Args:
         input_data: Optional dictionary containing input data
         
     Returns:
-        The result of the compliance monitoring process
+        The result of the compliance monitoring process, matching ComplianceMonitoringUseCase.output_schema
     """
     # Create a new instance to ensure clean state
     use_case = ComplianceMonitoringUseCase()
@@ -124,7 +146,7 @@ def run(input_data: Optional[Dict[str, Any]] = None) -> str:
     use_case.setup_crew(Process.sequential)
     
     # Run the use case
-    result = use_case.crew.kickoff()
+    result = use_case.kickoff()
     return result
 
 if __name__ == "__main__":
@@ -1,8 +1,7 @@
-"""Loan Default Prediction example using CrewAI with Ollama."""
+"""Loan Default Prediction example using CrewAI with Ollama."""
 
 import sys
 import os
-import json
 from typing import Dict, Any, Optional
 
 # Add the parent directory to sys.path to allow importing from projects
@@ -14,6 +13,40 @@ from projects.utils import UseCase
 class LoanDefaultPredictionUseCase(UseCase):
     """Loan Default Prediction use case implementation."""
     
+    # Lending systems consume the plan directly, so the result is structured
+    output_schema = {
+        "type": "object",
+        "properties": {
+            "risk_factors": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "factor": {"type": "string"},
+                        "impact": {"enum": ["High", "Medium", "Low"]},
+                        "evidence": {"type": "string"},
+                    },
+                    "required": ["factor", "impact"],
+                },
+            },
+            "risk_categories": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "category": {"type": "string"},
+                        "default_probability": {"type": "string"},
+                        "lending_strategy": {"type": "string"},
+                    },
+                    "required": ["category", "lending_strategy"],
+                },
+            },
+            "monitoring": {"type": "array", "items": {"type": "string"}},
+            "summary": {"type": "string"},
+        },
+        "required": ["risk_factors", "risk_categories", "summary"],
+    }
+    
     def setup_agents(self):
         """Set up agents for loan default prediction."""
         self.data_scientist = Agent(
@@ -70,7 +103,7 @@ class LoanDefaultPredictionUseCase(UseCase):
         # Prepare loan data if provided
         loan_data_context = ""
         if input_data and "loan_data" in input_data:
-            loan_data_context = f"Use the following loan data for analysis: {json.dumps(input_data['loan_data'])}"
+            loan_data_context = f"Use the following loan data for analysis: {self.format_input(input_data['loan_data'])}"
         
         # Define tasks
         data_analysis_task = Task(
@@ -108,14 +141,14 @@ class LoanDefaultPredictionUseCase(UseCase):
 # Create instance for standalone usage
 loan_default_prediction = LoanDefaultPredictionUseCase()
 
-def run(input_data: Optional[Dict[str, Any]] = None) -> str:
+def run(input_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Run the loan default prediction use case.
     
     Args:
         input_data: Optional dictionary containing input data
         
     Returns:
-        The result of the loan default prediction process
+        The implementation plan, matching LoanDefaultPredictionUseCase.output_schema
     """
     # Create a new instance to ensure clean state
     use_case = LoanDefaultPredictionUseCase()
@@ -124,7 +157,7 @@ def run(input_data: Optional[Dict[str, Any]] = None) -> str:
     use_case.setup_crew(Process.sequential)
     
     # Run the use case
-    result = use_case.crew.kickoff()
+    result = use_case.kickoff()
     return result
 
 if __name__ == "__main__":
@@ -1,8 +1,7 @@
-"""Insider Trading Detection example using CrewAI with Ollama."""
+"""Insider Trading Detection example using CrewAI with Ollama."""
 
 import sys
 import os
-import json
 from typing import Dict, Any, Optional
 
 # Add the parent directory to sys.path to allow importing from projects
@@ -14,6 +13,30 @@ from projects.utils import UseCase
 class InsiderTradingDetectionUseCase(UseCase):
     """Insider Trading Detection use case implementation."""
     
+    # Potential violations open investigation cases, so the result is structured
+    output_schema = {
+        "type": "object",
+        "properties": {
+            "violations": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "subject": {"type": "string"},
+                        "security": {"type": "string"},
+                        "description": {"type": "string"},
+                        "likelihood": {"enum": ["High", "Medium", "Low"]},
+                    },
+                    "required": ["description", "likelihood"],
+                },
+            },
+            "investigate": {"type": "boolean"},
+            "next_steps": {"type": "array", "items": {"type": "string"}},
+            "summary": {"type": "string"},
+        },
+        "required": ["violations", "investigate", "summary"],
+    }
+    
     def setup_agents(self):
         """Set up agents for insider trading detection."""
         self.market_analyst = Agent(
@@ -70,7 +93,7 @@ class InsiderTradingDetectionUseCase(UseCase):
         # Prepare trading data context if provided
         trading_context = ""
         if input_data and "trading_data" in input_data:
-            trading_context = f"Use the following trading data for analysis: {json.dumps(input_data['trading_data'])}"
+            trading_context = f"Use the following trading data for analysis: {self.format_input(input_data['trading_data'])}"
         
         # Define tasks
         trading_pattern_analysis_task = Task(
@@ -111,14 +134,14 @@ class InsiderTradingDetectionUseCase(UseCase):
 # Create instance for standalone usage
 insider_trading_detection = InsiderTradingDetectionUseCase()
 
-def run(input_data: Optional[Dict[str, Any]] = None) -> str:
+def run(input_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Run the insider trading detection use case.
     
     Args:
         input_data: Optional dictionary containing input data
         
     Returns:
-        The result of the insider trading detection process
+        The result of the insider trading detection process, matching InsiderTradingDetectionUseCase.output_schema
     """
     # Create a new instance to ensure clean state
     use_case = InsiderTradingDetectionUseCase()
@@ -127,7 +150,7 @@ def run(input_data: Optional[Dict[str, Any]] = None) -> str:
     use_case.setup_crew(Process.sequential)
     
     # Run the use case
-    result = use_case.crew.kickoff()
+    result = use_case.kickoff()
     return result
 
 if __name__ == "__main__":
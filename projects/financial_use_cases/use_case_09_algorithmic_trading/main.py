@@ -13,6 +13,26 @@ from crewai import Agent, Task
 class AlgorithmicTradingUseCase(UseCase):
     """Algorithmic Trading use case implementation."""
     
+    # Backtest metrics are compared across strategies, so the result is structured
+    output_schema = {
+        "type": "object",
+        "properties": {
+            "metrics": {
+                "type": "object",
+                "properties": {
+                    "sharpe_ratio": {"type": "number"},
+                    "max_drawdown_percent": {"type": "number"},
+                    "win_rate_percent": {"type": "number", "minimum": 0, "maximum": 100},
+                },
+            },
+            "risks": {"type": "array", "items": {"type": "string"}},
+            "optimizations": {"type": "array", "items": {"type": "string"}},
+            "implementation": {"type": "array", "items": {"type": "string"}},
+            "summary": {"type": "string"},
+        },
+        "required": ["metrics", "risks", "summary"],
+    }
+    
     def setup_agents(self):
         """Set up the specialist agents for the Algorithmic Trading use case."""
         
@@ -67,7 +87,7 @@ class AlgorithmicTradingUseCase(UseCase):
         # Market Research Task
         task_market_research = Task(
             description=f"Analyze current market conditions and identify potential trading opportunities for '{query}'. \n\n"
-                      f"Market Data: {market_data}\n\n"
+                      f"Market Data: {self.format_input(market_data)}\n\n"
                       f"Identify key patterns, trends, and market inefficiencies that could be exploited. "
                       f"Consider different timeframes and relevant market factors.",
             agent=self.market_analyst
@@ -101,20 +121,20 @@ class AlgorithmicTradingUseCase(UseCase):
         self.tasks = [task_market_research, task_strategy_development, task_backtesting]
 
 
-def run(input_data: Dict[str, Any]) -> str:
+def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
     """Run the Algorithmic Trading use case.
     
     Args:
         input_data (Dict[str, Any]): Input data containing query and optionally market_data.
         
     Returns:
-        str: The result of the use case execution.
+        Dict[str, Any]: The result of the use case execution, matching AlgorithmicTradingUseCase.output_schema.
     """
     use_case = AlgorithmicTradingUseCase()
     use_case.setup_agents()
     use_case.setup_tasks(input_data)
     use_case.setup_crew()
-    return use_case.crew.kickoff()
+    return use_case.kickoff()
     
 
 if __name__ == "__main__":
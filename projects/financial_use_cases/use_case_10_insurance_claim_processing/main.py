@@ -1,10 +1,16 @@
 
 """Insurance Claim Processing example using CrewAI with Ollama."""
 
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
 from crewai import Agent, Task, Crew
-from langchain.llms import Ollama
+from projects.backends import create_llm
 
-llm = Ollama(model="llama3", base_url="http://localhost:11434")
+llm = create_llm("llama3")
 
 agent = Agent(
     role="Insurance Claim Processing",
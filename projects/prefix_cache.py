@@ -0,0 +1,196 @@
+"""Prompt-prefix reuse and time-to-first-token measurement.
+
+Every prompt a crewAI agent sends starts with the same text: the role,
+backstory and goal, then the tool descriptions and output format, and only
+then the task ("Current Task: ..."). Ollama keeps the evaluated tokens of
+recent prompts and only evaluates the part of a new prompt after the longest
+prefix it has already seen, but only on the host that saw it. So the LLM
+layer gives every prompt a prefix key, the hash of the model and the text
+before the first PREFIX_MARKERS match, and the backend pool sends prompts
+with the same key to the same host while it is not overloaded. crewAI renders
+the prefix from the agents' static fields, so it stays byte-identical across
+calls as long as roles, backstories, goals and tool lists are not built from
+run-time data.
+
+Each request is measured: the time to its first response line, and the
+prompt tokens Ollama actually evaluated. Requests are counted as "reused" if
+their prefix was sent to the same host recently and as "fresh" otherwise, so
+report() compares time to first token with and without prefix reuse.
+OLLAMA_PREFIX_AFFINITY=0 turns the host affinity off.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, AsyncIterator, Callable, Iterator, List, Optional
+
+# Route prompts with the same prefix to the same host; OLLAMA_PREFIX_AFFINITY=0 turns it off
+PREFIX_AFFINITY = os.environ.get("OLLAMA_PREFIX_AFFINITY", "1") != "0"
+
+# Text that starts the per-call part of a prompt; everything before the first match is the stable prefix
+PREFIX_MARKERS = ("\nCurrent Task:",)
+
+# Seconds a host is assumed to keep a prefix cached after its last use
+PREFIX_TTL = 300.0
+
+# Prefixes remembered per process
+MAX_PREFIXES = 1024
+
+# Time-to-first-token samples kept per group
+MAX_SAMPLES = 500
+
+
+def stable_prefix(prompt: str) -> Optional[str]:
+    """Return the part of a prompt that is the same on every call of an agent, or None."""
+    positions = [prompt.find(marker) for marker in PREFIX_MARKERS]
+    positions = [position for position in positions if position > 0]
+    return prompt[:min(positions)] if positions else None
+
+
+def prefix_key(model: str, prompt: str) -> Optional[str]:
+    """Return the key of a prompt's stable prefix for a model, or None if it has none."""
+    prefix = stable_prefix(prompt)
+    if prefix is None:
+        return None
+    return hashlib.sha256(f"{model}\n{prefix}".encode("utf-8")).hexdigest()
+
+
+def _mean(values: List[float]) -> Optional[float]:
+    return round(sum(values) / len(values), 4) if values else None
+
+
+def _median(values: List[float]) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return round(ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2, 4)
+
+
+class PrefixTracker:
+    """Remember which host saw which prefix and measure time to first token per request."""
+
+    def __init__(self, ttl: float = PREFIX_TTL, max_prefixes: int = MAX_PREFIXES):
+        self.ttl = ttl
+        self.max_prefixes = max_prefixes
+        self._seen: "OrderedDict[Any, float]" = OrderedDict()
+        self._samples: Dict[str, Dict[str, List[float]]] = {
+            group: {"ttft": [], "prompt_tokens": []} for group in ("reused", "fresh")}
+        self._lock = threading.Lock()
+
+    def _use(self, url: str, key: str) -> bool:
+        """Mark a prefix as sent to a host and return whether the host had it cached."""
+        now = time.monotonic()
+        with self._lock:
+            last = self._seen.pop((url, key), None)
+            self._seen[(url, key)] = now
+            while len(self._seen) > self.max_prefixes:
+                self._seen.popitem(last=False)
+        return last is not None and now - last < self.ttl
+
+    def record(self, reused: bool, ttft: float, prompt_tokens: Optional[int] = None):
+        """Add a measured request to the reused or fresh group."""
+        samples = self._samples["reused" if reused else "fresh"]
+        with self._lock:
+            samples["ttft"].append(ttft)
+            del samples["ttft"][:-MAX_SAMPLES]
+            if prompt_tokens is not None:
+                samples["prompt_tokens"].append(prompt_tokens)
+                del samples["prompt_tokens"][:-MAX_SAMPLES]
+
+    def measure(self, url: str, key: Optional[str], open_stream: Callable[[], Iterator[str]]) -> Iterator[str]:
+        """Send a request to a host and pass its response lines through, measuring it once it completes.
+
+        Args:
+            url: Base URL of the host the request goes to
+            key: Prefix key of the prompt, or None to measure it as fresh
+            open_stream: Function sending the request and returning the lines of Ollama's generate API
+
+        Returns:
+            Iterator over the response lines
+        """
+        reused = key is not None and self._use(url, key)
+        start = time.perf_counter()
+        ttft = None
+        line = None
+        for line in open_stream():
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            yield line
+        if ttft is not None:
+            self.record(reused, ttft, _prompt_tokens(line))
+
+    async def ameasure(self, url: str, key: Optional[str],
+                       open_stream: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """Asynchronous counterpart of measure()."""
+        reused = key is not None and self._use(url, key)
+        start = time.perf_counter()
+        ttft = None
+        line = None
+        async for line in open_stream():
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            yield line
+        if ttft is not None:
+            self.record(reused, ttft, _prompt_tokens(line))
+
+    def report(self) -> Dict[str, Any]:
+        """Compare time to first token and evaluated prompt tokens of reused and fresh prefixes.
+
+        Returns:
+            Per group the request count, mean and median time to first token in seconds and
+            mean evaluated prompt tokens, plus the speedup of the median from reuse
+        """
+        with self._lock:
+            groups = {group: {name: list(values) for name, values in samples.items()}
+                      for group, samples in self._samples.items()}
+        report = {group: {"requests": len(samples["ttft"]), "ttft_mean": _mean(samples["ttft"]),
+                          "ttft_median": _median(samples["ttft"]),
+                          "prompt_tokens_mean": _mean(samples["prompt_tokens"])}
+                  for group, samples in groups.items()}
+        reused, fresh = report["reused"]["ttft_median"], report["fresh"]["ttft_median"]
+        report["speedup"] = round(fresh / reused, 2) if reused and fresh else None
+        return report
+
+    def reset(self):
+        """Forget the seen prefixes and the measurements."""
+        with self._lock:
+            self._seen.clear()
+            for samples in self._samples.values():
+                for values in samples.values():
+                    values.clear()
+
+
+def _prompt_tokens(line: Optional[str]) -> Optional[int]:
+    """Return the prompt tokens Ollama evaluated, from the final line of a response."""
+    try:
+        answer = json.loads(line)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(answer, dict) or not answer.get("done"):
+        return None
+    # Tokens of a cached prefix are not evaluated again, so this drops when the prefix is reused
+    return answer.get("prompt_eval_count")
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Format a prefix reuse report as one line per group."""
+    lines = []
+    for group in ("reused", "fresh"):
+        stats = report[group]
+        if not stats["requests"]:
+            continue
+        tokens = stats["prompt_tokens_mean"]
+        lines.append(f"{group}: {stats['requests']} requests, time to first token median "
+                     f"{stats['ttft_median']:.2f}s, mean {stats['ttft_mean']:.2f}s"
+                     + (f", {tokens:.0f} prompt tokens evaluated" if tokens is not None else ""))
+    if report.get("speedup"):
+        lines.append(f"speedup from prefix reuse: {report['speedup']:.2f}x")
+    return "\n".join(lines)
+
+
+# Tracker shared by every LLM of the process
+PREFIX_TRACKER = PrefixTracker()
@@ -0,0 +1,488 @@
+"""Local BM25 corpus index for the literature review use case.
+
+The index lives in a single directory and is built from immutable segments.
+Each call to ``commit()`` flushes the documents added since the last commit
+into a new segment, so a personal library can grow incrementally without
+re-indexing everything. Documents read again from a library file that changed
+replace their earlier version, whose postings are skipped at query time and
+dropped by ``merge()``. Postings are stored as packed ``uint32`` pairs and
+read through ``mmap`` at query time, which keeps memory usage flat for large
+corpora while still answering queries in milliseconds.
+
+Directory layout::
+
+    manifest.json       segment list and corpus statistics
+    docs.jsonl          one JSON record per document (metadata, abstract, text)
+    docs.idx            uint64 byte offsets into docs.jsonl, one per document
+    docs.ids            JSON document id per line, so ids load without parsing docs.jsonl
+    deleted.bin         uint32 numbers of documents replaced by a newer version
+    sources.txt         signature (path, size, mtime) of every library file already indexed
+    doclens.bin         uint32 token length per document
+    seg_0000.lex.json   term -> [postings offset, document frequency]
+    seg_0000.post       packed (doc number, term frequency) uint32 pairs
+"""
+
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+from array import array
+from collections import Counter, defaultdict
+from typing import Dict, Any, Callable, List, Optional, Iterable
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the "
+    "this to was were will with we our their these those which using based".split()
+)
+
+# Fields indexed for every document; the title is counted twice as a cheap boost.
+INDEXED_FIELDS = ("title", "title", "abstract", "text")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase index terms.
+
+    Args:
+        text: Raw text to tokenize
+
+    Returns:
+        List of terms with stopwords and single characters removed
+    """
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+class _Segment:
+    """A committed, read-only segment of the index."""
+
+    def __init__(self, directory: str, name: str):
+        self.name = name
+        with open(os.path.join(directory, f"{name}.lex.json"), "r", encoding="utf-8") as f:
+            self.lexicon = json.load(f)
+        self._file = open(os.path.join(directory, f"{name}.post"), "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._postings = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+    def document_frequency(self, term: str) -> int:
+        entry = self.lexicon.get(term)
+        return entry[1] if entry else 0
+
+    def postings(self, term: str) -> array:
+        """Return the flat (doc number, term frequency) array for a term."""
+        entry = self.lexicon.get(term)
+        result = array("I")
+        if entry and self._postings is not None:
+            offset, count = entry
+            result.frombytes(self._postings[offset:offset + count * 2 * result.itemsize])
+        return result
+
+    def close(self):
+        if self._postings is not None:
+            self._postings.close()
+        self._file.close()
+
+
+class CorpusIndex:
+    """Incremental on-disk BM25 index over a local library of papers."""
+
+    def __init__(self, directory: str, k1: float = 1.2, b: float = 0.75):
+        """Open (or create) an index directory.
+
+        Args:
+            directory: Directory holding the index files
+            k1: BM25 term frequency saturation parameter
+            b: BM25 document length normalisation parameter
+        """
+        self.directory = os.path.expanduser(directory)
+        self.k1 = k1
+        self.b = b
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.manifest = self._read_manifest()
+        self.segments = [_Segment(self.directory, name) for name in self.manifest["segments"]]
+
+        self.doc_lengths = array("I")
+        self.doc_offsets = array("Q")
+        self._load_array(self.doc_lengths, "doclens.bin")
+        self._load_array(self.doc_offsets, "docs.idx")
+        self.deleted = set(self._read_array("deleted.bin", "I"))
+        self._doc_ids: Optional[Dict[str, int]] = None
+        self._sources = None
+        self._source_paths = None
+        # Ordered like a list, with constant-time membership tests
+        self._pending_sources: Dict[str, None] = {}
+        self._pending_deletions: List[int] = []
+
+        self._pending_docs: List[Dict[str, Any]] = []
+        self._pending_postings: Dict[str, List[int]] = defaultdict(list)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        path = self._path("manifest.json")
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {"segments": [], "doc_count": 0, "total_length": 0, "next_segment": 0}
+
+    def _write_manifest(self):
+        tmp_path = self._path("manifest.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self._path("manifest.json"))
+
+    def _read_array(self, name: str, typecode: str) -> array:
+        values = array(typecode)
+        path = self._path(name)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                values.frombytes(f.read())
+        return values
+
+    def _load_array(self, target: array, name: str):
+        path = self._path(name)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                target.frombytes(f.read())
+        # Drop entries past the last committed document (e.g. after a crash mid-commit)
+        del target[self.manifest["doc_count"]:]
+
+    @property
+    def doc_count(self) -> int:
+        """Number of committed documents."""
+        return self.manifest["doc_count"]
+
+    def __len__(self) -> int:
+        return self.doc_count - len(self.deleted)
+
+    def _known_ids(self) -> Dict[str, int]:
+        """Map every indexed document id to the number of its current version."""
+        if self._doc_ids is None:
+            path = self._path("docs.ids")
+            ids = []
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    ids = [json.loads(line) for line in f]
+            if len(ids) != self.doc_count:
+                # Indexes written before the sidecar existed, or a torn commit: rebuild it once
+                ids = ids[:self.doc_count] if len(ids) > self.doc_count else [
+                    doc["id"] for doc in self._iter_records()]
+                with open(path, "w", encoding="utf-8") as f:
+                    f.writelines(json.dumps(doc_id) + "\n" for doc_id in ids)
+            # A replaced document's id appears again later, so its newest number wins
+            self._doc_ids = {doc_id: number for number, doc_id in enumerate(ids)}
+        return self._doc_ids
+
+    def _known_sources(self) -> set:
+        if self._sources is None:
+            path = self._path("sources.txt")
+            self._sources = set()
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    self._sources = {line.rstrip("\n") for line in f if line.strip()}
+        return self._sources
+
+    def _known_source_paths(self) -> set:
+        if self._source_paths is None:
+            self._source_paths = {signature.rsplit("|", 2)[0] for signature in self._known_sources()}
+        return self._source_paths
+
+    def has_source(self, signature: str) -> bool:
+        """Whether the library file with this signature (see file_signature) is already indexed."""
+        return signature in self._known_sources() or signature in self._pending_sources
+
+    def add(self, document: Dict[str, Any]) -> bool:
+        """Queue a document for indexing.
+
+        Args:
+            document: Paper record with an ``id`` and any of ``title``, ``authors``,
+                ``year``, ``abstract`` and ``text``
+
+        Returns:
+            True if the document was queued, False if its id is already indexed. Documents
+            read from a library file that changed since it was indexed (their ``_source``
+            names an indexed path with another signature) replace their earlier version.
+        """
+        document = dict(document)
+        source = document.pop("_source", None)
+        if source and source not in self._pending_sources and source not in self._known_sources():
+            self._pending_sources[source] = None
+        doc_id = str(document.get("id") or document.get("title") or "")
+        if not doc_id:
+            raise ValueError("Documents need an 'id' or a 'title'")
+        known = self._known_ids()
+        previous = known.get(doc_id)
+        if previous is not None:
+            changed_file = (source is not None and source not in self._known_sources()
+                            and source.rsplit("|", 2)[0] in self._known_source_paths())
+            if not changed_file or previous >= self.doc_count or previous in self._pending_deletions:
+                return False
+            self._pending_deletions.append(previous)
+
+        record = dict(document, id=doc_id)
+        terms = tokenize(" ".join(str(record.get(field) or "") for field in INDEXED_FIELDS))
+        doc_number = self.doc_count + len(self._pending_docs)
+        known[doc_id] = doc_number
+        for term, frequency in Counter(terms).items():
+            self._pending_postings[term].extend((doc_number, frequency))
+        record["_length"] = len(terms)
+        self._pending_docs.append(record)
+        return True
+
+    def add_many(self, documents: Iterable[Dict[str, Any]]) -> int:
+        """Queue several documents and return how many were new."""
+        return sum(1 for document in documents if self.add(document))
+
+    def commit(self) -> Optional[str]:
+        """Flush pending documents into a new segment.
+
+        Returns:
+            The name of the new segment, or None if nothing was pending
+        """
+        if not self._pending_docs:
+            self._commit_sources()
+            return None
+
+        name = f"seg_{self.manifest['next_segment']:04d}"
+        lexicon = {}
+        postings = array("I")
+        for term in sorted(self._pending_postings):
+            values = self._pending_postings[term]
+            lexicon[term] = [len(postings) * postings.itemsize, len(values) // 2]
+            postings.extend(values)
+
+        with open(self._path(f"{name}.post"), "wb") as f:
+            postings.tofile(f)
+        with open(self._path(f"{name}.lex.json"), "w", encoding="utf-8") as f:
+            json.dump(lexicon, f)
+
+        lengths = array("I")
+        offsets = array("Q")
+        self._known_ids()
+        with open(self._path("docs.ids"), "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(record["id"]) + "\n" for record in self._pending_docs)
+        with open(self._path("docs.jsonl"), "ab") as f:
+            position = f.tell()
+            for record in self._pending_docs:
+                lengths.append(record.pop("_length"))
+                offsets.append(position)
+                line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+                f.write(line)
+                position += len(line)
+        for filename, values in (("doclens.bin", lengths), ("docs.idx", offsets)):
+            with open(self._path(filename), "r+b" if os.path.exists(self._path(filename)) else "wb") as f:
+                # Truncate to the committed size first so a torn earlier commit cannot misalign
+                f.truncate(self.doc_count * values.itemsize)
+                f.seek(0, os.SEEK_END)
+                values.tofile(f)
+        if self._pending_deletions:
+            # Written before the manifest; if the commit is torn the changed files are read and replaced again
+            with open(self._path("deleted.bin"), "ab") as f:
+                array("I", self._pending_deletions).tofile(f)
+
+        self.doc_lengths.extend(lengths)
+        self.doc_offsets.extend(offsets)
+        self.manifest["segments"].append(name)
+        self.manifest["doc_count"] += len(self._pending_docs)
+        self.manifest["total_length"] += sum(lengths) - sum(self.doc_lengths[number]
+                                                            for number in self._pending_deletions)
+        self.manifest["next_segment"] += 1
+        self._write_manifest()
+        self.segments.append(_Segment(self.directory, name))
+
+        self.deleted.update(self._pending_deletions)
+        self._pending_deletions = []
+        self._pending_docs = []
+        self._pending_postings = defaultdict(list)
+        self._commit_sources()
+        return name
+
+    def _commit_sources(self):
+        # Written after the manifest, so a crash only means the files are read again next time
+        if not self._pending_sources:
+            return
+        with open(self._path("sources.txt"), "a", encoding="utf-8") as f:
+            f.writelines(source + "\n" for source in self._pending_sources)
+        self._known_sources().update(self._pending_sources)
+        self._known_source_paths().update(source.rsplit("|", 2)[0] for source in self._pending_sources)
+        self._pending_sources = {}
+
+    def merge(self):
+        """Merge all segments into one to keep query fan-out low, dropping postings of replaced documents."""
+        if len(self.segments) < 2 and not self.deleted:
+            return
+        merged: Dict[str, array] = defaultdict(lambda: array("I"))
+        for segment in self.segments:
+            for term in segment.lexicon:
+                postings = segment.postings(term)
+                for i in range(0, len(postings), 2):
+                    if postings[i] not in self.deleted:
+                        merged[term].extend(postings[i:i + 2])
+
+        name = f"seg_{self.manifest['next_segment']:04d}"
+        lexicon = {}
+        postings = array("I")
+        for term in sorted(merged):
+            lexicon[term] = [len(postings) * postings.itemsize, len(merged[term]) // 2]
+            postings.extend(merged[term])
+        with open(self._path(f"{name}.post"), "wb") as f:
+            postings.tofile(f)
+        with open(self._path(f"{name}.lex.json"), "w", encoding="utf-8") as f:
+            json.dump(lexicon, f)
+
+        old_segments = self.segments
+        self.manifest["segments"] = [name]
+        self.manifest["next_segment"] += 1
+        self._write_manifest()
+        self.segments = [_Segment(self.directory, name)]
+        for segment in old_segments:
+            segment.close()
+            for suffix in (".lex.json", ".post"):
+                os.remove(self._path(segment.name + suffix))
+
+    def get_document(self, doc_number: int) -> Dict[str, Any]:
+        """Load a committed document by its internal number."""
+        with open(self._path("docs.jsonl"), "rb") as f:
+            f.seek(self.doc_offsets[doc_number])
+            return json.loads(f.readline().decode("utf-8"))
+
+    def iter_documents(self) -> Iterable[Dict[str, Any]]:
+        """Iterate over all committed documents in insertion order, without replaced versions."""
+        for number, record in enumerate(self._iter_records()):
+            if number not in self.deleted:
+                yield record
+
+    def _iter_records(self) -> Iterable[Dict[str, Any]]:
+        path = self._path("docs.jsonl")
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            for _ in range(self.doc_count):
+                yield json.loads(f.readline().decode("utf-8"))
+
+    def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """Rank committed documents against a query with BM25.
+
+        Args:
+            query: Free-text query
+            top_k: Number of documents to return
+
+        Returns:
+            Document records ordered by descending score, each with a ``score`` key
+        """
+        terms = set(tokenize(query))
+        if not terms or not self.doc_count:
+            return []
+
+        n_docs = len(self) or 1
+        avg_length = self.manifest["total_length"] / n_docs or 1.0
+        lengths = self.doc_lengths
+        k1, b = self.k1, self.b
+        deleted = self.deleted
+        scores: Dict[int, float] = defaultdict(float)
+
+        for term in terms:
+            df = sum(segment.document_frequency(term) for segment in self.segments)
+            if not df:
+                continue
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for segment in self.segments:
+                postings = segment.postings(term)
+                for i in range(0, len(postings), 2):
+                    doc_number, tf = postings[i], postings[i + 1]
+                    if doc_number in deleted:
+                        continue
+                    norm = k1 * (1 - b + b * lengths[doc_number] / avg_length)
+                    scores[doc_number] += idf * tf * (k1 + 1) / (tf + norm)
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        results = []
+        for doc_number, score in best:
+            document = self.get_document(doc_number)
+            document["score"] = round(score, 4)
+            results.append(document)
+        return results
+
+    def close(self):
+        """Release memory maps held by the segments."""
+        for segment in self.segments:
+            segment.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def file_signature(path: str) -> str:
+    """Identify a library file by its path, size and modification time."""
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+
+def load_documents(path: str, skip: Optional[Callable[[str], bool]] = None) -> Iterable[Dict[str, Any]]:
+    """Yield paper records from a library directory.
+
+    Supports ``.json``/``.jsonl`` files of paper records, plain ``.txt``/``.md``
+    files (the first line is used as the title) and ``.pdf`` files when the
+    optional ``pypdf`` package is installed. Every record carries the
+    ``_source`` signature of its file, which ``CorpusIndex.add`` records.
+
+    Args:
+        path: Directory (searched recursively) or single file
+        skip: Called with the signature of each file before it is read; files
+            it returns True for are not read, e.g. ``CorpusIndex.has_source``
+
+    Returns:
+        Iterator over paper records
+    """
+    path = os.path.expanduser(path)
+    if os.path.isdir(path):
+        for root, _, files in os.walk(path):
+            for name in sorted(files):
+                yield from load_documents(os.path.join(root, name), skip)
+        return
+
+    signature = file_signature(path)
+    if skip is not None and skip(signature):
+        return
+    for record in _read_documents(path):
+        yield dict(record, _source=signature)
+
+
+def _read_documents(path: str) -> Iterable[Dict[str, Any]]:
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".jsonl":
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif extension == ".json":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        yield from (data if isinstance(data, list) else [data])
+    elif extension in (".txt", ".md"):
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            text = f.read()
+        title = text.strip().split("\n", 1)[0].lstrip("# ").strip()
+        yield {"id": path, "title": title, "text": text, "path": path}
+    elif extension == ".pdf":
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            return
+        try:
+            reader = PdfReader(path)
+            text = "\n".join(page.extract_text() or "" for page in reader.pages)
+        except Exception:
+            return
+        title = (reader.metadata.title if reader.metadata else None) or os.path.basename(path)
+        yield {"id": path, "title": title, "text": text, "path": path}
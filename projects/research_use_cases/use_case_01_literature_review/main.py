@@ -1,26 +1,155 @@
 """Literature Review example using CrewAI with Ollama."""
 
-from crewai import Agent, Task, Crew
-from langchain.llms import Ollama
+import sys
+import os
+import json
+from typing import Dict, Any, List, Optional
 
-llm = Ollama(model="llama3", base_url="http://localhost:11434")
+# Add the parent directory to sys.path to allow importing from projects
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
 
-agent = Agent(
-    role="Literature Review",
-    goal="Summarize relevant academic papers.",
-    backstory="Agent for Literature Review.",
-    allow_delegation=False,
-    llm=llm,
-)
+from crewai import Agent, Task, Crew, Process
+from projects.utils import UseCase
+from projects.research_use_cases.use_case_01_literature_review.corpus_index import CorpusIndex, load_documents
 
-task = Task(
-    description="Summarize relevant academic papers.",
-    expected_output="Result of the task.",
-    agent=agent,
-)
+# Characters of full text passed to the agents for each retrieved paper
+MAX_EXCERPT_CHARS = 1500
 
-crew = Crew(agents=[agent], tasks=[task])
+class LiteratureReviewUseCase(UseCase):
+    """Literature Review use case implementation."""
+    
+    # Reviews are merged and compared across topics, so the result is structured
+    output_schema = {
+        "type": "object",
+        "properties": {
+            "current_research": {"type": "string"},
+            "methodologies": {"type": "array", "items": {"type": "string"}},
+            "key_findings": {"type": "array", "items": {"type": "string"}},
+            "gaps": {"type": "array", "items": {"type": "string"}},
+            "future_directions": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["current_research", "key_findings", "gaps"],
+    }
+
+    def setup_agents(self):
+        """Set up agents for literature review."""
+        self.researcher = Agent(
+            role="Research Analyst",
+            goal="Find and analyze relevant academic papers",
+            backstory="You are an expert researcher with experience in analyzing academic literature. "
+                      "You can quickly identify key studies, understand their methodologies, and extract important findings.",
+            allow_delegation=False,
+            llm=self.llm,
+            tools=self.tools,
+            verbose=True
+        )
+
+        self.synthesizer = Agent(
+            role="Information Synthesizer",
+            goal="Synthesize research findings into a cohesive literature review",
+            backstory="You are skilled at integrating diverse research findings into comprehensive literature reviews. "
+                     "You identify patterns, contradictions, and gaps in the current research.",
+            allow_delegation=False,
+            llm=self.llm,
+            tools=self.tools,
+            verbose=True
+        )
+
+        # Add agents to the list
+        self.agents = [self.researcher, self.synthesizer]
+
+    def retrieve_papers(self, input_data: Dict[str, Any], topic: str) -> List[Dict[str, Any]]:
+        """Retrieve the top-k papers for the topic from a local corpus index.
+
+        Args:
+            input_data: Input data with ``corpus_path`` and optionally ``papers_path`` and ``top_k``
+            topic: Query used to rank the corpus
+
+        Returns:
+            Retrieved paper records, best match first
+        """
+        corpus_path = input_data.get("corpus_path")
+        if not corpus_path:
+            return []
+
+        with CorpusIndex(corpus_path) as index:
+            # Index any new papers from the library before searching; unchanged files are not read again
+            if input_data.get("papers_path"):
+                index.add_many(load_documents(input_data["papers_path"], skip=index.has_source))
+                index.commit()
+            return index.search(topic, top_k=int(input_data.get("top_k", 5)))
+
+    def setup_tasks(self, input_data: Optional[Dict[str, Any]] = None):
+        """Set up tasks for literature review.
+
+        Args:
+            input_data: Optional dictionary containing input data
+        """
+        # Process input data if provided
+        topic = input_data.get("query", "artificial intelligence advances") if input_data else "artificial intelligence advances"
+        papers = self.retrieve_papers(input_data, topic) if input_data else []
+
+        # Define tasks
+        if papers:
+            paper_context = json.dumps([
+                {
+                    "title": paper.get("title"),
+                    "authors": paper.get("authors"),
+                    "year": paper.get("year"),
+                    "abstract": paper.get("abstract"),
+                    "excerpt": (paper.get("text") or "")[:MAX_EXCERPT_CHARS],
+                }
+                for paper in papers
+            ])
+            research_task = Task(
+                description=f"Summarize the following {len(papers)} papers retrieved from the local library for '{topic}', "
+                           f"noting their authors, publication date, key findings, and methodologies. "
+                           f"Only use the papers provided.\nPapers: {paper_context}",
+                expected_output="A detailed list of the retrieved papers with summaries of their findings and methodologies.",
+                agent=self.researcher,
+            )
+        else:
+            research_task = Task(
+                description=f"Research and identify key academic papers on '{topic}'. Find at least 5 relevant papers, "
+                           f"noting their authors, publication date, key findings, and methodologies.",
+                expected_output="A detailed list of relevant academic papers with summaries of their findings and methodologies.",
+                agent=self.researcher,
+            )
+
+        synthesis_task = Task(
+            description=f"Create a comprehensive literature review on '{topic}' based on the research findings. "
+                      f"Synthesize the key themes, identify research gaps, and suggest future research directions.",
+            expected_output="A structured literature review with sections on current research, methodologies, findings, gaps, and future directions.",
+            agent=self.synthesizer,
+            context=[research_task]
+        )
+
+        # Add tasks to the list
+        self.tasks = [research_task, synthesis_task]
+
+# Create instance for standalone usage
+literature_review = LiteratureReviewUseCase()
+
+def run(input_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Run the literature review use case.
+
+    Args:
+        input_data: Optional dictionary containing input data. Provide ``corpus_path``
+            (and optionally ``papers_path`` and ``top_k``) to review papers from a local library.
+
+    Returns:
+        The result of the literature review analysis, matching LiteratureReviewUseCase.output_schema
+    """
+    # Create a new instance to ensure clean state
+    use_case = LiteratureReviewUseCase()
+    use_case.setup_agents()
+    use_case.setup_tasks(input_data)
+    use_case.setup_crew(Process.sequential)
+
+    # Run the use case
+    result = use_case.kickoff()
+    return result
 
 if __name__ == "__main__":
-    result = crew.kickoff()
+    result = run()
     print(result)
@@ -1,4 +1,4 @@
-"""Experiment Design example using CrewAI with Ollama."""
+"""Experiment Design example using CrewAI with Ollama."""
 
 import sys
 import os
@@ -9,11 +9,50 @@ from typing import Dict, Any, Optional
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
 
 from crewai import Agent, Task, Crew, Process
+from langchain.tools import Tool
 from projects.utils import UseCase
+from projects.research_use_cases.use_case_02_experiment_design.power import run_power_tool
 
 class ExperimentDesignUseCase(UseCase):
     """Experiment Design use case implementation."""
     
+    # Ethics concerns are checked off before approval, so the result is structured
+    output_schema = {
+        "type": "object",
+        "properties": {
+            "concerns": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "concern": {"type": "string"},
+                        "severity": {"enum": ["High", "Medium", "Low"]},
+                        "safeguard": {"type": "string"},
+                    },
+                    "required": ["concern", "safeguard"],
+                },
+            },
+            "ready_for_review": {"type": "boolean"},
+            "summary": {"type": "string"},
+        },
+        "required": ["concerns", "ready_for_review", "summary"],
+    }
+    
+    def _init_power_tool(self):
+        """Initialize the power and sample-size calculator tool."""
+        return Tool(
+            name="power_calculator",
+            func=run_power_tool,
+            description="Approximate statistical power and sample-size calculations (normal and Cornish-Fisher "
+                        "approximations, or simulation). Input is a JSON object. "
+                        "Analytic: {\"calculation\": \"power\" or \"sample_size\", \"test\": \"two_sample_t\" | "
+                        "\"paired_t\" | \"one_sample_t\" | \"two_proportions\" | \"correlation\", plus effect_size, "
+                        "n_per_group or n, p1/p2, r, alpha, power}. Any parameter may be a list to sweep all combinations. "
+                        "Simulation for complex designs: {\"calculation\": \"simulate\", \"design\": \"two_sample\" | "
+                        "\"paired\" | \"anova\" | \"cluster\", \"n\": size per group or clusters per arm, \"effect\": "
+                        "effect size or list of group means, plus correlation, icc or cluster_size}."
+        )
+    
     def setup_agents(self):
         """Set up agents for experiment design."""
         self.research_methodologist = Agent(
@@ -35,7 +74,7 @@ class ExperimentDesignUseCase(UseCase):
                      "to ensure experiments have sufficient power and validity.",
             allow_delegation=False,
             llm=self.llm,
-            tools=self.tools,
+            tools=self.tools + [self._init_power_tool()],
             verbose=True
         )
         
@@ -74,7 +113,9 @@ class ExperimentDesignUseCase(UseCase):
         statistical_task = Task(
             description="Develop a statistical analysis plan based on the proposed methodology. "
                        "Include sample size calculation with power analysis, appropriate statistical tests, "
-                       "effect size estimations, and handling of potential missing data or outliers.",
+                       "effect size estimations, and handling of potential missing data or outliers. "
+                       "Use the power_calculator tool for every sample size and power figure, sweep plausible "
+                       "effect sizes, and report the exact numbers it returns.",
             expected_output="A comprehensive statistical analysis plan with power calculations and justifications for statistical approaches.",
             agent=self.statistical_analyst,
             context=[methodology_task]
@@ -95,14 +136,14 @@ class ExperimentDesignUseCase(UseCase):
 # Create instance for standalone usage
 experiment_design = ExperimentDesignUseCase()
 
-def run(input_data: Optional[Dict[str, Any]] = None) -> str:
+def run(input_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Run the experiment design use case.
     
     Args:
         input_data: Optional dictionary containing input data
         
     Returns:
-        The result of the experiment design process
+        The result of the experiment design process, matching ExperimentDesignUseCase.output_schema
     """
     # Create a new instance to ensure clean state
     use_case = ExperimentDesignUseCase()
@@ -111,7 +152,7 @@ def run(input_data: Optional[Dict[str, Any]] = None) -> str:
     use_case.setup_crew(Process.sequential)
     
     # Run the use case
-    result = use_case.crew.kickoff()
+    result = use_case.kickoff()
     return result
 
 if __name__ == "__main__":
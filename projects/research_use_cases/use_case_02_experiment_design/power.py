@@ -0,0 +1,387 @@
+"""Statistical power and sample-size calculations for the Experiment Design use case.
+
+Two engines are provided:
+
+- Analytic formulas for common tests (two-sample and paired t-tests, two
+  proportions, correlations). They use a normal approximation to the
+  noncentral t distribution with small-sample corrections, so they need only
+  the standard library and sweep thousands of scenarios in milliseconds.
+- Simulation-based power for designs without a convenient closed form
+  (one-way ANOVA, cluster-randomized trials, paired designs with a given
+  pre/post correlation). Simulations are generated in NumPy batches and the
+  batches are spread over a process pool. The critical value is taken from
+  simulations of the same design under the null hypothesis, so no
+  distribution tables are needed.
+
+``run_power_tool`` exposes both engines to agents through a JSON interface.
+"""
+
+import itertools
+import json
+import math
+from concurrent.futures import Executor, ProcessPoolExecutor
+from statistics import NormalDist
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+_NORMAL = NormalDist()
+
+# Simulations generated per NumPy batch (one process pool task)
+SIMULATION_BATCH = 1000
+
+MAX_SAMPLE_SIZE = 10 ** 7
+
+
+def _z(p: float) -> float:
+    return _NORMAL.inv_cdf(p)
+
+
+def t_quantile(p: float, df: float) -> float:
+    """Approximate quantile of Student's t distribution (Cornish-Fisher expansion)."""
+    if math.isinf(df):
+        return _z(p)
+    z = _z(p)
+    g1 = (z ** 3 + z) / 4
+    g2 = (5 * z ** 5 + 16 * z ** 3 + 3 * z) / 96
+    g3 = (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / 384
+    g4 = (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / 92160
+    return z + g1 / df + g2 / df ** 2 + g3 / df ** 3 + g4 / df ** 4
+
+
+def _noncentral_t_sf(critical: float, ncp: float, df: float) -> float:
+    """Approximate P(T > critical) for a noncentral t with the given noncentrality."""
+    if math.isinf(df):
+        return 1 - _NORMAL.cdf(critical - ncp)
+    return _NORMAL.cdf((ncp - critical * (1 - 1 / (4 * df))) / math.sqrt(1 + critical ** 2 / (2 * df)))
+
+
+def _t_power(ncp: float, df: float, alpha: float, alternative: str) -> float:
+    if alternative == "two-sided":
+        critical = t_quantile(1 - alpha / 2, df)
+        return _noncentral_t_sf(critical, ncp, df) + _noncentral_t_sf(critical, -ncp, df)
+    critical = t_quantile(1 - alpha, df)
+    return _noncentral_t_sf(critical, ncp if alternative == "larger" else -ncp, df)
+
+
+def _z_power(shift: float, alpha: float, alternative: str) -> float:
+    if alternative == "two-sided":
+        critical = _z(1 - alpha / 2)
+        return 1 - _NORMAL.cdf(critical - shift) + _NORMAL.cdf(-critical - shift)
+    critical = _z(1 - alpha)
+    return 1 - _NORMAL.cdf(critical - (shift if alternative == "larger" else -shift))
+
+
+def power_two_sample_t(effect_size: float, n_per_group: int, alpha: float = 0.05,
+                       ratio: float = 1.0, alternative: str = "two-sided") -> float:
+    """Power of a two-sample t-test.
+
+    Args:
+        effect_size: Standardized mean difference (Cohen's d)
+        n_per_group: Size of the first group
+        alpha: Significance level
+        ratio: Size of the second group relative to the first
+        alternative: "two-sided", "larger" or "smaller"
+
+    Returns:
+        Power between 0 and 1
+    """
+    n1, n2 = n_per_group, n_per_group * ratio
+    ncp = effect_size * math.sqrt(n1 * n2 / (n1 + n2))
+    return _t_power(ncp, n1 + n2 - 2, alpha, alternative)
+
+
+def power_paired_t(effect_size: float, n: int, alpha: float = 0.05, alternative: str = "two-sided") -> float:
+    """Power of a paired or one-sample t-test.
+
+    Args:
+        effect_size: Mean difference divided by the standard deviation of the differences
+        n: Number of pairs
+        alpha: Significance level
+        alternative: "two-sided", "larger" or "smaller"
+
+    Returns:
+        Power between 0 and 1
+    """
+    return _t_power(effect_size * math.sqrt(n), n - 1, alpha, alternative)
+
+
+def power_two_proportions(p1: float, p2: float, n_per_group: int, alpha: float = 0.05,
+                          alternative: str = "two-sided") -> float:
+    """Power of a two-sample test of proportions (normal approximation with pooled variance)."""
+    pooled = (p1 + p2) / 2
+    null_sd = math.sqrt(2 * pooled * (1 - pooled) / n_per_group)
+    alt_sd = math.sqrt((p1 * (1 - p1) + p2 * (1 - p2)) / n_per_group)
+    if alternative == "two-sided":
+        critical = _z(1 - alpha / 2) * null_sd
+        difference = abs(p2 - p1)
+        return _NORMAL.cdf((difference - critical) / alt_sd) + _NORMAL.cdf((-difference - critical) / alt_sd)
+    difference = (p2 - p1) if alternative == "larger" else (p1 - p2)
+    return _NORMAL.cdf((difference - _z(1 - alpha) * null_sd) / alt_sd)
+
+
+def power_correlation(r: float, n: int, alpha: float = 0.05, alternative: str = "two-sided") -> float:
+    """Power of a test that a Pearson correlation is zero (Fisher z transformation)."""
+    return _z_power(math.atanh(r) * math.sqrt(n - 3), alpha, alternative)
+
+
+def _smallest_n(power_at: Callable[[int], float], target: float, minimum: int) -> int:
+    """Find the smallest n with power_at(n) >= target by exponential then binary search."""
+    low, high = minimum, minimum
+    while power_at(high) < target:
+        low, high = high, high * 2
+        if high > MAX_SAMPLE_SIZE:
+            raise ValueError("Required sample size exceeds the supported maximum; is the effect size zero?")
+    while low < high:
+        middle = (low + high) // 2
+        if power_at(middle) >= target:
+            high = middle
+        else:
+            low = middle + 1
+    return high
+
+
+# Analytic tests: (power function, name of the sample size argument, smallest valid sample size)
+TESTS: Dict[str, Tuple[Callable[..., float], str, int]] = {
+    "two_sample_t": (power_two_sample_t, "n_per_group", 2),
+    "paired_t": (power_paired_t, "n", 2),
+    "one_sample_t": (power_paired_t, "n", 2),
+    "two_proportions": (power_two_proportions, "n_per_group", 2),
+    "correlation": (power_correlation, "n", 4),
+}
+
+
+def _check_parameters(test: str, params: Dict[str, Any]):
+    """Reject parameters for which a test's formulas are undefined."""
+    if test not in TESTS:
+        raise ValueError(f"Unknown test '{test}'. Available: {', '.join(TESTS)}")
+    _, size_argument, minimum = TESTS[test]
+    if params.get(size_argument) is not None and params[size_argument] < minimum:
+        raise ValueError(f"{size_argument} must be at least {minimum} for {test}")
+    if params.get("ratio") is not None and params["ratio"] <= 0:
+        raise ValueError("ratio must be positive")
+    for name in ("p1", "p2"):
+        if params.get(name) is not None and not 0 < params[name] < 1:
+            raise ValueError(f"{name} must be strictly between 0 and 1")
+    if params.get("r") is not None and not -1 < params["r"] < 1:
+        raise ValueError("r must be strictly between -1 and 1")
+
+
+def power(test: str, **params: Any) -> float:
+    """Compute the power of an analytic test.
+
+    Args:
+        test: One of TESTS
+        **params: Arguments of the test's power function
+
+    Returns:
+        Power between 0 and 1
+    """
+    _check_parameters(test, params)
+    return TESTS[test][0](**params)
+
+
+def sample_size(test: str, power: float = 0.8, **params: Any) -> int:
+    """Compute the smallest sample size that reaches the target power.
+
+    Args:
+        test: One of TESTS
+        power: Target power
+        **params: Arguments of the test's power function except the sample size
+
+    Returns:
+        Sample size (per group for two-group tests)
+    """
+    _check_parameters(test, params)
+    function, size_argument, minimum = TESTS[test]
+    return _smallest_n(lambda n: function(**{size_argument: n}, **params), power, minimum)
+
+
+def sweep(calculation: str, test: str, **params: Any) -> List[Dict[str, Any]]:
+    """Evaluate power or sample size over every combination of list-valued parameters.
+
+    Args:
+        calculation: "power" or "sample_size"
+        test: One of TESTS
+        **params: Parameters; lists are swept, scalars are held fixed
+
+    Returns:
+        One row per combination with the parameters and the result
+    """
+    names = list(params)
+    grids = [value if isinstance(value, (list, tuple)) else [value] for value in params.values()]
+    rows = []
+    for values in itertools.product(*grids):
+        combination = dict(zip(names, values))
+        if calculation == "power":
+            result = {"power": round(power(test, **combination), 4)}
+        elif calculation == "sample_size":
+            result = {TESTS[test][1]: sample_size(test, **combination)}
+        else:
+            raise ValueError("calculation must be 'power' or 'sample_size'")
+        rows.append(dict(combination, **result))
+    return rows
+
+
+def _statistics(design: str, n: int, effect, rng, sims: int, **params: Any):
+    """Simulate a batch of experiments and return the test statistic of each."""
+    import numpy as np
+
+    if design == "two_sample":
+        ratio = params.get("ratio", 1.0)
+        a = rng.standard_normal((sims, n))
+        b = rng.standard_normal((sims, int(round(n * ratio)))) + effect
+        standard_error = np.sqrt(a.var(axis=1, ddof=1) / a.shape[1] + b.var(axis=1, ddof=1) / b.shape[1])
+        return np.abs(b.mean(axis=1) - a.mean(axis=1)) / standard_error
+
+    if design == "paired":
+        rho = params.get("correlation", 0.5)
+        before = rng.standard_normal((sims, n))
+        after = rho * before + math.sqrt(1 - rho ** 2) * rng.standard_normal((sims, n)) + effect
+        difference = after - before
+        return np.abs(difference.mean(axis=1)) / (difference.std(axis=1, ddof=1) / math.sqrt(n))
+
+    if design == "anova":
+        # effect is the list of standardized group means
+        means = np.asarray(effect if isinstance(effect, (list, tuple)) else [0.0, effect], dtype=float)
+        groups = rng.standard_normal((sims, len(means), n)) + means[None, :, None]
+        group_means = groups.mean(axis=2)
+        grand_mean = group_means.mean(axis=1, keepdims=True)
+        between = n * ((group_means - grand_mean) ** 2).sum(axis=1) / (len(means) - 1)
+        within = groups.var(axis=2, ddof=1).mean(axis=1)
+        return between / within
+
+    if design == "cluster":
+        # n is the number of clusters per arm; analysis is a t-test on cluster means
+        icc = params.get("icc", 0.05)
+        cluster_size = params.get("cluster_size", 20)
+        cluster_sd = math.sqrt(icc)
+        individual_sd = math.sqrt((1 - icc) / cluster_size)
+
+        def arm_means(shift):
+            return (shift + cluster_sd * rng.standard_normal((sims, n))
+                    + individual_sd * rng.standard_normal((sims, n)))
+
+        a, b = arm_means(0.0), arm_means(effect)
+        standard_error = np.sqrt((a.var(axis=1, ddof=1) + b.var(axis=1, ddof=1)) / n)
+        return np.abs(b.mean(axis=1) - a.mean(axis=1)) / standard_error
+
+    raise ValueError(f"Unknown design '{design}'. Available: two_sample, paired, anova, cluster")
+
+
+def _check_simulation(design: str, n: int, effect, simulations: int, alpha: float, params: Dict[str, Any]):
+    """Reject simulations whose test statistic is undefined, instead of estimating a power of 0."""
+    if design not in ("two_sample", "paired", "anova", "cluster"):
+        raise ValueError(f"Unknown design '{design}'. Available: two_sample, paired, anova, cluster")
+    if n < 2:
+        raise ValueError(f"n must be at least 2 for {design}")
+    if simulations < 1:
+        raise ValueError("simulations must be at least 1")
+    if not 0 < alpha < 1:
+        raise ValueError("alpha must be strictly between 0 and 1")
+    if design == "two_sample" and round(n * params.get("ratio", 1.0)) < 2:
+        raise ValueError("ratio must leave at least 2 subjects in the second group")
+    if design == "paired" and not -1 < params.get("correlation", 0.5) < 1:
+        raise ValueError("correlation must be strictly between -1 and 1")
+    if design == "anova" and isinstance(effect, (list, tuple)) and len(effect) < 2:
+        raise ValueError("anova needs the means of at least 2 groups")
+    if design == "cluster" and (not 0 <= params.get("icc", 0.05) <= 1 or params.get("cluster_size", 20) < 1):
+        raise ValueError("icc must be between 0 and 1 and cluster_size at least 1")
+
+
+def _simulate_batch(args: Tuple[str, int, Any, int, Any, Dict[str, Any]]):
+    """Simulate one batch under the null and the alternative (process pool task)."""
+    import numpy as np
+
+    design, n, effect, sims, seed, params = args
+    rng = np.random.default_rng(seed)
+    null_effect = [0.0] * len(effect) if isinstance(effect, (list, tuple)) else 0.0
+    return (_statistics(design, n, null_effect, rng, sims, **params),
+            _statistics(design, n, effect, rng, sims, **params))
+
+
+def simulate_power(design: str, n: int, effect, simulations: int = 4000, alpha: float = 0.05,
+                   seed: int = 0, workers: Optional[int] = None, executor: Optional[Executor] = None,
+                   **params: Any) -> Dict[str, Any]:
+    """Estimate power by Monte Carlo simulation.
+
+    Requires NumPy. Batches of SIMULATION_BATCH simulations run in parallel on a
+    process pool when there is more than one batch and workers is not 1.
+
+    Args:
+        design: "two_sample", "paired", "anova" or "cluster"
+        n: Sample size per group (clusters per arm for "cluster")
+        effect: Standardized effect size, or the list of group means for "anova"
+        simulations: Number of simulated experiments
+        alpha: Significance level
+        seed: Random seed; results are reproducible for a given seed and batch size
+        workers: Number of worker processes (None for one per CPU)
+        executor: Process pool to run the batches on, e.g. one shared by several calls;
+            a pool is created for the call if it is not given
+        **params: Design parameters such as ratio, correlation, icc or cluster_size
+
+    Returns:
+        Dictionary with the estimated power, its Monte Carlo standard error and the simulation count
+    """
+    _check_simulation(design, n, effect, simulations, alpha, params)
+    import numpy as np
+
+    seeds = np.random.SeedSequence(seed).spawn(math.ceil(simulations / SIMULATION_BATCH))
+    tasks = [
+        (design, n, effect, min(SIMULATION_BATCH, simulations - i * SIMULATION_BATCH), child, params)
+        for i, child in enumerate(seeds)
+    ]
+    if len(tasks) > 1 and workers != 1 and executor is not None:
+        batches = list(executor.map(_simulate_batch, tasks))
+    elif len(tasks) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            batches = list(executor.map(_simulate_batch, tasks))
+    else:
+        batches = [_simulate_batch(task) for task in tasks]
+
+    null = np.concatenate([batch[0] for batch in batches])
+    alternative = np.concatenate([batch[1] for batch in batches])
+    critical = np.quantile(null, 1 - alpha)
+    estimate = float((alternative > critical).mean())
+    return {
+        "design": design,
+        "n": n,
+        "power": round(estimate, 4),
+        "standard_error": round(math.sqrt(estimate * (1 - estimate) / len(alternative)), 4),
+        "simulations": int(len(alternative)),
+    }
+
+
+def run_power_tool(query: str) -> str:
+    """Run a power calculation described as JSON and return the result as JSON.
+
+    Examples of queries:
+        {"calculation": "sample_size", "test": "two_sample_t", "effect_size": [0.2, 0.5, 0.8], "power": 0.8}
+        {"calculation": "power", "test": "two_proportions", "p1": 0.1, "p2": 0.15, "n_per_group": [500, 1000]}
+        {"calculation": "simulate", "design": "cluster", "n": 15, "effect": 0.3, "icc": 0.05, "cluster_size": 20}
+
+    Args:
+        query: JSON object with a "calculation" of "power", "sample_size" or "simulate"
+
+    Returns:
+        JSON results, or an error message the agent can act on
+    """
+    try:
+        request = json.loads(query)
+        calculation = request.pop("calculation", "power")
+        if calculation == "simulate":
+            design = request.pop("design")
+            sizes = request.pop("n")
+            sizes = sizes if isinstance(sizes, list) else [sizes]
+            if len(sizes) > 1 and request.get("workers") != 1 and request.get("simulations", 4000) > SIMULATION_BATCH:
+                # One pool serves every size, instead of starting worker processes per size
+                with ProcessPoolExecutor(max_workers=request.get("workers")) as executor:
+                    results = [simulate_power(design, n, executor=executor, **request) for n in sizes]
+            else:
+                results = [simulate_power(design, n, **request) for n in sizes]
+        else:
+            results = sweep(calculation, request.pop("test"), **request)
+        return json.dumps(results)
+    except ImportError:
+        return "Error: simulation-based power requires NumPy; use the analytic 'power' or 'sample_size' calculations."
+    except (KeyError, TypeError, ValueError, ArithmeticError) as e:
+        return (f"Error: {e}. Send a JSON object with 'calculation' ('power', 'sample_size' or 'simulate') "
+                f"and 'test' ({', '.join(TESTS)}) or 'design' (two_sample, paired, anova, cluster).")
@@ -1,19 +1,48 @@
-"""Data Analysis example using CrewAI with Ollama."""
+"""Data Analysis example using CrewAI with Ollama."""
 
 import sys
 import os
 import json
-from typing import Dict, Any, Optional
+from itertools import islice
+from typing import Dict, Any, List, Optional
 
 # Add the parent directory to sys.path to allow importing from projects
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
 
 from crewai import Agent, Task, Crew, Process
 from projects.utils import UseCase
+from projects.research_use_cases.use_case_03_data_analysis.profiling import (
+    is_profilable, iter_chunks, profile_dataset
+)
+
+# Number of example rows shown to the agents next to the profile
+SAMPLE_ROWS = 5
 
 class DataAnalysisUseCase(UseCase):
     """Data Analysis use case implementation."""
     
+    # Each visualization is rendered separately, so the result is structured
+    output_schema = {
+        "type": "object",
+        "properties": {
+            "visualizations": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "title": {"type": "string"},
+                        "chart_type": {"type": "string"},
+                        "variables": {"type": "array", "items": {"type": "string"}},
+                        "caption": {"type": "string"},
+                    },
+                    "required": ["title", "chart_type", "caption"],
+                },
+            },
+            "summary": {"type": "string"},
+        },
+        "required": ["visualizations", "summary"],
+    }
+    
     def setup_agents(self):
         """Set up agents for data analysis."""
         self.data_engineer = Agent(
@@ -64,15 +93,31 @@ class DataAnalysisUseCase(UseCase):
         # Process input data if provided
         analysis_query = input_data.get("query", "Analyze customer purchase patterns and identify market segments") if input_data else "Analyze customer purchase patterns and identify market segments"
         
-        # Prepare dataset context if provided
+        # Profile the dataset in one streaming pass; agents get the compact profile instead of raw rows
         dataset_context = ""
+        self.dataset_profile = None
         if input_data and "dataset" in input_data:
-            dataset_context = f"Use this dataset for analysis: {json.dumps(input_data['dataset'])}"
+            dataset = input_data["dataset"]
+            if is_profilable(dataset):
+                self.dataset_profile = profile_dataset(dataset)
+                columns = self.dataset_profile["columns"]
+                rows = [{name: value for name, value in row.items() if name in columns}
+                        for row in self._sample_rows(dataset)]
+                dataset_context = (f"Use this dataset profile for analysis: {json.dumps(self.dataset_profile)}\n"
+                                   f"Example rows: {json.dumps(rows, default=str)}")
+                omitted = self.dataset_profile.get("columns_omitted", 0)
+                if omitted:
+                    dataset_context += (f"\nOnly the first {len(columns)} columns were profiled; "
+                                        f"{omitted} more columns are not shown.")
+            else:
+                # Descriptions and other free-form datasets are passed through as given
+                dataset_context = f"Use this dataset for analysis: {self.format_input(dataset)}"
         
         # Define tasks
         data_preparation_task = Task(
             description=f"Prepare the dataset for analysis related to '{analysis_query}'. {dataset_context}\n"
-                       f"Clean the data by handling missing values, outliers, and inconsistencies. "
+                       f"Clean the data by handling missing values, outliers, and inconsistencies; use the column statistics, "
+                       f"missingness and quantiles in the profile (when provided) to decide how. "
                        f"Perform necessary transformations like normalization, encoding categorical variables, "
                        f"and feature engineering. Provide a summary of the preprocessing steps and the resulting dataset.",
             expected_output="A report on data preprocessing steps performed, with summary statistics of the prepared dataset.",
@@ -100,18 +145,27 @@ class DataAnalysisUseCase(UseCase):
         
         # Add tasks to the list
         self.tasks = [data_preparation_task, data_analysis_task, visualization_task]
+    
+    def _sample_rows(self, dataset: Any) -> List[Dict[str, Any]]:
+        """Return the first few rows of a dataset given as a file path, row list or column dict."""
+        if isinstance(dataset, str):
+            return next(iter_chunks(os.path.expanduser(dataset), SAMPLE_ROWS), [])
+        if isinstance(dataset, dict):
+            names = list(dataset)
+            return [dict(zip(names, values)) for values in islice(zip(*(dataset[name] for name in names)), SAMPLE_ROWS)]
+        return list(dataset[:SAMPLE_ROWS])
 
 # Create instance for standalone usage
 data_analysis = DataAnalysisUseCase()
 
-def run(input_data: Optional[Dict[str, Any]] = None) -> str:
+def run(input_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Run the data analysis use case.
     
     Args:
         input_data: Optional dictionary containing input data
         
     Returns:
-        The result of the data analysis process
+        The result of the data analysis process, matching DataAnalysisUseCase.output_schema
     """
     # Create a new instance to ensure clean state
     use_case = DataAnalysisUseCase()
@@ -120,7 +174,7 @@ def run(input_data: Optional[Dict[str, Any]] = None) -> str:
     use_case.setup_crew(Process.sequential)
     
     # Run the use case
-    result = use_case.crew.kickoff()
+    result = use_case.kickoff()
     return result
 
 if __name__ == "__main__":
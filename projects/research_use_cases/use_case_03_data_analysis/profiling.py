@@ -0,0 +1,594 @@
+"""Streaming dataset profiling for the Data Analysis use case.
+
+Large CSV and Parquet files are read in chunks and folded into one-pass,
+mergeable accumulators, so memory stays bounded regardless of file size:
+
+- ``RunningStats``: count, mean, variance, min and max (Welford / Chan et al.)
+- ``TDigest``: quantiles and histograms
+- ``HyperLogLog``: distinct counts
+- ``FrequentItems``: most common values (Misra-Gries)
+- ``CoMoments``: pairwise Pearson correlations between numeric columns
+
+Profiles of several chunks or files combine with ``merge``. Finished profiles
+are cached by file fingerprint, so re-running an analysis on an unchanged file
+does not read it again.
+"""
+
+import csv
+import hashlib
+import math
+import os
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Set, Union
+
+from projects.utils import DiskCache, content_hash, file_fingerprint
+
+# Bumped whenever the profile format changes so stale cached profiles are not reused
+PROFILE_VERSION = 2
+
+# Rows read per chunk when streaming files
+CHUNK_ROWS = 50000
+
+# Values treated as missing in text data
+MISSING_VALUES = frozenset({"", "na", "n/a", "nan", "null", "none", "-", "?"})
+
+# Share of non-missing values that must parse as numbers for a column to be numeric
+NUMERIC_THRESHOLD = 0.95
+
+# Correlations are computed between at most this many numeric columns (pairs grow quadratically)
+MAX_CORRELATION_COLUMNS = 12
+
+# Columns profiled at most, in order of appearance; every profiled column adds statistics, quantiles
+# and a histogram to the prompt, so later columns are only counted
+MAX_PROFILED_COLUMNS = 50
+
+HISTOGRAM_BINS = 10
+TOP_VALUES = 5
+
+
+class RunningStats:
+    """Mean and variance with Welford's algorithm, mergeable with Chan's formula."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "RunningStats"):
+        if not other.count:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.mean += delta * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+
+class TDigest:
+    """Merging t-digest for approximate quantiles over a stream."""
+
+    def __init__(self, compression: int = 100):
+        """Initialize the digest.
+
+        Args:
+            compression: Accuracy parameter; roughly the number of centroids kept
+        """
+        self.compression = compression
+        self.centroids: List[List[float]] = []
+        self._buffer: List[float] = []
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        self._buffer.append(value)
+        if len(self._buffer) >= 10 * self.compression:
+            self._compress()
+
+    def merge(self, other: "TDigest"):
+        self.centroids.extend([mean, weight] for mean, weight in other.centroids)
+        self._buffer.extend(other._buffer)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    @property
+    def count(self) -> float:
+        return sum(weight for _, weight in self.centroids) + len(self._buffer)
+
+    def _compress(self):
+        if not self._buffer and len(self.centroids) <= self.compression:
+            return
+        if self._buffer:
+            self.min = min(self.min, min(self._buffer))
+            self.max = max(self.max, max(self._buffer))
+        points = sorted(self.centroids + [[value, 1.0] for value in self._buffer])
+        self._buffer = []
+        total = sum(weight for _, weight in points)
+
+        # Centroids near the tails stay small, so extreme quantiles remain accurate
+        merged = [list(points[0])]
+        cumulative = 0.0
+        for mean, weight in points[1:]:
+            current = merged[-1]
+            proposed = current[1] + weight
+            q = (cumulative + proposed / 2) / total
+            if proposed <= max(1.0, 4 * total * q * (1 - q) / self.compression):
+                current[0] += (mean - current[0]) * weight / proposed
+                current[1] = proposed
+            else:
+                cumulative += current[1]
+                merged.append([mean, weight])
+        self.centroids = merged
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Return the approximate value at quantile q (0 to 1)."""
+        self._compress()
+        if not self.centroids:
+            return None
+        if len(self.centroids) == 1:
+            return self.centroids[0][0]
+        total = sum(weight for _, weight in self.centroids)
+        target = q * total
+
+        # Interpolate between centroid centres, anchored at min and max
+        previous_position, previous_value = 0.0, self.min
+        cumulative = 0.0
+        for mean, weight in self.centroids:
+            position = cumulative + weight / 2
+            if target <= position:
+                span = position - previous_position
+                fraction = (target - previous_position) / span if span else 0.0
+                return previous_value + fraction * (mean - previous_value)
+            previous_position, previous_value = position, mean
+            cumulative += weight
+        span = total - previous_position
+        fraction = (target - previous_position) / span if span else 1.0
+        return previous_value + fraction * (self.max - previous_value)
+
+    def cdf(self, value: float) -> float:
+        """Return the approximate fraction of values less than or equal to value."""
+        self._compress()
+        if not self.centroids or value < self.min:
+            return 0.0
+        if value >= self.max:
+            return 1.0
+        total = sum(weight for _, weight in self.centroids)
+        previous_position, previous_value = 0.0, self.min
+        cumulative = 0.0
+        for mean, weight in self.centroids:
+            position = cumulative + weight / 2
+            if value < mean:
+                span = mean - previous_value
+                fraction = (value - previous_value) / span if span else 1.0
+                return (previous_position + fraction * (position - previous_position)) / total
+            previous_position, previous_value = position, mean
+            cumulative += weight
+        span = self.max - previous_value
+        fraction = (value - previous_value) / span if span else 1.0
+        return (previous_position + fraction * (total - previous_position)) / total
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter; exact while the number of distinct values is small."""
+
+    def __init__(self, precision: int = 12, exact_limit: int = 1024):
+        """Initialize the counter.
+
+        Args:
+            precision: Number of index bits; 2**precision registers (about 1.6% error at 12)
+            exact_limit: Distinct values tracked exactly before switching to the sketch estimate
+        """
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+        self.exact_limit = exact_limit
+        self._exact: Optional[set] = set()
+
+    def add(self, value: str):
+        if self._exact is not None:
+            self._exact.add(value)
+            if len(self._exact) > self.exact_limit:
+                self._exact = None
+        hashed = int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+        index = hashed >> (64 - self.precision)
+        remainder = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog"):
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+        if self._exact is not None and other._exact is not None:
+            self._exact |= other._exact
+            if len(self._exact) > self.exact_limit:
+                self._exact = None
+        else:
+            self._exact = None
+
+    def count(self) -> int:
+        if self._exact is not None:
+            return len(self._exact)
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            estimate = size * math.log(size / zeros)
+        return int(round(estimate))
+
+
+class FrequentItems:
+    """Misra-Gries summary of the most frequent values."""
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+
+    def add(self, value: str):
+        counts = self.counts
+        if value in counts:
+            counts[value] += 1
+        elif len(counts) < self.capacity:
+            counts[value] = 1
+        else:
+            # Decrement every counter; values that reach zero make room for new ones
+            for key in list(counts):
+                counts[key] -= 1
+                if not counts[key]:
+                    del counts[key]
+
+    def merge(self, other: "FrequentItems"):
+        for value, count in other.counts.items():
+            self.counts[value] = self.counts.get(value, 0) + count
+        if len(self.counts) > self.capacity:
+            cutoff = sorted(self.counts.values(), reverse=True)[self.capacity]
+            self.counts = {value: count - cutoff for value, count in self.counts.items() if count > cutoff}
+
+    def top(self, k: int) -> List[List[Any]]:
+        return [[value, count] for value, count in sorted(self.counts.items(), key=lambda item: (-item[1], item[0]))[:k]]
+
+
+class CoMoments:
+    """Pairwise co-moments of numeric columns for Pearson correlations."""
+
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+        # Per pair: [count, mean_x, mean_y, m2_x, m2_y, c_xy]
+        self.pairs = {(a, b): [0, 0.0, 0.0, 0.0, 0.0, 0.0]
+                      for i, a in enumerate(columns) for b in columns[i + 1:]}
+
+    def add(self, values: Dict[str, float]):
+        for (a, b), moments in self.pairs.items():
+            x, y = values.get(a), values.get(b)
+            if x is None or y is None:
+                continue
+            moments[0] += 1
+            n = moments[0]
+            dx = x - moments[1]
+            moments[1] += dx / n
+            dy = y - moments[2]
+            moments[2] += dy / n
+            moments[3] += dx * (x - moments[1])
+            moments[4] += dy * (y - moments[2])
+            moments[5] += dx * (y - moments[2])
+
+    def merge(self, other: "CoMoments"):
+        for pair, theirs in other.pairs.items():
+            ours = self.pairs.get(pair)
+            if ours is None or not theirs[0]:
+                continue
+            n_a, n_b = ours[0], theirs[0]
+            n = n_a + n_b
+            dx, dy = theirs[1] - ours[1], theirs[2] - ours[2]
+            ours[3] += theirs[3] + dx * dx * n_a * n_b / n
+            ours[4] += theirs[4] + dy * dy * n_a * n_b / n
+            ours[5] += theirs[5] + dx * dy * n_a * n_b / n
+            ours[1] += dx * n_b / n
+            ours[2] += dy * n_b / n
+            ours[0] = n
+
+    def correlations(self) -> Dict[str, float]:
+        result = {}
+        for (a, b), (n, _, _, m2_x, m2_y, c_xy) in self.pairs.items():
+            if n > 1 and m2_x > 0 and m2_y > 0:
+                result[f"{a}~{b}"] = round(c_xy / math.sqrt(m2_x * m2_y), 4)
+        return result
+
+
+def _to_number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)):
+        return None if isinstance(value, float) and math.isnan(value) else float(value)
+    try:
+        number = float(str(value).replace(",", ""))
+    except ValueError:
+        return None
+    return None if math.isnan(number) or math.isinf(number) else number
+
+
+def _is_missing(value: Any) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, float):
+        return math.isnan(value)
+    return isinstance(value, str) and value.strip().lower() in MISSING_VALUES
+
+
+class ColumnProfile:
+    """Accumulators for a single column."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.missing = 0
+        self.stats = RunningStats()
+        self.digest = TDigest()
+        self.distinct = HyperLogLog()
+        self.frequent = FrequentItems()
+
+    def add(self, value: Any) -> Optional[float]:
+        """Add a value and return it as a number if it is numeric."""
+        self.count += 1
+        if _is_missing(value):
+            self.missing += 1
+            return None
+        text = str(value).strip()
+        self.distinct.add(text)
+        self.frequent.add(text)
+        number = _to_number(value)
+        if number is not None:
+            self.stats.add(number)
+            self.digest.add(number)
+        return number
+
+    def merge(self, other: "ColumnProfile"):
+        self.count += other.count
+        self.missing += other.missing
+        self.stats.merge(other.stats)
+        self.digest.merge(other.digest)
+        self.distinct.merge(other.distinct)
+        self.frequent.merge(other.frequent)
+
+    @property
+    def is_numeric(self) -> bool:
+        present = self.count - self.missing
+        return present > 0 and self.stats.count >= NUMERIC_THRESHOLD * present
+
+    def summary(self) -> Dict[str, Any]:
+        present = self.count - self.missing
+        summary = {
+            "type": "numeric" if self.is_numeric else "categorical",
+            "missing": self.missing,
+            "missing_rate": round(self.missing / self.count, 4) if self.count else 0.0,
+            "distinct": self.distinct.count(),
+        }
+        if self.is_numeric:
+            summary.update({
+                "mean": round(self.stats.mean, 6),
+                "std": round(math.sqrt(self.stats.variance), 6),
+                "min": self.stats.min,
+                "max": self.stats.max,
+                "quantiles": {f"p{int(q * 100)}": round(self.digest.quantile(q), 6)
+                              for q in (0.01, 0.25, 0.5, 0.75, 0.99)},
+                "histogram": self._histogram(),
+            })
+        elif present:
+            summary["top_values"] = self.frequent.top(TOP_VALUES)
+        return summary
+
+    def _histogram(self) -> Dict[str, Any]:
+        low, high = self.stats.min, self.stats.max
+        if high <= low:
+            return {"edges": [low, high], "counts": [self.stats.count]}
+        edges = [low + (high - low) * i / HISTOGRAM_BINS for i in range(HISTOGRAM_BINS + 1)]
+        cdf = [self.digest.cdf(edge) for edge in edges]
+        cdf[0] = 0.0
+        counts = [int(round((cdf[i + 1] - cdf[i]) * self.stats.count)) for i in range(HISTOGRAM_BINS)]
+        return {"edges": [round(edge, 6) for edge in edges], "counts": counts}
+
+
+class DatasetProfiler:
+    """One-pass profiler over rows of a dataset."""
+
+    # Rows buffered before the numeric columns to correlate are chosen
+    TYPE_SAMPLE_ROWS = 100
+
+    def __init__(self):
+        self.rows = 0
+        self.rows_with_missing = 0
+        self.columns: Dict[str, ColumnProfile] = {}
+        self.omitted_columns: Set[str] = set()
+        self.correlations: Optional[CoMoments] = None
+        self._pending: List[Dict[str, float]] = []
+
+    def update(self, rows: Iterable[Dict[str, Any]]):
+        """Fold a chunk of rows (dicts of column name to value) into the profile."""
+        columns = self.columns
+        for row in rows:
+            self.rows += 1
+            numbers = {}
+            has_missing = False
+            for name, value in row.items():
+                column = columns.get(name)
+                if column is None:
+                    if len(columns) >= MAX_PROFILED_COLUMNS:
+                        self.omitted_columns.add(name)
+                        continue
+                    column = columns[name] = ColumnProfile(name)
+                missing = column.missing
+                number = column.add(value)
+                if number is not None:
+                    numbers[name] = number
+                elif column.missing != missing:
+                    has_missing = True
+            if has_missing:
+                self.rows_with_missing += 1
+            if self.correlations is not None:
+                self.correlations.add(numbers)
+            else:
+                self._pending.append(numbers)
+                if len(self._pending) >= self.TYPE_SAMPLE_ROWS:
+                    self._start_correlations()
+
+    def _start_correlations(self):
+        """Choose the correlated columns once the column types are evident and replay buffered rows."""
+        numeric = [name for name, column in self.columns.items() if column.is_numeric]
+        self.correlations = CoMoments(numeric[:MAX_CORRELATION_COLUMNS])
+        for numbers in self._pending:
+            self.correlations.add(numbers)
+        self._pending = []
+
+    def merge(self, other: "DatasetProfiler"):
+        """Merge the profile of another chunk or file into this one."""
+        self.rows += other.rows
+        self.rows_with_missing += other.rows_with_missing
+        for name, column in other.columns.items():
+            if name in self.columns:
+                self.columns[name].merge(column)
+            elif len(self.columns) < MAX_PROFILED_COLUMNS:
+                self.columns[name] = column
+            else:
+                self.omitted_columns.add(name)
+        self.omitted_columns.update(other.omitted_columns)
+        self.omitted_columns.difference_update(self.columns)
+        if self.correlations is None:
+            self._start_correlations()
+        if other.correlations is None:
+            other._start_correlations()
+        self.correlations.merge(other.correlations)
+
+    def profile(self) -> Dict[str, Any]:
+        """Return the finished profile as a JSON-serializable dictionary."""
+        if self.correlations is None:
+            self._start_correlations()
+        return {
+            "rows": self.rows,
+            "rows_with_missing": self.rows_with_missing,
+            "columns": {name: column.summary() for name, column in self.columns.items()},
+            "columns_omitted": len(self.omitted_columns),
+            "correlations": self.correlations.correlations(),
+        }
+
+
+def iter_chunks(path: str, chunk_rows: int = CHUNK_ROWS) -> Iterator[List[Dict[str, Any]]]:
+    """Stream a CSV or Parquet file as chunks of row dictionaries.
+
+    Parquet files require the optional ``pyarrow`` package.
+
+    Args:
+        path: Path to a .csv, .tsv or .parquet file
+        chunk_rows: Rows per chunk
+
+    Returns:
+        Iterator over lists of rows
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".parquet", ".pq"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Profiling Parquet files requires the optional 'pyarrow' package") from e
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pylist()
+        return
+
+    with open(path, "r", encoding="utf-8", errors="replace", newline="") as f:
+        sample = f.read(64 * 1024)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+        except csv.Error:
+            dialect = csv.excel_tab if extension == ".tsv" else csv.excel
+        chunk = []
+        for row in csv.DictReader(f, dialect=dialect):
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def profile_rows(rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Profile rows that are already in memory."""
+    profiler = DatasetProfiler()
+    profiler.update(rows)
+    return profiler.profile()
+
+
+def profile_file(path: str, cache: Optional[DiskCache] = None, chunk_rows: int = CHUNK_ROWS) -> Dict[str, Any]:
+    """Profile a CSV or Parquet file, reusing the cached profile if the file is unchanged.
+
+    Args:
+        path: Path to the data file
+        cache: Profile cache, defaults to the shared on-disk cache
+        chunk_rows: Rows read per chunk
+
+    Returns:
+        Dataset profile
+    """
+    path = os.path.expanduser(path)
+    cache = cache if cache is not None else DiskCache("dataset_profiles")
+    key = content_hash(PROFILE_VERSION, file_fingerprint(path))
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    profiler = DatasetProfiler()
+    for chunk in iter_chunks(path, chunk_rows):
+        profiler.update(chunk)
+    profile = dict(profiler.profile(), source=os.path.basename(path))
+    cache.set(key, profile)
+    return profile
+
+
+def is_profilable(dataset: Any) -> bool:
+    """Whether a dataset is a path to an existing file, a list of row dicts or a dict of column lists."""
+    if isinstance(dataset, str):
+        return os.path.isfile(os.path.expanduser(dataset))
+    if isinstance(dataset, list):
+        return bool(dataset) and all(isinstance(row, dict) for row in dataset)
+    if isinstance(dataset, dict):
+        return bool(dataset) and all(isinstance(values, (list, tuple)) for values in dataset.values())
+    return False
+
+
+def profile_dataset(dataset: Union[str, List[Dict[str, Any]], Dict[str, List[Any]]],
+                    cache: Optional[DiskCache] = None) -> Dict[str, Any]:
+    """Profile a dataset given as a file path, a list of rows or a dict of columns.
+
+    Args:
+        dataset: Path to a CSV/Parquet file, list of row dicts, or dict of column lists
+        cache: Profile cache for files
+
+    Returns:
+        Dataset profile
+
+    Raises:
+        ValueError: If the dataset is none of these (see is_profilable)
+    """
+    if not is_profilable(dataset):
+        raise ValueError("dataset must be an existing file path, a list of row dicts or a dict of column lists")
+    if isinstance(dataset, str):
+        return profile_file(dataset, cache)
+    if isinstance(dataset, dict):
+        names = list(dataset)
+        dataset = [dict(zip(names, values)) for values in zip(*(dataset[name] for name in names))]
+    return profile_rows(dataset)
@@ -1,4 +1,4 @@
-"""Grant Writing example using CrewAI with Ollama."""
+"""Grant Writing example using CrewAI with Ollama."""
 
 import sys
 import os
@@ -9,11 +9,19 @@ from typing import Dict, Any, Optional
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
 
 from crewai import Agent, Task, Crew, Process
-from projects.utils import UseCase
+from projects.utils import UseCase, DiskCache
+from projects.research_use_cases.use_case_04_grant_writing.sections import assemble_proposal, plan_sections
 
 class GrantWritingUseCase(UseCase):
     """Grant Writing use case implementation."""
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.section_cache = DiskCache("grant_sections")
+        self._section_cache_keys = {}
+        self.sections = []
+        self.section_texts = {}
+    
     def setup_agents(self):
         """Set up agents for grant writing."""
         self.research_expert = Agent(
@@ -59,49 +67,54 @@ class GrantWritingUseCase(UseCase):
     def setup_tasks(self, input_data: Optional[Dict[str, Any]] = None):
         """Set up tasks for grant writing.
         
+        Each proposal section is its own task. Sections whose inputs, agency requirements and
+        upstream sections are unchanged since an earlier run are reused from the cache, so
+        iterating on a proposal only regenerates the sections affected by the edit.
+        
         Args:
             input_data: Optional dictionary containing input data
         """
-        # Process input data if provided
-        grant_topic = input_data.get("query", "Developing novel machine learning approaches for climate prediction") if input_data else "Developing novel machine learning approaches for climate prediction"
-        
-        # Prepare funding agency if provided
-        funding_context = ""
-        if input_data and "funding_agency" in input_data:
-            funding_context = f"Target funding agency: {input_data['funding_agency']}"
-        
-        # Define tasks
-        research_plan_task = Task(
-            description=f"Develop a comprehensive research plan for a grant proposal on '{grant_topic}'. {funding_context}\n"
-                       f"Include research questions, significance, innovation, methodological approach, preliminary results "
-                       f"(if applicable), expected outcomes, and potential impact. Explain why this research deserves funding "
-                       f"and how it advances the field.",
-            expected_output="A detailed research plan that clearly articulates the research questions, approach, and significance.",
-            agent=self.research_expert,
-        )
+        writers = {
+            "research_expert": self.research_expert,
+            "grant_writer": self.grant_writer,
+            "budget_specialist": self.budget_specialist,
+        }
         
-        proposal_task = Task(
-            description=f"Draft a complete grant proposal based on the research plan for '{grant_topic}'. {funding_context}\n"
-                       f"Follow standard grant proposal structure including abstract/summary, introduction, "
-                       f"literature review, research design, timeline, expected outcomes, broader impacts, and references. "
-                       f"Make the proposal persuasive, clear, and aligned with typical funding agency priorities.",
-            expected_output="A complete grant proposal draft with all standard sections.",
-            agent=self.grant_writer,
-            context=[research_plan_task]
-        )
-        
-        budget_task = Task(
-            description=f"Create a detailed budget and budget justification for the research project on '{grant_topic}'.\n"
-                       f"Include personnel costs (salaries, benefits), equipment, supplies, travel, participant costs, "
-                       f"and indirect costs. Provide clear justification for each budget item, explaining why it is "
-                       f"necessary for the successful execution of the research plan.",
-            expected_output="A comprehensive budget with line items and detailed justifications for each expense.",
-            agent=self.budget_specialist,
-            context=[research_plan_task, proposal_task]
-        )
+        self.sections = plan_sections(input_data, self.model_name)
+        self.section_texts = {}
+        self._section_cache_keys = {}
+        section_tasks = {}
+        for section in self.sections:
+            cached = self.section_cache.get(section["key"])
+            if cached is not None:
+                self.section_texts[section["id"]] = cached
+                continue
+            
+            # Unchanged upstream sections are passed as text, regenerated ones as task context
+            earlier_sections = [f"{plan['title']} (already written):\n{self.section_texts[plan['id']]}"
+                                for plan in self.sections
+                                if plan["id"] in section["upstream"] and plan["id"] in self.section_texts]
+            description = "\n\n".join([section["prompt"]] + earlier_sections)
+            context = [section_tasks[name] for name in section["upstream"] if name in section_tasks]
+            task = Task(
+                description=description,
+                expected_output=section["expected_output"],
+                agent=writers[section["writer"]],
+                context=context or None
+            )
+            self._section_cache_keys[task.description] = (section["id"], section["key"])
+            section_tasks[section["id"]] = task
         
         # Add tasks to the list
-        self.tasks = [research_plan_task, proposal_task, budget_task]
+        self.tasks = list(section_tasks.values())
+    
+    def on_task_output(self, output: Any):
+        """Cache each written section under the key of its inputs."""
+        section = self._section_cache_keys.get(output.description)
+        if section:
+            section_id, cache_key = section
+            self.section_texts[section_id] = output.raw_output
+            self.section_cache.set(cache_key, output.raw_output)
 
 # Create instance for standalone usage
 grant_writing = GrantWritingUseCase()
@@ -119,11 +132,17 @@ def run(input_data: Optional[Dict[str, Any]] = None) -> str:
     use_case = GrantWritingUseCase()
     use_case.setup_agents()
     use_case.setup_tasks(input_data)
-    use_case.setup_crew(Process.sequential)
     
-    # Run the use case
-    result = use_case.crew.kickoff()
-    return result
+    # Only sections that changed since the last run need the crew
+    result = None
+    if use_case.tasks:
+        use_case.setup_crew(Process.sequential)
+        result = use_case.kickoff()
+    
+    proposal, missing = assemble_proposal(use_case.sections, use_case.section_texts)
+    if missing:
+        return result
+    return proposal
 
 if __name__ == "__main__":
     result = run()
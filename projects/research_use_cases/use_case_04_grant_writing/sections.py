@@ -0,0 +1,235 @@
+"""Section-level planning and caching for the Grant Writing use case.
+
+A proposal is written as a fixed sequence of sections. Each section declares
+the inputs it reads and the sections it builds on, and gets a cache key from
+the hash of exactly those inputs, the agency's requirements for that section
+and the keys of its upstream sections. Changing the budget therefore only
+invalidates the budget, while changing the aims invalidates everything that
+builds on them.
+
+Agency boilerplate (page limits, required structure and review criteria) is
+rendered once per agency and reused for every section and every run.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+
+from projects.utils import content_hash
+
+# Bump when the section prompts change so cached sections are regenerated
+SECTION_VERSION = 1
+
+DEFAULT_TOPIC = "Developing novel machine learning approaches for climate prediction"
+
+# Sections in writing order: (id, title, writer, inputs read, upstream sections, instructions, expected output)
+SECTIONS = [
+    ("specific_aims", "Specific Aims", "research_expert", ("topic", "aims", "preliminary_data"), (),
+     "Write the specific aims for a grant proposal on '{topic}'. State the problem and the gap in knowledge, "
+     "the long-term goal, the central hypothesis, and two to four specific aims with their expected outcomes. "
+     "Explain why this research deserves funding and how it advances the field.",
+     "A specific aims section with a clear hypothesis and numbered aims."),
+    ("research_strategy", "Research Strategy", "research_expert", ("topic", "preliminary_data"), ("specific_aims",),
+     "Write the research strategy for '{topic}' that carries out the specific aims. Cover significance, "
+     "innovation and, for each aim, the methodological approach, preliminary results (if applicable), "
+     "expected outcomes, potential pitfalls and alternative strategies.",
+     "A research strategy covering significance, innovation and the approach for every aim."),
+    ("project_summary", "Project Summary", "grant_writer", ("topic",), ("specific_aims", "research_strategy"),
+     "Write the project summary (abstract) for '{topic}' for a broad scientific audience. Summarize the "
+     "problem, the aims, the approach and the expected impact persuasively and accessibly.",
+     "A concise, persuasive project summary."),
+    ("broader_impacts", "Broader Impacts", "grant_writer", ("topic",), ("specific_aims",),
+     "Describe the broader impacts of the research on '{topic}': benefits to society, training and "
+     "mentoring, broadening participation, dissemination and any infrastructure or data that others can reuse.",
+     "A broader impacts section with concrete, verifiable activities."),
+    ("timeline", "Timeline", "grant_writer", ("duration_years",), ("research_strategy",),
+     "Lay out a timeline with milestones and deliverables for each aim of the research on '{topic}' "
+     "over {duration_years} years.",
+     "A year-by-year timeline with milestones and deliverables."),
+    ("budget", "Budget and Justification", "budget_specialist", ("budget", "duration_years"),
+     ("research_strategy", "timeline"),
+     "Create a detailed budget and budget justification for the research project on '{topic}' over "
+     "{duration_years} years. Include personnel costs (salaries, benefits), equipment, supplies, travel, "
+     "participant costs, and indirect costs. Provide clear justification for each budget item, explaining "
+     "why it is necessary for the successful execution of the research plan.",
+     "A comprehensive budget with line items and detailed justifications for each expense."),
+]
+
+SECTION_IDS = [section[0] for section in SECTIONS]
+
+# Requirements of common funding agencies: aliases, general rules and rules per section
+AGENCY_PROFILES = {
+    "NSF": {
+        "name": "National Science Foundation (NSF)",
+        "aliases": ("nsf", "national science foundation"),
+        "general": ["Follow the NSF Proposal and Award Policies and Procedures Guide (PAPPG).",
+                    "Proposals are reviewed on Intellectual Merit and Broader Impacts."],
+        "sections": {
+            "specific_aims": ["Present the aims as the objectives of the Project Description."],
+            "research_strategy": ["The Project Description, including results from prior NSF support, is "
+                                  "limited to 15 pages."],
+            "project_summary": ["The Project Summary has three headed parts: Overview, Intellectual Merit and "
+                                "Broader Impacts, within 4,600 characters."],
+            "broader_impacts": ["Broader Impacts must be a separate, headed section of the Project Description."],
+            "budget": ["Budget justification is limited to 5 pages.",
+                       "Include a data management and sharing plan reference."],
+        },
+    },
+    "NIH": {
+        "name": "National Institutes of Health (NIH)",
+        "aliases": ("nih", "national institutes of health"),
+        "general": ["Reviewers score Significance, Investigators, Innovation, Approach and Environment."],
+        "sections": {
+            "specific_aims": ["The Specific Aims page is limited to one page."],
+            "research_strategy": ["Organize the Research Strategy as Significance, Innovation and Approach, "
+                                  "within 12 pages for an R01."],
+            "project_summary": ["The Project Summary/Abstract is limited to 30 lines of text and states the "
+                                "relevance to public health."],
+            "broader_impacts": ["NIH has no broader impacts section; frame this as public health relevance "
+                                "and dissemination."],
+            "budget": ["Requests up to $250,000 direct costs per year use a modular budget in $25,000 modules."],
+        },
+    },
+    "ERC": {
+        "name": "European Research Council (ERC)",
+        "aliases": ("erc", "european research council"),
+        "general": ["The sole evaluation criterion is scientific excellence of the project and the "
+                    "principal investigator.",
+                    "Emphasize ground-breaking, high-risk/high-gain objectives."],
+        "sections": {
+            "specific_aims": ["State the aims as the objectives of the extended synopsis (Part B1)."],
+            "research_strategy": ["Write as the scientific proposal (Part B2): state of the art, objectives "
+                                  "and methodology, within the call's page limit."],
+            "project_summary": ["The abstract is limited to 2,000 characters."],
+            "budget": ["Starting Grants fund up to EUR 1.5 million over 5 years; justify the PI's time "
+                       "commitment."],
+        },
+    },
+}
+
+DEFAULT_PROFILE = {
+    "name": None,
+    "aliases": (),
+    "general": ["Follow the funder's call text for structure, page limits and review criteria."],
+    "sections": {},
+}
+
+
+def normalize_agency(agency: Optional[str]) -> Optional[str]:
+    """Map an agency name or alias to a known agency code, or None if it is unknown."""
+    if not agency:
+        return None
+    lowered = re.sub(r"\s+", " ", str(agency).lower()).strip()
+    for code, profile in AGENCY_PROFILES.items():
+        if any(re.search(rf"\b{re.escape(alias)}\b", lowered) for alias in profile["aliases"]):
+            return code
+    return None
+
+
+@lru_cache(maxsize=64)
+def agency_requirements(agency: Optional[str]) -> Dict[str, str]:
+    """Render an agency's boilerplate once, split into general and per-section requirements.
+
+    Args:
+        agency: Funding agency as given by the user
+
+    Returns:
+        Dictionary with the "general" requirements and one entry per section id
+    """
+    code = normalize_agency(agency)
+    profile = AGENCY_PROFILES[code] if code else DEFAULT_PROFILE
+    name = profile["name"] or agency
+    general = [f"Target funding agency: {name}."] if name else []
+    general += profile["general"]
+    requirements = {"general": " ".join(general)}
+    for section_id in SECTION_IDS:
+        requirements[section_id] = " ".join(profile["sections"].get(section_id, []))
+    return requirements
+
+
+def section_inputs(input_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Collect the proposal inputs the sections read, with defaults."""
+    input_data = input_data or {}
+    notes = input_data.get("notes") or {}
+    return {
+        "topic": input_data.get("query", DEFAULT_TOPIC),
+        "funding_agency": input_data.get("funding_agency"),
+        "aims": input_data.get("aims"),
+        "preliminary_data": input_data.get("preliminary_data"),
+        "budget": input_data.get("budget"),
+        "duration_years": input_data.get("duration_years", 3),
+        "notes": {section_id: notes[section_id] for section_id in SECTION_IDS if notes.get(section_id)},
+    }
+
+
+def plan_sections(input_data: Optional[Dict[str, Any]], model_name: str) -> List[Dict[str, Any]]:
+    """Compute every section's prompt and cache key.
+
+    A section's key covers its prompt (its own inputs, notes and agency
+    requirements) and the keys of its upstream sections, so edits invalidate exactly the sections
+    downstream of them.
+
+    Args:
+        input_data: Proposal inputs as passed to run()
+        model_name: Model writing the sections
+
+    Returns:
+        One dictionary per section, in writing order
+    """
+    inputs = section_inputs(input_data)
+    requirements = agency_requirements(inputs["funding_agency"])
+    keys: Dict[str, str] = {}
+    plans = []
+    for section_id, title, writer, reads, upstream, instructions, expected_output in SECTIONS:
+        values = {name: inputs[name] for name in reads}
+        prompt = _section_prompt(instructions, inputs, values, inputs["notes"].get(section_id), requirements,
+                                 section_id)
+        # The prompt embeds everything the section reads, so it stands in for the inputs in the key
+        keys[section_id] = content_hash(SECTION_VERSION, model_name, section_id, prompt,
+                                        [keys[name] for name in upstream])
+        plans.append({
+            "id": section_id,
+            "title": title,
+            "writer": writer,
+            "upstream": list(upstream),
+            "key": keys[section_id],
+            "prompt": prompt,
+            "expected_output": expected_output,
+        })
+    return plans
+
+
+def _section_prompt(instructions: str, inputs: Dict[str, Any], values: Dict[str, Any], note: Optional[str],
+                    requirements: Dict[str, str], section_id: str) -> str:
+    """Build a section's task description from its instructions and the inputs it reads."""
+    parts = [instructions.format(topic=inputs["topic"], duration_years=inputs["duration_years"])]
+    labels = {"aims": "Proposed aims", "preliminary_data": "Preliminary data", "budget": "Budget constraints"}
+    for name, label in labels.items():
+        if values.get(name):
+            parts.append(f"{label}: {values[name]}")
+    if requirements["general"]:
+        parts.append(requirements["general"])
+    if requirements[section_id]:
+        parts.append(f"Agency requirements for this section: {requirements[section_id]}")
+    if note:
+        parts.append(f"Author notes: {note}")
+    return "\n".join(parts)
+
+
+def assemble_proposal(plans: List[Dict[str, Any]], texts: Dict[str, str]) -> Tuple[str, List[str]]:
+    """Join the written sections into a proposal in writing order.
+
+    Args:
+        plans: Result of plan_sections
+        texts: Section text by section id
+
+    Returns:
+        The proposal text and the ids of sections that have no text yet
+    """
+    parts, missing = [], []
+    for plan in plans:
+        if plan["id"] in texts:
+            parts.append(f"## {plan['title']}\n\n{texts[plan['id']].strip()}")
+        else:
+            missing.append(plan["id"])
+    return "\n\n".join(parts), missing
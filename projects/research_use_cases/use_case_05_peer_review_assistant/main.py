@@ -1,4 +1,4 @@
-"""Peer Review Assistant example using CrewAI with Ollama."""
+"""Peer Review Assistant example using CrewAI with Ollama."""
 
 import sys
 import os
@@ -9,11 +9,46 @@ from typing import Dict, Any, Optional
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
 
 from crewai import Agent, Task, Crew, Process
-from projects.utils import UseCase
+from projects.utils import UseCase, DiskCache, content_hash
+from projects.research_use_cases.use_case_05_peer_review_assistant.segmentation import (
+    segment_manuscript, select_sections, render_sections
+)
+
+# Section kinds each reviewer receives
+METHODOLOGY_SECTIONS = ("abstract", "methods", "results")
+CONTENT_SECTIONS = ("abstract", "introduction", "results", "discussion", "conclusion")
+CITATION_SECTIONS = ("introduction", "discussion")
+WRITING_SECTIONS = ("abstract", "introduction", "conclusion")
 
 class PeerReviewAssistantUseCase(UseCase):
     """Peer Review Assistant use case implementation."""
     
+    # Comments are returned to authors one by one, so the result is structured
+    output_schema = {
+        "type": "object",
+        "properties": {
+            "issues": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "location": {"type": "string"},
+                        "issue": {"type": "string"},
+                        "suggestion": {"type": "string"},
+                    },
+                    "required": ["issue", "suggestion"],
+                },
+            },
+            "overall_assessment": {"type": "string"},
+        },
+        "required": ["issues", "overall_assessment"],
+    }
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.review_cache = DiskCache("peer_review")
+        self._review_cache_keys = {}
+    
     def setup_agents(self):
         """Set up agents for peer review assistance."""
         self.methodology_reviewer = Agent(
@@ -60,63 +95,110 @@ class PeerReviewAssistantUseCase(UseCase):
     def setup_tasks(self, input_data: Optional[Dict[str, Any]] = None):
         """Set up tasks for peer review assistance.
         
+        The manuscript is segmented once and each reviewer only receives the sections it needs.
+        Reviews of sections that are unchanged since an earlier run are reused from the cache.
+        
         Args:
             input_data: Optional dictionary containing input data
         """
         # Process input data if provided
         manuscript_title = input_data.get("title", "Advances in Machine Learning for Climate Prediction") if input_data else "Advances in Machine Learning for Climate Prediction"
         
-        # Prepare manuscript context if provided
-        manuscript_context = ""
+        # Segment the manuscript once if provided
+        segments = None
         if input_data and "manuscript" in input_data:
-            manuscript_context = f"Review the following manuscript:\n\n{input_data['manuscript']}"
-        else:
-            manuscript_context = "Analyze a hypothetical manuscript on machine learning applications for climate prediction."
+            segments = segment_manuscript(input_data["manuscript"])
         
-        # Define tasks
-        methodology_review_task = Task(
-            description=f"Evaluate the methodology of the manuscript '{manuscript_title}'. {manuscript_context}\n"
-                       f"Assess the research design, methods, data collection procedures, analytical techniques, "
-                       f"and statistical approaches. Identify any methodological weaknesses, potential biases, "
-                       f"or limitations. Suggest specific improvements to strengthen the methodology.",
-            expected_output="A comprehensive review of the methodology with specific issues identified and improvements suggested.",
-            agent=self.methodology_reviewer,
-        )
+        def manuscript_context(kinds, include_figures=False, include_references=False):
+            """Build the manuscript excerpt for one reviewer and the hashes it depends on."""
+            if segments is None:
+                return "Analyze a hypothetical manuscript on machine learning applications for climate prediction.", None
+            # Fall back to the full manuscript when it has no recognizable sections of these kinds
+            sections = select_sections(segments, kinds) or segments["sections"]
+            parts = [render_sections(sections)]
+            if include_figures and segments["figures"]:
+                parts.append("Figure and table captions:\n" + "\n".join(
+                    f"{figure['label']}: {figure['caption']}" for figure in segments["figures"]))
+            if include_references and segments["references"]:
+                parts.append("Reference list:\n" + "\n".join(segments["references"]))
+            context = "Review the following manuscript sections:\n\n" + "\n\n".join(parts)
+            return context, content_hash([section["hash"] for section in sections], parts[1:])
         
-        content_review_task = Task(
-            description=f"Evaluate the scientific content and arguments of '{manuscript_title}'. {manuscript_context}\n"
-                       f"Assess the accuracy, clarity, and significance of the scientific claims. Evaluate the literature "
-                       f"review, results interpretation, and conclusions. Identify any logical flaws, gaps in evidence, "
-                       f"or alternative interpretations that should be addressed. Comment on the novelty and potential impact.",
-            expected_output="A detailed content review highlighting strengths, weaknesses, and specific recommendations for improvement.",
-            agent=self.content_reviewer,
-            context=[methodology_review_task]
-        )
+        # Section reviews are independent, so they run in parallel and are cached per section hash
+        review_specs = [
+            (self.methodology_reviewer, "Methodology review", METHODOLOGY_SECTIONS, True, False,
+             f"Evaluate the methodology of the manuscript '{manuscript_title}'. {{context}}\n"
+             f"Assess the research design, methods, data collection procedures, analytical techniques, "
+             f"and statistical approaches. Identify any methodological weaknesses, potential biases, "
+             f"or limitations. Suggest specific improvements to strengthen the methodology.",
+             "A comprehensive review of the methodology with specific issues identified and improvements suggested."),
+            (self.content_reviewer, "Content review", CONTENT_SECTIONS, True, False,
+             f"Evaluate the scientific content and arguments of '{manuscript_title}'. {{context}}\n"
+             f"Assess the accuracy, clarity, and significance of the scientific claims. Evaluate the literature "
+             f"review, results interpretation, and conclusions. Identify any logical flaws, gaps in evidence, "
+             f"or alternative interpretations that should be addressed. Comment on the novelty and potential impact.",
+             "A detailed content review highlighting strengths, weaknesses, and specific recommendations for improvement."),
+            (self.writing_editor, "Citation check", CITATION_SECTIONS, False, True,
+             f"Check the citations of '{manuscript_title}'. {{context}}\n"
+             f"Verify that the reference list is complete and consistently formatted, that cited works support "
+             f"the claims they are attached to, and flag missing, outdated, or self-serving citations.",
+             "A citation check listing reference issues and suggested additions or corrections."),
+        ]
         
+        review_tasks = []
+        cached_reviews = []
+        self._review_cache_keys = {}
+        for agent, label, kinds, include_figures, include_references, description, expected_output in review_specs:
+            context, sections_hash = manuscript_context(kinds, include_figures, include_references)
+            cache_key = content_hash(self.model_name, agent.role, description, sections_hash) if sections_hash else None
+            cached = self.review_cache.get(cache_key) if cache_key else None
+            if cached is not None:
+                cached_reviews.append(f"{label} (sections unchanged since the last review):\n{cached}")
+                continue
+            
+            task = Task(
+                description=description.format(context=context),
+                expected_output=expected_output,
+                agent=agent,
+                async_execution=True
+            )
+            if cache_key:
+                self._review_cache_keys[task.description] = cache_key
+            review_tasks.append(task)
+        
+        writing_context, _ = manuscript_context(WRITING_SECTIONS)
+        earlier_reviews = "\n\nEarlier reviews:\n\n" + "\n\n".join(cached_reviews) if cached_reviews else ""
         writing_review_task = Task(
-            description=f"Review the writing quality and structure of '{manuscript_title}'. {manuscript_context}\n"
+            description=f"Review the writing quality and structure of '{manuscript_title}'. {writing_context}\n"
                        f"Evaluate the overall organization, clarity, flow, and readability. Identify issues with "
                        f"paragraph structure, transitions, sentence construction, word choice, and academic style. "
-                       f"Provide specific suggestions to improve the writing and ensure it meets high academic standards.",
+                       f"Provide specific suggestions to improve the writing and ensure it meets high academic standards."
+                       f"{earlier_reviews}",
             expected_output="A detailed writing review with specific examples of issues and constructive suggestions for improvement.",
             agent=self.writing_editor,
-            context=[methodology_review_task, content_review_task]
+            context=review_tasks
         )
         
         # Add tasks to the list
-        self.tasks = [methodology_review_task, content_review_task, writing_review_task]
+        self.tasks = review_tasks + [writing_review_task]
+    
+    def on_task_output(self, output: Any):
+        """Cache section reviews keyed by the hashes of the sections they covered."""
+        cache_key = self._review_cache_keys.get(output.description)
+        if cache_key:
+            self.review_cache.set(cache_key, output.raw_output)
 
 # Create instance for standalone usage
 peer_review_assistant = PeerReviewAssistantUseCase()
 
-def run(input_data: Optional[Dict[str, Any]] = None) -> str:
+def run(input_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Run the peer review assistant use case.
     
     Args:
         input_data: Optional dictionary containing input data
         
     Returns:
-        The result of the peer review process
+        The result of the peer review process, matching PeerReviewAssistantUseCase.output_schema
     """
     # Create a new instance to ensure clean state
     use_case = PeerReviewAssistantUseCase()
@@ -125,7 +207,7 @@ def run(input_data: Optional[Dict[str, Any]] = None) -> str:
     use_case.setup_crew(Process.sequential)
     
     # Run the use case
-    result = use_case.crew.kickoff()
+    result = use_case.kickoff()
     return result
 
 if __name__ == "__main__":
@@ -0,0 +1,136 @@
+"""Single-pass manuscript segmentation for the Peer Review Assistant use case.
+
+The manuscript is read line by line once and split into typed sections,
+figure/table captions and reference entries. Each reviewer then only receives
+the parts of the manuscript it needs, and every section carries a content
+hash so review results can be cached per section.
+"""
+
+import re
+from typing import Dict, Any, Iterable, List, Optional, Union
+
+from projects.utils import content_hash
+
+# Keywords identifying the kind of a section from its heading
+SECTION_KINDS = (
+    ("abstract", ("abstract", "summary")),
+    ("introduction", ("introduction", "background", "related work", "literature review", "motivation")),
+    ("methods", ("method", "methodology", "materials", "experimental setup", "experiment design",
+                 "study design", "data collection", "participants", "procedure", "approach")),
+    ("results", ("result", "findings", "evaluation", "experiments")),
+    ("discussion", ("discussion", "limitations", "implications")),
+    ("conclusion", ("conclusion", "future work", "concluding")),
+    ("references", ("references", "bibliography", "works cited", "literature cited")),
+    ("appendix", ("appendix", "supplementary")),
+)
+
+HEADING_PATTERN = re.compile(
+    r"^\s*(?:#{1,6}\s+(?P<md>.+?)"
+    r"|(?P<num>(?:\d+(?:\.\d+)*\.?|[IVX]+\.)\s+[A-Z][^.!?]{0,80})"
+    r"|(?P<bare>[A-Z][A-Za-z ]{2,40}):?)\s*$"
+)
+
+CAPTION_PATTERN = re.compile(r"^\s*(?P<label>(?:Figure|Fig\.|Table)\s*\d+[a-z]?)\s*[.:|-]\s*(?P<caption>.+)$",
+                             re.IGNORECASE)
+
+REFERENCE_START_PATTERN = re.compile(r"^\s*(?:\[\d+\]|\d+\.\s)")
+
+
+def classify_heading(title: str) -> str:
+    """Map a section heading to a section kind such as "methods" or "references"."""
+    lowered = title.lower()
+    for kind, keywords in SECTION_KINDS:
+        if any(keyword in lowered for keyword in keywords):
+            return kind
+    return "other"
+
+
+def _heading_title(line: str, in_references: bool = False) -> Optional[str]:
+    """Return the heading text if the line is a section heading."""
+    match = HEADING_PATTERN.match(line)
+    if not match:
+        return None
+    if match.group("bare"):
+        # Short capitalised lines are only headings when they name a known section
+        if len(match.group("bare").split()) > 4 or classify_heading(match.group("bare")) == "other":
+            return None
+    if match.group("num"):
+        # Numbered reference entries and numbered list items are not headings
+        if in_references or len(match.group("num").split()) > 8:
+            return None
+    return (match.group("md") or match.group("num") or match.group("bare")).strip()
+
+
+def _split_references(lines: List[str]) -> List[str]:
+    """Split the lines of a references section into individual entries."""
+    numbered = any(REFERENCE_START_PATTERN.match(line) for line in lines)
+    entries, current = [], []
+    for line in lines:
+        stripped = line.strip()
+        starts_entry = REFERENCE_START_PATTERN.match(line) if numbered else True
+        if not stripped or (starts_entry and current):
+            if current:
+                entries.append(" ".join(current))
+            current = []
+        if stripped:
+            current.append(stripped)
+    if current:
+        entries.append(" ".join(current))
+    return entries
+
+
+def segment_manuscript(manuscript: Union[str, Iterable[str]]) -> Dict[str, Any]:
+    """Segment a manuscript into sections, figures and references in one pass.
+
+    Args:
+        manuscript: Manuscript text, or any iterable of lines such as an open file
+
+    Returns:
+        Dictionary with ``sections`` (title, kind, text, hash), ``figures``
+        (label, caption) and ``references`` (list of entry strings)
+    """
+    lines = manuscript.splitlines() if isinstance(manuscript, str) else manuscript
+
+    sections: List[Dict[str, Any]] = []
+    figures: List[Dict[str, str]] = []
+    reference_lines: List[str] = []
+    title, kind, body = "Front Matter", "front_matter", []
+
+    def close_section():
+        text = "\n".join(body).strip()
+        if text:
+            sections.append({"title": title, "kind": kind, "text": text, "hash": content_hash(kind, text)})
+
+    for line in lines:
+        line = line.rstrip("\n")
+        heading = _heading_title(line, in_references=kind == "references")
+        if heading:
+            close_section()
+            title, kind, body = heading, classify_heading(heading), []
+            continue
+
+        caption = CAPTION_PATTERN.match(line)
+        if caption:
+            figures.append({"label": caption.group("label"), "caption": caption.group("caption").strip(),
+                            "section": title})
+        if kind == "references":
+            reference_lines.append(line)
+        body.append(line)
+    close_section()
+
+    return {
+        "sections": sections,
+        "figures": figures,
+        "references": _split_references(reference_lines),
+    }
+
+
+def select_sections(segments: Dict[str, Any], kinds: Iterable[str]) -> List[Dict[str, Any]]:
+    """Return the sections whose kind is one of the requested kinds, in document order."""
+    wanted = set(kinds)
+    return [section for section in segments["sections"] if section["kind"] in wanted]
+
+
+def render_sections(sections: List[Dict[str, Any]]) -> str:
+    """Render sections back into text for a task description."""
+    return "\n\n".join(f"## {section['title']}\n{section['text']}" for section in sections)
@@ -1,4 +1,4 @@
-"""Research Project Management example using CrewAI with Ollama."""
+"""Research Project Management example using CrewAI with Ollama."""
 
 import sys
 import os
@@ -9,13 +9,68 @@ from typing import Dict, Any, Optional
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
 
 from crewai import Agent, Task, Crew, Process
+from langchain.tools import Tool
 from projects.utils import UseCase
+from projects.research_use_cases.use_case_06_research_project_management.scheduler import (
+    is_task_graph, run_scheduler_tool, schedule_project, summarize_schedule
+)
 
 class ResearchProjectManagementUseCase(UseCase):
     """Research Project Management use case implementation."""
     
+    # KPIs and risks are loaded into project trackers, so the result is structured
+    output_schema = {
+        "type": "object",
+        "properties": {
+            "kpis": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "name": {"type": "string"},
+                        "target": {"type": "string"},
+                        "frequency": {"type": "string"},
+                    },
+                    "required": ["name"],
+                },
+            },
+            "risks": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "risk": {"type": "string"},
+                        "likelihood": {"enum": ["High", "Medium", "Low"]},
+                        "mitigation": {"type": "string"},
+                    },
+                    "required": ["risk", "mitigation"],
+                },
+            },
+            "reporting": {"type": "array", "items": {"type": "string"}},
+            "summary": {"type": "string"},
+        },
+        "required": ["kpis", "risks", "summary"],
+    }
+    
+    # Project details the scheduler tool's what-if queries apply to
+    project_details: Optional[Dict[str, Any]] = None
+    
+    def _init_scheduler_tool(self):
+        """Initialize the critical-path scheduler tool."""
+        return Tool(
+            name="project_scheduler",
+            func=lambda query: run_scheduler_tool(query, self.project_details),
+            description="Computes the critical path, slack and resource-levelled schedule of the project. "
+                        "Input is a JSON object with what-if changes to the current project: "
+                        "{\"durations\": {task id: new duration}, \"resources\": {resource: capacity}}, "
+                        "or a full project {\"tasks\": [{\"id\", \"duration\", \"depends_on\", \"resources\"}], "
+                        "\"resources\": {...}}. Use it for all dates, durations and slack figures."
+        )
+    
     def setup_agents(self):
         """Set up agents for research project management."""
+        scheduler_tool = self._init_scheduler_tool()
+        
         self.project_planner = Agent(
             role="Research Project Planner",
             goal="Develop comprehensive research project plans",
@@ -25,7 +80,7 @@ class ResearchProjectManagementUseCase(UseCase):
                      "and anticipating resource needs for research projects.",
             allow_delegation=False,
             llm=self.llm,
-            tools=self.tools,
+            tools=self.tools + [scheduler_tool],
             verbose=True
         )
         
@@ -38,7 +93,7 @@ class ResearchProjectManagementUseCase(UseCase):
                      "You excel at identifying resource bottlenecks and finding solutions.",
             allow_delegation=False,
             llm=self.llm,
-            tools=self.tools,
+            tools=self.tools + [scheduler_tool],
             verbose=True
         )
         
@@ -69,8 +124,26 @@ class ResearchProjectManagementUseCase(UseCase):
         
         # Prepare project context if provided
         project_context = ""
+        self.schedule = None
         if input_data and "project_details" in input_data:
-            project_context = f"Use the following project details: {json.dumps(input_data['project_details'])}"
+            project_details = input_data["project_details"]
+            if is_task_graph(project_details):
+                try:
+                    self.schedule = schedule_project(project_details)
+                except (AttributeError, TypeError, ValueError):
+                    # Task lists the scheduler cannot use, such as unknown dependencies, go to the agents as given
+                    self.schedule = None
+            if self.schedule:
+                # Schedule task graphs deterministically; agents get the figures instead of the raw task list
+                self.project_details = project_details
+                details = {key: value for key, value in project_details.items() if key != "tasks"}
+                project_context = (f"Use the following project details: {self.format_input(details)}\n"
+                                   f"The task graph has already been scheduled with the critical path method "
+                                   f"(durations in the project's time unit): {json.dumps(summarize_schedule(self.schedule))}\n"
+                                   f"Do not recompute dates or slack by hand; use the project_scheduler tool for what-if "
+                                   f"questions and focus on risks, assumptions and mitigation around the critical path.")
+            else:
+                project_context = f"Use the following project details: {self.format_input(project_details)}"
         
         # Define tasks
         project_planning_task = Task(
@@ -110,14 +183,14 @@ class ResearchProjectManagementUseCase(UseCase):
 # Create instance for standalone usage
 research_project_management = ResearchProjectManagementUseCase()
 
-def run(input_data: Optional[Dict[str, Any]] = None) -> str:
+def run(input_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Run the research project management use case.
     
     Args:
         input_data: Optional dictionary containing input data
         
     Returns:
-        The result of the research project management process
+        The result of the research project management process, matching ResearchProjectManagementUseCase.output_schema
     """
     # Create a new instance to ensure clean state
     use_case = ResearchProjectManagementUseCase()
@@ -126,7 +199,7 @@ def run(input_data: Optional[Dict[str, Any]] = None) -> str:
     use_case.setup_crew(Process.sequential)
     
     # Run the use case
-    result = use_case.crew.kickoff()
+    result = use_case.kickoff()
     return result
 
 if __name__ == "__main__":
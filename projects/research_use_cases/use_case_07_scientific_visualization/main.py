@@ -1,21 +1,80 @@
-"""Scientific Visualization example using CrewAI with Ollama."""
+"""Scientific Visualization example using CrewAI with Ollama."""
 
 import sys
 import os
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 # Add the parent directory to sys.path to allow importing from projects
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
 
 from crewai import Agent, Task, Crew, Process
-from projects.utils import UseCase
+from langchain.tools import Tool
+from projects.utils import UseCase, estimate_tokens
+from projects.research_use_cases.use_case_07_scientific_visualization.rendering import (
+    CHART_TYPES, ChartRenderer, describe, is_renderable
+)
+
+# Datasets below this many estimated tokens are also shown to the agents verbatim
+MAX_INLINE_DATASET_TOKENS = 2000
 
 class ScientificVisualizationUseCase(UseCase):
     """Scientific Visualization use case implementation."""
     
+    # Guidelines are checked figure by figure, so the result is structured
+    output_schema = {
+        "type": "object",
+        "properties": {
+            "guidelines": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "aspect": {"type": "string"},
+                        "recommendation": {"type": "string"},
+                    },
+                    "required": ["aspect", "recommendation"],
+                },
+            },
+            "summary": {"type": "string"},
+        },
+        "required": ["guidelines", "summary"],
+    }
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Renderer for the current dataset and the charts it rendered, set up in setup_tasks
+        self.chart_renderer: Optional[ChartRenderer] = None
+        self.rendered_charts: List[str] = []
+    
+    def _init_render_tool(self):
+        """Initialize the chart rendering tool."""
+        return Tool(
+            name="render_chart",
+            func=self._render_chart,
+            description=f"Renders a chart of the provided dataset to an SVG or PNG file, downsampling large data "
+                        f"automatically. Input is a JSON chart spec: {{\"type\": one of {', '.join(CHART_TYPES)}, "
+                        f"\"x\": column (omit for the row index), \"y\": column or list of columns, \"title\", "
+                        f"\"x_label\", \"y_label\", \"bins\", \"aggregate\" (count, sum, mean, min, max for bar "
+                        f"charts), \"max_points\", \"format\": \"svg\" or \"png\", \"width\", \"height\"}}. "
+                        f"Returns the path of the rendered file."
+        )
+    
+    def _render_chart(self, query: str) -> str:
+        """Render a chart spec given as JSON against the current dataset."""
+        if self.chart_renderer is None:
+            return "Error: no dataset was provided, so there is nothing to render."
+        try:
+            result = self.chart_renderer.render(json.loads(query))
+        except (ImportError, KeyError, OSError, TypeError, ValueError) as e:
+            return f"Error: {e}"
+        self.rendered_charts.append(result["path"])
+        return json.dumps(result)
+    
     def setup_agents(self):
         """Set up agents for scientific visualization."""
+        render_tool = self._init_render_tool()
+        
         self.data_interpreter = Agent(
             role="Scientific Data Interpreter",
             goal="Analyze scientific data to identify key patterns for visualization",
@@ -38,7 +97,7 @@ class ScientificVisualizationUseCase(UseCase):
                      "for different data and research contexts, ensuring accuracy and clarity.",
             allow_delegation=False,
             llm=self.llm,
-            tools=self.tools,
+            tools=self.tools + [render_tool],
             verbose=True
         )
         
@@ -69,8 +128,19 @@ class ScientificVisualizationUseCase(UseCase):
         
         # Prepare dataset context if provided
         dataset_context = ""
-        if input_data and "dataset" in input_data:
+        self.chart_renderer = None
+        self.rendered_charts = []
+        if input_data and "dataset" in input_data and not is_renderable(input_data["dataset"]):
+            # Descriptions and other free-form datasets are passed through as given
             dataset_context = f"Use the following dataset for visualization: {json.dumps(input_data['dataset'])}"
+        elif input_data and "dataset" in input_data:
+            # Large datasets are only summarized; the render_chart tool does the heavy lifting
+            self.chart_renderer = ChartRenderer(input_data["dataset"])
+            dataset_context = f"The dataset has these columns: {json.dumps(describe(self.chart_renderer.source))}"
+            if not isinstance(input_data["dataset"], str):
+                dataset_json = json.dumps(input_data["dataset"])
+                if estimate_tokens(dataset_json) <= MAX_INLINE_DATASET_TOKENS:
+                    dataset_context += f"\nUse the following dataset for visualization: {dataset_json}"
         
         # Define tasks
         data_interpretation_task = Task(
@@ -88,7 +158,8 @@ class ScientificVisualizationUseCase(UseCase):
                        f"Select the most effective visualization types (e.g., graphs, charts, maps, 3D models) for the "
                        f"identified data patterns and research context. Specify design elements including layout, color schemes, "
                        f"labeling, annotations, and interactive features if applicable. Provide detailed specifications "
-                       f"for each proposed visualization.",
+                       f"for each proposed visualization. If a dataset was provided, render each chart with the "
+                       f"render_chart tool and include the returned file paths.",
             expected_output="Detailed visualization designs and specifications for the scientific data.",
             agent=self.visualization_designer,
             context=[data_interpretation_task]
@@ -111,14 +182,15 @@ class ScientificVisualizationUseCase(UseCase):
 # Create instance for standalone usage
 scientific_visualization = ScientificVisualizationUseCase()
 
-def run(input_data: Optional[Dict[str, Any]] = None) -> str:
+def run(input_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Run the scientific visualization use case.
     
     Args:
         input_data: Optional dictionary containing input data
         
     Returns:
-        The result of the scientific visualization process
+        The result of the scientific visualization process, matching ScientificVisualizationUseCase.output_schema,
+        with the paths of the charts rendered during the run under "rendered_charts"
     """
     # Create a new instance to ensure clean state
     use_case = ScientificVisualizationUseCase()
@@ -127,7 +199,11 @@ def run(input_data: Optional[Dict[str, Any]] = None) -> str:
     use_case.setup_crew(Process.sequential)
     
     # Run the use case
-    result = use_case.crew.kickoff()
+    result = use_case.kickoff()
+    
+    # List the chart files rendered during the run
+    if use_case.rendered_charts:
+        result["rendered_charts"] = list(dict.fromkeys(use_case.rendered_charts))
     return result
 
 if __name__ == "__main__":
@@ -0,0 +1,612 @@
+"""Downsampling and headless chart rendering for the Scientific Visualization use case.
+
+Datasets with millions of points are reduced before anything is drawn. Data is
+processed in fixed-size NumPy chunks, so memory stays bounded by the chunk
+size and the output resolution rather than the dataset size:
+
+- Line charts use min-max bucketing in a single streaming pass, then
+  Largest-Triangle-Three-Buckets (LTTB) down to the requested point budget,
+  so peaks and troughs survive.
+- Histograms, bar charts and heatmaps use binned aggregation.
+- Scatter plots above the point budget are reduced to one point per occupied
+  cell of a 2D grid, so outliers are kept.
+
+Charts are written as SVG with no further dependencies, or as PNG through
+matplotlib's headless Agg backend when it is installed. Rendered files are
+cached by the hash of the data and the chart spec.
+"""
+
+import csv
+import hashlib
+import math
+import os
+import threading
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from projects.utils import CACHE_DIR, content_hash, file_fingerprint
+
+# Bumped whenever rendering changes so stale cached charts are not reused
+RENDER_VERSION = 1
+
+CHART_TYPES = ("line", "scatter", "histogram", "bar", "heatmap")
+
+DEFAULT_SPEC = {
+    "width": 800,
+    "height": 500,
+    "max_points": 2000,
+    "bins": 50,
+    "format": "svg",
+    "aggregate": "mean",
+}
+
+# Rows processed per NumPy chunk
+CHUNK_ROWS = 200000
+
+# Min-max buckets per output point in the pass that precedes LTTB
+MINMAX_RATIO = 2
+
+PALETTE = ("#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#8c564b", "#e377c2", "#7f7f7f")
+
+Point = Tuple[float, float]
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _as_floats(values: List[Any]) -> np.ndarray:
+    """Convert values to a float array with NaN for missing or non-numeric entries."""
+    try:
+        array = np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        array = np.fromiter((_to_float(value) for value in values), dtype=float, count=len(values))
+    array[np.isinf(array)] = np.nan
+    return array
+
+
+def is_renderable(dataset: Any) -> bool:
+    """Whether a dataset is a path to an existing file, a list of row dicts or a dict of column lists."""
+    if isinstance(dataset, str):
+        return os.path.isfile(os.path.expanduser(dataset))
+    if isinstance(dataset, list):
+        return bool(dataset) and all(isinstance(row, dict) for row in dataset)
+    if isinstance(dataset, dict):
+        return bool(dataset) and all(isinstance(values, (list, tuple)) for values in dataset.values())
+    return False
+
+
+class DataSource:
+    """Chunked column access to a dataset held in memory or streamed from a CSV file.
+
+    Every ``iter_chunks`` call starts a fresh pass, so algorithms that need two
+    passes (range, then bucketing) never hold a whole file in memory.
+    """
+
+    def __init__(self, dataset: Union[str, Dict[str, List[Any]], List[Dict[str, Any]]]):
+        """Wrap a dataset.
+
+        Args:
+            dataset: Path to a CSV file, a dict of column lists, or a list of row dicts
+
+        Raises:
+            ValueError: If the dataset is none of these (see is_renderable)
+        """
+        if not is_renderable(dataset):
+            raise ValueError("dataset must be an existing CSV file path, a list of row dicts or a dict of column lists")
+        self._arrays: Dict[str, np.ndarray] = {}
+        if isinstance(dataset, str):
+            self.path = os.path.expanduser(dataset)
+            with open(self.path, "r", encoding="utf-8", newline="") as f:
+                self.columns = next(csv.reader(f), [])
+        else:
+            self.path = None
+            if isinstance(dataset, list):
+                names = list(dict.fromkeys(key for row in dataset for key in row))
+                dataset = {name: [row.get(name) for row in dataset] for name in names}
+            self.data = dataset
+            self.columns = list(dataset)
+
+    def _column(self, name: str) -> np.ndarray:
+        """Return an in-memory column as floats, converting it only once."""
+        if name not in self._arrays:
+            self._arrays[name] = _as_floats(self.data[name])
+        return self._arrays[name]
+
+    def iter_chunks(self, names: List[Optional[str]], dropna: bool = True,
+                    chunk_rows: int = CHUNK_ROWS) -> Iterator[Tuple[np.ndarray, ...]]:
+        """Iterate over chunks of the requested columns as float arrays.
+
+        Args:
+            names: Column names; None selects the row index
+            dropna: Drop rows where any requested value is missing or non-numeric
+            chunk_rows: Rows per chunk
+
+        Returns:
+            Iterator over tuples with one array per requested column
+        """
+        for name in names:
+            if name is not None and name not in self.columns:
+                raise ValueError(f"Unknown column '{name}'. Available: {', '.join(self.columns)}")
+
+        def finish(arrays, offset, length):
+            arrays = [np.arange(offset, offset + length, dtype=float) if a is None else a for a in arrays]
+            if dropna and arrays:
+                keep = np.all([~np.isnan(a) for a in arrays], axis=0)
+                arrays = [a[keep] for a in arrays]
+            return tuple(arrays)
+
+        if self.path:
+            with open(self.path, "r", encoding="utf-8", newline="") as f:
+                reader = csv.reader(f)
+                header = next(reader, [])
+                positions = [header.index(name) if name is not None else None for name in names]
+                offset = 0
+                while True:
+                    rows = [row for _, row in zip(range(chunk_rows), reader)]
+                    if not rows:
+                        return
+                    arrays = [None if p is None else _as_floats([row[p] if p < len(row) else None for row in rows])
+                              for p in positions]
+                    yield finish(arrays, offset, len(rows))
+                    offset += len(rows)
+        else:
+            length = max((len(values) for values in self.data.values()), default=0)
+            columns = [None if name is None else self._column(name) for name in names]
+            for start in range(0, length, chunk_rows):
+                arrays = [None if c is None else c[start:start + chunk_rows] for c in columns]
+                yield finish(arrays, start, min(chunk_rows, length - start))
+
+    def fingerprint(self) -> str:
+        """Hash identifying the data, without re-reading large files that are unchanged."""
+        if self.path:
+            return file_fingerprint(self.path)
+        digest = hashlib.sha256()
+        for name in self.columns:
+            digest.update(name.encode("utf-8"))
+            values = self._column(name)
+            digest.update(values.tobytes())
+            if np.isnan(values).any():
+                # Non-numeric content is not captured by the float array
+                digest.update(repr(self.data[name]).encode("utf-8"))
+        return digest.hexdigest()
+
+
+def _value_range(source: DataSource, names: List[Optional[str]]) -> List[Tuple[float, float]]:
+    """Return the (min, max) of each column over rows where every value is present."""
+    low = [math.inf] * len(names)
+    high = [-math.inf] * len(names)
+    for chunk in source.iter_chunks(names):
+        if not len(chunk[0]):
+            continue
+        for d, values in enumerate(chunk):
+            low[d] = min(low[d], float(values.min()))
+            high[d] = max(high[d], float(values.max()))
+    if names and math.isinf(low[0]):
+        raise ValueError("The selected columns contain no numeric values")
+    return list(zip(low, high))
+
+
+def describe(source: DataSource) -> Dict[str, Any]:
+    """Summarize the columns of a dataset: row count and numeric range per column."""
+    names = source.columns
+    rows = 0
+    numeric = [0] * len(names)
+    low = [math.inf] * len(names)
+    high = [-math.inf] * len(names)
+    for chunk in source.iter_chunks(names, dropna=False):
+        rows += len(chunk[0]) if chunk else 0
+        for i, values in enumerate(chunk):
+            values = values[~np.isnan(values)]
+            if len(values):
+                numeric[i] += len(values)
+                low[i] = min(low[i], float(values.min()))
+                high[i] = max(high[i], float(values.max()))
+    columns = {}
+    for i, name in enumerate(names):
+        columns[name] = {"numeric_values": numeric[i]}
+        if numeric[i]:
+            columns[name].update(min=low[i], max=high[i])
+    return {"rows": rows, "columns": columns}
+
+
+def _bucket_index(values: np.ndarray, low: float, high: float, buckets: int) -> np.ndarray:
+    width = (high - low) / buckets if high > low else 1.0
+    return np.minimum(((values - low) / width).astype(np.int64), buckets - 1)
+
+
+def minmax_downsample(source: DataSource, x: Optional[str], y: str, x_range: Tuple[float, float],
+                      buckets: int) -> List[Point]:
+    """Reduce a series to the minimum and maximum y of each x bucket in one pass.
+
+    Args:
+        source: Data source
+        x: X column, or None for the row index
+        y: Y column
+        x_range: (min, max) of x
+        buckets: Number of equal-width x buckets
+
+    Returns:
+        Up to two points per bucket, sorted by x
+    """
+    min_x = np.full(buckets, np.nan)
+    min_y = np.full(buckets, np.inf)
+    max_x = np.full(buckets, np.nan)
+    max_y = np.full(buckets, -np.inf)
+    for xs, ys in source.iter_chunks([x, y]):
+        if not len(xs):
+            continue
+        index = _bucket_index(xs, x_range[0], x_range[1], buckets)
+        order = np.lexsort((ys, index))
+        sorted_index = index[order]
+        present, first = np.unique(sorted_index, return_index=True)
+        last = np.append(first[1:], len(order)) - 1
+        # Smallest y of each bucket is first in the sorted run, largest is last
+        low_rows, high_rows = order[first], order[last]
+        better = ys[low_rows] < min_y[present]
+        min_y[present[better]] = ys[low_rows][better]
+        min_x[present[better]] = xs[low_rows][better]
+        better = ys[high_rows] > max_y[present]
+        max_y[present[better]] = ys[high_rows][better]
+        max_x[present[better]] = xs[high_rows][better]
+    occupied = ~np.isnan(min_x)
+    points = set(zip(min_x[occupied].tolist(), min_y[occupied].tolist()))
+    points.update(zip(max_x[occupied].tolist(), max_y[occupied].tolist()))
+    return sorted(points)
+
+
+def lttb(points: List[Point], threshold: int) -> List[Point]:
+    """Downsample x-sorted points with Largest-Triangle-Three-Buckets.
+
+    Args:
+        points: (x, y) pairs sorted by x
+        threshold: Number of points to keep (at least 3)
+
+    Returns:
+        The selected points, always including the first and last
+    """
+    count = len(points)
+    if threshold >= count or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (count - 2) / (threshold - 2)
+    selected = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, count)
+        next_points = points[next_start:next_end] or [points[-1]]
+        average_x = sum(p[0] for p in next_points) / len(next_points)
+        average_y = sum(p[1] for p in next_points) / len(next_points)
+
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        ax, ay = points[selected]
+        best_area, best = -1.0, start
+        for j in range(start, end):
+            px, py = points[j]
+            area = abs((ax - average_x) * (py - ay) - (ax - px) * (average_y - ay))
+            if area > best_area:
+                best_area, best = area, j
+        sampled.append(points[best])
+        selected = best
+    sampled.append(points[-1])
+    return sampled
+
+
+def bin_aggregate(source: DataSource, names: List[Optional[str]], value_range: Tuple[float, float], bins: int,
+                  aggregate: str = "count") -> Tuple[List[float], List[float]]:
+    """Aggregate a column, or a second column grouped by the first, into equal-width bins.
+
+    Args:
+        source: Data source
+        names: [x] to count values of x, or [x, y] to aggregate y per x bin
+        value_range: (min, max) of x
+        bins: Number of bins
+        aggregate: "count", "sum", "mean", "min" or "max"
+
+    Returns:
+        Tuple of (bin edges, aggregated value per bin)
+    """
+    if aggregate not in ("count", "sum", "mean", "min", "max"):
+        raise ValueError("aggregate must be one of count, sum, mean, min, max")
+    counts = np.zeros(bins)
+    totals = np.zeros(bins)
+    minima = np.full(bins, np.inf)
+    maxima = np.full(bins, -np.inf)
+    for chunk in source.iter_chunks(names):
+        index = _bucket_index(chunk[0], value_range[0], value_range[1], bins)
+        counts += np.bincount(index, minlength=bins)
+        if len(chunk) > 1:
+            totals += np.bincount(index, weights=chunk[1], minlength=bins)
+            np.minimum.at(minima, index, chunk[1])
+            np.maximum.at(maxima, index, chunk[1])
+
+    low, high = value_range
+    width = (high - low) / bins if high > low else 1.0
+    edges = [low + width * i for i in range(bins + 1)]
+    if aggregate == "count" or len(names) == 1:
+        result = counts
+    elif aggregate == "sum":
+        result = totals
+    elif aggregate == "mean":
+        result = np.divide(totals, counts, out=np.zeros(bins), where=counts > 0)
+    else:
+        result = np.where(counts > 0, minima if aggregate == "min" else maxima, 0.0)
+    return edges, result.tolist()
+
+
+def bin_2d(source: DataSource, names: List[Optional[str]], ranges: List[Tuple[float, float]],
+           bins: int) -> List[List[int]]:
+    """Count (x, y) rows on a bins x bins grid; grid[row][column] with row 0 at the lowest y."""
+    grid = np.zeros(bins * bins, dtype=np.int64)
+    for xs, ys in source.iter_chunks(names):
+        cells = _bucket_index(ys, ranges[1][0], ranges[1][1], bins) * bins + \
+            _bucket_index(xs, ranges[0][0], ranges[0][1], bins)
+        grid += np.bincount(cells, minlength=bins * bins)
+    return grid.reshape(bins, bins).tolist()
+
+
+def nice_ticks(low: float, high: float, count: int = 5) -> List[float]:
+    """Return round tick values covering [low, high]."""
+    if high <= low:
+        return [low]
+    raw_step = (high - low) / count
+    magnitude = 10 ** math.floor(math.log10(raw_step))
+    step = next(m * magnitude for m in (1, 2, 2.5, 5, 10) if m * magnitude >= raw_step)
+    first = math.ceil(low / step) * step
+    return [round(first + i * step, 10) for i in range(int((high - first) / step + 1e-9) + 1)]
+
+
+def _format_tick(value: float) -> str:
+    if value == 0:
+        return "0"
+    if abs(value) >= 1e5 or abs(value) < 1e-3:
+        return f"{value:.2g}"
+    return f"{value:g}"
+
+
+def reduce_chart(source: DataSource, spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a dataset and a chart spec into a small drawable chart description.
+
+    Args:
+        source: Data to plot
+        spec: Chart spec with "type", "x", "y" (a column or list of columns) and options
+
+    Returns:
+        Chart description with the reduced series, bars or grid and the axis ranges
+    """
+    chart_type = spec["type"]
+    if chart_type not in CHART_TYPES:
+        raise ValueError(f"Unknown chart type '{chart_type}'. Available: {', '.join(CHART_TYPES)}")
+    x = spec.get("x")
+    ys = spec.get("y") or []
+    ys = [ys] if isinstance(ys, str) else list(ys)
+    max_points = int(spec["max_points"])
+    bins = int(spec["bins"])
+
+    if chart_type in ("histogram", "bar"):
+        if x is None:
+            raise ValueError(f"A {chart_type} chart needs an 'x' column")
+        names = [x] if chart_type == "histogram" or not ys else [x, ys[0]]
+        (value_range,) = _value_range(source, [x])
+        edges, heights = bin_aggregate(source, names, value_range, bins, spec["aggregate"])
+        return {"type": "bars", "edges": edges, "heights": heights,
+                "x_range": (edges[0], edges[-1]), "y_range": (min(0.0, min(heights)), max(heights) or 1.0)}
+
+    if not ys:
+        raise ValueError(f"A {chart_type} chart needs at least one 'y' column")
+
+    if chart_type == "heatmap":
+        ranges = _value_range(source, [x, ys[0]])
+        return {"type": "heatmap", "grid": bin_2d(source, [x, ys[0]], ranges, bins),
+                "x_range": ranges[0], "y_range": ranges[1]}
+
+    series = []
+    for y in ys:
+        x_range, y_range = _value_range(source, [x, y])
+        if chart_type == "line":
+            points = lttb(minmax_downsample(source, x, y, x_range, max_points * MINMAX_RATIO), max_points)
+        else:
+            side = max(1, int(math.sqrt(max_points)))
+            grid = bin_2d(source, [x, y], [x_range, y_range], side)
+            if sum(map(sum, grid)) <= max_points:
+                points = [p for xs, values in source.iter_chunks([x, y]) for p in zip(xs.tolist(), values.tolist())]
+            else:
+                # One point per occupied cell keeps the shape and the outliers
+                x_width = (x_range[1] - x_range[0]) / side
+                y_width = (y_range[1] - y_range[0]) / side
+                points = [(x_range[0] + (c + 0.5) * x_width, y_range[0] + (r + 0.5) * y_width)
+                          for r, row in enumerate(grid) for c, count in enumerate(row) if count]
+        series.append({"name": y, "points": points, "x_range": x_range, "y_range": y_range})
+
+    return {
+        "type": chart_type,
+        "series": series,
+        "x_range": (min(s["x_range"][0] for s in series), max(s["x_range"][1] for s in series)),
+        "y_range": (min(s["y_range"][0] for s in series), max(s["y_range"][1] for s in series)),
+    }
+
+
+
+def _escape(text: Any) -> str:
+    return str(text).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
+def render_svg(chart: Dict[str, Any], spec: Dict[str, Any]) -> str:
+    """Render a reduced chart as an SVG document."""
+    width, height = int(spec["width"]), int(spec["height"])
+    left, right, top, bottom = 70, 20, 40 if spec.get("title") else 20, 50
+    plot_width, plot_height = width - left - right, height - top - bottom
+    (x_low, x_high), (y_low, y_high) = chart["x_range"], chart["y_range"]
+    x_span = (x_high - x_low) or 1.0
+    y_span = (y_high - y_low) or 1.0
+
+    def sx(value: float) -> float:
+        return round(left + (value - x_low) / x_span * plot_width, 2)
+
+    def sy(value: float) -> float:
+        return round(top + plot_height - (value - y_low) / y_span * plot_height, 2)
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" font-family="sans-serif" font-size="11">',
+        f'<rect width="{width}" height="{height}" fill="white"/>',
+    ]
+    if spec.get("title"):
+        parts.append(f'<text x="{width / 2}" y="24" text-anchor="middle" font-size="15">{_escape(spec["title"])}</text>')
+
+    # Axes, ticks and labels
+    parts.append(f'<g stroke="#333"><line x1="{left}" y1="{top + plot_height}" x2="{left + plot_width}" '
+                 f'y2="{top + plot_height}"/><line x1="{left}" y1="{top}" x2="{left}" y2="{top + plot_height}"/></g>')
+    for tick in nice_ticks(x_low, x_high):
+        parts.append(f'<line x1="{sx(tick)}" y1="{top + plot_height}" x2="{sx(tick)}" y2="{top + plot_height + 5}" '
+                     f'stroke="#333"/><text x="{sx(tick)}" y="{top + plot_height + 18}" '
+                     f'text-anchor="middle">{_format_tick(tick)}</text>')
+    for tick in nice_ticks(y_low, y_high):
+        parts.append(f'<line x1="{left - 5}" y1="{sy(tick)}" x2="{left}" y2="{sy(tick)}" stroke="#333"/>'
+                     f'<text x="{left - 8}" y="{sy(tick) + 4}" text-anchor="end">{_format_tick(tick)}</text>')
+    if spec.get("x_label") or spec.get("x"):
+        parts.append(f'<text x="{left + plot_width / 2}" y="{height - 10}" text-anchor="middle">'
+                     f'{_escape(spec.get("x_label") or spec.get("x"))}</text>')
+    if spec.get("y_label"):
+        parts.append(f'<text transform="translate(16 {top + plot_height / 2}) rotate(-90)" '
+                     f'text-anchor="middle">{_escape(spec["y_label"])}</text>')
+
+    if chart["type"] == "bars":
+        edges, heights = chart["edges"], chart["heights"]
+        base = sy(max(y_low, 0.0))
+        for i, value in enumerate(heights):
+            top_y = sy(value)
+            parts.append(f'<rect x="{sx(edges[i])}" y="{min(top_y, base)}" width="{max(sx(edges[i + 1]) - sx(edges[i]) - 1, 0.5)}" '
+                         f'height="{abs(base - top_y)}" fill="{PALETTE[0]}"/>')
+    elif chart["type"] == "heatmap":
+        grid = chart["grid"]
+        rows, columns = len(grid), len(grid[0]) if grid else 0
+        peak = max((max(row) for row in grid), default=0) or 1
+        cell_width, cell_height = plot_width / max(columns, 1), plot_height / max(rows, 1)
+        for r, row in enumerate(grid):
+            for c, count in enumerate(row):
+                if count:
+                    # Log scale so sparse regions stay visible next to dense ones
+                    shade = int(255 - 225 * math.log1p(count) / math.log1p(peak))
+                    parts.append(f'<rect x="{round(left + c * cell_width, 2)}" '
+                                 f'y="{round(top + plot_height - (r + 1) * cell_height, 2)}" '
+                                 f'width="{round(cell_width + 0.5, 2)}" height="{round(cell_height + 0.5, 2)}" '
+                                 f'fill="rgb({shade},{shade},255)"/>')
+    else:
+        for i, series in enumerate(chart["series"]):
+            color = PALETTE[i % len(PALETTE)]
+            if chart["type"] == "line":
+                coordinates = " ".join(f"{sx(x)},{sy(y)}" for x, y in series["points"])
+                parts.append(f'<polyline fill="none" stroke="{color}" stroke-width="1.2" points="{coordinates}"/>')
+            else:
+                parts.append(f'<g fill="{color}" fill-opacity="0.6">' + "".join(
+                    f'<circle cx="{sx(x)}" cy="{sy(y)}" r="2"/>' for x, y in series["points"]) + "</g>")
+        if len(chart["series"]) > 1:
+            for i, series in enumerate(chart["series"]):
+                y = top + 10 + i * 16
+                parts.append(f'<rect x="{left + plot_width - 120}" y="{y - 8}" width="10" height="10" '
+                             f'fill="{PALETTE[i % len(PALETTE)]}"/><text x="{left + plot_width - 105}" y="{y + 1}">'
+                             f'{_escape(series["name"])}</text>')
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+
+def render_png(chart: Dict[str, Any], spec: Dict[str, Any], path: str):
+    """Render a reduced chart to a PNG file with matplotlib's headless backend."""
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError as e:
+        raise ImportError("PNG output requires the optional 'matplotlib' package; use format 'svg'") from e
+
+    dpi = 100
+    figure, axes = plt.subplots(figsize=(int(spec["width"]) / dpi, int(spec["height"]) / dpi), dpi=dpi)
+    try:
+        if chart["type"] == "bars":
+            edges = chart["edges"]
+            axes.bar(edges[:-1], chart["heights"], width=[b - a for a, b in zip(edges, edges[1:])], align="edge")
+        elif chart["type"] == "heatmap":
+            (x_low, x_high), (y_low, y_high) = chart["x_range"], chart["y_range"]
+            axes.imshow(chart["grid"], origin="lower", aspect="auto", extent=(x_low, x_high, y_low, y_high),
+                        cmap="Blues")
+        else:
+            for series in chart["series"]:
+                xs = [p[0] for p in series["points"]]
+                ys = [p[1] for p in series["points"]]
+                if chart["type"] == "line":
+                    axes.plot(xs, ys, linewidth=1.2, label=series["name"])
+                else:
+                    axes.scatter(xs, ys, s=4, alpha=0.6, label=series["name"])
+            if len(chart["series"]) > 1:
+                axes.legend()
+        axes.set_title(spec.get("title", ""))
+        axes.set_xlabel(spec.get("x_label") or spec.get("x") or "")
+        axes.set_ylabel(spec.get("y_label", ""))
+        figure.tight_layout()
+        figure.savefig(path, format="png")
+    finally:
+        plt.close(figure)
+
+
+class ChartRenderer:
+    """Render chart specs against a dataset, caching the files by data hash and spec."""
+
+    def __init__(self, dataset: Union[str, Dict[str, List[Any]], List[Dict[str, Any]]],
+                 output_dir: Optional[str] = None):
+        """Initialize the renderer.
+
+        Args:
+            dataset: Path to a CSV file, a dict of column lists, or a list of row dicts
+            output_dir: Directory for rendered charts, defaults to the shared cache directory
+        """
+        self.source = DataSource(dataset)
+        self.output_dir = output_dir or os.path.join(CACHE_DIR, "charts")
+        self._fingerprint: Optional[str] = None
+
+    @property
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            self._fingerprint = self.source.fingerprint()
+        return self._fingerprint
+
+    def render(self, spec: Dict[str, Any]) -> Dict[str, Any]:
+        """Render a chart spec, or return the cached file if it was rendered before.
+
+        Args:
+            spec: Chart spec; see DEFAULT_SPEC for the options and CHART_TYPES for the types
+
+        Returns:
+            Dictionary with the artifact ``path``, whether it was ``cached`` and the
+            number of ``points`` drawn
+        """
+        spec = dict(DEFAULT_SPEC, **spec)
+        if spec["format"] not in ("svg", "png"):
+            raise ValueError("format must be 'svg' or 'png'")
+        key = content_hash(RENDER_VERSION, self.fingerprint, spec)
+        path = os.path.join(self.output_dir, f"{key}.{spec['format']}")
+        if os.path.exists(path):
+            return {"path": path, "cached": True}
+
+        chart = reduce_chart(self.source, spec)
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        if spec["format"] == "png":
+            render_png(chart, spec, tmp_path)
+        else:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(render_svg(chart, spec))
+        os.replace(tmp_path, path)
+
+        if chart["type"] in ("bars", "heatmap"):
+            drawn = len(chart.get("heights") or []) or sum(len(row) for row in chart["grid"])
+        else:
+            drawn = sum(len(series["points"]) for series in chart["series"])
+        return {"path": path, "cached": False, "points": drawn}
@@ -0,0 +1,312 @@
+"""Content-addressed artifact manifests for the AI Model Reproducibility use case.
+
+Datasets, model weights, configs and environment lockfiles are fingerprinted
+with SHA-256, so the digests match ``sha256sum`` and model hub checksums:
+
+- Files are memory-mapped and hashed in fixed-size slices, so memory use does
+  not grow with the artifact size.
+- Files are hashed in parallel threads; ``hashlib`` releases the GIL while
+  hashing large buffers, so throughput is bounded by the disk.
+- Digests are cached by path, size and modification time, so unchanged
+  multi-GB files are not read again on the next run.
+
+A manifest maps each artifact path to its digest, size and kind, and is
+itself addressed by the hash of its entries. Manifests of two runs can be
+diffed to report exactly which artifacts were added, removed, renamed or
+modified.
+"""
+
+import fnmatch
+import hashlib
+import json
+import mmap
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, List, Optional, Union
+
+from projects.utils import DiskCache, content_hash
+
+# Bump when the manifest layout changes so stale cached manifests are not mixed in
+MANIFEST_VERSION = 1
+
+# Bytes handed to the hash function per update
+HASH_CHUNK_BYTES = 8 << 20
+
+# Directories that never contain run artifacts
+SKIP_DIRS = {".git", ".hg", ".svn", "__pycache__", ".ipynb_checkpoints", ".mypy_cache", ".pytest_cache"}
+
+# Filename patterns used to classify artifacts, checked in order
+ARTIFACT_KINDS = [
+    ("environment", ["requirements*.txt", "*.lock", "Pipfile", "pyproject.toml", "setup.py", "setup.cfg",
+                     "environment.yml", "environment.yaml", "conda-*.yml", "Dockerfile", "*.dockerfile",
+                     "package-lock.json"]),
+    ("weights", ["*.pt", "*.pth", "*.bin", "*.ckpt", "*.safetensors", "*.h5", "*.hdf5", "*.onnx", "*.pb",
+                 "*.tflite", "*.gguf", "*.joblib", "*.pkl", "*.pickle", "*.npz", "*.msgpack"]),
+    ("config", ["*.yaml", "*.yml", "*.json", "*.toml", "*.cfg", "*.ini", "*.conf", "*.gin"]),
+    ("dataset", ["*.csv", "*.tsv", "*.parquet", "*.jsonl", "*.arrow", "*.feather", "*.tfrecord*", "*.npy",
+                 "*.txt", "*.zip", "*.tar", "*.tar.gz", "*.tgz", "*.gz", "*.zst"]),
+    ("code", ["*.py", "*.ipynb", "*.sh", "*.r", "*.jl"]),
+]
+
+
+def artifact_kind(path: str) -> str:
+    """Classify an artifact by its filename."""
+    name = os.path.basename(path).lower()
+    for kind, patterns in ARTIFACT_KINDS:
+        if any(fnmatch.fnmatch(name, pattern.lower()) for pattern in patterns):
+            return kind
+    return "other"
+
+
+def hash_file(path: str, chunk_bytes: int = HASH_CHUNK_BYTES) -> str:
+    """Compute the SHA-256 of a file by streaming over a memory map.
+
+    Args:
+        path: File to hash
+        chunk_bytes: Bytes passed to the hash function per update
+
+    Returns:
+        Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return digest.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                for offset in range(0, size, chunk_bytes):
+                    digest.update(view[offset:offset + chunk_bytes])
+            finally:
+                view.release()
+    return digest.hexdigest()
+
+
+def collect_files(paths: Iterable[str]) -> List[str]:
+    """Expand files and directories into a sorted list of regular files."""
+    files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, subdirectories, names in os.walk(path):
+                subdirectories[:] = [d for d in subdirectories if d not in SKIP_DIRS]
+                files.update(os.path.join(directory, name) for name in names)
+        elif os.path.isfile(path):
+            files.add(path)
+        else:
+            raise ValueError(f"Artifact not found: {path}")
+    return sorted(files)
+
+
+class ArtifactHasher:
+    """Hash artifact files in parallel, reusing digests of unchanged files."""
+
+    def __init__(self, cache: Optional[DiskCache] = None, workers: Optional[int] = None):
+        """Initialize the hasher.
+
+        Args:
+            cache: Digest cache, defaults to the shared on-disk cache
+            workers: Number of hashing threads, defaults to the CPU count
+        """
+        self.cache = cache if cache is not None else DiskCache("artifact_hashes")
+        self.workers = workers or min(32, os.cpu_count() or 1)
+
+    def _hash(self, path: str, verify: bool) -> Dict[str, Any]:
+        stat = os.stat(path)
+        key = content_hash(os.path.abspath(path), stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        digest = None if verify else self.cache.get(key)
+        if digest is None:
+            digest = hash_file(path)
+            self.cache.set(key, digest)
+        return {"sha256": digest, "size": stat.st_size}
+
+    def hash_files(self, files: List[str], verify: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Hash files, largest first so big artifacts do not end up last in the queue.
+
+        Args:
+            files: Files to hash
+            verify: Ignore cached digests and read every file again
+
+        Returns:
+            Dictionary mapping each file to its digest and size
+        """
+        ordered = sorted(files, key=lambda path: os.path.getsize(path), reverse=True)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = executor.map(lambda path: self._hash(path, verify), ordered)
+            return dict(zip(ordered, results))
+
+
+def build_manifest(paths: Iterable[str], root: Optional[str] = None, hasher: Optional[ArtifactHasher] = None,
+                   verify: bool = False) -> Dict[str, Any]:
+    """Fingerprint artifacts into a content-addressed manifest.
+
+    Args:
+        paths: Files or directories containing the run's artifacts
+        root: Directory the manifest paths are relative to, defaults to the common parent
+        hasher: Hasher to use, defaults to a parallel hasher with the shared cache
+        verify: Ignore cached digests and read every file again
+
+    Returns:
+        Manifest with the artifact entries and the manifest ``digest``
+    """
+    files = collect_files(paths)
+    if root is None:
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(f)) for f in files]) if files else os.getcwd()
+    hashes = (hasher or ArtifactHasher()).hash_files(files, verify=verify)
+
+    artifacts = {}
+    for path in files:
+        name = os.path.relpath(os.path.abspath(path), root).replace(os.sep, "/")
+        artifacts[name] = dict(hashes[path], kind=artifact_kind(path))
+    return {
+        "version": MANIFEST_VERSION,
+        "digest": content_hash(MANIFEST_VERSION, artifacts),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "root": os.path.abspath(root),
+        "artifacts": artifacts,
+    }
+
+
+def save_manifest(manifest: Dict[str, Any], cache: Optional[DiskCache] = None) -> str:
+    """Store a manifest under its digest and return the digest."""
+    cache = cache if cache is not None else DiskCache("artifact_manifests")
+    cache.set(manifest["digest"], manifest)
+    return manifest["digest"]
+
+
+def load_manifest(reference: Union[str, Dict[str, Any]], cache: Optional[DiskCache] = None) -> Dict[str, Any]:
+    """Load a manifest given as a dictionary, a JSON file path or a stored digest.
+
+    Raises:
+        ValueError: If the reference does not resolve to a manifest
+    """
+    if isinstance(reference, dict):
+        manifest = reference
+    elif os.path.isfile(reference):
+        with open(reference, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    else:
+        manifest = (cache if cache is not None else DiskCache("artifact_manifests")).get(reference)
+    if not isinstance(manifest, dict) or "artifacts" not in manifest:
+        raise ValueError(f"Unknown manifest: {reference if isinstance(reference, str) else '<dict>'}")
+    return manifest
+
+
+def diff_manifests(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Compare two manifests.
+
+    Args:
+        old: Baseline manifest
+        new: Current manifest
+
+    Returns:
+        Dictionary of ``added``, ``removed``, ``modified`` and ``renamed`` entries and
+        the number of ``unchanged`` artifacts
+    """
+    old_artifacts, new_artifacts = old["artifacts"], new["artifacts"]
+    added = {name: entry for name, entry in new_artifacts.items() if name not in old_artifacts}
+    removed = {name: entry for name, entry in old_artifacts.items() if name not in new_artifacts}
+
+    # A removed and an added file with the same content is a rename
+    removed_by_hash: Dict[str, List[str]] = {}
+    for name in sorted(removed):
+        removed_by_hash.setdefault(removed[name]["sha256"], []).append(name)
+    renamed = []
+    for name in sorted(added):
+        candidates = removed_by_hash.get(added[name]["sha256"])
+        if candidates:
+            old_name = candidates.pop(0)
+            renamed.append({"from": old_name, "to": name, "kind": added[name]["kind"]})
+            del removed[old_name]
+    for rename in renamed:
+        del added[rename["to"]]
+
+    modified = []
+    unchanged = 0
+    for name in sorted(set(old_artifacts) & set(new_artifacts)):
+        before, after = old_artifacts[name], new_artifacts[name]
+        if before["sha256"] == after["sha256"]:
+            unchanged += 1
+        else:
+            modified.append({"path": name, "kind": after["kind"], "old_sha256": before["sha256"],
+                             "new_sha256": after["sha256"], "size_change": after["size"] - before["size"]})
+
+    return {
+        "old_digest": old.get("digest"),
+        "new_digest": new.get("digest"),
+        "identical": old.get("digest") == new.get("digest") or not (added or removed or renamed or modified),
+        "added": [dict(entry, path=name) for name, entry in sorted(added.items())],
+        "removed": [dict(entry, path=name) for name, entry in sorted(removed.items())],
+        "renamed": renamed,
+        "modified": modified,
+        "unchanged": unchanged,
+    }
+
+
+def summarize_manifest(manifest: Dict[str, Any]) -> Dict[str, Any]:
+    """Count artifacts and bytes per kind."""
+    kinds: Dict[str, Dict[str, int]] = {}
+    for entry in manifest["artifacts"].values():
+        totals = kinds.setdefault(entry["kind"], {"files": 0, "bytes": 0})
+        totals["files"] += 1
+        totals["bytes"] += entry["size"]
+    return {"digest": manifest["digest"], "artifacts": len(manifest["artifacts"]), "kinds": kinds}
+
+
+def format_diff(diff: Dict[str, Any], limit: int = 20) -> str:
+    """Format a manifest diff as a compact text report for the agents.
+
+    Args:
+        diff: Result of diff_manifests
+        limit: Maximum number of entries listed per section
+
+    Returns:
+        Report with one line per changed artifact
+    """
+    if diff["identical"]:
+        return f"All {diff['unchanged']} artifacts are identical to the baseline manifest {(diff['old_digest'] or '')[:12]}."
+    lines = [f"Artifact changes since manifest {(diff['old_digest'] or '')[:12]} "
+             f"({diff['unchanged']} artifacts unchanged):"]
+    sections = [
+        ("Modified", diff["modified"], lambda e: f"{e['path']} [{e['kind']}] {e['old_sha256'][:12]} -> "
+                                                 f"{e['new_sha256'][:12]} ({e['size_change']:+d} bytes)"),
+        ("Added", diff["added"], lambda e: f"{e['path']} [{e['kind']}] {e['sha256'][:12]}"),
+        ("Removed", diff["removed"], lambda e: f"{e['path']} [{e['kind']}] {e['sha256'][:12]}"),
+        ("Renamed", diff["renamed"], lambda e: f"{e['from']} -> {e['to']} [{e['kind']}]"),
+    ]
+    for title, entries, describe in sections:
+        if entries:
+            lines.append(f"{title} ({len(entries)}):")
+            lines.extend(f"- {describe(entry)}" for entry in entries[:limit])
+            if len(entries) > limit:
+                lines.append(f"- ... and {len(entries) - limit} more")
+    return "\n".join(lines)
+
+
+def run_artifact_tool(query: str, baseline: Optional[str] = None) -> str:
+    """Tool entry point: fingerprint artifacts and diff them against a baseline.
+
+    Args:
+        query: JSON object with "paths" (files or directories) and an optional
+            "baseline" (manifest digest or manifest JSON file)
+        baseline: Baseline used when the query does not name one
+
+    Returns:
+        JSON summary of the manifest and, if there is a baseline, the diff report
+    """
+    try:
+        request = json.loads(query)
+        if isinstance(request, list):
+            request = {"paths": request}
+        paths = request["paths"]
+        paths = [paths] if isinstance(paths, str) else list(paths)
+        manifest = build_manifest(paths, root=request.get("root"))
+        save_manifest(manifest)
+        result = summarize_manifest(manifest)
+        reference = request.get("baseline", baseline)
+        if reference:
+            result["diff"] = format_diff(diff_manifests(load_manifest(reference), manifest))
+        return json.dumps(result)
+    except (KeyError, TypeError, ValueError, OSError) as e:
+        return f"Error: {e}"
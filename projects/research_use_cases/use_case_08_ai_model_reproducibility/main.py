@@ -1,4 +1,4 @@
-"""AI Model Reproducibility example using CrewAI with Ollama."""
+"""AI Model Reproducibility example using CrewAI with Ollama."""
 
 import sys
 import os
@@ -9,13 +9,56 @@ from typing import Dict, Any, Optional
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
 
 from crewai import Agent, Task, Crew, Process
+from langchain.tools import Tool
 from projects.utils import UseCase
+from projects.research_use_cases.use_case_08_ai_model_reproducibility.artifacts import (
+    build_manifest, diff_manifests, format_diff, load_manifest, run_artifact_tool, save_manifest,
+    summarize_manifest
+)
 
 class AIModelReproducibilityUseCase(UseCase):
     """AI Model Reproducibility use case implementation."""
     
+    # The verification checklist is ticked off item by item, so the result is structured
+    output_schema = {
+        "type": "object",
+        "properties": {
+            "steps": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "step": {"type": "string"},
+                        "details": {"type": "string"},
+                    },
+                    "required": ["step"],
+                },
+            },
+            "checklist": {"type": "array", "items": {"type": "string"}},
+            "summary": {"type": "string"},
+        },
+        "required": ["steps", "checklist", "summary"],
+    }
+    
+    # Manifest of the run's artifacts and the baseline it is compared with, set up in setup_tasks
+    manifest: Optional[Dict[str, Any]] = None
+    baseline_manifest: Optional[str] = None
+    
+    def _init_artifact_tool(self):
+        """Initialize the artifact fingerprinting tool."""
+        return Tool(
+            name="artifact_fingerprint",
+            func=lambda query: run_artifact_tool(query, self.baseline_manifest),
+            description="Fingerprints datasets, model weights, configs and environment lockfiles with SHA-256 "
+                        "and stores a content-addressed manifest. Input is a JSON object: {\"paths\": [files or "
+                        "directories], \"baseline\": optional manifest digest or manifest file to diff against}. "
+                        "Returns the manifest digest, artifact counts per kind and a report of changed artifacts."
+        )
+    
     def setup_agents(self):
         """Set up agents for AI model reproducibility."""
+        artifact_tool = self._init_artifact_tool()
+        
         self.code_analyst = Agent(
             role="ML Code Analyst",
             goal="Analyze AI model code for reproducibility factors",
@@ -25,7 +68,7 @@ class AIModelReproducibilityUseCase(UseCase):
                      "and environment dependencies. You can recommend best practices for reproducible AI.",
             allow_delegation=False,
             llm=self.llm,
-            tools=self.tools,
+            tools=self.tools + [artifact_tool],
             verbose=True
         )
         
@@ -51,7 +94,7 @@ class AIModelReproducibilityUseCase(UseCase):
                       "version control best practices, and documentation requirements for reproducibility.",
             allow_delegation=False,
             llm=self.llm,
-            tools=self.tools,
+            tools=self.tools + [artifact_tool],
             verbose=True
         )
         
@@ -70,7 +113,20 @@ class AIModelReproducibilityUseCase(UseCase):
         # Prepare model context if provided
         model_context = ""
         if input_data and "model_details" in input_data:
-            model_context = f"Use the following model details for analysis: {json.dumps(input_data['model_details'])}"
+            model_context = f"Use the following model details for analysis: {self.format_input(input_data['model_details'])}"
+        
+        self.manifest = None
+        self.baseline_manifest = input_data.get("baseline_manifest") if input_data else None
+        if input_data and input_data.get("artifacts"):
+            # Fingerprint the artifacts up front; agents get the digests and a diff, not the files
+            artifacts = input_data["artifacts"]
+            self.manifest = build_manifest([artifacts] if isinstance(artifacts, str) else artifacts)
+            save_manifest(self.manifest)
+            model_context += (f"\nThe run's artifacts were fingerprinted into manifest {self.manifest['digest']}: "
+                              f"{json.dumps(summarize_manifest(self.manifest)['kinds'])}")
+            if self.baseline_manifest:
+                diff = diff_manifests(load_manifest(self.baseline_manifest), self.manifest)
+                model_context += f"\n{format_diff(diff)}"
         
         # Define tasks
         code_analysis_task = Task(
@@ -99,7 +155,8 @@ class AIModelReproducibilityUseCase(UseCase):
                       f"Based on the code and data analyses, create a detailed protocol covering environment "
                       f"setup, code execution, data handling, and result validation. Include specific steps for "
                       f"containerization, dependency management, configuration tracking, and documentation. "
-                      f"Provide a checklist for researchers to verify reproducibility of the model.",
+                      f"Provide a checklist for researchers to verify reproducibility of the model. If artifacts were "
+                      f"fingerprinted, pin them by their manifest digests and explain any changed artifacts.",
             expected_output="A complete reproducibility protocol with implementation steps and verification checklist.",
             agent=self.reproducibility_engineer,
             context=[code_analysis_task, data_evaluation_task]
@@ -111,14 +168,15 @@ class AIModelReproducibilityUseCase(UseCase):
 # Create instance for standalone usage
 ai_model_reproducibility = AIModelReproducibilityUseCase()
 
-def run(input_data: Optional[Dict[str, Any]] = None) -> str:
+def run(input_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Run the AI model reproducibility use case.
     
     Args:
         input_data: Optional dictionary containing input data
         
     Returns:
-        The result of the AI model reproducibility process
+        The result of the AI model reproducibility process, matching AIModelReproducibilityUseCase.output_schema,
+        with the artifact manifest digest under "artifact_manifest"
     """
     # Create a new instance to ensure clean state
     use_case = AIModelReproducibilityUseCase()
@@ -127,7 +185,11 @@ def run(input_data: Optional[Dict[str, Any]] = None) -> str:
     use_case.setup_crew(Process.sequential)
     
     # Run the use case
-    result = use_case.crew.kickoff()
+    result = use_case.kickoff()
+    
+    # Record the manifest so a later run can be diffed against it
+    if use_case.manifest:
+        result["artifact_manifest"] = use_case.manifest["digest"]
     return result
 
 if __name__ == "__main__":
@@ -0,0 +1,261 @@
+"""Map-reduce summarization of long papers for the Research Paper Summarization use case.
+
+Papers are split on section boundaries, packed into chunks that fit a token
+budget, summarized concurrently, and then reduced level by level until a
+single digest remains. ``asummarize`` does the same on asyncio with the
+model's native async client, so many papers can be condensed concurrently
+without a thread per LLM call. Every LLM call is cached by the hash of its prompt
+inputs, so re-summarizing an edited paper only pays for the changed chunks
+and the reduce steps above them.
+"""
+
+import asyncio
+import contextvars
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional, Tuple
+
+from projects.utils import DiskCache, content_hash, estimate_tokens
+
+# Common section titles in research papers, matched case-insensitively on their own line
+SECTION_NAMES = (
+    "abstract", "introduction", "background", "related work", "preliminaries", "method", "methods",
+    "methodology", "approach", "materials and methods", "experiments", "experimental setup",
+    "evaluation", "results", "discussion", "limitations", "conclusion", "conclusions",
+    "future work", "acknowledgements", "acknowledgments", "references", "appendix",
+)
+
+# Numbered headings must start with a capital letter, so numbered list items are not taken for headings
+HEADING_PATTERN = re.compile(
+    r"^\s*(?:#{1,6}\s+.+"                                         # Markdown headings
+    r"|(?:\d+(?:\.\d+)*\.?|[IVX]+\.)\s+(?-i:[A-Z])[^\n]{0,80}"   # Numbered headings, e.g. "2.1 Methods"
+    r"|(?:" + "|".join(SECTION_NAMES) + r")\s*:?)\s*$",           # Bare section names
+    re.IGNORECASE | re.MULTILINE,
+)
+
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+# Bumped whenever the prompts change so stale cached summaries are not reused
+PROMPT_VERSION = 1
+
+MAP_PROMPT = (
+    "You are summarizing one part of the research paper '{query}'.\n"
+    "Section(s): {title}\n\n{text}\n\n"
+    "Write a dense summary of this part covering research questions, methods, "
+    "findings and limitations it mentions. Do not add information that is not in the text."
+)
+
+REDUCE_PROMPT = (
+    "Combine the following partial summaries of the research paper '{query}' into one "
+    "coherent summary. Keep all key findings, methods, numbers and limitations.\n\n{text}"
+)
+
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """Split a paper into (title, body) sections on heading lines.
+
+    Args:
+        text: Full paper text
+
+    Returns:
+        List of sections in document order. Text before the first heading is
+        returned under the title "Preamble".
+    """
+    sections = []
+    title = "Preamble"
+    position = 0
+    for match in HEADING_PATTERN.finditer(text):
+        body = text[position:match.start()].strip()
+        if body:
+            sections.append((title, body))
+        title = match.group(0).strip().lstrip("#").strip().rstrip(":")
+        position = match.end()
+    body = text[position:].strip()
+    if body:
+        sections.append((title, body))
+    return sections
+
+
+def _split_oversized(text: str, max_tokens: int) -> List[str]:
+    """Split text that exceeds the budget on paragraphs, then sentences, then characters."""
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+
+    for pattern in ("\n\n", SENTENCE_PATTERN):
+        parts = text.split(pattern) if isinstance(pattern, str) else pattern.split(text)
+        if len(parts) > 1:
+            pieces, current = [], ""
+            for part in parts:
+                candidate = f"{current} {part}".strip() if current else part
+                if current and estimate_tokens(candidate) > max_tokens:
+                    pieces.append(current)
+                    current = part
+                else:
+                    current = candidate
+            if current:
+                pieces.append(current)
+            if len(pieces) > 1:
+                return [chunk for piece in pieces for chunk in _split_oversized(piece, max_tokens)]
+
+    max_chars = max_tokens * 4
+    return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+
+
+def pack_chunks(sections: List[Tuple[str, str]], max_tokens: int) -> List[Tuple[str, str]]:
+    """Greedily pack consecutive sections into chunks that fit a token budget.
+
+    Args:
+        sections: (title, body) pairs from split_sections
+        max_tokens: Maximum estimated tokens per chunk
+
+    Returns:
+        List of (titles, text) chunks
+    """
+    chunks = []
+    titles, texts, used = [], [], 0
+    for title, body in sections:
+        for piece in _split_oversized(body, max_tokens):
+            size = estimate_tokens(piece)
+            if texts and used + size > max_tokens:
+                chunks.append((", ".join(titles), "\n\n".join(texts)))
+                titles, texts, used = [], [], 0
+            if title not in titles:
+                titles.append(title)
+            texts.append(piece)
+            used += size
+    if texts:
+        chunks.append((", ".join(titles), "\n\n".join(texts)))
+    return chunks
+
+
+class ChunkedSummarizer:
+    """Summarize long documents with a cached, concurrent map-reduce over chunks."""
+
+    def __init__(self, llm: Any, model_name: str = "", max_chunk_tokens: int = 1500,
+                 max_workers: int = 4, cache: Optional[DiskCache] = None):
+        """Initialize the summarizer.
+
+        Args:
+            llm: Language model with an ``invoke(prompt)`` method, and ``ainvoke(prompt)``
+                for asummarize
+            model_name: Model name, part of the cache key
+            max_chunk_tokens: Token budget for each map or reduce prompt's input text
+            max_workers: Number of concurrent LLM calls
+            cache: Cache for chunk and reduce summaries
+        """
+        self.llm = llm
+        self.model_name = model_name
+        self.max_chunk_tokens = max_chunk_tokens
+        self.max_workers = max_workers
+        self.cache = cache if cache is not None else DiskCache("chunk_summaries")
+        self.cache_hits = 0
+        self.llm_calls = 0
+        self._counts_lock = threading.Lock()
+
+    def _cached(self, prompt: str) -> Tuple[str, Optional[str]]:
+        key = content_hash(PROMPT_VERSION, self.model_name, prompt)
+        cached = self.cache.get(key)
+        with self._counts_lock:
+            if cached is not None:
+                self.cache_hits += 1
+            else:
+                self.llm_calls += 1
+        return key, cached
+
+    def _complete(self, prompt: str) -> str:
+        key, cached = self._cached(prompt)
+        if cached is not None:
+            return cached
+        summary = str(self.llm.invoke(prompt)).strip()
+        self.cache.set(key, summary)
+        return summary
+
+    async def _acomplete(self, prompt: str, slots: asyncio.Semaphore) -> str:
+        key, cached = self._cached(prompt)
+        if cached is not None:
+            return cached
+        async with slots:
+            summary = str(await self.llm.ainvoke(prompt)).strip()
+        self.cache.set(key, summary)
+        return summary
+
+    def _map(self, prompts: List[str]) -> List[str]:
+        # Calls keep the caller's context, such as the scheduling class and user of a batch run
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, self._complete, prompt) for prompt in prompts]
+            return [future.result() for future in futures]
+
+    async def _amap(self, prompts: List[str], slots: asyncio.Semaphore) -> List[str]:
+        return list(await asyncio.gather(*(self._acomplete(prompt, slots) for prompt in prompts)))
+
+    def _group(self, summaries: List[str]) -> List[List[str]]:
+        """Group consecutive summaries so each group fits the chunk budget (at least two per group)."""
+        groups, current, used = [], [], 0
+        for summary in summaries:
+            size = estimate_tokens(summary)
+            if len(current) >= 2 and used + size > self.max_chunk_tokens:
+                groups.append(current)
+                current, used = [], 0
+            current.append(summary)
+            used += size
+        if current:
+            groups.append(current)
+        return groups
+
+    def _map_prompts(self, text: str, query: str) -> List[str]:
+        return [
+            MAP_PROMPT.format(query=query, title=title, text=chunk_text)
+            for title, chunk_text in pack_chunks(split_sections(text), self.max_chunk_tokens)
+        ]
+
+    def _reduce_level(self, summaries: List[str], query: str) -> Tuple[List[str], List[str]]:
+        """Split one reduce level into the prompts to run and the summaries carried up unchanged."""
+        groups = self._group(summaries)
+        prompts = [REDUCE_PROMPT.format(query=query, text="\n\n---\n\n".join(group))
+                   for group in groups if len(group) > 1]
+        # A trailing single summary is carried up to the next level unchanged
+        return prompts, [group[0] for group in groups if len(group) == 1]
+
+    def summarize(self, text: str, query: str = "") -> str:
+        """Summarize a document of any length.
+
+        Args:
+            text: Full document text
+            query: Paper title or description used in the prompts
+
+        Returns:
+            A single summary of the whole document
+        """
+        prompts = self._map_prompts(text, query)
+        if not prompts:
+            return ""
+
+        summaries = self._map(prompts)
+
+        # Hierarchical reduce until a single summary remains
+        while len(summaries) > 1:
+            prompts, carried = self._reduce_level(summaries, query)
+            summaries = self._map(prompts) + carried
+        return summaries[0]
+
+    async def asummarize(self, text: str, query: str = "") -> str:
+        """Summarize a document of any length on asyncio, with at most max_workers LLM calls in flight.
+
+        Args:
+            text: Full document text
+            query: Paper title or description used in the prompts
+
+        Returns:
+            A single summary of the whole document, identical to summarize()
+        """
+        prompts = self._map_prompts(text, query)
+        if not prompts:
+            return ""
+
+        slots = asyncio.Semaphore(self.max_workers)
+        summaries = await self._amap(prompts, slots)
+        while len(summaries) > 1:
+            prompts, carried = self._reduce_level(summaries, query)
+            summaries = await self._amap(prompts, slots) + carried
+        return summaries[0]
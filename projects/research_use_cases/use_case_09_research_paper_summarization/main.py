@@ -1,18 +1,39 @@
 """Research Paper Summarization example using CrewAI with Ollama."""
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import sys
 import os
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from projects.utils import UseCase
+from projects.utils import UseCase, estimate_tokens
+from projects.research_use_cases.use_case_09_research_paper_summarization.chunking import ChunkedSummarizer
 from crewai import Agent, Task
 
 class ResearchPaperSummarizationUseCase(UseCase):
     """Research Paper Summarization use case implementation."""
     
+    # Summaries are indexed by section, so the result is structured
+    output_schema = {
+        "type": "object",
+        "properties": {
+            "research_questions": {"type": "array", "items": {"type": "string"}},
+            "methodology": {"type": "string"},
+            "key_findings": {"type": "array", "items": {"type": "string"}},
+            "significance": {"type": "string"},
+            "limitations": {"type": "array", "items": {"type": "string"}},
+            "future_directions": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["research_questions", "methodology", "key_findings", "significance"],
+    }
+    
+    # Papers longer than this are condensed with a map-reduce pass before the crew runs
+    max_inline_tokens = 3000
+    
+    # Token budget for each chunk of a long paper
+    max_chunk_tokens = 1500
+    
     def setup_agents(self):
         """Set up the specialist agents for the Research Paper Summarization use case."""
         
@@ -54,19 +75,30 @@ class ResearchPaperSummarizationUseCase(UseCase):
         # Add agents to the list
         self.agents = [self.content_analyst, self.literature_contextualizer, self.summary_writer]
     
-    def setup_tasks(self, input_data: Dict[str, Any]):
+    def setup_tasks(self, input_data: Dict[str, Any], paper_digest: Optional[str] = None):
         """Set up tasks for the Research Paper Summarization use case.
         
         Args:
             input_data (Dict[str, Any]): Input data containing query and paper_content.
+            paper_digest (Optional[str]): Digest of a long paper that was already condensed.
         """
         query = input_data.get("query", "")
         paper_content = input_data.get("paper_content", "")
         
+        # Long papers are summarized chunk by chunk so the prompt fits the model context
+        content_label = "Paper Content"
+        if estimate_tokens(paper_content) > self.max_inline_tokens:
+            if paper_digest is None:
+                summarizer = ChunkedSummarizer(self.llm, model_name=self.model_name,
+                                               max_chunk_tokens=self.max_chunk_tokens)
+                paper_digest = summarizer.summarize(paper_content, query)
+            paper_content = paper_digest
+            content_label = "Paper Digest (condensed section by section from the full text)"
+        
         # Task 1: Analyze Paper Content
         task_analyze = Task(
             description=f"Analyze the following research paper: '{query}'. \n\n"
-                      f"Paper Content: {paper_content}\n\n"
+                      f"{content_label}: {paper_content}\n\n"
                       f"Extract key findings, methodologies, research questions, and contributions. "
                       f"Identify the main arguments and evidence presented.",
             agent=self.content_analyst
@@ -96,22 +128,52 @@ class ResearchPaperSummarizationUseCase(UseCase):
         
         # Add tasks to the list
         self.tasks = [task_analyze, task_contextualize, task_summarize]
+    
+    async def asetup_tasks(self, input_data: Dict[str, Any]):
+        """Set up tasks, condensing a long paper with the model's async client.
+        
+        Args:
+            input_data (Dict[str, Any]): Input data containing query and paper_content.
+        """
+        paper_content = input_data.get("paper_content", "")
+        paper_digest = None
+        if estimate_tokens(paper_content) > self.max_inline_tokens:
+            summarizer = ChunkedSummarizer(self.llm, model_name=self.model_name,
+                                           max_chunk_tokens=self.max_chunk_tokens)
+            paper_digest = await summarizer.asummarize(paper_content, input_data.get("query", ""))
+        self.setup_tasks(input_data, paper_digest=paper_digest)
 
 
-def run(input_data: Dict[str, Any]) -> str:
+def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
     """Run the Research Paper Summarization use case.
     
     Args:
         input_data (Dict[str, Any]): Input data containing query and optionally paper_content.
         
     Returns:
-        str: The result of the use case execution.
+        Dict[str, Any]: The result of the use case execution, matching ResearchPaperSummarizationUseCase.output_schema.
     """
     use_case = ResearchPaperSummarizationUseCase()
     use_case.setup_agents()
     use_case.setup_tasks(input_data)
     use_case.setup_crew()
-    return use_case.crew.kickoff()
+    return use_case.kickoff()
+
+
+async def arun(input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Run the Research Paper Summarization use case from asyncio code.
+    
+    Args:
+        input_data (Dict[str, Any]): Input data containing query and optionally paper_content.
+        
+    Returns:
+        Dict[str, Any]: The result of the use case execution, matching ResearchPaperSummarizationUseCase.output_schema.
+    """
+    use_case = ResearchPaperSummarizationUseCase()
+    use_case.setup_agents()
+    await use_case.asetup_tasks(input_data)
+    use_case.setup_crew()
+    return await use_case.arun()
     
 
 if __name__ == "__main__":
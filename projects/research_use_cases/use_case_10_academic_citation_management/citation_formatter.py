@@ -0,0 +1,309 @@
+"""Deterministic bibliography formatting for the Academic Citation Management use case.
+
+Each citation style is a set of templates, one per entry type. A template is
+compiled once into literal and field segments (cached with ``lru_cache``), so
+formatting an entry is a simple join and thousands of entries format per
+second. Optional parts of a template are wrapped in square brackets and are
+dropped when any field inside them is empty, e.g. ``[, {pages}]``; literal
+brackets are doubled, like braces in ``str.format``.
+
+Entries the engine cannot format confidently (unknown type, missing required
+fields, unparseable authors) are still formatted on a best-effort basis but
+flagged as ambiguous so only those need review.
+"""
+
+import re
+from functools import lru_cache
+from string import Formatter
+from typing import Dict, Any, List, Optional, Tuple
+
+# Templates per style and entry type; *text* marks italics (Markdown)
+STYLE_TEMPLATES = {
+    "APA": {
+        "article": "{authors} ({year}). {title}. *{journal}*[, *{volume}*][({issue})][, {pages}].[ {doi_url}]",
+        "book": "{authors} ({year}). *{title}*[ ({edition} ed.)]. {publisher}.[ {doi_url}]",
+        "inproceedings": "{authors} ({year}). {title}. In *{booktitle}*[ (pp. {pages})][. {publisher}].[ {doi_url}]",
+        "web": "{authors} ({year}). *{title}*. {url}",
+    },
+    "MLA": {
+        "article": "{authors}. \"{title}.\" *{journal}*[, vol. {volume}][, no. {issue}], {year}[, pp. {pages}].[ {doi_url}.]",
+        "book": "{authors}. *{title}*.[ {edition} ed.,] {publisher}, {year}.",
+        "inproceedings": "{authors}. \"{title}.\" *{booktitle}*[, {publisher}], {year}[, pp. {pages}].",
+        "web": "{authors}. *{title}*. {year}, {url}.",
+    },
+    "CHICAGO": {
+        "article": "{authors}. \"{title}.\" *{journal}*[ {volume}][, no. {issue}] ({year})[: {pages}].[ {doi_url}.]",
+        "book": "{authors}. *{title}*.[ {edition} ed.] {publisher}, {year}.",
+        "inproceedings": "{authors}. \"{title}.\" In *{booktitle}*[, {pages}].[ {publisher},] {year}.",
+        "web": "{authors}. \"{title}.\" {year}. {url}.",
+    },
+    "IEEE": {
+        "article": "[[{number}]] {authors}, \"{title},\" *{journal}*[, vol. {volume}][, no. {issue}][, pp. {pages}], {year}[, doi: {doi}].",
+        "book": "[[{number}]] {authors}, *{title}*[, {edition} ed]. {publisher}, {year}.",
+        "inproceedings": "[[{number}]] {authors}, \"{title},\" in *{booktitle}*, {year}[, pp. {pages}][, doi: {doi}].",
+        "web": "[[{number}]] {authors}, \"{title}.\" {url} ({year}).",
+    },
+}
+
+STYLE_ALIASES = {"APA7": "APA", "MLA9": "MLA", "CHICAGO AUTHOR-DATE": "CHICAGO", "CMS": "CHICAGO"}
+
+# Fields without which an entry of each type is flagged as ambiguous
+REQUIRED_FIELDS = {
+    "article": ("authors", "title", "year", "journal"),
+    "book": ("authors", "title", "year", "publisher"),
+    "inproceedings": ("authors", "title", "year", "booktitle"),
+    "web": ("title", "url"),
+}
+
+CORPORATE_WORDS = ("group", "consortium", "organization", "organisation", "institute", "association",
+                   "committee", "society", "council", "agency", "university", "team", "foundation")
+
+MAX_APA_AUTHORS = 20
+
+_OPTIONAL_PATTERN = re.compile(r"\[([^\[\]]*\{[^\[\]]*\}[^\[\]]*)\]")
+
+# Placeholders for escaped literal brackets while optional groups are parsed
+_LITERAL_BRACKETS = (("[[", "\x00"), ("]]", "\x01"))
+
+
+@lru_cache(maxsize=None)
+def compile_template(template: str) -> Tuple[Tuple[bool, Tuple[Tuple[str, Optional[str]], ...]], ...]:
+    """Compile a template into (optional, ((literal, field), ...)) groups.
+
+    Args:
+        template: Template string with ``{field}`` placeholders and ``[...]`` optional groups
+
+    Returns:
+        Tuple of groups ready for rendering
+    """
+    for escaped, placeholder in _LITERAL_BRACKETS:
+        template = template.replace(escaped, placeholder)
+
+    groups = []
+    position = 0
+    for match in _OPTIONAL_PATTERN.finditer(template):
+        if match.start() > position:
+            groups.append((False, template[position:match.start()]))
+        groups.append((True, match.group(1)))
+        position = match.end()
+    if position < len(template):
+        groups.append((False, template[position:]))
+
+    def unescape(literal):
+        return literal.replace("\x00", "[").replace("\x01", "]")
+
+    formatter = Formatter()
+    return tuple(
+        (optional, tuple((unescape(literal), field) for literal, field, _, _ in formatter.parse(text)))
+        for optional, text in groups
+    )
+
+
+def render_template(template: str, fields: Dict[str, str]) -> str:
+    """Render a template, dropping optional groups with empty fields."""
+    output = []
+    for optional, segments in compile_template(template):
+        values = [fields.get(field) or "" for _, field in segments if field]
+        if optional and not all(values):
+            continue
+        output.extend(literal + (fields.get(field) or "" if field else "") for literal, field in segments)
+    return "".join(output)
+
+
+def parse_author(name: str) -> Tuple[str, List[str], bool]:
+    """Split an author name into family name and given names.
+
+    Args:
+        name: "Last, First Middle" or "First Middle Last"
+
+    Returns:
+        Tuple of (family name, given names, is_corporate)
+    """
+    name = " ".join(str(name).split()).strip()
+    if any(word in name.lower().split() for word in CORPORATE_WORDS):
+        return name, [], True
+    if "," in name:
+        last, _, first = name.partition(",")
+        return last.strip(), first.replace(".", ". ").split(), False
+    parts = name.replace(".", ". ").split()
+    if len(parts) < 2:
+        return name, [], False
+    # Keep particles such as "van", "de" or "von" with the family name
+    split = len(parts) - 1
+    while split > 1 and parts[split - 1].islower():
+        split -= 1
+    return " ".join(parts[split:]), parts[:split], False
+
+
+def _initials(given: List[str], separator: str = " ") -> str:
+    return separator.join(
+        "-".join(f"{piece[0]}." for piece in part.split("-") if piece) for part in given if part
+    )
+
+
+def _join(names: List[str], conjunction: str, serial_comma: bool = False) -> str:
+    # Three or more names always take the serial comma; serial_comma also puts one between two
+    # names, as APA, MLA and Chicago do after an inverted first author
+    if len(names) <= 1:
+        return "".join(names)
+    if len(names) == 2:
+        return f"{names[0]}{',' if serial_comma else ''} {conjunction} {names[1]}"
+    return ", ".join(names[:-1]) + f", {conjunction} {names[-1]}"
+
+
+def format_authors(authors: List[Tuple[str, List[str], bool]], style: str) -> str:
+    """Format a parsed author list according to a citation style."""
+    if not authors:
+        return ""
+
+    def inverted(author, initials_only):
+        last, given, corporate = author
+        if corporate or not given:
+            return last
+        return f"{last}, {_initials(given) if initials_only else ' '.join(given)}"
+
+    def direct(author):
+        last, given, corporate = author
+        if corporate or not given:
+            return last
+        return f"{_initials(given)} {last}"
+
+    if style == "APA":
+        names = [inverted(author, True) for author in authors]
+        if len(names) > MAX_APA_AUTHORS:
+            return ", ".join(names[:MAX_APA_AUTHORS - 1]) + ", . . . " + names[-1]
+        return _join(names, "&", serial_comma=True)
+    if style == "MLA":
+        if len(authors) >= 3:
+            return f"{inverted(authors[0], False)}, et al"
+        names = [inverted(authors[0], False)] + [" ".join(a[1] + [a[0]]) for a in authors[1:]]
+        return _join(names, "and", serial_comma=True)
+    if style == "CHICAGO":
+        names = [inverted(authors[0], False)] + [" ".join(a[1] + [a[0]]) for a in authors[1:]]
+        return _join(names, "and", serial_comma=True)
+    # IEEE
+    names = [direct(author) for author in authors]
+    if len(names) > 6:
+        return f"{names[0]} et al."
+    return _join(names, "and")
+
+
+def _authors_list(value: Any) -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [part for part in re.split(r"\s+and\s+|;|&", value) if part.strip()]
+    return [str(author) for author in value]
+
+
+def infer_entry_type(reference: Dict[str, Any]) -> Optional[str]:
+    """Infer the entry type from the fields present."""
+    entry_type = str(reference.get("type") or "").lower()
+    aliases = {"journal": "article", "paper": "article", "conference": "inproceedings",
+               "proceedings": "inproceedings", "chapter": "inproceedings", "website": "web", "online": "web"}
+    entry_type = aliases.get(entry_type, entry_type)
+    if entry_type in REQUIRED_FIELDS:
+        return entry_type
+    if reference.get("journal"):
+        return "article"
+    if reference.get("booktitle"):
+        return "inproceedings"
+    if reference.get("publisher") or reference.get("isbn"):
+        return "book"
+    if reference.get("url") and not reference.get("doi"):
+        return "web"
+    return None
+
+
+def format_reference(reference: Dict[str, Any], style: str, number: int = 1) -> Tuple[str, List[str]]:
+    """Format a single reference.
+
+    Args:
+        reference: Reference record
+        style: Citation style name (APA, MLA, Chicago or IEEE)
+        number: Position in the bibliography, used by numeric styles
+
+    Returns:
+        Tuple of (formatted entry, list of reasons the entry is ambiguous)
+    """
+    style = normalize_style(style)
+    if style is None:
+        raise ValueError("Unsupported citation style")
+
+    reasons = []
+    entry_type = infer_entry_type(reference)
+    if entry_type is None:
+        reasons.append("unknown entry type")
+        entry_type = "article"
+
+    authors = [parse_author(name) for name in _authors_list(reference.get("authors") or reference.get("author"))]
+    if any(not given and not corporate for _, given, corporate in authors):
+        reasons.append("author names could not be split into given and family names")
+
+    year = str(reference.get("year") or "")
+    if year and not re.fullmatch(r"\d{4}[a-z]?", year):
+        reasons.append(f"non-standard year '{year}'")
+
+    doi = str(reference.get("doi") or "")
+    fields = {
+        "number": str(number),
+        "authors": format_authors(authors, style),
+        "year": year or "n.d.",
+        "title": str(reference.get("title") or "").strip().rstrip("."),
+        "journal": reference.get("journal") or "",
+        "booktitle": reference.get("booktitle") or "",
+        "publisher": reference.get("publisher") or "",
+        "volume": str(reference.get("volume") or ""),
+        "issue": str(reference.get("issue") or reference.get("number") or ""),
+        "pages": str(reference.get("pages") or "").replace("--", "–").replace("-", "–"),
+        "edition": str(reference.get("edition") or ""),
+        "url": reference.get("url") or "",
+        "doi": doi,
+        "doi_url": f"https://doi.org/{doi}" if doi else reference.get("url") or "",
+    }
+    missing = [field for field in REQUIRED_FIELDS[entry_type] if not (reference.get(field) or fields.get(field))]
+    if missing:
+        reasons.append(f"missing {', '.join(missing)}")
+
+    return render_template(STYLE_TEMPLATES[style][entry_type], fields), reasons
+
+
+def normalize_style(style: str) -> Optional[str]:
+    """Map a style name to a supported style key, or None if unsupported."""
+    key = str(style or "").strip().upper()
+    key = STYLE_ALIASES.get(key, key)
+    return key if key in STYLE_TEMPLATES else None
+
+
+def _sort_key(reference: Dict[str, Any]) -> Tuple[str, str, str]:
+    authors = _authors_list(reference.get("authors") or reference.get("author"))
+    first = parse_author(authors[0])[0].lower() if authors else str(reference.get("title") or "").lower()
+    return first, str(reference.get("year") or ""), str(reference.get("title") or "").lower()
+
+
+def format_bibliography(references: List[Dict[str, Any]], style: str) -> Dict[str, Any]:
+    """Format a bibliography.
+
+    Author-date styles are sorted by first author, year and title; IEEE keeps
+    the given (citation) order.
+
+    Args:
+        references: Reference records
+        style: Citation style name
+
+    Returns:
+        Dictionary with the formatted ``entries`` and the ``ambiguous`` entries
+        (position, formatted text, reasons) that need review
+    """
+    key = normalize_style(style)
+    if key is None:
+        raise ValueError(f"Unsupported citation style '{style}'. Supported: {', '.join(STYLE_TEMPLATES)}")
+
+    ordered = references if key == "IEEE" else sorted(references, key=_sort_key)
+    entries, ambiguous = [], []
+    for number, reference in enumerate(ordered, start=1):
+        text, reasons = format_reference(reference, key, number)
+        entries.append(text)
+        if reasons:
+            ambiguous.append({"position": number, "entry": text, "reasons": reasons})
+    return {"style": key, "entries": entries, "ambiguous": ambiguous}
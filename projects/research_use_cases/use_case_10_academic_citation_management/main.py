@@ -1,4 +1,4 @@
-"""Academic Citation Management example using CrewAI with Ollama."""
+"""Academic Citation Management example using CrewAI with Ollama."""
 
 import sys
 import os
@@ -10,10 +10,51 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.
 
 from crewai import Agent, Task, Crew, Process
 from projects.utils import UseCase
+from projects.research_use_cases.use_case_10_academic_citation_management.reference_index import ReferenceIndex
+from projects.research_use_cases.use_case_10_academic_citation_management.citation_formatter import (
+    format_bibliography, normalize_style
+)
+
+# Maximum number of deduplicated references listed in full in the task description
+MAX_LISTED_REFERENCES = 100
+
+# Characters of a flagged bibliography entry kept to identify it in the task description
+MAX_ENTRY_CHARS = 160
 
 class AcademicCitationManagementUseCase(UseCase):
     """Academic Citation Management use case implementation."""
     
+    # Corrected entries replace formatted ones by position, so the result is structured
+    output_schema = {
+        "type": "object",
+        "properties": {
+            "entries": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "position": {"type": "integer", "minimum": 1},
+                        "entry": {"type": "string"},
+                    },
+                    "required": ["entry"],
+                },
+            },
+            "tools": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "name": {"type": "string"},
+                        "reason": {"type": "string"},
+                    },
+                    "required": ["name"],
+                },
+            },
+            "workflow": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["entries", "tools"],
+    }
+    
     def setup_agents(self):
         """Set up agents for academic citation management."""
         self.reference_librarian = Agent(
@@ -68,18 +109,27 @@ class AcademicCitationManagementUseCase(UseCase):
         research_topic = input_data.get("query", "Machine learning applications in climate science") if input_data else "Machine learning applications in climate science"
         citation_style = input_data.get("citation_style", "APA") if input_data else "APA"
         
-        # Prepare references context if provided
+        # Deduplicate and validate references deterministically; agents only see what is left to resolve
         references_context = ""
+        self.resolved_references = []
         if input_data and "references" in input_data:
-            references_context = f"Use the following references for analysis: {json.dumps(input_data['references'])}"
+            resolution = ReferenceIndex(input_data["references"]).resolve()
+            self.resolved_references = resolution["references"]
+            references_context = self._references_context(resolution, len(input_data["references"]))
+        
+        # Format the bibliography deterministically; the agent only handles flagged edge cases
+        self.bibliography = None
+        if self.resolved_references and normalize_style(citation_style):
+            self.bibliography = format_bibliography(self.resolved_references, citation_style)
         
         # Define tasks
         reference_organization_task = Task(
             description=f"Organize and validate academic references for research on '{research_topic}'. {references_context}\n"
-                       f"Review the provided references, ensuring each citation is complete with all required metadata "
-                       f"(authors, year, title, journal/publisher, DOI, etc.). Identify any missing or inconsistent "
-                       f"information. Organize references by category (e.g., primary research, reviews, methodological, "
-                       f"theoretical) and recency. Flag any potentially problematic references.",
+                       f"Review the provided references. Exact and near-exact duplicates have already been merged and "
+                       f"missing metadata (authors, year, title, DOI, etc.) has already been detected; resolve the listed "
+                       f"conflicts and suggest how to complete the missing information. Organize references by category "
+                       f"(e.g., primary research, reviews, methodological, theoretical) and recency. Flag any potentially "
+                       f"problematic references.",
             expected_output=f"A comprehensive organization of references with validation notes and categorization.",
             agent=self.reference_librarian,
         )
@@ -95,32 +145,109 @@ class AcademicCitationManagementUseCase(UseCase):
             context=[reference_organization_task]
         )
         
+        if self.bibliography:
+            ambiguous = self.bibliography["ambiguous"]
+            if ambiguous:
+                # Entries are identified by position, reasons and the start of their text, not reproduced in full
+                flagged = [{"position": entry["position"], "reasons": entry["reasons"],
+                            "entry": self._shorten(entry["entry"])} for entry in ambiguous[:MAX_LISTED_REFERENCES]]
+                edge_cases = (f"The formatter flagged {len(ambiguous)} entries as ambiguous. "
+                              f"Provide a corrected {citation_style} entry for each of them only: "
+                              f"{json.dumps(flagged)}" + self._omitted(len(ambiguous), "ambiguous entries"))
+            else:
+                edge_cases = "The formatter flagged no ambiguous entries."
+            bibliography_description = (
+                f"The bibliography of {len(self.bibliography['entries'])} references has already been formatted "
+                f"in {citation_style} style and will be attached to the final report; do not reproduce it. {edge_cases}\n"
+                f"Recommend a citation management workflow and tools that would be most suitable for ongoing research "
+                f"on this topic, considering factors like collaboration needs, integration with writing software, and "
+                f"discipline-specific requirements."
+            )
+            bibliography_output = (f"Corrected {citation_style} entries for the flagged references and recommendations "
+                                   f"for citation management tools and workflows.")
+        else:
+            bibliography_description = (
+                f"Create a properly formatted bibliography in {citation_style} style and recommend a citation management system. "
+                f"Based on the reference validation and citation analysis, format the complete bibliography according "
+                f"to {citation_style} guidelines. Identify any challenging formatting cases and provide appropriate solutions. "
+                f"Recommend a citation management workflow and tools that would be most suitable for ongoing research "
+                f"on this topic, considering factors like collaboration needs, integration with writing software, and "
+                f"discipline-specific requirements."
+            )
+            bibliography_output = f"A formatted bibliography in {citation_style} style and recommendations for citation management tools and workflows."
+        
         bibliography_management_task = Task(
-            description=f"Create a properly formatted bibliography in {citation_style} style and recommend a citation management system. "
-                      f"Based on the reference validation and citation analysis, format the complete bibliography according "
-                      f"to {citation_style} guidelines. Identify any challenging formatting cases and provide appropriate solutions. "
-                      f"Recommend a citation management workflow and tools that would be most suitable for ongoing research "
-                      f"on this topic, considering factors like collaboration needs, integration with writing software, and "
-                      f"discipline-specific requirements.",
-            expected_output=f"A formatted bibliography in {citation_style} style and recommendations for citation management tools and workflows.",
+            description=bibliography_description,
+            expected_output=bibliography_output,
             agent=self.bibliography_specialist,
             context=[reference_organization_task, citation_analysis_task]
         )
         
         # Add tasks to the list
         self.tasks = [reference_organization_task, citation_analysis_task, bibliography_management_task]
+    
+    def _references_context(self, resolution: Dict[str, Any], total: int) -> str:
+        """Describe the reference index results compactly for the task description.
+        
+        Args:
+            resolution: Output of ReferenceIndex.resolve()
+            total: Number of references provided
+            
+        Returns:
+            Task description text with the unresolved conflicts and missing metadata
+        """
+        references = resolution["references"]
+        by_index = {reference["index"]: reference for reference in references}
+        
+        def brief(reference: Dict[str, Any]) -> Dict[str, Any]:
+            return {key: reference[key] for key in ("index", "authors", "year", "title", "doi")
+                    if reference.get(key) not in (None, "", [])}
+        
+        parts = [f"{total} references were provided; after automatic deduplication "
+                 f"({len(resolution['duplicates'])} duplicate groups merged) {len(references)} unique references remain."]
+        if len(references) <= MAX_LISTED_REFERENCES:
+            parts.append(f"References: {json.dumps([brief(reference) for reference in references])}")
+        else:
+            parts.append(f"The {len(references)} references are too many to list in full.")
+        if resolution["conflicts"]:
+            conflicts = [
+                dict(conflict, entries=[brief(by_index.get(i) or {"index": i}) for i in conflict["references"]])
+                for conflict in resolution["conflicts"][:MAX_LISTED_REFERENCES]
+            ]
+            parts.append(f"Unresolved conflicts to decide: {json.dumps(conflicts)}"
+                         + self._omitted(len(resolution["conflicts"]), "conflicts"))
+        else:
+            parts.append("There are no unresolved duplicate conflicts.")
+        missing = resolution["missing_metadata"]
+        if missing:
+            parts.append(f"References with missing metadata: {json.dumps(missing[:MAX_LISTED_REFERENCES])}"
+                         + self._omitted(len(missing), "references with missing metadata"))
+        return "\n".join(parts)
+    
+    @staticmethod
+    def _shorten(text: str) -> str:
+        """Cut a formatted entry to the characters that identify it."""
+        return text if len(text) <= MAX_ENTRY_CHARS else text[:MAX_ENTRY_CHARS - 3].rstrip() + "..."
+    
+    @staticmethod
+    def _omitted(count: int, what: str) -> str:
+        """Note how many entries of a list were left out of the task description."""
+        if count <= MAX_LISTED_REFERENCES:
+            return ""
+        return f" ({count - MAX_LISTED_REFERENCES} more {what} not listed, {count} in total.)"
 
 # Create instance for standalone usage
 academic_citation_management = AcademicCitationManagementUseCase()
 
-def run(input_data: Optional[Dict[str, Any]] = None) -> str:
+def run(input_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Run the academic citation management use case.
     
     Args:
         input_data: Optional dictionary containing input data
         
     Returns:
-        The result of the academic citation management process
+        The result of the academic citation management process, matching
+        AcademicCitationManagementUseCase.output_schema, with the formatted bibliography under "bibliography"
     """
     # Create a new instance to ensure clean state
     use_case = AcademicCitationManagementUseCase()
@@ -129,7 +256,12 @@ def run(input_data: Optional[Dict[str, Any]] = None) -> str:
     use_case.setup_crew(Process.sequential)
     
     # Run the use case
-    result = use_case.crew.kickoff()
+    result = use_case.kickoff()
+    
+    # Attach the deterministically formatted bibliography
+    if use_case.bibliography:
+        result["bibliography"] = {"style": use_case.bibliography["style"],
+                                  "entries": use_case.bibliography["entries"]}
     return result
 
 if __name__ == "__main__":
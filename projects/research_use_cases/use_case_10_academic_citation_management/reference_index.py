@@ -0,0 +1,312 @@
+"""Deterministic reference deduplication for the Academic Citation Management use case.
+
+References are matched in three passes:
+
+1. Exact matches on normalized DOI, ISBN-13 and normalized title, via hashing.
+2. Fuzzy title matches found with MinHash signatures and LSH banding, then
+   verified with the exact Jaccard similarity of the title words.
+3. Author names are normalized to "lastname initial" so author lists can be
+   compared and merged consistently.
+
+Clear duplicates are merged automatically. Only borderline title matches and
+merges with conflicting metadata are reported as conflicts for the agents.
+"""
+
+import hashlib
+import re
+import struct
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+DOI_PATTERN = re.compile(r"10\.\d{4,9}/[^\s\"<>]+", re.IGNORECASE)
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Metadata every complete reference should have
+REQUIRED_FIELDS = ("authors", "title", "year")
+
+# MinHash / LSH parameters: 8 bands of 3 rows puts the match threshold near 0.5 Jaccard
+NUM_BANDS = 8
+BAND_ROWS = 3
+NUM_PERMUTATIONS = NUM_BANDS * BAND_ROWS
+
+# Verified Jaccard similarity above which titles are merged automatically,
+# and the lower bound for reporting a possible duplicate to the agents
+AUTO_MERGE_SIMILARITY = 0.85
+CONFLICT_SIMILARITY = 0.6
+
+# Cap on pairwise comparisons inside one LSH bucket (titles made of very common words)
+MAX_BUCKET_COMPARISONS = 50
+
+_HASH_STRUCT = struct.Struct(f"<{NUM_PERMUTATIONS}I")
+
+
+def _strip_accents(text: str) -> str:
+    if text.isascii():
+        return text
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+
+def normalize_doi(value: Optional[str]) -> Optional[str]:
+    """Normalize a DOI or DOI URL to its lowercase ``10.xxxx/...`` form."""
+    if not value:
+        return None
+    match = DOI_PATTERN.search(str(value))
+    return match.group(0).rstrip(".,;").lower() if match else None
+
+
+def normalize_isbn(value: Optional[str]) -> Optional[str]:
+    """Normalize an ISBN-10 or ISBN-13 to ISBN-13 digits."""
+    if not value:
+        return None
+    digits = re.sub(r"[^0-9Xx]", "", str(value)).upper()
+    if len(digits) == 10:
+        core = "978" + digits[:9]
+        check = (10 - sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(core)) % 10) % 10
+        return core + str(check)
+    return digits if len(digits) == 13 and digits.isdigit() else None
+
+
+def normalize_title(title: Optional[str]) -> str:
+    """Lowercase a title and strip accents, punctuation and extra whitespace."""
+    return " ".join(WORD_PATTERN.findall(_strip_accents(str(title or "")).lower()))
+
+
+def normalize_author(name: str) -> str:
+    """Normalize an author name to ``"lastname initial"``.
+
+    Handles "Last, First", "First Middle Last" and "F. Last" forms.
+    """
+    name = _strip_accents(name).strip().strip(".")
+    if not name:
+        return ""
+    if "," in name:
+        last, _, first = name.partition(",")
+    else:
+        parts = name.split()
+        last, first = parts[-1], " ".join(parts[:-1])
+    last = " ".join(WORD_PATTERN.findall(last.lower()))
+    initial = next((c for c in first.lower() if c.isalpha()), "")
+    return f"{last} {initial}".strip()
+
+
+def normalize_authors(authors: Union[str, List[str], None]) -> List[str]:
+    """Normalize an author list given as a list or an "and"/";"-separated string."""
+    if not authors:
+        return []
+    if isinstance(authors, str):
+        authors = re.split(r"\s+and\s+|;|&", authors)
+    return [normalized for normalized in (normalize_author(str(a)) for a in authors) if normalized]
+
+
+def _token_hashes(token: str) -> Tuple[int, ...]:
+    """Hash a token under NUM_PERMUTATIONS independent 32-bit hash functions at once."""
+    return _HASH_STRUCT.unpack(hashlib.shake_128(token.encode("utf-8")).digest(_HASH_STRUCT.size))
+
+
+def _jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def _coerce(reference: Union[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Turn a free-text citation into a minimal record."""
+    if isinstance(reference, dict):
+        return dict(reference)
+    text = str(reference)
+    record = {"title": text}
+    doi = normalize_doi(text)
+    if doi:
+        record["doi"] = doi
+    year = re.search(r"\b(1[89]\d{2}|20\d{2})\b", text)
+    if year:
+        record["year"] = year.group(1)
+    return record
+
+
+class _DisjointSet:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, item: int) -> int:
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, a: int, b: int):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            # Keep the earliest reference as the canonical one
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+class ReferenceIndex:
+    """Index of bibliography entries that resolves duplicates deterministically."""
+
+    def __init__(self, references: List[Union[str, Dict[str, Any]]]):
+        """Build the index.
+
+        Args:
+            references: Reference records (dicts with title, authors, year, doi, isbn, ...)
+                or free-text citation strings
+        """
+        self.records = [_coerce(reference) for reference in references]
+        self.titles = [normalize_title(record.get("title")) for record in self.records]
+        self.title_tokens = [set(title.split()) for title in self.titles]
+        self.authors = [normalize_authors(record.get("authors") or record.get("author")) for record in self.records]
+        self.dois = [normalize_doi(record.get("doi")) for record in self.records]
+        self.isbns = [normalize_isbn(record.get("isbn")) for record in self.records]
+
+    def _exact_matches(self, sets: _DisjointSet, reasons: Dict[Tuple[int, int], str], conflicts: List[Dict[str, Any]]):
+        for name, keys in (("doi", self.dois), ("isbn", self.isbns), ("title", self.titles)):
+            first_seen: Dict[str, int] = {}
+            for i, key in enumerate(keys):
+                if not key:
+                    continue
+                if key not in first_seen:
+                    first_seen[key] = i
+                    continue
+                first = first_seen[key]
+                # Identifiers are authoritative; identical titles still need compatible metadata
+                metadata_conflicts = self._metadata_conflicts(first, i) if name == "title" else []
+                if metadata_conflicts:
+                    conflicts.append({
+                        "references": [first, i],
+                        "reason": "identical titles with different metadata",
+                        "title_similarity": 1.0,
+                        "conflicting_fields": metadata_conflicts,
+                    })
+                else:
+                    sets.union(first, i)
+                    reasons.setdefault((first, i), name)
+
+    def _fuzzy_candidates(self) -> set:
+        """Return index pairs whose titles share at least one LSH band."""
+        bands: List[Dict[int, List[int]]] = [defaultdict(list) for _ in range(NUM_BANDS)]
+        seen_titles = set()
+        token_hashes: Dict[str, Tuple[int, ...]] = {}
+        for i, tokens in enumerate(self.title_tokens):
+            # Identical titles are already matched exactly; only sign one of them
+            if not tokens or self.titles[i] in seen_titles:
+                continue
+            seen_titles.add(self.titles[i])
+            hashes = []
+            for token in tokens:
+                if token not in token_hashes:
+                    token_hashes[token] = _token_hashes(token)
+                hashes.append(token_hashes[token])
+            # Column-wise minimum over the tokens is the MinHash signature
+            signature = list(map(min, zip(*hashes)))
+            for band, buckets in enumerate(bands):
+                row = band * BAND_ROWS
+                key = 0
+                for value in signature[row:row + BAND_ROWS]:
+                    key = (key << 32) | value
+                buckets[key].append(i)
+
+        pairs = set()
+        for buckets in bands:
+            for members in buckets.values():
+                if len(members) < 2:
+                    continue
+                for position, i in enumerate(members):
+                    for j in members[position + 1:position + 1 + MAX_BUCKET_COMPARISONS]:
+                        pairs.add((i, j))
+        return pairs
+
+    def _metadata_conflicts(self, i: int, j: int) -> List[str]:
+        """List metadata fields on which two references disagree."""
+        conflicts = []
+        for field, values in (("doi", self.dois), ("isbn", self.isbns)):
+            if values[i] and values[j] and values[i] != values[j]:
+                conflicts.append(field)
+        year_i, year_j = self.records[i].get("year"), self.records[j].get("year")
+        if year_i and year_j and str(year_i) != str(year_j):
+            conflicts.append("year")
+        if self.authors[i] and self.authors[j] and self.authors[i][0].split()[0] != self.authors[j][0].split()[0]:
+            conflicts.append("authors")
+        return conflicts
+
+    def resolve(self) -> Dict[str, Any]:
+        """Deduplicate the references.
+
+        Returns:
+            Dictionary with the merged ``references``, the automatic ``duplicates``
+            merges, unresolved ``conflicts`` for review and ``missing_metadata``
+        """
+        sets = _DisjointSet(len(self.records))
+        reasons: Dict[Tuple[int, int], str] = {}
+        conflicts = []
+
+        self._exact_matches(sets, reasons, conflicts)
+
+        for i, j in sorted(self._fuzzy_candidates()):
+            if sets.find(i) == sets.find(j):
+                continue
+            similarity = _jaccard(self.title_tokens[i], self.title_tokens[j])
+            if similarity < CONFLICT_SIMILARITY:
+                continue
+            metadata_conflicts = self._metadata_conflicts(i, j)
+            if similarity >= AUTO_MERGE_SIMILARITY and not metadata_conflicts:
+                sets.union(i, j)
+                reasons.setdefault((i, j), "similar_title")
+            else:
+                conflicts.append({
+                    "references": [i, j],
+                    "reason": "possible duplicate",
+                    "title_similarity": round(similarity, 2),
+                    "conflicting_fields": metadata_conflicts,
+                })
+
+        clusters: Dict[int, List[int]] = defaultdict(list)
+        for i in range(len(self.records)):
+            clusters[sets.find(i)].append(i)
+
+        references, duplicates, missing_metadata = [], [], []
+        for canonical, members in sorted(clusters.items()):
+            merged, field_conflicts = self._merge(members)
+            merged["index"] = canonical
+            references.append(merged)
+            if len(members) > 1:
+                duplicates.append({
+                    "canonical": canonical,
+                    "merged": members[1:],
+                    "reasons": sorted({reasons.get((a, b), "transitive") for a in members for b in members if a < b
+                                       and (a, b) in reasons}),
+                })
+            if field_conflicts:
+                conflicts.append({
+                    "references": members,
+                    "reason": "duplicates disagree on metadata",
+                    "conflicting_fields": field_conflicts,
+                })
+            missing = [field for field in REQUIRED_FIELDS if not merged.get(field)]
+            if not (merged.get("doi") or merged.get("isbn") or merged.get("url")):
+                missing.append("doi")
+            if missing:
+                missing_metadata.append({"reference": canonical, "missing": missing})
+
+        return {
+            "references": references,
+            "duplicates": duplicates,
+            "conflicts": conflicts,
+            "missing_metadata": missing_metadata,
+        }
+
+    def _merge(self, members: List[int]) -> Tuple[Dict[str, Any], List[str]]:
+        """Merge duplicate records, filling gaps from later records and noting disagreements."""
+        merged = dict(self.records[members[0]])
+        field_conflicts = set()
+        for i in members[1:]:
+            for field, value in self.records[i].items():
+                if value in (None, "", []):
+                    continue
+                if merged.get(field) in (None, "", []):
+                    merged[field] = value
+                elif field in ("year", "doi", "isbn") and str(merged[field]).lower() != str(value).lower():
+                    if field == "doi" and normalize_doi(merged[field]) == normalize_doi(value):
+                        continue
+                    field_conflicts.add(field)
+        if merged.get("doi"):
+            merged["doi"] = normalize_doi(merged["doi"]) or merged["doi"]
+        return merged, sorted(field_conflicts)
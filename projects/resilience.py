@@ -0,0 +1,577 @@
+"""Deadlines, retries, hedged requests and circuit breaking for LLM calls.
+
+Every generation of the project's Ollama LLM runs under a Resilience policy:
+
+- Deadlines: the whole generation must finish within "deadline" seconds,
+  the first response line must arrive within "first_token_timeout", and no
+  gap between lines may exceed "stall_timeout". A missed deadline raises
+  DeadlineExceeded instead of stalling the crew.
+- Retries: a generation that fails before any output arrived, because its
+  host failed or timed out, is retried up to "retries" times with
+  exponential backoff and jitter, on another host when there is one.
+- Hedging: when the first line takes longer than the "hedge_percentile"
+  of recent first-line latencies of the model, a duplicate request goes to
+  a second host and whichever answers first wins; the other is cancelled.
+- Circuit breaking: after "breaker_threshold" consecutive failures a host's
+  circuit opens and calls to it fail fast with CircuitOpenError for
+  "breaker_cooldown" seconds, after which one trial call may close it.
+
+Settings default to RESILIENCE_DEFAULTS, overridden by the JSON object in
+CREW_AI_RESILIENCE and then by a use case's resilience attribute; None turns
+a mechanism off. Counters of every mechanism are kept per policy name.
+"""
+
+import asyncio
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Dict, Any, AsyncIterator, Callable, Iterator, List, Optional, Tuple
+
+RESILIENCE_DEFAULTS = {
+    "deadline": 600.0,
+    "first_token_timeout": 180.0,
+    "stall_timeout": 60.0,
+    "retries": 2,
+    "backoff": 1.0,
+    "max_backoff": 8.0,
+    "hedge_percentile": 95.0,
+    "hedge_min_samples": 20,
+    "breaker_threshold": 5,
+    "breaker_cooldown": 30.0,
+}
+
+# First-line latencies kept per model for the hedging threshold
+LATENCY_SAMPLES = 200
+
+# Exception class names of HTTP clients that mean the host, not the request, failed
+_CONNECTION_ERRORS = {"ConnectionError", "ConnectTimeout", "ReadTimeout", "Timeout", "ClientConnectionError",
+                      "ClientConnectorError", "ServerDisconnectedError", "ServerTimeoutError"}
+
+_END = object()
+
+_breakers: Dict[str, "CircuitBreaker"] = {}
+_metrics: Dict[str, "ResilienceMetrics"] = {}
+_registry_lock = threading.Lock()
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a generation misses one of its deadlines."""
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of calling a host whose circuit is open."""
+
+
+def is_backend_failure(error: BaseException) -> bool:
+    """Whether an error means the host failed, so the request may be retried on another host."""
+    if isinstance(error, (OSError, asyncio.TimeoutError)):
+        return True
+    if any(cls.__name__ in _CONNECTION_ERRORS for cls in type(error).__mro__):
+        return True
+    return bool(re.search(r"status code 5\d\d", str(error)))
+
+
+def resilience_settings(overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Merge RESILIENCE_DEFAULTS, CREW_AI_RESILIENCE and overrides into one settings dictionary."""
+    settings = dict(RESILIENCE_DEFAULTS)
+    configured = os.environ.get("CREW_AI_RESILIENCE")
+    for source in (json.loads(configured) if configured else {}, overrides or {}):
+        unknown = set(source) - set(RESILIENCE_DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown resilience settings: {', '.join(sorted(unknown))}")
+        settings.update(source)
+    return settings
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker of one host."""
+
+    def __init__(self):
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        return "closed" if self.opened_at is None else "open"
+
+    def allow(self, cooldown: Optional[float]) -> bool:
+        """Whether a call may go to the host; after the cooldown one trial call is let through."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < (cooldown or 0.0) or self.trial_running:
+                return False
+            self.trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self, threshold: Optional[int]) -> bool:
+        """Count a failure and return whether it opened the circuit."""
+        with self._lock:
+            self.failures += 1
+            failed_trial = self.trial_running
+            self.trial_running = False
+            if failed_trial or (self.opened_at is None and threshold and self.failures >= threshold):
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+
+class ResilienceMetrics:
+    """Counters of the resilience mechanisms and recent first-line latencies."""
+
+    COUNTERS = ("calls", "successes", "failures", "timeouts", "retries", "hedges", "hedge_wins",
+                "breaker_rejections", "breaker_trips")
+
+    def __init__(self):
+        self.counts = dict.fromkeys(self.COUNTERS, 0)
+        self.latencies: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counts[name] += amount
+
+    def add_latency(self, model: str, seconds: float):
+        with self._lock:
+            self.latencies.setdefault(model, deque(maxlen=LATENCY_SAMPLES)).append(seconds)
+
+    def latency_percentile(self, model: str, q: float, min_samples: int) -> Optional[float]:
+        """Return the q-th percentile of recent first-line latencies, or None with too few samples."""
+        with self._lock:
+            samples = sorted(self.latencies.get(model, ()))
+        if not samples or len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(round((len(samples) - 1) * q / 100)))]
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counts)
+
+
+def breaker_for(url: str) -> CircuitBreaker:
+    """Return the process-wide circuit breaker of a host."""
+    with _registry_lock:
+        return _breakers.setdefault(url, CircuitBreaker())
+
+
+def resilience_metrics(name: str) -> ResilienceMetrics:
+    """Return the process-wide metrics of a policy name."""
+    with _registry_lock:
+        return _metrics.setdefault(name, ResilienceMetrics())
+
+
+class Resilience:
+    """Resilience settings of one use case, or of the process default, and their metrics."""
+
+    def __init__(self, name: str = "default", overrides: Optional[Dict[str, Any]] = None):
+        """Initialize the policy.
+
+        Args:
+            name: Name the metrics are kept under, usually the use case class name
+            overrides: Settings overriding the defaults and CREW_AI_RESILIENCE
+        """
+        self.name = name
+        self.settings = resilience_settings(overrides)
+        self.metrics = resilience_metrics(name)
+
+    def backoff(self, retry: int) -> float:
+        """Seconds to wait before the retry-th retry (from 0): exponential, with jitter."""
+        ceiling = min(self.settings["max_backoff"] or 0.0, (self.settings["backoff"] or 0.0) * 2 ** retry)
+        return random.uniform(ceiling / 2, ceiling)
+
+    def hedge_delay(self, model: str, hosts: int) -> Optional[float]:
+        """Seconds without a first line after which a hedged request starts, or None."""
+        q = self.settings["hedge_percentile"]
+        if q is None or hosts < 2:
+            return None
+        return self.metrics.latency_percentile(model, q, self.settings["hedge_min_samples"] or 1)
+
+    def allow(self, url: str) -> bool:
+        """Whether the circuit of a host lets a call through, counting rejections."""
+        if breaker_for(url).allow(self.settings["breaker_cooldown"]):
+            return True
+        self.metrics.count("breaker_rejections")
+        return False
+
+    def record_failure(self, url: str):
+        """Count a failure against a host's circuit breaker."""
+        if breaker_for(url).record_failure(self.settings["breaker_threshold"]):
+            self.metrics.count("breaker_trips")
+
+    def should_retry(self, error: Exception, retry: int, hosts: int, deadline_at: float) -> bool:
+        """Whether a generation that failed before any output may be tried again."""
+        if not is_backend_failure(error) or retry >= (self.settings["retries"] or 0):
+            return False
+        if isinstance(error, CircuitOpenError) and hosts == 1:
+            # Fail fast: the only host is known to be down
+            return False
+        return time.monotonic() < deadline_at
+
+
+class HostSelector:
+    """Hands out hosts for attempts: the hosts of a BackendPool, or a single base URL.
+
+    An affinity key, such as a prompt prefix key, makes the pool prefer the same host for the same key.
+    """
+
+    def __init__(self, pool: Any = None, url: Optional[str] = None, affinity: Optional[str] = None):
+        self.pool = pool
+        self.url = url
+        self.affinity = affinity
+
+    @property
+    def count(self) -> int:
+        return len(self.pool.backends) if self.pool is not None else 1
+
+    def pick(self, exclude: List[str]) -> Tuple[str, Any]:
+        """Pick a host, avoiding excluded URLs while other hosts are available.
+
+        Returns:
+            The host URL and a token for release()
+        """
+        if self.pool is None:
+            return self.url, None
+        excluded = [backend for backend in self.pool.backends if backend.url in exclude]
+        try:
+            backend = self.pool.acquire(excluded, affinity=self.affinity)
+        except Exception:
+            if not excluded:
+                raise
+            backend = self.pool.acquire(affinity=self.affinity)
+        return backend.url, backend
+
+    def release(self, token: Any, latency: Optional[float], error: Optional[BaseException]):
+        if self.pool is not None and token is not None:
+            self.pool.release(token, latency=latency, error=error)
+
+
+def _limit(seconds: Optional[float]) -> float:
+    return float("inf") if seconds is None else seconds
+
+
+# Attempt whose request is being sent on the current thread, see attach_response()
+_current_attempt: ContextVar[Optional["_Attempt"]] = ContextVar("current_attempt", default=None)
+
+
+def attach_response(response: Any):
+    """Let the attempt sending the current request close its response when the attempt is cancelled.
+
+    Closing the response ends a read that would otherwise block the attempt's thread,
+    connection and host slot until the server answers. Outside an attempt this does nothing.
+
+    Args:
+        response: Object with a close() method, such as a streamed requests.Response
+    """
+    attempt = _current_attempt.get()
+    if attempt is not None:
+        attempt.attach(response)
+
+
+class _Attempt:
+    """One request of a generation, read on its own thread into the generation's event queue."""
+
+    def __init__(self, url: str, token: Any, open_stream: Callable[[str], Iterator[str]], events: queue.Queue,
+                 hosts: HostSelector, hedge: bool = False):
+        self.url = url
+        self.hedge = hedge
+        self.started = time.monotonic()
+        self.timed_out = False
+        self.latency: Optional[float] = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._response = None
+        self._token = token
+        self._hosts = hosts
+        threading.Thread(target=self._run, args=(open_stream, events), name="llm-attempt", daemon=True).start()
+
+    def _run(self, open_stream, events):
+        _current_attempt.set(self)
+        error = None
+        try:
+            for line in open_stream(self.url):
+                if self._cancelled.is_set():
+                    break
+                if self.latency is None:
+                    self.latency = time.monotonic() - self.started
+                events.put((self, "line", line))
+            else:
+                events.put((self, "end", None))
+        except Exception as e:
+            error = e
+            events.put((self, "error", e))
+        finally:
+            self._release(error)
+
+    def _release(self, error: Optional[BaseException]):
+        """Give the host slot back once, when the attempt ends or is cancelled, whichever comes first."""
+        with self._lock:
+            token, self._token = self._token, None
+            hosts, self._hosts = self._hosts, None
+        if hosts is None:
+            return
+        if self.timed_out and error is None:
+            error = DeadlineExceeded(f"Generation on {self.url} timed out")
+        hosts.release(token, self.latency, error)
+
+    def attach(self, response: Any):
+        """Keep the response of the attempt's request, closing it at once if the attempt was cancelled."""
+        with self._lock:
+            self._response = response
+        if self._cancelled.is_set():
+            self._close_response()
+
+    def _close_response(self):
+        with self._lock:
+            response, self._response = self._response, None
+        if response is not None:
+            try:
+                response.close()
+            except Exception:
+                pass
+
+    def cancel(self, timed_out: bool = False):
+        self.timed_out = self.timed_out or timed_out
+        self._cancelled.set()
+        self._close_response()
+        self._release(None)
+
+
+class _AsyncAttempt:
+    """One request of an asynchronous generation, read by its own task."""
+
+    def __init__(self, url: str, token: Any, open_stream: Callable[[str], AsyncIterator[str]],
+                 events: asyncio.Queue, hosts: HostSelector, hedge: bool = False):
+        self.url = url
+        self.hedge = hedge
+        self.started = time.monotonic()
+        self.timed_out = False
+        self._task = asyncio.ensure_future(self._run(token, open_stream, events, hosts))
+
+    async def _run(self, token, open_stream, events, hosts):
+        latency, error = None, None
+        try:
+            async for line in open_stream(self.url):
+                if latency is None:
+                    latency = time.monotonic() - self.started
+                events.put_nowait((self, "line", line))
+            events.put_nowait((self, "end", None))
+        except Exception as e:
+            error = e
+            events.put_nowait((self, "error", e))
+        finally:
+            if self.timed_out and error is None:
+                error = DeadlineExceeded(f"Generation on {self.url} timed out")
+            hosts.release(token, latency, error)
+
+    def cancel(self, timed_out: bool = False):
+        self.timed_out = self.timed_out or timed_out
+        self._task.cancel()
+
+
+class _Generation:
+    """Bookkeeping of one generation shared by the sync and async paths."""
+
+    def __init__(self, hosts: HostSelector, policy: Resilience, model: str):
+        self.hosts = hosts
+        self.policy = policy
+        self.model = model
+        self.deadline_at = time.monotonic() + _limit(policy.settings["deadline"])
+        self.failed: List[str] = []
+        self.attempts: List[Any] = []
+        self.active = 0
+        self.first_token_at = 0.0
+        self.hedge_at = float("inf")
+        policy.metrics.count("calls")
+
+    def start(self, attempt_class, open_stream, events):
+        """Start the first attempt of a round."""
+        self.attempts = []
+        url, token = self.hosts.pick(self.failed)
+        if not self.policy.allow(url):
+            self.hosts.release(token, None, None)
+            self.failed.append(url)
+            raise CircuitOpenError(f"Circuit of {url} is open")
+        self.attempts.append(attempt_class(url, token, open_stream, events, self.hosts))
+        self.active = 1
+        now = time.monotonic()
+        self.first_token_at = now + _limit(self.policy.settings["first_token_timeout"])
+        delay = self.policy.hedge_delay(self.model, self.hosts.count)
+        self.hedge_at = now + delay if delay is not None else float("inf")
+
+    def first_wait(self) -> float:
+        return max(0.0, min(self.deadline_at, self.first_token_at, self.hedge_at) - time.monotonic())
+
+    def on_wait_expired(self, attempt_class, open_stream, events):
+        """Start a hedged attempt if that is due, otherwise fail the round with DeadlineExceeded."""
+        now = time.monotonic()
+        if now >= self.hedge_at and now < min(self.deadline_at, self.first_token_at):
+            self.hedge_at = float("inf")
+            busy = [attempt.url for attempt in self.attempts]
+            url, token = self.hosts.pick(busy + self.failed)
+            if url in busy or not self.policy.allow(url):
+                self.hosts.release(token, None, None)
+                return
+            self.policy.metrics.count("hedges")
+            self.attempts.append(attempt_class(url, token, open_stream, events, self.hosts, hedge=True))
+            self.active += 1
+            return
+        self.policy.metrics.count("timeouts")
+        for attempt in self.attempts:
+            self.policy.record_failure(attempt.url)
+        raise DeadlineExceeded(f"No response from {', '.join(a.url for a in self.attempts)} in time")
+
+    def on_first_event(self, attempt, kind: str, payload: Any):
+        """Handle an event before any output; return the winning attempt, or None to keep waiting."""
+        if kind == "error":
+            self.policy.record_failure(attempt.url)
+            self.failed.append(attempt.url)
+            self.active -= 1
+            if self.active == 0:
+                raise payload
+            return None
+        for other in self.attempts:
+            if other is not attempt:
+                other.cancel()
+        if attempt.hedge:
+            self.policy.metrics.count("hedge_wins")
+        breaker_for(attempt.url).record_success()
+        self.policy.metrics.add_latency(self.model, time.monotonic() - attempt.started)
+        return attempt
+
+    def abandon(self, error: BaseException):
+        for attempt in self.attempts:
+            attempt.cancel(timed_out=isinstance(error, DeadlineExceeded))
+
+    def stream_wait(self) -> float:
+        return max(0.0, min(self.deadline_at - time.monotonic(), _limit(self.policy.settings["stall_timeout"])))
+
+    def on_stalled(self, winner):
+        winner.cancel(timed_out=True)
+        self.policy.metrics.count("timeouts")
+        self.policy.record_failure(winner.url)
+        return DeadlineExceeded(f"Generation on {winner.url} stalled or missed its deadline")
+
+
+def resilient_stream(open_stream: Callable[[str], Iterator[str]], hosts: HostSelector, policy: Resilience,
+                     model: str) -> Iterator[str]:
+    """Stream a generation with deadlines, retries, hedging and circuit breaking.
+
+    Args:
+        open_stream: Function starting the request against a host URL and returning its lines
+        hosts: Hosts the attempts go to
+        policy: Resilience settings and metrics
+        model: Model name, which keys the first-line latencies used for hedging
+
+    Returns:
+        Iterator over the response lines of the winning attempt
+    """
+    generation = _Generation(hosts, policy, model)
+    retry = 0
+    while True:
+        events: queue.Queue = queue.Queue()
+        try:
+            generation.start(_Attempt, open_stream, events)
+            winner = None
+            while winner is None:
+                try:
+                    attempt, kind, payload = events.get(timeout=generation.first_wait())
+                except queue.Empty:
+                    generation.on_wait_expired(_Attempt, open_stream, events)
+                    continue
+                winner = generation.on_first_event(attempt, kind, payload)
+            break
+        except Exception as e:
+            generation.abandon(e)
+            if not policy.should_retry(e, retry, hosts.count, generation.deadline_at):
+                policy.metrics.count("failures")
+                raise
+            policy.metrics.count("retries")
+            time.sleep(min(policy.backoff(retry), max(0.0, generation.deadline_at - time.monotonic())))
+            retry += 1
+
+    # Output has started, so failures from here on are raised rather than retried
+    try:
+        while kind != "end":
+            if kind == "error":
+                policy.record_failure(winner.url)
+                raise payload
+            yield payload
+            while True:
+                try:
+                    attempt, kind, payload = events.get(timeout=generation.stream_wait())
+                except queue.Empty:
+                    raise generation.on_stalled(winner)
+                if attempt is winner:
+                    break
+        policy.metrics.count("successes")
+    except Exception:
+        policy.metrics.count("failures")
+        winner.cancel()
+        raise
+    except GeneratorExit:
+        winner.cancel()
+        raise
+
+
+async def aresilient_stream(open_stream: Callable[[str], AsyncIterator[str]], hosts: HostSelector,
+                            policy: Resilience, model: str) -> AsyncIterator[str]:
+    """Asynchronous counterpart of resilient_stream(); cancelled attempts close their connections."""
+    generation = _Generation(hosts, policy, model)
+    retry = 0
+    while True:
+        events: asyncio.Queue = asyncio.Queue()
+        try:
+            generation.start(_AsyncAttempt, open_stream, events)
+            winner = None
+            while winner is None:
+                try:
+                    attempt, kind, payload = await asyncio.wait_for(events.get(), generation.first_wait())
+                except asyncio.TimeoutError:
+                    generation.on_wait_expired(_AsyncAttempt, open_stream, events)
+                    continue
+                winner = generation.on_first_event(attempt, kind, payload)
+            break
+        except Exception as e:
+            generation.abandon(e)
+            if not policy.should_retry(e, retry, hosts.count, generation.deadline_at):
+                policy.metrics.count("failures")
+                raise
+            policy.metrics.count("retries")
+            await asyncio.sleep(min(policy.backoff(retry), max(0.0, generation.deadline_at - time.monotonic())))
+            retry += 1
+
+    try:
+        while kind != "end":
+            if kind == "error":
+                policy.record_failure(winner.url)
+                raise payload
+            yield payload
+            while True:
+                try:
+                    attempt, kind, payload = await asyncio.wait_for(events.get(), generation.stream_wait())
+                except asyncio.TimeoutError:
+                    raise generation.on_stalled(winner)
+                if attempt is winner:
+                    break
+        policy.metrics.count("successes")
+    except Exception:
+        policy.metrics.count("failures")
+        winner.cancel()
+        raise
+    except BaseException:
+        winner.cancel()
+        raise
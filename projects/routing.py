@@ -0,0 +1,191 @@
+"""Per-agent model routing with escalation to larger models.
+
+A routing policy maps agent roles to models so cheap or latency-critical
+agents can run on a small model while the rest keep the use case's model.
+Policies are JSON files named by the CREW_AI_MODEL_ROUTING environment
+variable:
+
+    {
+        "tiers": {"small": "llama3.2:3b", "large": "llama3:70b"},
+        "roles": {"*formatter*": "small", "general banking support*": "small"},
+        "escalation": ["small", "default", "large"]
+    }
+
+"tiers" names models, and any place that takes a model also accepts a tier
+name or "default", the model the use case was created with. "roles" maps
+case-insensitive shell-style role patterns to models; it extends the
+agent_tiers a use case declares. "escalation" orders models from small to
+large: when an agent's generation fails validation it is generated again on
+each following model until one passes.
+
+Without a policy every agent uses the use case's model and nothing escalates.
+"""
+
+import fnmatch
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Any, Callable, List, Optional
+
+from langchain_core.language_models.llms import LLM
+
+DEFAULT_TIER = "default"
+
+# Tier names use cases may declare without the policy defining them
+TIER_NAMES = ("small", "medium", "large")
+
+# Validator signature: (prompt, generated text) -> reason the text is rejected, or None
+Validator = Callable[[str, str], Optional[str]]
+
+
+@lru_cache(maxsize=8)
+def _load_policy(path: str, mtime: float) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        policy = json.load(f)
+    if not isinstance(policy, dict):
+        raise ValueError(f"Model routing policy {path} must be a JSON object")
+    return policy
+
+
+def routing_policy() -> Dict[str, Any]:
+    """Return the routing policy named by CREW_AI_MODEL_ROUTING, or an empty policy.
+
+    The file is read again only when it changes.
+    """
+    path = os.environ.get("CREW_AI_MODEL_ROUTING")
+    if not path:
+        return {}
+    return _load_policy(path, os.path.getmtime(path))
+
+
+def resolve_model(name: Optional[str], default_model: str, policy: Dict[str, Any]) -> str:
+    """Turn a tier name, "default" or model name into a model name.
+
+    Standard tier names the policy does not define resolve to the default model,
+    so use cases can name tiers without requiring a policy.
+    """
+    tiers = policy.get("tiers") or {}
+    if name in tiers:
+        return tiers[name]
+    if not name or name == DEFAULT_TIER or name in TIER_NAMES:
+        return default_model
+    return name
+
+
+def route_role(role: str, default_model: str, policy: Dict[str, Any],
+               agent_tiers: Optional[Dict[str, str]] = None) -> str:
+    """Return the model an agent role runs on.
+
+    Patterns from the policy are tried before those the use case declares, and
+    the first pattern matching the role wins.
+
+    Args:
+        role: The agent's role
+        default_model: The use case's model
+        policy: Routing policy
+        agent_tiers: Role patterns and tiers declared by the use case
+
+    Returns:
+        Model name
+    """
+    routes = list((policy.get("roles") or {}).items()) + list((agent_tiers or {}).items())
+    for pattern, target in routes:
+        if fnmatch.fnmatchcase(role.lower(), pattern.lower()):
+            return resolve_model(target, default_model, policy)
+    return default_model
+
+
+def escalation_chain(model: str, default_model: str, policy: Dict[str, Any]) -> List[str]:
+    """Return the models a generation escalates to after failing on model, smallest first."""
+    ladder = []
+    for name in policy.get("escalation") or []:
+        resolved = resolve_model(name, default_model, policy)
+        if resolved not in ladder:
+            ladder.append(resolved)
+    if model not in ladder:
+        return []
+    return ladder[ladder.index(model) + 1:]
+
+
+def check_agent_output(text: Any) -> Optional[str]:
+    """Check a generation of a crewAI agent's ReAct loop.
+
+    Returns:
+        Why the text is unusable, or None if it is a tool call or a non-empty final answer
+    """
+    if not isinstance(text, str) or not text.strip():
+        return "empty output"
+    if "Final Answer:" in text:
+        if not text.split("Final Answer:", 1)[1].strip():
+            return "empty final answer"
+        return None
+    if re.search(r"Action\s*:", text) and re.search(r"Action\s*Input\s*:", text):
+        return None
+    return "missing 'Action:'/'Action Input:' or 'Final Answer:'"
+
+
+def generate_with_escalation(llms: List[Any], models: List[str], prompt: str, validate: Optional[Validator],
+                             on_escalate: Optional[Callable[[str, str, str], None]] = None,
+                             **kwargs: Any) -> str:
+    """Generate with the first model and move up the chain while validation fails.
+
+    Args:
+        llms: Language models, the agent's own first
+        models: Model names matching llms
+        prompt: Prompt to generate from
+        validate: Validator, or None to accept the first generation
+        on_escalate: Called with (from model, to model, reason) before each escalation
+        **kwargs: Generation arguments such as stop
+
+    Returns:
+        The first generation that passes validation, or the last model's if none does
+    """
+    text = llms[0].invoke(prompt, **kwargs)
+    for index in range(1, len(llms)):
+        reason = validate(prompt, text) if validate else None
+        if reason is None:
+            break
+        if on_escalate:
+            on_escalate(models[index - 1], models[index], reason)
+        text = llms[index].invoke(prompt, **kwargs)
+    return text
+
+
+async def agenerate_with_escalation(llms: List[Any], models: List[str], prompt: str,
+                                    validate: Optional[Validator],
+                                    on_escalate: Optional[Callable[[str, str, str], None]] = None,
+                                    **kwargs: Any) -> str:
+    """Asynchronous counterpart of generate_with_escalation()."""
+    text = await llms[0].ainvoke(prompt, **kwargs)
+    for index in range(1, len(llms)):
+        reason = validate(prompt, text) if validate else None
+        if reason is None:
+            break
+        if on_escalate:
+            on_escalate(models[index - 1], models[index], reason)
+        text = await llms[index].ainvoke(prompt, **kwargs)
+    return text
+
+
+class EscalatingLLM(LLM):
+    """LLM that regenerates on larger models when a generation fails validation."""
+
+    llms: List[Any]
+    models: List[str]
+    check: Any = None
+    on_escalate: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "escalating"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None,
+              **kwargs: Any) -> str:
+        return generate_with_escalation(self.llms, self.models, prompt, self.check, self.on_escalate,
+                                        stop=stop, **kwargs)
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None,
+                     **kwargs: Any) -> str:
+        return await agenerate_with_escalation(self.llms, self.models, prompt, self.check, self.on_escalate,
+                                               stop=stop, **kwargs)
@@ -0,0 +1,481 @@
+"""Priority scheduling and fair sharing of LLM capacity.
+
+Every generation of the project's Ollama LLM waits for a slot of the
+LLMScheduler of its hosts before it is sent:
+
+- Priority classes: a request is "interactive" (a user is waiting on it)
+  or "batch". Free slots go to waiting interactive requests first, and
+  "interactive_reserve" slots per host are never given to batch requests,
+  so a user arriving while a batch fills the host does not wait for a long
+  generation to end.
+- Fair queuing: within a class, slots go to the user (or session) that has
+  received the least service time for its weight, so one user submitting
+  many requests cannot starve the others.
+- Admission control: a request arriving while "max_queued_<class>"
+  requests of its class wait, or waiting longer than "max_wait_<class>"
+  seconds, fails with AdmissionRejected instead of piling up.
+- Across processes: processes serving interactive requests touch a file in
+  "shared_dir", and batch requests of other processes keep to
+  "busy_batch_concurrent" slots until "interactive_grace" seconds after the
+  last interactive request, so a nightly batch run yields to the UI.
+
+The class and user of a request are taken from the request_priority and
+request_user context variables, set with scheduling(). Settings default to
+SCHEDULER_DEFAULTS, overridden by the JSON object in CREW_AI_SCHEDULER; a
+max_concurrent of None turns scheduling off.
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, AsyncIterator, Callable, Iterator, List, Optional, Tuple
+
+PRIORITIES = ("interactive", "batch")
+
+SCHEDULER_DEFAULTS = {
+    # Generations running at once per host
+    "max_concurrent": 4,
+    # Slots per host that only interactive requests may take
+    "interactive_reserve": 1,
+    "max_queued_interactive": 64,
+    "max_queued_batch": 1024,
+    # Seconds a request may wait for a slot; None waits indefinitely
+    "max_wait_interactive": 120.0,
+    "max_wait_batch": None,
+    # Share weight per user; users not listed have weight 1
+    "weights": {},
+    # Directory through which processes announce interactive requests; None turns it off
+    "shared_dir": os.path.join(tempfile.gettempdir(), "crew_ai_scheduler"),
+    "interactive_grace": 30.0,
+    # Batch generations a process runs at once while another process serves interactive requests
+    "busy_batch_concurrent": 1,
+}
+
+# Queue waits kept per class for the percentiles
+WAIT_SAMPLES = 1000
+
+# Seconds between checks of other processes by waiting batch requests, and between file touches
+POLL_INTERVAL = 1.0
+
+# Weight of the newest generation in the moving average of service time
+SERVICE_SMOOTHING = 0.2
+
+request_priority: ContextVar[str] = ContextVar("request_priority", default="interactive")
+request_user: ContextVar[str] = ContextVar("request_user", default="default")
+
+_schedulers: Dict[Any, "LLMScheduler"] = {}
+_schedulers_lock = threading.Lock()
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised when a request is not admitted to the queue or waits too long for a slot."""
+
+    def __init__(self, priority: str, reason: str):
+        super().__init__(f"LLM request ({priority}) rejected: {reason}")
+        self.priority = priority
+        self.reason = reason
+
+
+def scheduler_settings(overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Merge SCHEDULER_DEFAULTS, CREW_AI_SCHEDULER and overrides into one settings dictionary."""
+    settings = dict(SCHEDULER_DEFAULTS)
+    configured = os.environ.get("CREW_AI_SCHEDULER")
+    for source in (json.loads(configured) if configured else {}, overrides or {}):
+        unknown = set(source) - set(SCHEDULER_DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown scheduler settings: {', '.join(sorted(unknown))}")
+        settings.update(source)
+    return settings
+
+
+@contextmanager
+def scheduling(priority: Optional[str] = None, user: Optional[str] = None):
+    """Run the LLM requests of the block with a priority class and on behalf of a user.
+
+    Args:
+        priority: "interactive" or "batch", unchanged if None
+        user: User or session id the requests share fairly with others, unchanged if None
+    """
+    if priority is not None and priority not in PRIORITIES:
+        raise ValueError(f"priority must be one of {', '.join(PRIORITIES)}")
+    tokens = []
+    if priority is not None:
+        tokens.append((request_priority, request_priority.set(priority)))
+    if user is not None:
+        tokens.append((request_user, request_user.set(str(user))))
+    try:
+        yield
+    finally:
+        for variable, token in reversed(tokens):
+            variable.reset(token)
+
+
+def _percentile(ordered: List[float], q: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * q / 100)))]
+
+
+class SchedulerMetrics:
+    """Queue waits and admission counters per priority class, and service per user."""
+
+    def __init__(self):
+        self.counts = {priority: {"granted": 0, "rejected": 0, "timed_out": 0} for priority in PRIORITIES}
+        self.waits = {priority: deque(maxlen=WAIT_SAMPLES) for priority in PRIORITIES}
+        self.users: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def count(self, priority: str, name: str):
+        with self._lock:
+            self.counts[priority][name] += 1
+
+    def add_wait(self, priority: str, user: str, seconds: float):
+        with self._lock:
+            self.counts[priority]["granted"] += 1
+            self.waits[priority].append(seconds)
+            stats = self.users.setdefault(user, {"requests": 0, "wait": 0.0, "service": 0.0})
+            stats["requests"] += 1
+            stats["wait"] += seconds
+
+    def add_service(self, user: str, seconds: float):
+        with self._lock:
+            self.users[user]["service"] += seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return per class counters with queue-wait mean and percentiles, and per user totals."""
+        with self._lock:
+            classes = {}
+            for priority in PRIORITIES:
+                waits = sorted(self.waits[priority])
+                classes[priority] = dict(
+                    self.counts[priority],
+                    wait_mean=round(sum(waits) / len(waits), 4) if waits else None,
+                    wait_p50=_percentile(waits, 50),
+                    wait_p95=_percentile(waits, 95),
+                    wait_max=waits[-1] if waits else None,
+                )
+            users = {user: {"requests": stats["requests"], "wait_mean": round(stats["wait"] / stats["requests"], 4),
+                            "service": round(stats["service"], 3)}
+                     for user, stats in sorted(self.users.items())}
+        return {"classes": classes, "users": users}
+
+
+class _Request:
+    """A request waiting for, or holding, a slot."""
+
+    def __init__(self, priority: str, user: str, weight: float, seq: int):
+        self.priority = priority
+        self.user = user
+        self.weight = weight
+        self.seq = seq
+        self.enqueued = time.monotonic()
+        self.granted_at: Optional[float] = None
+        self.charged = 0.0
+        self.event = threading.Event()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.future: Optional[asyncio.Future] = None
+
+    def wake(self):
+        self.event.set()
+        if self.future is not None:
+            self.loop.call_soon_threadsafe(lambda: self.future.done() or self.future.set_result(None))
+
+
+class LLMScheduler:
+    """Slots of the generations sent to one set of hosts, shared by priority and fairly per user."""
+
+    def __init__(self, hosts: int = 1, overrides: Optional[Dict[str, Any]] = None):
+        """Initialize the scheduler.
+
+        Args:
+            hosts: Number of hosts the slots are for; max_concurrent is per host
+            overrides: Settings overriding the defaults and CREW_AI_SCHEDULER
+        """
+        self.hosts = max(1, hosts)
+        self.settings = scheduler_settings(overrides)
+        self.metrics = SchedulerMetrics()
+        self._waiting: Dict[str, List[_Request]] = {priority: [] for priority in PRIORITIES}
+        self._running = dict.fromkeys(PRIORITIES, 0)
+        # Service each user received, in seconds divided by its weight, and the start of the latest grant
+        self._vtime: Dict[str, Dict[str, float]] = {priority: {} for priority in PRIORITIES}
+        self._virtual = dict.fromkeys(PRIORITIES, 0.0)
+        self._service = 1.0
+        self._seq = 0
+        self._others_checked = 0.0
+        self._others_busy = False
+        self._touched = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.settings["max_concurrent"] is not None
+
+    def _limit(self, priority: str) -> int:
+        capacity = self.settings["max_concurrent"] * self.hosts
+        if priority == "interactive":
+            return capacity
+        limit = max(1, capacity - (self.settings["interactive_reserve"] or 0) * self.hosts)
+        if self._other_process_interactive():
+            limit = min(limit, self.settings["busy_batch_concurrent"])
+        return limit
+
+    def _has_slot(self, priority: str) -> bool:
+        if sum(self._running.values()) >= self.settings["max_concurrent"] * self.hosts:
+            return False
+        return priority == "interactive" or self._running["batch"] < self._limit("batch")
+
+    def _dispatch(self):
+        """Grant free slots to waiting requests, interactive first, least served user first; holds the lock."""
+        for priority in PRIORITIES:
+            waiting = self._waiting[priority]
+            vtime = self._vtime[priority]
+            while waiting and self._has_slot(priority):
+                request = min(waiting, key=lambda r: (vtime.get(r.user, 0.0), r.seq))
+                waiting.remove(request)
+                self._grant(request)
+
+    def _grant(self, request: _Request):
+        vtime = self._vtime[request.priority]
+        start = max(vtime.get(request.user, 0.0), self._virtual[request.priority])
+        self._virtual[request.priority] = start
+        # Charge the expected service now so a user's concurrent requests do not all go first
+        request.charged = self._service / request.weight
+        vtime[request.user] = start + request.charged
+        if len(vtime) > 1000:
+            for user in [user for user, value in vtime.items() if value <= start]:
+                del vtime[user]
+        self._running[request.priority] += 1
+        request.granted_at = time.monotonic()
+        self.metrics.add_wait(request.priority, request.user, request.granted_at - request.enqueued)
+        if request.priority == "interactive":
+            self._announce()
+        request.wake()
+
+    def _enqueue(self, priority: Optional[str], user: Optional[str]) -> _Request:
+        priority = priority or request_priority.get()
+        user = user or request_user.get()
+        if priority not in PRIORITIES:
+            raise ValueError(f"priority must be one of {', '.join(PRIORITIES)}")
+        weight = float((self.settings["weights"] or {}).get(user, 1.0))
+        with self._lock:
+            self._seq += 1
+            request = _Request(priority, user, weight, self._seq)
+            self._waiting[priority].append(request)
+            self._dispatch()
+            # Only requests that have to wait count against the queue limit
+            limit = self.settings[f"max_queued_{priority}"]
+            if request.granted_at is None and limit is not None and len(self._waiting[priority]) > limit:
+                self._waiting[priority].remove(request)
+                self.metrics.count(priority, "rejected")
+                raise AdmissionRejected(priority, f"{limit} requests already queued")
+        return request
+
+    def _timed_out(self, request: _Request) -> bool:
+        """Drop a request that waited past max_wait; False if it was granted meanwhile."""
+        with self._lock:
+            if request.granted_at is not None:
+                return False
+            self._waiting[request.priority].remove(request)
+            self.metrics.count(request.priority, "timed_out")
+        return True
+
+    def _wait_step(self, request: _Request) -> Tuple[bool, Optional[float]]:
+        """Return whether the request may still wait, and for how many seconds before looking again."""
+        max_wait = self.settings[f"max_wait_{request.priority}"]
+        remaining = None if max_wait is None else request.enqueued + max_wait - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            return False, None
+        # Batch requests look again now and then, since interactive requests of other processes end unseen
+        if request.priority == "batch" and self.settings["shared_dir"]:
+            return True, POLL_INTERVAL if remaining is None else min(remaining, POLL_INTERVAL)
+        return True, remaining
+
+    def _abandon(self, request: _Request):
+        """Give up a waiting request, releasing its slot if it was granted meanwhile."""
+        with self._lock:
+            if request.granted_at is None:
+                self._waiting[request.priority].remove(request)
+                return
+        self.release(request)
+
+    def acquire(self, priority: Optional[str] = None, user: Optional[str] = None) -> _Request:
+        """Wait for a slot.
+
+        Args:
+            priority: Priority class, defaults to request_priority
+            user: User or session the request is made for, defaults to request_user
+
+        Returns:
+            The granted request, to be passed to release()
+
+        Raises:
+            AdmissionRejected: When the class's queue is full or the request waited too long
+        """
+        request = self._enqueue(priority, user)
+        try:
+            while not request.event.is_set():
+                may_wait, step = self._wait_step(request)
+                if not may_wait:
+                    if self._timed_out(request):
+                        raise AdmissionRejected(request.priority, "waited too long for a slot")
+                    break
+                if not request.event.wait(step):
+                    with self._lock:
+                        self._dispatch()
+        except AdmissionRejected:
+            raise
+        except BaseException:
+            self._abandon(request)
+            raise
+        return request
+
+    async def aacquire(self, priority: Optional[str] = None, user: Optional[str] = None) -> _Request:
+        """Asynchronous counterpart of acquire()."""
+        request = self._enqueue(priority, user)
+        request.loop = asyncio.get_running_loop()
+        request.future = request.loop.create_future()
+        if request.event.is_set():
+            return request
+        try:
+            while not request.event.is_set():
+                may_wait, step = self._wait_step(request)
+                if not may_wait:
+                    if self._timed_out(request):
+                        raise AdmissionRejected(request.priority, "waited too long for a slot")
+                    break
+                try:
+                    await asyncio.wait_for(asyncio.shield(request.future), step)
+                except asyncio.TimeoutError:
+                    with self._lock:
+                        self._dispatch()
+        except AdmissionRejected:
+            raise
+        except BaseException:
+            self._abandon(request)
+            raise
+        return request
+
+    def release(self, request: _Request):
+        """Free the slot of a granted request and grant it to the next waiting request."""
+        held = time.monotonic() - request.granted_at
+        with self._lock:
+            self._running[request.priority] -= 1
+            # Replace the expected service charged at the grant by the time the slot was held
+            vtime = self._vtime[request.priority]
+            if request.user in vtime:
+                vtime[request.user] += held / request.weight - request.charged
+            self._service += SERVICE_SMOOTHING * (held - self._service)
+            self.metrics.add_service(request.user, held)
+            if request.priority == "interactive":
+                self._announce()
+            self._dispatch()
+
+    def stream(self, open_stream: Callable[[], Iterator[str]]) -> Iterator[str]:
+        """Pass the lines of a generation through, holding a slot from before it is opened until it ends."""
+        if not self.enabled:
+            yield from open_stream()
+            return
+        request = self.acquire()
+        try:
+            yield from open_stream()
+        finally:
+            self.release(request)
+
+    async def astream(self, open_stream: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """Asynchronous counterpart of stream()."""
+        if not self.enabled:
+            async for line in open_stream():
+                yield line
+            return
+        request = await self.aacquire()
+        try:
+            async for line in open_stream():
+                yield line
+        finally:
+            self.release(request)
+
+    def _announce(self):
+        """Let batch requests of other processes know interactive requests run here; holds the lock."""
+        directory = self.settings["shared_dir"]
+        now = time.time()
+        if not directory or now - self._touched < POLL_INTERVAL:
+            return
+        self._touched = now
+        try:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"interactive-{os.getpid()}")
+            with open(path, "a"):
+                os.utime(path)
+        except OSError:
+            pass
+
+    def _other_process_interactive(self) -> bool:
+        """Whether another process had an interactive request within interactive_grace; holds the lock."""
+        directory = self.settings["shared_dir"]
+        if not directory:
+            return False
+        now = time.time()
+        if now - self._others_checked >= POLL_INTERVAL:
+            self._others_checked = now
+            own = f"interactive-{os.getpid()}"
+            busy = False
+            try:
+                for entry in os.scandir(directory):
+                    if entry.name.startswith("interactive-") and entry.name != own:
+                        if now - entry.stat().st_mtime <= (self.settings["interactive_grace"] or 0.0):
+                            busy = True
+                            break
+            except OSError:
+                pass
+            self._others_busy = busy
+        return self._others_busy
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return queue depths, running requests and the metrics."""
+        with self._lock:
+            depths = {priority: (len(self._waiting[priority]), self._running[priority]) for priority in PRIORITIES}
+            capacity = (self.settings["max_concurrent"] or 0) * self.hosts
+        snapshot = self.metrics.snapshot()
+        for priority, (queued, running) in depths.items():
+            snapshot["classes"][priority].update(queued=queued, running=running)
+        snapshot["capacity"] = capacity
+        return snapshot
+
+
+def scheduler_for(urls: List[str]) -> LLMScheduler:
+    """Return the process-wide scheduler of a set of hosts."""
+    key = tuple(sorted(urls))
+    with _schedulers_lock:
+        if key not in _schedulers:
+            _schedulers[key] = LLMScheduler(len(key))
+        return _schedulers[key]
+
+
+def scheduler_stats() -> Dict[str, Dict[str, Any]]:
+    """Return a snapshot of every scheduler, keyed by its comma-separated hosts."""
+    with _schedulers_lock:
+        schedulers = dict(_schedulers)
+    return {",".join(key): scheduler.snapshot() for key, scheduler in sorted(schedulers.items())}
+
+
+def format_stats(stats: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Format scheduler snapshots as one line per priority class that had requests."""
+    def seconds(value):
+        return "-" if value is None else f"{value:.2f}s"
+
+    lines = []
+    for hosts, snapshot in stats.items():
+        for priority, counts in snapshot["classes"].items():
+            if not (counts["granted"] or counts["rejected"] or counts["timed_out"]):
+                continue
+            lines.append(f"{hosts} {priority}: {counts['granted']} granted, "
+                         f"{counts['rejected'] + counts['timed_out']} rejected, queue wait mean "
+                         f"{seconds(counts['wait_mean'])}, p95 {seconds(counts['wait_p95'])}, "
+                         f"max {seconds(counts['wait_max'])}")
+    return lines
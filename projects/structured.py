@@ -0,0 +1,361 @@
+"""Structured JSON results validated against a use case's output schema.
+
+A use case that declares output_schema returns a JSON value instead of the
+crew's free text. The final task is asked to answer with a JSON document
+matching the schema; if its answer contains one, no further generation is
+needed. Otherwise the answer is converted by the model in Ollama's JSON mode,
+and the conversion is validated while it streams: the first character that
+cannot lead to a valid document (wrong type, unknown property, syntax error,
+missing required property when an object closes) stops the generation at
+once and the conversion is retried with the reason, instead of discovering
+the problem after the full generation.
+
+Schemas are JSON Schema dictionaries using the keywords "type" (a name or a
+list of names), "properties", "required", "additionalProperties" (true or
+false), "items", "enum", "minimum", "maximum" and "minItems". Other keywords
+are ignored.
+"""
+
+import json
+import re
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+_LITERALS = {"t": "true", "f": "false", "n": "null"}
+_NUMBER_CHARS = set("0123456789+-.eE")
+_WHITESPACE = set(" \t\r\n")
+
+
+class SchemaViolation(ValueError):
+    """Raised when an output cannot match the output schema."""
+
+    def __init__(self, reason: str, text: str = ""):
+        super().__init__(reason)
+        self.reason = reason
+        self.text = text
+
+
+def _types(schema: Dict[str, Any]) -> Optional[List[str]]:
+    declared = schema.get("type")
+    if declared is None:
+        return None
+    return [declared] if isinstance(declared, str) else list(declared)
+
+
+def _allows(schema: Dict[str, Any], kind: str) -> bool:
+    types = _types(schema)
+    return types is None or kind in types or (kind == "integer" and "number" in types)
+
+
+def _kind(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    return "array" if isinstance(value, list) else "object"
+
+
+def _property_schema(schema: Dict[str, Any], key: str) -> Optional[Dict[str, Any]]:
+    """Return the schema of an object property, or None if the property is not allowed."""
+    properties = schema.get("properties") or {}
+    if key in properties:
+        return properties[key]
+    additional = schema.get("additionalProperties", True)
+    if additional is False:
+        return None
+    return additional if isinstance(additional, dict) else {}
+
+
+def validate_json(value: Any, schema: Dict[str, Any], path: str = "$") -> Optional[str]:
+    """Validate a parsed JSON value against a schema.
+
+    Returns:
+        The first violation, such as "$.cases[0].risk: expected one of ...", or None if the value is valid
+    """
+    kind = _kind(value)
+    if not _allows(schema, kind):
+        return f"{path}: expected {' or '.join(_types(schema))}, got {kind}"
+    if "enum" in schema and value not in schema["enum"]:
+        return f"{path}: expected one of {json.dumps(schema['enum'])}"
+    if kind in ("integer", "number"):
+        if "minimum" in schema and value < schema["minimum"]:
+            return f"{path}: {value} is below the minimum {schema['minimum']}"
+        if "maximum" in schema and value > schema["maximum"]:
+            return f"{path}: {value} is above the maximum {schema['maximum']}"
+    if kind == "object":
+        for key in schema.get("required") or []:
+            if key not in value:
+                return f"{path}: missing required property '{key}'"
+        for key, item in value.items():
+            item_schema = _property_schema(schema, key)
+            if item_schema is None:
+                return f"{path}: unexpected property '{key}'"
+            error = validate_json(item, item_schema, f"{path}.{key}")
+            if error:
+                return error
+    if kind == "array":
+        if len(value) < schema.get("minItems", 0):
+            return f"{path}: expected at least {schema['minItems']} items"
+        for index, item in enumerate(value):
+            error = validate_json(item, schema.get("items") or {}, f"{path}[{index}]")
+            if error:
+                return error
+    return None
+
+
+class StreamingJSONValidator:
+    """Check a JSON document against a schema as its text arrives.
+
+    feed() raises SchemaViolation at the first character after which the text can
+    no longer become a valid document, and complete turns true once the document
+    has closed, so the rest of a generation can be skipped.
+    """
+
+    def __init__(self, schema: Dict[str, Any]):
+        self.schema = schema
+        self.complete = False
+        self._parts: List[str] = []
+        # Open containers, innermost last
+        self._stack: List[Dict[str, Any]] = []
+        # Schema and path of the value expected next, if any
+        self._expect: Optional[Tuple[Dict[str, Any], str]] = (schema, "$")
+        # String, number or literal being read, if any
+        self._token: Optional[Dict[str, Any]] = None
+
+    @property
+    def text(self) -> str:
+        """The text fed so far."""
+        return "".join(self._parts)
+
+    def feed(self, chunk: str):
+        """Validate the next part of the text."""
+        self._parts.append(chunk)
+        for char in chunk:
+            self._step(char)
+
+    def result(self) -> Any:
+        """Parse the finished document and validate it completely.
+
+        Returns:
+            The parsed value
+        """
+        try:
+            value = json.loads(self.text)
+        except ValueError as e:
+            raise SchemaViolation(f"invalid JSON: {e}", self.text)
+        error = validate_json(value, self.schema)
+        if error:
+            raise SchemaViolation(error, self.text)
+        return value
+
+    def _fail(self, reason: str):
+        raise SchemaViolation(reason, self.text)
+
+    def _step(self, char: str):
+        if self._token is not None and not self._continue_token(char):
+            return
+        if char in _WHITESPACE:
+            return
+        if self.complete:
+            self._fail("unexpected text after the JSON document")
+        frame = self._stack[-1] if self._stack else None
+        if self._expect is not None:
+            if char == "]" and frame and frame["state"] == "first":
+                self._expect = None
+                self._close(frame)
+            else:
+                self._start_value(char)
+            return
+        state = frame["state"]
+        if state in ("first", "key") and frame["kind"] == "object" and char == '"':
+            self._token = {"kind": "key", "text": "", "escaped": False}
+        elif state == "first" and char == "}":
+            self._close(frame)
+        elif state == "colon" and char == ":":
+            self._expect = (_property_schema(frame["schema"], frame["key"]), f"{frame['path']}.{frame['key']}")
+        elif state == "next" and char == ",":
+            if frame["kind"] == "object":
+                frame["state"] = "key"
+            else:
+                self._expect = (frame["schema"].get("items") or {}, f"{frame['path']}[{frame['count']}]")
+        elif state == "next" and char == ("}" if frame["kind"] == "object" else "]"):
+            self._close(frame)
+        else:
+            self._fail(f"{frame['path']}: unexpected '{char}'")
+
+    def _start_value(self, char: str):
+        schema, path = self._expect
+        self._expect = None
+        if char == "{":
+            kind = "object"
+        elif char == "[":
+            kind = "array"
+        elif char == '"':
+            kind = "string"
+        elif char in _LITERALS:
+            kind = "boolean" if char in "tf" else "null"
+        elif char == "-" or char.isdigit():
+            # Integer or number is only known once the number ends
+            kind = "integer"
+        else:
+            self._fail(f"{path}: expected a JSON value, got '{char}'")
+        if not _allows(schema, kind):
+            got = "number" if kind == "integer" else kind
+            self._fail(f"{path}: expected {' or '.join(_types(schema))}, got {got}")
+        if kind in ("object", "array"):
+            self._stack.append({"kind": kind, "schema": schema, "path": path, "state": "first", "key": None,
+                                "keys": [], "count": 0})
+            if kind == "array":
+                self._expect = (schema.get("items") or {}, f"{path}[0]")
+        elif kind == "string":
+            self._token = {"kind": "string", "text": "", "escaped": False, "schema": schema, "path": path}
+        else:
+            self._token = {"kind": "number" if kind == "integer" else "literal", "text": char, "schema": schema,
+                           "path": path}
+
+    def _continue_token(self, char: str) -> bool:
+        """Add a character to the open token; return whether the character still needs handling."""
+        token = self._token
+        if token["kind"] in ("key", "string"):
+            if char == '"' and not token["escaped"]:
+                self._token = None
+                self._end_string(token)
+                return False
+            token["escaped"] = char == "\\" and not token["escaped"]
+            token["text"] += char
+            enum = token.get("schema", {}).get("enum")
+            if enum and "\\" not in token["text"] and not any(
+                    isinstance(option, str) and option.startswith(token["text"]) for option in enum):
+                # No allowed value starts like this, so stop before the string ends
+                self._fail(f"{token['path']}: expected one of {json.dumps(enum)}")
+            return False
+        if token["kind"] == "literal":
+            token["text"] += char
+            literal = _LITERALS[token["text"][0]]
+            if not literal.startswith(token["text"]):
+                self._fail(f"{token['path']}: invalid literal '{token['text']}'")
+            if token["text"] == literal:
+                self._token = None
+                self._end_value(json.loads(literal), token["schema"], token["path"])
+            return False
+        if char in _NUMBER_CHARS:
+            token["text"] += char
+            return False
+        self._token = None
+        self._end_number(token)
+        return True
+
+    def _end_string(self, token: Dict[str, Any]):
+        try:
+            text = json.loads(f'"{token["text"]}"')
+        except ValueError:
+            self._fail(f"invalid string \"{token['text']}\"")
+        if token["kind"] == "string":
+            self._end_value(text, token["schema"], token["path"])
+            return
+        frame = self._stack[-1]
+        if _property_schema(frame["schema"], text) is None:
+            self._fail(f"{frame['path']}: unexpected property '{text}'")
+        frame["key"] = text
+        frame["keys"].append(text)
+        frame["state"] = "colon"
+
+    def _end_number(self, token: Dict[str, Any]):
+        try:
+            value = json.loads(token["text"])
+        except ValueError:
+            self._fail(f"{token['path']}: invalid number '{token['text']}'")
+        self._end_value(value, token["schema"], token["path"])
+
+    def _end_value(self, value: Any, schema: Dict[str, Any], path: str):
+        """Validate a finished scalar and move its container on."""
+        error = validate_json(value, schema, path)
+        if error:
+            self._fail(error)
+        self._advance()
+
+    def _close(self, frame: Dict[str, Any]):
+        if frame["kind"] == "object":
+            missing = [key for key in frame["schema"].get("required") or [] if key not in frame["keys"]]
+            if missing:
+                self._fail(f"{frame['path']}: missing required property '{missing[0]}'")
+        elif frame["count"] < frame["schema"].get("minItems", 0):
+            self._fail(f"{frame['path']}: expected at least {frame['schema']['minItems']} items")
+        self._stack.pop()
+        self._advance()
+
+    def _advance(self):
+        """Move the enclosing container past the value that just ended."""
+        if not self._stack:
+            self.complete = True
+            return
+        frame = self._stack[-1]
+        frame["state"] = "next"
+        if frame["kind"] == "array":
+            frame["count"] += 1
+
+
+def extract_json(text: str) -> Optional[Any]:
+    """Return the JSON document in a free-text answer, such as one in a code fence, or None."""
+    if not isinstance(text, str):
+        return None
+    candidates = re.findall(r"```(?:json)?\s*(.*?)```", text, re.DOTALL) + [text]
+    decoder = json.JSONDecoder()
+    for candidate in candidates:
+        for match in re.finditer(r"[\[{]", candidate):
+            try:
+                value, _ = decoder.raw_decode(candidate, match.start())
+            except ValueError:
+                continue
+            return value
+    return None
+
+
+def schema_instructions(schema: Dict[str, Any]) -> str:
+    """Describe the answer format for a prompt."""
+    return ("Respond with only a JSON document, without any other text, that matches this JSON Schema:\n"
+            f"{json.dumps(schema, ensure_ascii=False)}")
+
+
+def conversion_prompt(text: str, schema: Dict[str, Any], previous_error: Optional[str] = None) -> str:
+    """Build the prompt converting a free-text result into the schema's JSON."""
+    # Optional properties are declared with plain types, so null would fail validation where leaving them out passes
+    prompt = (f"{schema_instructions(schema)}\n\nFill it with the information in the following text. Leave out "
+              f"properties that are not required when the text does not contain their information, and only use "
+              f"null where the schema allows it.\n\nText:\n{text}")
+    if previous_error:
+        prompt += f"\n\nA previous answer was rejected: {previous_error}. Make sure to avoid this."
+    return prompt
+
+
+def stream_validated(chunks: Iterator[str], schema: Dict[str, Any]) -> Tuple[Any, int]:
+    """Read a streamed generation until its JSON document closes, validating it as it arrives.
+
+    The generation is closed as soon as it violates the schema or the document is complete.
+
+    Args:
+        chunks: Text chunks of the generation, such as llm.stream(prompt)
+        schema: Output schema
+
+    Returns:
+        The parsed value and the number of characters read
+
+    Raises:
+        SchemaViolation: At the first violation, with the text read so far
+    """
+    validator = StreamingJSONValidator(schema)
+    try:
+        for chunk in chunks:
+            validator.feed(chunk)
+            if validator.complete:
+                break
+    finally:
+        close = getattr(chunks, "close", None)
+        if close:
+            close()
+    return validator.result(), len(validator.text)
@@ -1,34 +1,468 @@
 """Common utilities for Crew AI use cases."""
 
 import os
+import io
+import re
+import csv
+import json
+import asyncio
+import logging
+import time
+import uuid
+import hashlib
+import threading
+import contextvars
+from functools import partial, wraps
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
 from typing import Dict, Any, List, Optional
 from crewai import Agent, Task, Crew, Process
+from crewai.tasks.task_output import TaskOutput
 from langchain.tools import DuckDuckGoSearchRun
 from langchain.tools import WikipediaQueryRun
 from langchain.utilities import WikipediaAPIWrapper
-from langchain_community.llms import Ollama
+from projects.backends import Ollama, ollama_hosts, create_llm
+from projects.budget import RunBudget, usage_report
+from projects.resilience import Resilience
+from projects.routing import EscalatingLLM, check_agent_output, escalation_chain, route_role, routing_policy
+from projects.structured import (SchemaViolation, conversion_prompt, extract_json, schema_instructions,
+                                 stream_validated, validate_json)
+
+logger = logging.getLogger(__name__)
+
+# Root directory for on-disk caches shared by the use cases
+CACHE_DIR = os.environ.get("CREW_AI_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "crew_ai_agents"))
+
+# Model used by use cases that are not given one; batch runs set it per record
+default_model: ContextVar[str] = ContextVar("default_model", default="llama3")
+
+# Identifier of the run whose checkpoints a use case saves and resumes, see UseCase.checkpointing;
+# retrying a failed run with the same identifier skips the tasks it already finished
+resume_id: ContextVar[Optional[str]] = ContextVar("resume_id", default=None)
+
+# Crews blocked in crewAI's synchronous executor at once across all arun() calls;
+# further runs wait on the event loop without holding a thread
+ASYNC_CREW_WORKERS = int(os.environ.get("CREW_AI_ASYNC_WORKERS", "16"))
+
+_blocking_executor: Optional[ThreadPoolExecutor] = None
+_blocking_executor_lock = threading.Lock()
+
+# Rough number of characters per token for Llama-style tokenizers
+CHARS_PER_TOKEN = 4
+
+# Context windows in tokens of common Ollama models, matched by name prefix
+MODEL_CONTEXT_WINDOWS = {
+    "llama2": 4096,
+    "llama3": 8192,
+    "llama3.1": 131072,
+    "llama3.2": 131072,
+    "llama3.3": 131072,
+    "mistral": 32768,
+    "mixtral": 32768,
+    "codellama": 16384,
+    "gemma": 8192,
+    "phi3": 4096,
+    "qwen2": 32768,
+}
+DEFAULT_CONTEXT_WINDOW = 4096
+
+# Share of the context window one serialized input may take; the rest is left for
+# instructions, the output of earlier tasks and the response
+INPUT_TOKEN_SHARE = 0.25
+
+# Terms marking sentences worth keeping when task output is compressed for later tasks
+KEY_TERMS = ("recommend", "conclu", "risk", "finding", "result", "key", "significant", "must", "should",
+             "critical", "important", "action", "decision", "issue", "summary", "total", "increase", "decrease")
+
+# Row and text limits tried in turn until a serialized input fits its token budget
+SERIALIZATION_LEVELS = [(None, None), (200, 2000), (100, 1000), (50, 500), (20, 200), (10, 100), (5, 60), (2, 40)]
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a piece of text.
+    
+    Args:
+        text: Text to measure
+        
+    Returns:
+        Approximate token count
+    """
+    if not text:
+        return 0
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def content_hash(*parts: Any) -> str:
+    """Compute a stable SHA-256 hex digest over arbitrary JSON-serializable parts."""
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def file_fingerprint(path: str) -> str:
+    """Fingerprint a file by size, modification time and hashes of its first and last megabyte."""
+    stat = os.stat(path)
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        digest.update(f.read(1 << 20))
+        if stat.st_size > 2 << 20:
+            f.seek(-(1 << 20), os.SEEK_END)
+            digest.update(f.read())
+    return content_hash(os.path.abspath(path), stat.st_size, stat.st_mtime_ns, digest.hexdigest())
+
+
+def context_window(model_name: str) -> int:
+    """Return the context window in tokens of an Ollama model such as "llama3:8b"."""
+    name = model_name.split(":")[0].lower()
+    for prefix in sorted(MODEL_CONTEXT_WINDOWS, key=len, reverse=True):
+        if name.startswith(prefix):
+            return MODEL_CONTEXT_WINDOWS[prefix]
+    return DEFAULT_CONTEXT_WINDOW
+
+
+def _is_scalar(value: Any) -> bool:
+    return value is None or isinstance(value, (str, int, float, bool))
+
+
+def _is_table(value: Any) -> bool:
+    """Whether a value is a non-empty list of flat records that can be rendered as CSV."""
+    return (isinstance(value, list) and bool(value)
+            and all(isinstance(row, dict) and all(_is_scalar(cell) for cell in row.values()) for row in value))
+
+
+def _format_scalar(value: Any, text_limit: Optional[int]) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    text = str(value)
+    if text_limit is not None and len(text) > text_limit:
+        return f"{text[:text_limit]}... [{len(text) - text_limit} more chars]"
+    return text
+
+
+def _sample_indices(count: int, limit: Optional[int]) -> List[int]:
+    """Evenly spaced indices including the first and last item."""
+    if limit is None or count <= limit:
+        return list(range(count))
+    if limit == 1:
+        return [0]
+    return sorted({round(i * (count - 1) / (limit - 1)) for i in range(limit)})
+
+
+def _column_summary(rows: List[Dict[str, Any]], columns: List[str]) -> str:
+    """Summarize every column of a table so sampled rows keep the overall picture."""
+    parts = []
+    for column in columns:
+        values = [row.get(column) for row in rows if row.get(column) is not None]
+        numbers = [value for value in values if isinstance(value, (int, float)) and not isinstance(value, bool)]
+        if numbers and len(numbers) == len(values):
+            parts.append(f"{column} min {min(numbers):.6g}, max {max(numbers):.6g}, "
+                         f"mean {sum(numbers) / len(numbers):.6g}")
+        else:
+            parts.append(f"{column} {len(set(map(str, values)))} distinct")
+    return "; ".join(parts)
+
+
+def _render_table(rows: List[Dict[str, Any]], row_limit: Optional[int], text_limit: Optional[int]) -> str:
+    columns = list(dict.fromkeys(column for row in rows for column in row))
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    indices = _sample_indices(len(rows), row_limit)
+    for index in indices:
+        writer.writerow([_format_scalar(rows[index].get(column), text_limit) for column in columns])
+    text = buffer.getvalue().rstrip("\n")
+    if len(indices) < len(rows):
+        text += (f"\n({len(indices)} of {len(rows)} rows shown, evenly spaced; all rows: "
+                 f"{_column_summary(rows, columns)})")
+    return text
+
+
+def _render_value(value: Any, row_limit: Optional[int], text_limit: Optional[int], indent: str = "") -> str:
+    """Render a value as indented "key: value" lines with CSV tables for lists of records."""
+    if _is_scalar(value):
+        return indent + _format_scalar(value, text_limit)
+    if _is_table(value):
+        table = _render_table(value, row_limit, text_limit)
+        return "\n".join(indent + line for line in table.split("\n"))
+    if isinstance(value, dict):
+        lines = []
+        for key, item in value.items():
+            if _is_scalar(item):
+                lines.append(f"{indent}{key}: {_format_scalar(item, text_limit)}")
+            elif isinstance(item, (list, tuple)) and all(_is_scalar(element) for element in item):
+                lines.append(f"{indent}{key}: {_render_value(item, row_limit, text_limit)}")
+            elif _is_table(item):
+                lines.append(f"{indent}{key} ({len(item)} rows):")
+                lines.append(_render_value(item, row_limit, text_limit, indent + "  "))
+            else:
+                lines.append(f"{indent}{key}:")
+                lines.append(_render_value(item, row_limit, text_limit, indent + "  "))
+        return "\n".join(lines)
+    if isinstance(value, (list, tuple)):
+        items = list(value)
+        indices = _sample_indices(len(items), row_limit)
+        if all(_is_scalar(item) for item in items):
+            rendered = ", ".join(_format_scalar(items[i], text_limit) for i in indices)
+            more = f" ({len(indices)} of {len(items)} shown)" if len(indices) < len(items) else ""
+            return f"{indent}[{rendered}]{more}"
+        lines = [f"{indent}- {_render_value(items[i], row_limit, text_limit, indent + '  ').lstrip()}"
+                 for i in indices]
+        if len(indices) < len(items):
+            lines.append(f"{indent}({len(indices)} of {len(items)} items shown)")
+        return "\n".join(lines)
+    return indent + _format_scalar(json.dumps(value, default=str), text_limit)
+
+
+def serialize_input(data: Any, max_tokens: Optional[int] = None) -> str:
+    """Render input data compactly for a task description.
+    
+    Lists of flat records become CSV tables and nested dictionaries become
+    indented "key: value" lines. If the result exceeds the token budget, rows
+    are sampled evenly (first and last kept, with a summary of every column)
+    and long text is shortened, deterministically, until it fits.
+    
+    Args:
+        data: Input data, typically a dictionary or list of records
+        max_tokens: Token budget for the result, or None for no limit
+        
+    Returns:
+        Compact text representation of the data
+    """
+    text = ""
+    for row_limit, text_limit in SERIALIZATION_LEVELS:
+        text = _render_value(data, row_limit, text_limit)
+        if max_tokens is None or estimate_tokens(text) <= max_tokens:
+            return text
+    # Even the smallest rendering is too large; cut it at the budget
+    limit = max_tokens * CHARS_PER_TOKEN
+    return f"{text[:limit]}... [truncated to fit {max_tokens} tokens]"
+
+
+def _split_sentences(text: str) -> List[str]:
+    return [sentence for sentence in re.split(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])", text.strip()) if sentence]
+
+
+def compress_text(text: str, max_tokens: int) -> str:
+    """Condense text to a token budget by keeping its structure and most informative sentences.
+    
+    Headings are kept as structure. List items and sentences are scored (first
+    sentence of a paragraph, figures, key terms, brevity) and the best ones are
+    kept in their original order until the budget is used up. The result is
+    deterministic.
+    
+    Args:
+        text: Text to compress, typically the output of a task
+        max_tokens: Token budget for the result
+        
+    Returns:
+        The text itself if it fits, otherwise the condensed text
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    
+    # Units are (order, heading, text, score); headings anchor the units below them
+    units = []
+    heading = None
+    seen = set()
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if re.match(r"^(#{1,6}\s|\*\*[^*]+\*\*:?$)", stripped) or (len(stripped) < 60 and stripped.endswith(":")):
+            heading = len(units)
+            units.append((heading, None, stripped, None))
+            continue
+        is_item = bool(re.match(r"^([-*•]|\d+[.)])\s", stripped))
+        for position, sentence in enumerate([stripped] if is_item else _split_sentences(stripped)):
+            if sentence in seen:
+                continue
+            seen.add(sentence)
+            lowered = sentence.lower()
+            score = (2.0 if is_item or position == 0 else 0.0)
+            score += 1.5 * min(len(re.findall(r"\d", sentence)), 3) / 3
+            score += sum(term in lowered for term in KEY_TERMS)
+            score -= len(sentence) / 400
+            units.append((len(units), heading, sentence, score))
+    
+    budget = max_tokens * CHARS_PER_TOKEN
+    kept = set()
+    used = 0
+    for order, heading, sentence, score in sorted((u for u in units if u[3] is not None), key=lambda u: (-u[3], u[0])):
+        cost = len(sentence) + 1 + (len(units[heading][2]) + 1 if heading is not None and heading not in kept else 0)
+        if used + cost > budget:
+            continue
+        kept.add(order)
+        if heading is not None and heading not in kept:
+            kept.add(heading)
+        used += cost
+    
+    lines = [units[order][2] for order in sorted(kept)]
+    if not lines:
+        return text[:budget]
+    return "\n".join(lines)
+
+
+async def run_blocking(func, *args: Any) -> Any:
+    """Run a blocking call on the shared bounded thread pool and await its result.
+    
+    Context variables such as default_model are carried over to the worker thread.
+    
+    Args:
+        func: Blocking callable
+        *args: Arguments for the callable
+        
+    Returns:
+        The callable's return value
+    """
+    global _blocking_executor
+    with _blocking_executor_lock:
+        if _blocking_executor is None:
+            _blocking_executor = ThreadPoolExecutor(max_workers=ASYNC_CREW_WORKERS, thread_name_prefix="crew")
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(_blocking_executor, context.run, func, *args)
+
+
+class DiskCache:
+    """Small JSON file cache keyed by content hash."""
+    
+    def __init__(self, namespace: str, directory: Optional[str] = None):
+        """Initialize the cache.
+        
+        Args:
+            namespace: Sub-directory separating unrelated cached values
+            directory: Root cache directory, defaults to CACHE_DIR
+        """
+        self.directory = os.path.join(directory or CACHE_DIR, namespace)
+        
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+        
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value for a key, or default if missing."""
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return default
+            
+    def set(self, key: str, value: Any):
+        """Store a JSON-serializable value under a key."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        
+    def delete(self, key: str):
+        """Remove a key if it is cached."""
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+            
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+        
+    def prune(self, max_age: float):
+        """Remove values stored more than max_age seconds ago."""
+        cutoff = time.time() - max_age
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except FileNotFoundError:
+                    pass
 
 class UseCase:
     """Base class for all use cases."""
     
-    def __init__(self, model_name: str = "llama3", base_url: str = "http://localhost:11434"):
+    # How outputs passed to later tasks are condensed: None (not at all), "extractive" or "llm"
+    context_compression: Optional[str] = None
+    # Token budget of each condensed task output
+    context_token_budget: int = 800
+    # Save task outputs of sequential crews so a failed run resumes from the first incomplete task.
+    # Checkpoints belong to one run: they are kept under the current resume_id, or under a fresh
+    # run_id when none is set (logged, and kept in self.run_id), and only a run with the same
+    # identifier restores them
+    checkpointing: bool = False
+    # Seconds after which the checkpoints of an unfinished run are no longer restored and are deleted
+    checkpoint_ttl: float = 24 * 3600
+    # Role patterns of agents that can run on a smaller model, mapped to a tier ("small", "medium" or
+    # "large") or model; tiers only change the model when the routing policy defines them
+    agent_tiers: Dict[str, str] = {}
+    # Overrides of the LLM resilience settings (deadlines, retries, hedging, circuit breaking), see
+    # projects.resilience.RESILIENCE_DEFAULTS; None turns a mechanism off
+    resilience: Dict[str, Any] = {}
+    # JSON Schema of the result; when set, run() returns the validated JSON value instead of the
+    # crew's text, see projects.structured
+    output_schema: Optional[Dict[str, Any]] = None
+    # Conversions in JSON mode attempted when the final answer does not contain a valid document
+    output_attempts: int = 3
+    # Overrides of the per-run limits on tokens, LLM and tool calls and wall time, see
+    # projects.budget.BUDGET_DEFAULTS; None removes a limit
+    budget: Dict[str, Any] = {}
+    
+    def __init__(self, model_name: Optional[str] = None, base_url: Optional[str] = None):
         """Initialize the use case with a model.
         
         Args:
-            model_name: Name of the Ollama model to use
-            base_url: Base URL for the Ollama API
+            model_name: Name of the Ollama model to use, defaults to the current default_model
+            base_url: Base URL for the Ollama API; without it, requests are spread over
+                the hosts in OLLAMA_HOSTS, or go to the local host if none are set
         """
-        self.model_name = model_name
-        self.base_url = base_url
+        self.model_name = model_name or default_model.get()
+        self.hosts = [base_url.rstrip("/")] if base_url else ollama_hosts()
+        self.base_url = self.hosts[0]
+        self.resilience_policy = Resilience(type(self).__name__, self.resilience)
+        self.run_budget = RunBudget(type(self).__name__, self.budget)
+        self._llms = {}
         self.llm = self._init_llm()
+        self._llms[self.model_name] = self.llm
         self.tools = self._init_tools()
         self.agents = []
         self.tasks = []
         self.crew = None
+        self.context_stats = []
+        self.checkpoints = DiskCache("checkpoints")
+        self.restored_tasks = 0
+        self.run_id = None
+        self._checkpoint_run = None
+        self.routing_stats = []
+        self.output_stats = []
+        self.run_stats = None
+        self._json_llm = None
+        self._crew_context = contextvars.copy_context()
+        
+    def _create_llm(self, model_name: str):
+        if len(self.hosts) == 1:
+            llm = Ollama(model=model_name, base_url=self.base_url)
+        else:
+            llm = create_llm(model_name, self.hosts)
+        llm.resilience = self.resilience_policy
+        llm.budget = self.run_budget
+        return llm
+        
+    def resilience_stats(self) -> Dict[str, int]:
+        """Return the counters of the resilience mechanisms for this use case's LLM calls."""
+        return self.resilience_policy.metrics.snapshot()
+        
+    def usage_report(self) -> Dict[str, Any]:
+        """Return the token, call and wall-time usage of this use case's finished runs."""
+        return usage_report(type(self).__name__).snapshot()
         
     def _init_llm(self):
         """Initialize the language model."""
-        return Ollama(model=self.model_name, base_url=self.base_url)
+        return self._create_llm(self.model_name)
+        
+    def llm_for(self, model_name: str):
+        """Return the language model for a model name, created once per use case."""
+        if model_name not in self._llms:
+            self._llms[model_name] = self._create_llm(model_name)
+        return self._llms[model_name]
     
     def _init_tools(self):
         """Initialize tools for agents."""
@@ -50,6 +484,18 @@ class UseCase:
             
         return tools
         
+    def format_input(self, data: Any, share: float = INPUT_TOKEN_SHARE) -> str:
+        """Serialize input data for a task description within the model's context window.
+        
+        Args:
+            data: Input data to render
+            share: Share of the model's context window the data may use
+            
+        Returns:
+            Compact text representation of the data
+        """
+        return serialize_input(data, max_tokens=int(context_window(self.model_name) * share))
+        
     def setup_agents(self):
         """Set up agents for the use case. Override in subclasses."""
         pass
@@ -58,6 +504,40 @@ class UseCase:
         """Set up tasks for the use case. Override in subclasses."""
         pass
         
+    def route_agents(self):
+        """Move agents to the models their roles route to, escalating to larger models on bad output.
+        
+        Only agents running on self.llm are routed. The policy comes from
+        CREW_AI_MODEL_ROUTING, extended by agent_tiers; see projects.routing.
+        """
+        policy = routing_policy()
+        for agent in self.agents:
+            if agent.llm is not self.llm:
+                continue
+            model = route_role(agent.role, self.model_name, policy, self.agent_tiers)
+            chain = [model] + escalation_chain(model, self.model_name, policy)
+            if len(chain) > 1:
+                agent.llm = EscalatingLLM(llms=[self.llm_for(name) for name in chain], models=chain,
+                                          check=self.validate_generation,
+                                          on_escalate=partial(self._record_escalation, agent.role))
+            elif model != self.model_name:
+                agent.llm = self.llm_for(model)
+                
+    def validate_generation(self, prompt: str, text: str) -> Optional[str]:
+        """Check an agent generation before it is accepted. Override to add checks.
+        
+        Args:
+            prompt: Prompt the agent sent
+            text: Generated text
+            
+        Returns:
+            Why the text is rejected, which escalates it to the next larger model, or None
+        """
+        return check_agent_output(text)
+        
+    def _record_escalation(self, role: str, from_model: str, to_model: str, reason: str):
+        self.routing_stats.append({"role": role, "from": from_model, "to": to_model, "reason": reason})
+        
     def setup_crew(self, process: Process = Process.sequential):
         """Set up the crew with configured agents and tasks.
         
@@ -70,13 +550,235 @@ class UseCase:
         if not self.tasks:
             self.setup_tasks()
             
+        self.request_output_schema()
+        self.route_agents()
+        tasks = self.tasks
+        self._checkpoint_run = None
+        self.restored_tasks = 0
+        self.run_id = resume_id.get()
+        if (self.checkpointing or self.run_id) and process == Process.sequential:
+            if not self.run_id:
+                self.run_id = uuid.uuid4().hex
+                logger.info("%s checkpoints run %s; set resume_id to it to resume the run after a failure",
+                            type(self).__name__, self.run_id)
+            self.checkpoints.prune(self.checkpoint_ttl)
+            # Tasks are identified by the run, use case, model and rendered task prompts, which embed the inputs
+            self._checkpoint_run = content_hash(self.run_id, type(self).__name__, self.model_name,
+                                                [(task.description, task.expected_output) for task in self.tasks])
+            tasks = self._restore_checkpoints()
+            
+        self._crew_context = contextvars.copy_context()
+        for task in tasks:
+            if task.async_execution:
+                self._carry_context(task)
         self.crew = Crew(
             agents=self.agents,
-            tasks=self.tasks,
+            tasks=tasks,
             process=process,
-            verbose=True
+            verbose=True,
+            task_callback=self._handle_task_output,
+            step_callback=self._handle_step
         )
         
+    def _carry_context(self, task: Any):
+        """Run an asynchronous task in a copy of the crew's context instead of an empty one.
+        
+        crewAI starts asynchronous tasks on a plain thread, which would lose context
+        variables such as the default model and the request's scheduling class and user.
+        """
+        execute = getattr(task, "_execute", None)
+        if execute is None or hasattr(execute, "__wrapped__"):
+            return
+        
+        @wraps(execute)
+        def execute_in_context(*args, **kwargs):
+            return self._crew_context.copy().run(execute, *args, **kwargs)
+        
+        task._execute = execute_in_context
+        
+    def _checkpoint_key(self, index: int) -> str:
+        return content_hash(self._checkpoint_run, index)
+        
+    def _restore_checkpoints(self) -> List[Any]:
+        """Restore the outputs of tasks completed by an earlier, failed run.
+        
+        Returns:
+            The tasks that still have to run
+        """
+        restored = 0
+        for index, task in enumerate(self.tasks[:-1]):
+            checkpoint = self.checkpoints.get(self._checkpoint_key(index))
+            if not isinstance(checkpoint, dict):
+                break
+            if time.time() - checkpoint.get("saved", 0) > self.checkpoint_ttl:
+                self.checkpoints.delete(self._checkpoint_key(index))
+                break
+            raw_output = checkpoint.get("output")
+            task.output = TaskOutput(description=task.description, exported_output=raw_output,
+                                     raw_output=raw_output)
+            # Restored tasks never start a thread for later tasks to wait on
+            task.async_execution = False
+            self._handle_task_output(task.output, save=False)
+            restored += 1
+        
+        remaining = self.tasks[restored:]
+        if restored and not remaining[0].context:
+            # Sequential crews hand the previous output to tasks without explicit context
+            remaining[0].context = [self.tasks[restored - 1]]
+        self.restored_tasks = restored
+        return remaining
+        
+    def _save_checkpoint(self, output: Any):
+        """Checkpoint a finished task, or clear the run's checkpoints once the last task is done."""
+        # crewAI sets the task's output before calling back; descriptions can repeat, so they identify no task
+        index = next((i for i, task in enumerate(self.tasks) if task.output is output), None)
+        if index is None:
+            return
+        if index < len(self.tasks) - 1:
+            self.checkpoints.set(self._checkpoint_key(index), {"output": output.raw_output, "saved": time.time()})
+        else:
+            for i in range(len(self.tasks)):
+                self.checkpoints.delete(self._checkpoint_key(i))
+        
+    def _handle_task_output(self, output: Any, save: bool = True):
+        """Checkpoint the output and run the task output hook, then condense the output if later tasks read it."""
+        if save and self._checkpoint_run:
+            self._save_checkpoint(output)
+        self.on_task_output(output)
+        if self.context_compression and any(output.description == upstream.description
+                                            for task in self.tasks for upstream in (task.context or [])):
+            self.compress_output(output)
+        
+    def compress_output(self, output: Any):
+        """Condense a task output in place before later tasks read it as context.
+        
+        The crew's final result is unaffected; only the text handed to downstream
+        tasks is replaced. Token counts before and after are recorded in context_stats.
+        
+        Args:
+            output: The crewAI TaskOutput of the task that just finished
+        """
+        text = output.raw_output
+        tokens_before = estimate_tokens(text)
+        if tokens_before <= self.context_token_budget:
+            return
+        
+        method = self.context_compression
+        summary = None
+        if method == "llm":
+            prompt = (f"Condense the following work into a structured summary for a colleague who builds on it. "
+                      f"Use short headings and bullet points, keep every figure, finding, decision and open "
+                      f"issue, and use at most {self.context_token_budget * 3 // 4} words.\n\n{text}")
+            try:
+                summary = self.llm.invoke(prompt)
+            except Exception:
+                method = "extractive"
+        if not isinstance(summary, str) or estimate_tokens(summary) > self.context_token_budget:
+            summary = compress_text(summary if isinstance(summary, str) else text, self.context_token_budget)
+        
+        output.raw_output = summary
+        self.context_stats.append({
+            "task": output.description[:80],
+            "method": method,
+            "tokens_before": tokens_before,
+            "tokens_after": estimate_tokens(summary),
+        })
+        
+    def on_task_output(self, output: Any):
+        """Handle the output of a completed task. Override in subclasses.
+        
+        Args:
+            output: The crewAI TaskOutput of the task that just finished
+        """
+        pass
+        
+    def request_output_schema(self):
+        """Ask the final task for a JSON answer matching output_schema, if the use case declares one."""
+        if not self.output_schema or not self.tasks:
+            return
+        task = self.tasks[-1]
+        instructions = schema_instructions(self.output_schema)
+        if instructions not in (task.expected_output or ""):
+            task.expected_output = f"{task.expected_output or ''}\n\n{instructions}".strip()
+            
+    def json_llm(self):
+        """Return the use case's model in Ollama's JSON mode, created once."""
+        if self._json_llm is None:
+            self._json_llm = self._create_llm(self.model_name)
+            self._json_llm.format = "json"
+        return self._json_llm
+        
+    def structure_output(self, text: Any) -> Any:
+        """Turn the crew's result into a JSON value matching output_schema.
+        
+        A valid JSON document in the final answer is used as it is. Otherwise the answer
+        is converted in JSON mode; each conversion is validated while it streams and is
+        stopped at its first violation, then retried with the reason.
+        
+        Args:
+            text: The crew's result
+            
+        Returns:
+            The validated JSON value
+            
+        Raises:
+            SchemaViolation: If no conversion produced a valid value
+        """
+        value = extract_json(text)
+        if value is not None and validate_json(value, self.output_schema) is None:
+            self.output_stats.append({"source": "final_answer", "attempts": 0, "discarded_chars": 0})
+            return value
+        
+        error, discarded = None, 0
+        for attempt in range(1, self.output_attempts + 1):
+            prompt = conversion_prompt(str(text), self.output_schema, error)
+            try:
+                value, _ = stream_validated(self.json_llm().stream(prompt), self.output_schema)
+            except SchemaViolation as e:
+                error = e.reason
+                discarded += len(e.text)
+                continue
+            self.output_stats.append({"source": "json_mode", "attempts": attempt, "discarded_chars": discarded})
+            return value
+        self.output_stats.append({"source": "failed", "attempts": self.output_attempts,
+                                  "discarded_chars": discarded})
+        raise SchemaViolation(f"No output matching the output schema after {self.output_attempts} "
+                              f"attempts: {error}", str(text))
+        
+    def _handle_step(self, step: Any):
+        """Count the tool calls of an agent step against the run budget."""
+        # Steps are a list of (action, observation) pairs, or the agent's final answer
+        if isinstance(step, list):
+            for _ in step:
+                self.run_budget.add_tool_call()
+        
+    def kickoff(self) -> Any:
+        """Run the crew and return its result, as a validated JSON value if output_schema is set.
+        
+        The run, including LLM calls made while its tasks were set up, is metered
+        against the use case's budget and stops with BudgetExceeded
+        once it passes a hard limit; its usage is added to usage_report() either way.
+        When a checkpointed run fails, the run_id to resume it with is logged.
+        """
+        self.run_budget.start()
+        # Asynchronous tasks run in the context the crew is started in
+        self._crew_context = contextvars.copy_context()
+        try:
+            try:
+                result = self.crew.kickoff()
+            except Exception:
+                if self._checkpoint_run:
+                    logger.warning("%s run %s failed; set resume_id to it to resume from the last finished task",
+                                   type(self).__name__, self.run_id)
+                raise
+            # Limits passed on the threads of asynchronous tasks only ended those threads
+            self.run_budget.raise_if_exceeded()
+            if not self.output_schema:
+                return result
+            return self.structure_output(result)
+        finally:
+            self.run_stats = self.run_budget.finish()
+        
     def run(self, input_data: Optional[Dict[str, Any]] = None) -> str:
         """Run the use case with optional input data.
         
@@ -91,5 +793,22 @@ class UseCase:
             self.setup_crew()
             
         # Kickoff the crew and return the result
-        result = self.crew.kickoff()
+        result = self.kickoff()
         return result
+        
+    async def arun(self, input_data: Optional[Dict[str, Any]] = None) -> str:
+        """Run the use case from asyncio code without blocking the event loop.
+        
+        crewAI executes agents synchronously, so the crew runs on a shared pool of
+        ASYNC_CREW_WORKERS threads; any number of concurrent arun() calls can be
+        awaited, and those beyond the pool size queue without holding a thread.
+        
+        Args:
+            input_data: Optional dictionary of input data
+            
+        Returns:
+            The result of running the crew
+        """
+        if not self.crew:
+            self.setup_crew()
+        return await run_blocking(self.kickoff)
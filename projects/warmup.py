@@ -0,0 +1,234 @@
+"""Preloading Ollama models and keeping them resident.
+
+Ollama loads a model on its first request, which can take tens of seconds,
+and unloads it after keep_alive (five minutes by default) without requests.
+A ModelWarmer loads the configured models on every host at startup with a
+longer keep_alive and pings them periodically so they are never evicted
+between runs. Each load reports how long the host took to load the model.
+
+The models to warm come from CREW_AI_WARM_MODELS (comma-separated) or, if
+it is not set, the default model plus every model named by the routing
+policy. OLLAMA_KEEP_ALIVE sets how long models stay loaded after a request
+(Ollama duration such as "30m", or seconds) and OLLAMA_WARM_INTERVAL the
+seconds between pings (half the keep_alive by default).
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+from projects.backends import ollama_hosts
+from projects.routing import escalation_chain, resolve_model, routing_policy
+
+DEFAULT_KEEP_ALIVE = "30m"
+
+# Seconds between pings when models are kept loaded indefinitely
+DEFAULT_WARM_INTERVAL = 300.0
+
+# Seconds a host may take to load a model
+LOAD_TIMEOUT = 300.0
+
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+_warmer: Optional["ModelWarmer"] = None
+_warmer_lock = threading.Lock()
+
+
+def keep_alive_seconds(keep_alive: Any) -> Optional[float]:
+    """Convert an Ollama keep_alive value to seconds, or None if models stay loaded indefinitely."""
+    if isinstance(keep_alive, (int, float)):
+        seconds = float(keep_alive)
+    else:
+        text = str(keep_alive).strip()
+        if re.fullmatch(r"-?\d+(\.\d+)?", text):
+            seconds = float(text)
+        else:
+            parts = re.findall(r"(\d+(?:\.\d+)?)(ms|s|m|h)", text)
+            if not parts or "".join(value + unit for value, unit in parts) != text.lstrip("-"):
+                raise ValueError(f"Invalid keep_alive '{keep_alive}'")
+            seconds = sum(float(value) * _DURATION_UNITS[unit] for value, unit in parts)
+            seconds = -seconds if text.startswith("-") else seconds
+    return None if seconds < 0 else seconds
+
+
+def configured_models(default_model: str) -> List[str]:
+    """Return the models to warm: CREW_AI_WARM_MODELS, or the default and routed models."""
+    listed = [model.strip() for model in os.environ.get("CREW_AI_WARM_MODELS", "").split(",") if model.strip()]
+    if listed:
+        return list(dict.fromkeys(listed))
+    policy = routing_policy()
+    models = [default_model]
+    models += [resolve_model(name, default_model, policy) for name in (policy.get("tiers") or {})]
+    models += [resolve_model(name, default_model, policy) for name in (policy.get("roles") or {}).values()]
+    models += escalation_chain(default_model, default_model, policy)
+    return list(dict.fromkeys(models))
+
+
+def load_model(host: str, model: str, keep_alive: Any = DEFAULT_KEEP_ALIVE,
+               timeout: float = LOAD_TIMEOUT) -> Dict[str, Any]:
+    """Ask a host to load a model, or keep it loaded, without generating anything.
+
+    Args:
+        host: Base URL of the Ollama host
+        model: Model name
+        keep_alive: How long the host keeps the model loaded after this request
+        timeout: Seconds to wait for the load
+
+    Returns:
+        Report with the wall time of the request and the host's own load time in seconds
+    """
+    body = json.dumps({"model": model, "keep_alive": keep_alive, "stream": False}).encode("utf-8")
+    request = urllib.request.Request(f"{host}/api/generate", data=body,
+                                     headers={"Content-Type": "application/json"})
+    report = {"host": host, "model": model, "ok": False, "seconds": None, "load_seconds": None, "error": None}
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            answer = json.load(response)
+        report["ok"] = True
+        # Ollama reports durations in nanoseconds; a resident model loads in well under a second
+        if answer.get("load_duration") is not None:
+            report["load_seconds"] = round(answer["load_duration"] / 1e9, 3)
+    except (OSError, ValueError) as e:
+        report["error"] = str(e)
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    report["time"] = time.time()
+    return report
+
+
+class ModelWarmer:
+    """Load models on every host and ping them so they stay resident."""
+
+    def __init__(self, models: List[str], hosts: Optional[List[str]] = None, keep_alive: Any = None,
+                 interval: Optional[float] = None, workers: int = 4):
+        """Initialize the warmer.
+
+        Args:
+            models: Models to keep loaded
+            hosts: Base URLs of the Ollama hosts, defaults to ollama_hosts()
+            keep_alive: Ollama keep_alive sent with every load, defaults to OLLAMA_KEEP_ALIVE or "30m"
+            interval: Seconds between pings, defaults to OLLAMA_WARM_INTERVAL or half the keep_alive
+            workers: Number of loads sent at once
+        """
+        self.models = list(dict.fromkeys(models))
+        self.hosts = hosts or ollama_hosts()
+        self.keep_alive = keep_alive if keep_alive is not None else os.environ.get("OLLAMA_KEEP_ALIVE",
+                                                                                  DEFAULT_KEEP_ALIVE)
+        seconds = keep_alive_seconds(self.keep_alive)
+        if interval is None:
+            interval = float(os.environ.get("OLLAMA_WARM_INTERVAL", 0)) or (
+                DEFAULT_WARM_INTERVAL if seconds is None else max(seconds / 2, 1.0))
+        self.interval = interval
+        self.workers = workers
+        self.reports: Dict[Any, Dict[str, Any]] = {}
+        self.cold_loads: Dict[Any, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stop: Optional[threading.Event] = None
+
+    def warm(self, models: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Load every model on every host now, in parallel.
+
+        Args:
+            models: Models to load, defaults to all of the warmer's models
+
+        Returns:
+            One report per host and model
+        """
+        pairs = [(host, model) for model in (self.models if models is None else models) for host in self.hosts]
+        if not pairs:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(pairs))) as executor:
+            results = list(executor.map(lambda pair: load_model(pair[0], pair[1], self.keep_alive), pairs))
+        with self._lock:
+            for pair, report in zip(pairs, results):
+                self.reports[pair] = report
+                # The first successful load after startup is the cold load time worth reporting
+                if report["ok"] and pair not in self.cold_loads:
+                    self.cold_loads[pair] = report
+        return results
+
+    def start(self, block: bool = False) -> List[Dict[str, Any]]:
+        """Warm the models and keep pinging them on a daemon thread until stop().
+
+        Args:
+            block: Whether to wait for the first warm-up before returning
+
+        Returns:
+            The reports of the first warm-up if block is set, otherwise an empty list
+        """
+        if self._stop is not None:
+            return []
+        self._stop = threading.Event()
+        stop = self._stop
+        results = self.warm() if block else []
+
+        def loop():
+            if not block:
+                self.warm()
+            while not stop.wait(self.interval):
+                self.warm()
+
+        threading.Thread(target=loop, name="ollama-warmup", daemon=True).start()
+        return results
+
+    def add(self, models: List[str]):
+        """Keep further models loaded, loading the new ones on a daemon thread if the warmer is running.
+
+        Args:
+            models: Models to add; models the warmer already keeps loaded are ignored
+        """
+        with self._lock:
+            added = [model for model in dict.fromkeys(models) if model not in self.models]
+            self.models.extend(added)
+        if added and self._stop is not None:
+            threading.Thread(target=self.warm, args=(added,), name="ollama-warmup", daemon=True).start()
+
+    def stop(self):
+        """Stop pinging the models."""
+        if self._stop is not None:
+            self._stop.set()
+            self._stop = None
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Return the latest report per host and model, with its cold load time."""
+        with self._lock:
+            return [dict(report, cold_load_seconds=self.cold_loads.get(pair, {}).get("load_seconds"))
+                    for pair, report in sorted(self.reports.items())]
+
+
+def format_report(reports: List[Dict[str, Any]]) -> str:
+    """Format warm-up reports as one line per host and model."""
+    lines = []
+    for report in reports:
+        if report["ok"]:
+            load = report.get("cold_load_seconds", report["load_seconds"])
+            lines.append(f"{report['model']} @ {report['host']}: loaded"
+                         + (f" in {load:.1f}s" if load is not None else ""))
+        else:
+            lines.append(f"{report['model']} @ {report['host']}: failed ({report['error']})")
+    return "\n".join(lines)
+
+
+def start_warmup(models: Optional[List[str]] = None, default_model: str = "llama3",
+                 block: bool = False) -> ModelWarmer:
+    """Start the process-wide warmer once; later calls return the running one.
+
+    Args:
+        models: Models to warm, defaults to configured_models(default_model)
+        default_model: Model use cases run on by default
+        block: Whether to wait for the first warm-up
+
+    Returns:
+        The process-wide ModelWarmer
+    """
+    global _warmer
+    with _warmer_lock:
+        if _warmer is None:
+            _warmer = ModelWarmer(models or configured_models(default_model))
+            _warmer.start(block=block)
+        return _warmer
@@ -0,0 +1,70 @@
+"""
+Headless batch runner for Crew AI Agents use cases.
+
+Reads a JSONL file of {"use_case_id": ..., "input_data": {...}} records (with an
+optional "model" and "id" per record), runs them on a worker pool and streams
+one JSON result per line as records complete.
+
+Example:
+    python run_batch.py nightly.jsonl -o results.jsonl --workers 8 --model-limit llama3=2
+"""
+
+import argparse
+import json
+import sys
+
+from ui.batch import BatchRunner, format_summary, read_records
+
+
+def parse_model_limits(values):
+    """Parse repeated MODEL=LIMIT arguments into a dictionary."""
+    limits = {}
+    for value in values or []:
+        model, separator, limit = value.rpartition("=")
+        if not separator or not model or not limit.isdigit() or int(limit) < 1:
+            raise argparse.ArgumentTypeError(f"Invalid model limit '{value}', expected MODEL=LIMIT")
+        limits[model] = int(limit)
+    return limits
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run use cases over a JSONL file of inputs.")
+    parser.add_argument("input", help="JSONL file of records, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL file for the results, or - for stdout (default)")
+    parser.add_argument("--workers", type=int, default=4, help="Number of records run at once (default 4)")
+    parser.add_argument("--mode", choices=("thread", "process"), default="thread",
+                        help="Run records in threads or in separate processes (default thread)")
+    parser.add_argument("--model-limit", action="append", metavar="MODEL=LIMIT",
+                        help="Maximum concurrent records for a model; may be repeated")
+    parser.add_argument("--summary", help="Also write the summary as JSON to this file")
+    parser.add_argument("--no-warmup", action="store_true",
+                        help="Do not preload the batch's models on the Ollama hosts before starting")
+    args = parser.parse_args(argv)
+
+    try:
+        model_limits = parse_model_limits(args.model_limit)
+        runner = BatchRunner(workers=args.workers, mode=args.mode, model_limits=model_limits,
+                             warmup=not args.no_warmup)
+    except (argparse.ArgumentTypeError, ValueError) as e:
+        parser.error(str(e))
+
+    input_file = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    output_file = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        summary = runner.run(read_records(input_file), output_file)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+    # Keep stdout clean for results when they are streamed there
+    print(format_summary(summary), file=sys.stderr if args.output == "-" else sys.stdout)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -125,9 +125,11 @@ for submodule in community_submodules:
     mock_submodule = mock.MagicMock()
     sys.modules[f'langchain_community.{submodule}'] = mock_submodule
 
-# Add Ollama to langchain_community
-mock_community_ollama = mock.MagicMock()
-sys.modules['langchain_community.llms'].Ollama = mock_community_ollama
+# Add Ollama to langchain_community as a class, since the project subclasses it
+class MockCommunityOllama(mock.MagicMock):
+    """Mock class for langchain_community's Ollama LLM."""
+
+sys.modules['langchain_community.llms'].Ollama = MockCommunityOllama
 sys.modules['langchain_community.utilities'].WikipediaAPIWrapper = mock.MagicMock()
 
 # Now we can safely import crewai and related modules for testing
@@ -140,6 +142,8 @@ sys.modules['crewai'] = mock_crewai
 sys.modules['crewai.agent'] = mock.MagicMock()
 sys.modules['crewai.task'] = mock.MagicMock()
 sys.modules['crewai.crew'] = mock.MagicMock()
+sys.modules['crewai.tasks'] = mock.MagicMock()
+sys.modules['crewai.tasks.task_output'] = mock.MagicMock()
 
 # Mock other dependencies
 sys.modules['ollama'] = mock.MagicMock()
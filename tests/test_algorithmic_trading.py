@@ -74,7 +74,7 @@ class TestAlgorithmicTradingUseCase(unittest.TestCase):
         # Setup mock
         mock_instance = MagicMock()
         mock_usecase_class.return_value = mock_instance
-        mock_instance.crew.kickoff.return_value = "Test algorithmic trading result"
+        mock_instance.kickoff.return_value = "Test algorithmic trading result"
         
         # Call run function
         test_input = {"query": "Mean reversion strategy"}
@@ -85,7 +85,7 @@ class TestAlgorithmicTradingUseCase(unittest.TestCase):
         mock_instance.setup_agents.assert_called_once()
         mock_instance.setup_tasks.assert_called_once_with(test_input)
         mock_instance.setup_crew.assert_called_once()
-        mock_instance.crew.kickoff.assert_called_once()
+        mock_instance.kickoff.assert_called_once()
         self.assertEqual(result, "Test algorithmic trading result")
 
 
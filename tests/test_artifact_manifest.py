@@ -0,0 +1,102 @@
+"""Unit tests for the AI model reproducibility artifact manifests."""
+
+import sys
+import os
+import json
+import hashlib
+import tempfile
+import unittest
+
+# Import the conftest fix before any project imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest
+
+from projects.research_use_cases.use_case_08_ai_model_reproducibility.artifacts import (
+    ArtifactHasher, artifact_kind, build_manifest, diff_manifests, format_diff, hash_file, load_manifest,
+    run_artifact_tool, save_manifest
+)
+from projects.utils import DiskCache
+
+
+class TestArtifactManifest(unittest.TestCase):
+    """Test cases for hashing, manifests and manifest diffs."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.root = os.path.join(self.temp_dir.name, "run")
+        self.cache_dir = os.path.join(self.temp_dir.name, "cache")
+        self.hasher = ArtifactHasher(cache=DiskCache("hashes", self.cache_dir), workers=4)
+        self._write("model/weights.safetensors", os.urandom(3 << 20))
+        self._write("data/train.csv", b"x,y\n1,2\n")
+        self._write("config.yaml", b"lr: 0.1\n")
+        self._write("requirements.txt", b"numpy==1.26.4\n")
+        self._write(".git/HEAD", b"ref: refs/heads/main\n")
+
+    def _write(self, name, data):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def test_hash_matches_sha256(self):
+        """Test memory-mapped hashing matches hashlib, including empty files."""
+        path = os.path.join(self.root, "model/weights.safetensors")
+        with open(path, "rb") as f:
+            expected = hashlib.sha256(f.read()).hexdigest()
+        self.assertEqual(hash_file(path, chunk_bytes=1 << 20), expected)
+        self._write("empty.bin", b"")
+        self.assertEqual(hash_file(os.path.join(self.root, "empty.bin")), hashlib.sha256().hexdigest())
+
+    def test_manifest_is_content_addressed(self):
+        """Test the manifest digest depends only on the artifacts' contents."""
+        first = build_manifest([self.root], hasher=self.hasher)
+        second = build_manifest([self.root], hasher=self.hasher, verify=True)
+
+        self.assertEqual(first["digest"], second["digest"])
+        self.assertEqual(sorted(first["artifacts"]),
+                         ["config.yaml", "data/train.csv", "model/weights.safetensors", "requirements.txt"])
+        self.assertEqual(first["artifacts"]["model/weights.safetensors"]["kind"], "weights")
+        self.assertEqual(artifact_kind("poetry.lock"), "environment")
+
+    def test_diff(self):
+        """Test modified, added, removed and renamed artifacts are reported."""
+        old = build_manifest([self.root], hasher=self.hasher)
+        self._write("config.yaml", b"lr: 0.2\n")
+        os.rename(os.path.join(self.root, "data/train.csv"), os.path.join(self.root, "data/train_v2.csv"))
+        os.remove(os.path.join(self.root, "requirements.txt"))
+        self._write("eval.jsonl", b"{}\n")
+        diff = diff_manifests(old, build_manifest([self.root], hasher=self.hasher))
+
+        self.assertFalse(diff["identical"])
+        self.assertEqual([entry["path"] for entry in diff["modified"]], ["config.yaml"])
+        self.assertEqual(diff["renamed"], [{"from": "data/train.csv", "to": "data/train_v2.csv", "kind": "dataset"}])
+        self.assertEqual([entry["path"] for entry in diff["removed"]], ["requirements.txt"])
+        self.assertEqual([entry["path"] for entry in diff["added"]], ["eval.jsonl"])
+        self.assertEqual(diff["unchanged"], 1)
+        self.assertIn("config.yaml [config]", format_diff(diff))
+
+    def test_identical_diff_without_baseline_digest(self):
+        """Test an identical diff against a baseline manifest without a digest is formatted."""
+        manifest = build_manifest([self.root], hasher=self.hasher)
+        baseline = {key: value for key, value in manifest.items() if key != "digest"}
+        self.assertIn("identical to the baseline manifest", format_diff(diff_manifests(baseline, manifest)))
+
+    def test_saved_manifest_and_tool(self):
+        """Test a stored manifest can be loaded back by digest and used as a tool baseline."""
+        cache = DiskCache("manifests", self.cache_dir)
+        manifest = build_manifest([self.root], hasher=self.hasher)
+        digest = save_manifest(manifest, cache)
+        self.assertEqual(load_manifest(digest, cache)["artifacts"], manifest["artifacts"])
+
+        path = os.path.join(self.temp_dir.name, "baseline.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        result = json.loads(run_artifact_tool(json.dumps({"paths": [self.root]}), baseline=path))
+        self.assertEqual(result["artifacts"], 4)
+        self.assertIn("identical", result["diff"])
+        self.assertTrue(run_artifact_tool('{"paths": ["/does/not/exist"]}').startswith("Error"))
+
+
+if __name__ == '__main__':
+    unittest.main()
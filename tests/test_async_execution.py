@@ -0,0 +1,143 @@
+"""Unit tests for running use cases from asyncio code."""
+
+import sys
+import os
+import asyncio
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+# Import the conftest fix before any project imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest
+
+from projects.utils import UseCase, default_model, run_blocking
+from ui.core import UseCaseManager
+
+
+class SleepingUseCase(UseCase):
+    """Use case whose crew blocks like a synchronous crewAI kickoff."""
+
+    def setup_agents(self):
+        self.agents = {}
+
+    def setup_tasks(self, input_data=None):
+        self.tasks = []
+
+    def setup_crew(self):
+        self.crew = MagicMock()
+        self.crew.kickoff.side_effect = lambda: time.sleep(0.05) or f"{self.model_name} done"
+
+
+class TestRunBlocking(unittest.TestCase):
+    """Test cases for the shared blocking-call pool."""
+
+    def test_context_variables_reach_worker_thread(self):
+        """Test default_model set in a coroutine is seen by the blocking call."""
+        async def main():
+            default_model.set("mistral")
+            return await run_blocking(lambda: (default_model.get(), threading.current_thread().name))
+
+        model, thread_name = asyncio.run(main())
+        self.assertEqual(model, "mistral")
+        self.assertTrue(thread_name.startswith("crew"))
+        self.assertEqual(default_model.get(), "llama3")
+
+    def test_exceptions_propagate(self):
+        """Test an exception raised by the blocking call is raised by the await."""
+        def fail():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            asyncio.run(run_blocking(fail))
+
+
+class TestUseCaseArun(unittest.TestCase):
+    """Test cases for UseCase.arun."""
+
+    def test_concurrent_runs_overlap_without_blocking_the_loop(self):
+        """Test several crews awaited together finish in about the time of one."""
+        async def main():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.005)
+
+            ticking = asyncio.ensure_future(ticker())
+            results = await asyncio.gather(*(SleepingUseCase(f"model{i}").arun() for i in range(8)))
+            ticking.cancel()
+            return results, ticks
+
+        start = time.perf_counter()
+        results, ticks = asyncio.run(main())
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(results, [f"model{i} done" for i in range(8)])
+        self.assertLess(elapsed, 0.3)
+        self.assertGreater(ticks, 2)
+
+    def test_arun_uses_existing_crew(self):
+        """Test arun does not rebuild a crew that was already set up."""
+        use_case = SleepingUseCase("llama3")
+        use_case.crew = MagicMock()
+        use_case.crew.kickoff.return_value = "prepared"
+
+        with patch.object(SleepingUseCase, "setup_crew") as setup_crew:
+            self.assertEqual(asyncio.run(use_case.arun()), "prepared")
+        setup_crew.assert_not_called()
+
+
+class TestArunUseCase(unittest.TestCase):
+    """Test cases for UseCaseManager.arun_use_case."""
+
+    def setUp(self):
+        self.manager = UseCaseManager()
+        self.manager.get_use_case = MagicMock(return_value={"module_path": "fake.module"})
+
+    def test_unknown_use_case(self):
+        """Test an unknown id is reported without raising."""
+        self.manager.get_use_case.return_value = None
+        result = asyncio.run(self.manager.arun_use_case("missing", {}))
+        self.assertFalse(result["success"])
+        self.assertIn("not found", result["error"])
+
+    def test_prefers_native_arun(self):
+        """Test a module's async arun is awaited instead of running run in a thread."""
+        async def arun(input_data):
+            return f"async {input_data['query']}"
+
+        module = SimpleNamespace(arun=arun, run=MagicMock())
+        with patch("ui.core.importlib.import_module", return_value=module):
+            result = asyncio.run(self.manager.arun_use_case("fake", {"query": "x"}))
+
+        self.assertEqual(result["result"], "async x")
+        module.run.assert_not_called()
+
+    def test_falls_back_to_run(self):
+        """Test modules without arun run their blocking run function off the loop."""
+        module = SimpleNamespace(run=lambda input_data: threading.current_thread().name)
+        with patch("ui.core.importlib.import_module", return_value=module):
+            result = asyncio.run(self.manager.arun_use_case("fake", {}))
+
+        self.assertTrue(result["success"])
+        self.assertTrue(result["result"].startswith("crew"))
+
+    def test_errors_are_reported(self):
+        """Test an exception in the use case is returned as a failed result."""
+        def run(input_data):
+            raise RuntimeError("crew failed")
+
+        with patch("ui.core.importlib.import_module", return_value=SimpleNamespace(run=run)):
+            result = asyncio.run(self.manager.arun_use_case("fake", {}))
+
+        self.assertFalse(result["success"])
+        self.assertEqual(result["error"], "crew failed")
+
+
+if __name__ == "__main__":
+    unittest.main()
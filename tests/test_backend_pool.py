@@ -0,0 +1,182 @@
+"""Unit tests for the load-balanced Ollama backend pool."""
+
+import sys
+import os
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch
+
+# Import the conftest fix before any project imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest
+
+from projects.backends import BackendPool, BackendUnavailableError, is_backend_failure, ollama_hosts
+from projects.utils import UseCase
+
+HOSTS = ["http://a:11434", "http://b:11434", "http://c:11434"]
+
+
+class TestBackendPool(unittest.TestCase):
+    """Test cases for routing, failover and draining."""
+
+    def setUp(self):
+        self.pool = BackendPool(HOSTS)
+
+    def test_least_outstanding_spreads_requests(self):
+        """Test concurrent requests go to the hosts with the fewest in flight."""
+        chosen = [self.pool.acquire() for _ in range(6)]
+        self.assertEqual(sorted(backend.url for backend in chosen), sorted(HOSTS * 2))
+        self.pool.release(chosen[0], latency=0.1)
+        self.assertIs(self.pool.acquire(), chosen[0])
+
+    def test_latency_strategy_prefers_fast_host(self):
+        """Test the latency strategy weighs time to first token by queue depth."""
+        pool = BackendPool(HOSTS[:2], strategy="latency")
+        fast, slow = pool.backends
+        fast.latency, slow.latency = 0.1, 1.0
+        self.assertEqual([pool.acquire() for _ in range(3)], [fast] * 3)
+        # Ten queued requests on the fast host now cost more than an idle slow host
+        fast.outstanding = 10
+        self.assertIs(pool.acquire(), slow)
+
+    def test_call_fails_over_on_connection_error(self):
+        """Test a request is retried on another host when its host refuses connections."""
+        calls = []
+
+        def request(url):
+            calls.append(url)
+            if len(calls) == 1:
+                raise ConnectionRefusedError("refused")
+            return f"answer from {url}"
+
+        result = self.pool.call(request)
+        self.assertEqual(result, f"answer from {calls[1]}")
+        self.assertNotEqual(calls[0], calls[1])
+        self.assertTrue(all(backend.outstanding == 0 for backend in self.pool.backends))
+
+    def test_request_errors_are_not_retried(self):
+        """Test errors caused by the request itself are raised without failover."""
+        calls = []
+
+        def request(url):
+            calls.append(url)
+            raise ValueError("Ollama call failed with status code 400.")
+
+        with self.assertRaises(ValueError):
+            self.pool.call(request)
+        self.assertEqual(len(calls), 1)
+
+    def test_all_hosts_failing_raises_last_error(self):
+        """Test the last host error is raised once every host failed."""
+        def request(url):
+            raise ConnectionRefusedError(url)
+
+        with self.assertRaises(ConnectionRefusedError):
+            self.pool.call(request)
+        self.assertEqual(sum(backend.errors for backend in self.pool.backends), 3)
+
+    def test_unhealthy_host_leaves_rotation(self):
+        """Test repeated failures take a host out of rotation until its cooldown."""
+        bad = self.pool.backends[0]
+        for _ in range(self.pool.failure_threshold):
+            self.pool.release(self.pool.acquire([b for b in self.pool.backends if b is not bad]),
+                              error=ConnectionResetError())
+        self.assertFalse(bad.healthy)
+        self.assertNotIn(bad, [self.pool.acquire() for _ in range(4)])
+
+        bad.unhealthy_until = 0.0
+        self.assertIn(bad, [self.pool.acquire() for _ in range(4)])
+
+    def test_stream_fails_over_only_before_first_line(self):
+        """Test a stream switches hosts before output arrives but not after."""
+        def flaky(url):
+            if url == self.pool.backends[0].url:
+                raise ConnectionError("down")
+            yield "line 1"
+            yield "line 2"
+
+        self.pool.backends[1].outstanding = self.pool.backends[2].outstanding = 1
+        self.assertEqual(list(self.pool.stream(flaky)), ["line 1", "line 2"])
+
+        def broken(url):
+            yield "partial"
+            raise ConnectionError("reset")
+
+        with self.assertRaises(ConnectionError):
+            list(self.pool.stream(broken))
+
+    def test_astream(self):
+        """Test the asynchronous stream fails over the same way."""
+        first = self.pool.backends[0]
+        self.pool.backends[1].outstanding = self.pool.backends[2].outstanding = 1
+
+        async def lines(url):
+            if url == first.url:
+                raise ConnectionError("down")
+            yield url
+
+        async def collect():
+            return [line async for line in self.pool.astream(lines)]
+
+        self.assertEqual(len(asyncio.run(collect())), 1)
+        self.assertEqual(first.errors, 1)
+
+    def test_drain_waits_for_in_flight_requests(self):
+        """Test a draining host gets no new requests and drain returns once it is idle."""
+        busy = self.pool.acquire()
+        self.assertFalse(self.pool.drain(busy.url, timeout=0.01))
+        self.assertNotIn(busy, [self.pool.acquire() for _ in range(4)])
+
+        threading.Timer(0.02, self.pool.release, args=(busy,), kwargs={"latency": 0.1}).start()
+        self.assertTrue(self.pool.drain(busy.url, timeout=2))
+
+        self.pool.add(busy.url)
+        self.assertFalse(busy.draining)
+
+    def test_remove_and_no_hosts_left(self):
+        """Test removed hosts are gone and an empty rotation raises BackendUnavailableError."""
+        self.assertTrue(self.pool.remove(HOSTS[0]))
+        self.assertEqual([backend.url for backend in self.pool.backends], HOSTS[1:])
+        self.pool.drain(HOSTS[1])
+        self.pool.drain(HOSTS[2])
+        with self.assertRaises(BackendUnavailableError):
+            self.pool.acquire()
+
+    def test_check_health(self):
+        """Test health checks mark hosts that do not answer as out of rotation."""
+        with patch.object(BackendPool, "probe", side_effect=lambda url: url != HOSTS[1]):
+            results = self.pool.check_health()
+        self.assertEqual(results, {HOSTS[0]: True, HOSTS[1]: False, HOSTS[2]: True})
+        self.assertFalse(self.pool.backends[1].healthy)
+
+
+class TestConfiguration(unittest.TestCase):
+    """Test cases for host configuration."""
+
+    def test_is_backend_failure(self):
+        """Test host failures are told apart from request errors."""
+        self.assertTrue(is_backend_failure(ConnectionRefusedError()))
+        self.assertTrue(is_backend_failure(ValueError("Ollama call failed with status code 503.")))
+        self.assertFalse(is_backend_failure(ValueError("Ollama call failed with status code 400.")))
+
+    def test_ollama_hosts(self):
+        """Test OLLAMA_HOSTS is parsed and the local host is the default."""
+        with patch.dict(os.environ, {"OLLAMA_HOSTS": "http://a:11434/, http://b:11434"}):
+            self.assertEqual(ollama_hosts(), ["http://a:11434", "http://b:11434"])
+        with patch.dict(os.environ, {"OLLAMA_HOSTS": ""}):
+            self.assertEqual(ollama_hosts(), ["http://localhost:11434"])
+
+    def test_use_case_uses_pool(self):
+        """Test use cases spread over OLLAMA_HOSTS unless given a base_url."""
+        with patch.dict(os.environ, {"OLLAMA_HOSTS": ",".join(HOSTS)}), \
+                patch("projects.utils.create_llm") as create_llm:
+            use_case = UseCase()
+            pinned = UseCase(base_url="http://pinned:11434")
+        create_llm.assert_called_once_with(use_case.model_name, HOSTS)
+        self.assertEqual(use_case.base_url, HOSTS[0])
+        self.assertEqual(pinned.hosts, ["http://pinned:11434"])
+
+
+if __name__ == "__main__":
+    unittest.main()
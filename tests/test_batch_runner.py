@@ -0,0 +1,184 @@
+"""Unit tests for the headless batch runner."""
+
+import sys
+import os
+import io
+import json
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+# Import the conftest fix before any project imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from projects.scheduling import request_priority, request_user
+from projects.utils import UseCase
+from ui.batch import BatchRunner, format_summary, percentile, read_records
+
+
+class FakeManager:
+    """Stand-in for UseCaseManager that records concurrency per model."""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active = {}
+        self.peak = {}
+        self.models = []
+
+    def get_all_use_cases(self):
+        return {}
+
+    def run_use_case(self, use_case_id, input_data=None, capture_output=True, reload=True):
+        model = UseCase().model_name
+        with self.lock:
+            self.models.append(model)
+            self.active[model] = self.active.get(model, 0) + 1
+            self.peak[model] = max(self.peak.get(model, 0), self.active[model])
+        time.sleep(self.delay)
+        with self.lock:
+            self.active[model] -= 1
+        if use_case_id == "broken":
+            return {"error": "boom", "success": False}
+        return {"result": f"{use_case_id}: {input_data['query']}", "output": "", "success": True}
+
+
+class TestBatchRunner(unittest.TestCase):
+    """Test cases for reading records, scheduling and reporting."""
+
+    def test_read_records(self):
+        """Test valid records are numbered and invalid lines become error records."""
+        lines = ['{"use_case_id": "a", "input_data": {"query": "x"}}', "", "not json",
+                 '{"input_data": {}}', '{"use_case_id": "b", "input_data": [1]}']
+        records = list(read_records(lines))
+
+        self.assertEqual([record["line"] for record in records], [1, 3, 4, 5])
+        self.assertNotIn("error", records[0])
+        self.assertTrue(all("error" in record for record in records[1:]))
+
+    def test_percentile(self):
+        """Test interpolated percentiles."""
+        self.assertEqual(percentile([1.0, 2.0, 3.0, 4.0, 5.0], 50), 3.0)
+        self.assertAlmostEqual(percentile(list(range(1, 101)), 95), 95.05)
+        self.assertIsNone(percentile([], 50))
+
+    def test_run_streams_results_within_model_limits(self):
+        """Test every record produces one line and per-model limits are respected."""
+        records = [{"use_case_id": "use_case_x", "input_data": {"query": str(i)},
+                    "model": "mistral" if i % 2 else None} for i in range(12)]
+        records.append({"use_case_id": "broken", "input_data": {"query": "y"}})
+        lines = [json.dumps(record) for record in records] + ["oops"]
+        manager = FakeManager()
+        output = io.StringIO()
+
+        summary = BatchRunner(workers=6, model_limits={"llama3": 2, "mistral": 1}, manager=manager).run(
+            read_records(lines), output)
+
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(sorted(result["line"] for result in results), list(range(1, 15)))
+        self.assertEqual(manager.peak, {"llama3": 2, "mistral": 1})
+        self.assertEqual(manager.models.count("mistral"), 6)
+        self.assertEqual(summary["records"], 14)
+        self.assertEqual(summary["failed"], 2)
+        self.assertEqual(summary["use_cases"]["use_case_x"]["records"], 12)
+        self.assertGreater(summary["throughput"], 0)
+        self.assertLessEqual(summary["p50"], summary["p95"])
+        self.assertIn("use_case_x: 3", [r["result"] for r in results if r["line"] == 4][0])
+
+    def test_invalid_configuration(self):
+        """Test unknown modes and non-positive limits are rejected."""
+        with self.assertRaises(ValueError):
+            BatchRunner(mode="fibers")
+        with self.assertRaises(ValueError):
+            BatchRunner(model_limits={"llama3": 0})
+
+    def test_warmup_before_first_record(self):
+        """Test the batch's models are warmed before records start and reported in the summary."""
+        manager = FakeManager(delay=0)
+        lines = ['{"use_case_id": "a", "input_data": {"query": "x"}, "model": "mistral"}',
+                 '{"use_case_id": "b", "input_data": {"query": "y"}}']
+
+        with patch("ui.batch.ModelWarmer") as warmer_class:
+            warmer = warmer_class.return_value
+            warmer.start.side_effect = lambda block: self.assertEqual(manager.models, [])
+            warmer.report.return_value = [{"host": "h", "model": "mistral", "ok": True, "load_seconds": 3.0,
+                                           "cold_load_seconds": 3.0, "error": None}]
+            summary = BatchRunner(manager=manager, warmup=True).run(read_records(lines), io.StringIO())
+
+        self.assertEqual(warmer_class.call_args.args[0], ["mistral", "llama3"])
+        warmer.start.assert_called_once_with(block=True)
+        warmer.stop.assert_called_once()
+        self.assertEqual(summary["warmup"]["models"][0]["model"], "mistral")
+        self.assertIn("mistral @ h: loaded in 3.0s", format_summary(summary))
+
+    def test_records_are_read_lazily(self):
+        """Test records are read a bounded window ahead and models seen later are warmed as they appear."""
+        manager = FakeManager(delay=0)
+        read = []
+
+        def lines():
+            for number in range(20):
+                read.append(number)
+                model = "mistral" if number == 15 else "llama3"
+                yield json.dumps({"use_case_id": "a", "input_data": {}, "model": model})
+
+        first_run = []
+        run_use_case = manager.run_use_case
+
+        def record_first_run(*args, **kwargs):
+            if not first_run:
+                first_run.append(len(read))
+            return run_use_case(*args, **kwargs)
+
+        manager.run_use_case = record_first_run
+        with patch("ui.batch.ModelWarmer") as warmer_class:
+            warmer_class.return_value.report.return_value = []
+            summary = BatchRunner(workers=1, manager=manager, warmup=True).run(read_records(lines()), io.StringIO())
+
+        self.assertEqual(first_run, [4])
+        self.assertEqual(summary["records"], 20)
+        self.assertEqual(warmer_class.call_args.args[0], ["llama3"])
+        warmer_class.return_value.add.assert_called_once_with(["mistral"])
+
+    def test_summary_reports_prefix_reuse(self):
+        """Test thread batches report time to first token with and without prefix reuse."""
+        prefix_reuse = {"reused": {"requests": 4, "ttft_mean": 0.3, "ttft_median": 0.25, "prompt_tokens_mean": 35},
+                        "fresh": {"requests": 2, "ttft_mean": 1.5, "ttft_median": 1.5, "prompt_tokens_mean": 900},
+                        "speedup": 6.0}
+        with patch("ui.batch.PREFIX_TRACKER") as tracker:
+            tracker.report.return_value = prefix_reuse
+            summary = BatchRunner(manager=FakeManager(delay=0)).run(
+                read_records(['{"use_case_id": "a", "input_data": {}}']), io.StringIO())
+
+        self.assertEqual(summary["prefix_reuse"], prefix_reuse)
+        self.assertIn("speedup from prefix reuse: 6.00x", format_summary(summary))
+
+    def test_records_run_as_batch_requests(self):
+        """Test records run at batch priority on behalf of their user, and queue waits are reported."""
+        manager = FakeManager(delay=0)
+        seen = []
+        run_use_case = manager.run_use_case
+
+        def record_context(*args, **kwargs):
+            seen.append((request_priority.get(), request_user.get()))
+            return run_use_case(*args, **kwargs)
+
+        manager.run_use_case = record_context
+        lines = ['{"use_case_id": "a", "input_data": {"query": "q"}, "user": "team-a"}',
+                 '{"use_case_id": "a", "input_data": {"query": "q"}}']
+        scheduler = {"h": {"classes": {"batch": {"granted": 3, "rejected": 0, "timed_out": 0, "wait_mean": 0.5,
+                                                 "wait_p95": 1.0, "wait_max": 2.0}}}}
+        with patch("ui.batch.scheduler_stats", return_value=scheduler):
+            summary = BatchRunner(workers=1, manager=manager).run(read_records(lines), io.StringIO())
+
+        self.assertEqual(seen, [("batch", "team-a"), ("batch", "batch")])
+        self.assertEqual(request_priority.get(), "interactive")
+        self.assertIn("h batch: 3 granted, 0 rejected, queue wait mean 0.50s", format_summary(summary))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+"""Unit tests for the scientific visualization downsampling and rendering."""
+
+import sys
+import os
+import csv
+import math
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Import the conftest fix before any project imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest
+
+try:
+    import numpy
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+if HAS_NUMPY:
+    from projects.research_use_cases.use_case_07_scientific_visualization.rendering import (
+        ChartRenderer, DataSource, bin_aggregate, describe, is_renderable, lttb, reduce_chart
+    )
+    from projects.research_use_cases.use_case_07_scientific_visualization.main import ScientificVisualizationUseCase
+
+
+@unittest.skipUnless(HAS_NUMPY, "NumPy is not installed")
+class TestChartRendering(unittest.TestCase):
+    """Test cases for the data reduction and the cached chart renderer."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def test_lttb_keeps_endpoints(self):
+        """Test LTTB returns the requested number of points including both ends."""
+        points = [(float(i), math.sin(i / 50)) for i in range(5000)]
+        reduced = lttb(points, 200)
+
+        self.assertEqual(len(reduced), 200)
+        self.assertEqual(reduced[0], points[0])
+        self.assertEqual(reduced[-1], points[-1])
+
+    def test_line_downsampling_keeps_spike(self):
+        """Test a single spike in a large series survives downsampling."""
+        values = numpy.sin(numpy.arange(300000) / 1000.0)
+        values[123457] = 50.0
+        chart = reduce_chart(DataSource({"signal": values.tolist()}),
+                             {"type": "line", "y": "signal", "max_points": 500, "bins": 50})
+
+        points = chart["series"][0]["points"]
+        self.assertLessEqual(len(points), 500)
+        self.assertIn((123457.0, 50.0), points)
+
+    def test_histogram_counts_every_value(self):
+        """Test binned counts add up to the number of numeric values."""
+        source = DataSource([{"value": i % 97} for i in range(10000)] + [{"value": "n/a"}])
+        edges, heights = bin_aggregate(source, ["value"], (0.0, 96.0), 10, "count")
+
+        self.assertEqual(len(edges), 11)
+        self.assertEqual(sum(heights), 10000)
+        self.assertEqual(describe(source)["rows"], 10001)
+
+    def test_render_is_cached(self):
+        """Test an SVG is written once and reused for the same spec."""
+        renderer = ChartRenderer({"x": list(range(1000)), "y": [i * i for i in range(1000)]},
+                                 output_dir=self.temp_dir.name)
+        spec = {"type": "scatter", "x": "x", "y": "y", "title": "Squares <n>"}
+        first = renderer.render(spec)
+        second = renderer.render(spec)
+
+        self.assertFalse(first["cached"])
+        self.assertTrue(second["cached"])
+        self.assertEqual(first["path"], second["path"])
+        with open(first["path"], encoding="utf-8") as f:
+            svg = f.read()
+        self.assertTrue(svg.startswith("<svg"))
+        self.assertIn("Squares &lt;n&gt;", svg)
+
+    def test_csv_streaming(self):
+        """Test a CSV file is read in chunks and unknown columns are rejected."""
+        path = os.path.join(self.temp_dir.name, "data.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["time", "temperature"])
+            writer.writerows((i, 20 + i % 7) for i in range(2500))
+        source = DataSource(path)
+
+        chunks = list(source.iter_chunks(["time", "temperature"], chunk_rows=1000))
+        self.assertEqual([len(xs) for xs, _ in chunks], [1000, 1000, 500])
+        renderer = ChartRenderer(path, output_dir=self.temp_dir.name)
+        self.assertTrue(renderer.render({"type": "histogram", "x": "temperature", "bins": 7})["path"].endswith(".svg"))
+        with self.assertRaises(ValueError):
+            renderer.render({"type": "line", "y": "pressure"})
+
+    def test_free_form_datasets_are_not_rendered(self):
+        """Test descriptions and other non-tabular datasets are passed to the agents as given."""
+        for dataset in ("Global mean temperature anomalies 1880-2020", [1, 2, 3], {"a": 1}):
+            with self.subTest(dataset=dataset):
+                self.assertFalse(is_renderable(dataset))
+                with self.assertRaises(ValueError):
+                    DataSource(dataset)
+                with patch('projects.utils.Ollama'):
+                    use_case = ScientificVisualizationUseCase()
+                use_case.setup_agents()
+                with patch('projects.research_use_cases.use_case_07_scientific_visualization.main.Task',
+                           MagicMock()) as task:
+                    use_case.setup_tasks({"query": "q", "dataset": dataset})
+                self.assertIsNone(use_case.chart_renderer)
+                self.assertIn("Use the following dataset for visualization",
+                              task.call_args_list[0].kwargs["description"])
+
+    def test_render_errors_are_tool_errors(self):
+        """Test file errors while rendering are returned to the agent and charts are kept per instance."""
+        with patch('projects.utils.Ollama'):
+            first, second = ScientificVisualizationUseCase(), ScientificVisualizationUseCase()
+        first.chart_renderer = MagicMock()
+        first.chart_renderer.render.side_effect = PermissionError("read-only output directory")
+        self.assertTrue(first._render_chart('{"type": "line", "y": "y"}').startswith("Error"))
+        first.rendered_charts.append("chart.svg")
+        self.assertEqual(second.rendered_charts, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
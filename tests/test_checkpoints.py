@@ -0,0 +1,164 @@
+"""Unit tests for checkpointing and resuming crew runs in the UseCase base class."""
+
+import sys
+import os
+import time
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Import the conftest fix before any project imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest
+
+from crewai import Process
+from projects.utils import DiskCache, UseCase, resume_id
+
+
+class RecordingUseCase(UseCase):
+    """Use case with three plain tasks that records the outputs it sees."""
+
+    def __init__(self, cache_dir, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkpoints = DiskCache("checkpoints", cache_dir)
+        self.outputs = []
+
+    def setup_tasks(self, input_data=None):
+        topic = (input_data or {}).get("query", "default")
+        # Tasks can share a description, like repeated review rounds
+        label = (lambda i: "Review") if (input_data or {}).get("repeat") else (lambda i: f"Step {i}")
+        self.tasks = [SimpleNamespace(description=f"{label(i)} on {topic}", expected_output="Text",
+                                      context=None, async_execution=i == 0, output=None)
+                      for i in range(3)]
+
+    def on_task_output(self, output):
+        self.outputs.append(output.raw_output)
+
+
+def finish(use_case, index):
+    """Simulate crewAI completing one task, which sets the task's output before calling back."""
+    task = use_case.tasks[index]
+    task.output = SimpleNamespace(description=task.description, raw_output=f"output {index}")
+    use_case._handle_task_output(task.output)
+
+
+@patch('projects.utils.TaskOutput', SimpleNamespace)
+@patch('projects.utils.Crew')
+class TestCheckpoints(unittest.TestCase):
+    """Test cases for per-task checkpoints."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def start(self, input_data=None, run_id="run-1"):
+        use_case = RecordingUseCase(self.temp_dir.name)
+        use_case.setup_agents()
+        use_case.setup_tasks(input_data or {"query": "coral reefs"})
+        token = resume_id.set(run_id)
+        try:
+            use_case.setup_crew(Process.sequential)
+        finally:
+            resume_id.reset(token)
+        return use_case
+
+    def test_resume_after_failure(self, mock_crew):
+        """Test a rerun skips the tasks finished before the failure."""
+        first = self.start()
+        finish(first, 0)
+        finish(first, 1)
+
+        second = self.start()
+        self.assertEqual(second.restored_tasks, 2)
+        self.assertEqual(mock_crew.call_args.kwargs["tasks"], second.tasks[2:])
+        self.assertEqual(second.outputs, ["output 0", "output 1"])
+        self.assertEqual(second.tasks[1].output.raw_output, "output 1")
+        self.assertFalse(second.tasks[0].async_execution)
+        # The first remaining task still sees the previous task's output
+        self.assertEqual(second.tasks[2].context, [second.tasks[1]])
+
+    def test_completed_runs_leave_no_checkpoints(self, mock_crew):
+        """Test finishing the last task clears the run so the next run starts fresh."""
+        first = self.start()
+        for index in range(3):
+            finish(first, index)
+        self.assertEqual(self.start().restored_tasks, 0)
+
+    def test_runs_are_keyed_by_inputs(self, mock_crew):
+        """Test checkpoints of other inputs, or only later tasks, are not restored."""
+        first = self.start()
+        finish(first, 0)
+        self.assertEqual(self.start({"query": "glaciers"}).restored_tasks, 0)
+
+        other = self.start({"query": "deserts"})
+        finish(other, 1)
+        self.assertEqual(self.start({"query": "deserts"}).restored_tasks, 0)
+
+    def test_runs_only_restore_their_own_checkpoints(self, mock_crew):
+        """Test identical runs under another resume id, or without one, never see each other's checkpoints."""
+        first = self.start()
+        finish(first, 0)
+        self.assertEqual(self.start(run_id="run-2").restored_tasks, 0)
+
+        RecordingUseCase.checkpointing = True
+        self.addCleanup(delattr, RecordingUseCase, "checkpointing")
+        fresh = self.start(run_id=None)
+        finish(fresh, 0)
+        self.assertNotEqual(fresh.run_id, "run-1")
+        self.assertEqual(self.start(run_id=None).restored_tasks, 0)
+        self.assertEqual(self.start(run_id=fresh.run_id).restored_tasks, 1)
+
+    def test_tasks_with_the_same_description_keep_their_positions(self, mock_crew):
+        """Test checkpoints are keyed by task position, not by description."""
+        first = self.start({"query": "coral reefs", "repeat": True})
+        finish(first, 0)
+        finish(first, 1)
+
+        second = self.start({"query": "coral reefs", "repeat": True})
+        self.assertEqual(second.restored_tasks, 2)
+        self.assertEqual([task.output.raw_output for task in second.tasks[:2]], ["output 0", "output 1"])
+
+    def test_checkpoints_expire(self, mock_crew):
+        """Test checkpoints older than checkpoint_ttl are not restored."""
+        first = self.start()
+        finish(first, 0)
+        with patch('projects.utils.time.time', return_value=time.time() + first.checkpoint_ttl + 1):
+            self.assertEqual(self.start().restored_tasks, 0)
+
+    def test_expired_checkpoints_are_deleted(self, mock_crew):
+        """Test starting a checkpointed run deletes checkpoints of any run older than checkpoint_ttl."""
+        abandoned = self.start(run_id="run-2")
+        finish(abandoned, 0)
+        finish(self.start(), 0)
+        path = abandoned.checkpoints._path(abandoned._checkpoint_key(0))
+        expired = time.time() - abandoned.checkpoint_ttl - 1
+        os.utime(path, (expired, expired))
+
+        self.start(run_id="run-3")
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(self.start().restored_tasks, 1)
+
+    def test_run_ids_are_logged(self, mock_crew):
+        """Test a fresh run id is logged, and logged again if the run fails, so callers can resume it."""
+        RecordingUseCase.checkpointing = True
+        self.addCleanup(delattr, RecordingUseCase, "checkpointing")
+        with self.assertLogs("projects.utils", "INFO") as logs:
+            use_case = self.start(run_id=None)
+        self.assertIn(use_case.run_id, logs.output[0])
+
+        mock_crew.return_value.kickoff.side_effect = RuntimeError("model unavailable")
+        with self.assertLogs("projects.utils", "WARNING") as logs, self.assertRaises(RuntimeError):
+            use_case.kickoff()
+        self.assertIn(use_case.run_id, logs.output[0])
+
+    def test_checkpointing_is_opt_in(self, mock_crew):
+        """Test runs without a resume id save no checkpoints unless the use case opts in."""
+        use_case = self.start(run_id=None)
+        self.assertIsNone(use_case.run_id)
+        finish(use_case, 0)
+        self.assertEqual(os.listdir(self.temp_dir.name), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+"""Unit tests for the academic citation formatter."""
+
+import sys
+import os
+import time
+import unittest
+
+# Import the conftest fix before any project imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest
+
+from projects.research_use_cases.use_case_10_academic_citation_management.citation_formatter import (
+    compile_template, format_bibliography, format_reference, parse_author, render_template
+)
+
+
+ARTICLE = {
+    "authors": ["Yann LeCun", "Bengio, Yoshua", "Geoffrey Hinton"],
+    "title": "Deep learning",
+    "journal": "Nature",
+    "volume": 521,
+    "issue": 7553,
+    "pages": "436-444",
+    "year": 2015,
+    "doi": "10.1038/nature14539",
+}
+
+BOOK = {
+    "authors": "Ian Goodfellow and Yoshua Bengio and Aaron Courville",
+    "title": "Deep Learning",
+    "publisher": "MIT Press",
+    "year": 2016,
+}
+
+
+class TestCitationFormatter(unittest.TestCase):
+    """Test cases for the citation formatter."""
+
+    def test_parse_author(self):
+        """Test author names in both orders and corporate authors."""
+        self.assertEqual(parse_author("Bengio, Yoshua"), ("Bengio", ["Yoshua"], False))
+        self.assertEqual(parse_author("Ludwig van Beethoven"), ("van Beethoven", ["Ludwig"], False))
+        self.assertTrue(parse_author("IPCC Working Group")[2])
+
+    def test_optional_groups_are_dropped(self):
+        """Test optional template groups disappear when their fields are empty."""
+        template = "{title}[, vol. {volume}][, pp. {pages}]."
+        self.assertEqual(render_template(template, {"title": "T", "pages": "1–2"}), "T, pp. 1–2.")
+        self.assertIs(compile_template(template), compile_template(template))
+
+    def test_apa_article(self):
+        """Test an APA journal article."""
+        text, reasons = format_reference(ARTICLE, "APA")
+        self.assertEqual(text, "LeCun, Y., Bengio, Y., & Hinton, G. (2015). Deep learning. *Nature*, *521*(7553), "
+                               "436–444. https://doi.org/10.1038/nature14539")
+        self.assertEqual(reasons, [])
+
+    def test_other_styles(self):
+        """Test MLA, Chicago and IEEE formatting."""
+        self.assertEqual(format_reference(BOOK, "MLA")[0],
+                         "Goodfellow, Ian, et al. *Deep Learning*. MIT Press, 2016.")
+        self.assertEqual(format_reference(BOOK, "chicago")[0],
+                         "Goodfellow, Ian, Yoshua Bengio, and Aaron Courville. *Deep Learning*. MIT Press, 2016.")
+        self.assertEqual(format_reference(ARTICLE, "IEEE", number=3)[0],
+                         "[3] Y. LeCun, Y. Bengio, and G. Hinton, \"Deep learning,\" *Nature*, vol. 521, no. 7553, "
+                         "pp. 436–444, 2015, doi: 10.1038/nature14539.")
+
+    def test_two_authors(self):
+        """Test two authors get a comma before the conjunction in APA, MLA and Chicago but not IEEE."""
+        paper = dict(BOOK, authors=["John Smith", "Jane Doe"])
+        self.assertEqual(format_reference(paper, "MLA")[0], "Smith, John, and Jane Doe. *Deep Learning*. MIT Press, 2016.")
+        self.assertTrue(format_reference(paper, "chicago")[0].startswith("Smith, John, and Jane Doe. "))
+        self.assertTrue(format_reference(paper, "APA")[0].startswith("Smith, J., & Doe, J. "))
+        self.assertTrue(format_reference(paper, "IEEE", number=1)[0].startswith("[1] J. Smith and J. Doe, "))
+
+    def test_ambiguous_entries_are_flagged(self):
+        """Test incomplete entries are flagged for review."""
+        result = format_bibliography([ARTICLE, {"title": "Untitled notes", "authors": ["Plato"], "year": "in press"}],
+                                     "APA")
+        self.assertEqual(len(result["entries"]), 2)
+        self.assertEqual(len(result["ambiguous"]), 1)
+        reasons = " ".join(result["ambiguous"][0]["reasons"])
+        self.assertIn("unknown entry type", reasons)
+        self.assertIn("non-standard year", reasons)
+
+    def test_unsupported_style(self):
+        """Test unsupported styles raise an error."""
+        with self.assertRaises(ValueError):
+            format_bibliography([ARTICLE], "Harvard")
+
+    def test_throughput(self):
+        """Test thousands of entries format well within a second each."""
+        references = [dict(ARTICLE, title=f"Deep learning {i}") for i in range(5000)]
+        start = time.perf_counter()
+        result = format_bibliography(references, "APA")
+        self.assertEqual(len(result["entries"]), 5000)
+        self.assertLess(time.perf_counter() - start, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+"""Unit tests for inter-task context compression in the UseCase base class."""
+
+import sys
+import os
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+# Import the conftest fix before any project imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest
+
+from projects.utils import UseCase, compress_text, estimate_tokens
+
+
+REPORT = ("## Market Analysis\n"
+          "The market was broadly stable over the quarter. Volatility declined as investors awaited news. "
+          "Several analysts remained cautious. Revenue increased 12% to $4.2M, driven by APAC.\n"
+          "Other commentary follows here without much substance, it is filler text that goes on and on.\n"
+          "## Risks\n"
+          "- Currency exposure of 35% in EUR is a key risk.\n"
+          "- Minor: office relocation.\n"
+          "We recommend hedging 50% of EUR exposure by Q3. This paragraph continues with some narrative.\n")
+
+
+class CompressingUseCase(UseCase):
+    """Use case that condenses task outputs for later tasks."""
+
+    context_compression = "extractive"
+    context_token_budget = 60
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.seen_outputs = []
+
+    def on_task_output(self, output):
+        self.seen_outputs.append(output.raw_output)
+
+
+class TestContextCompression(unittest.TestCase):
+    """Test cases for condensing task outputs passed as context."""
+
+    def setUp(self):
+        self.use_case = CompressingUseCase()
+        self.upstream = SimpleNamespace(description="Analyze the market", context=None)
+        self.downstream = SimpleNamespace(description="Write the report", context=[self.upstream])
+        self.use_case.tasks = [self.upstream, self.downstream]
+
+    def test_compress_text(self):
+        """Test compression keeps headings and key sentences in order within the budget."""
+        compressed = compress_text(REPORT * 3, 60)
+
+        self.assertLessEqual(estimate_tokens(compressed), 60)
+        self.assertIn("Revenue increased 12% to $4.2M", compressed)
+        self.assertLess(compressed.index("## Market Analysis"), compressed.index("## Risks"))
+        self.assertEqual(compress_text("Short.", 60), "Short.")
+
+    def test_only_outputs_used_as_context_are_compressed(self):
+        """Test upstream outputs are condensed after the hook and the final output is left alone."""
+        upstream_output = SimpleNamespace(description="Analyze the market", raw_output=REPORT)
+        final_output = SimpleNamespace(description="Write the report", raw_output=REPORT)
+        self.use_case._handle_task_output(upstream_output)
+        self.use_case._handle_task_output(final_output)
+
+        self.assertEqual(self.use_case.seen_outputs, [REPORT, REPORT])
+        self.assertLessEqual(estimate_tokens(upstream_output.raw_output), 60)
+        self.assertEqual(final_output.raw_output, REPORT)
+        self.assertEqual(len(self.use_case.context_stats), 1)
+        stats = self.use_case.context_stats[0]
+        self.assertEqual(stats["method"], "extractive")
+        self.assertEqual(stats["tokens_before"], estimate_tokens(REPORT))
+        self.assertLess(stats["tokens_after"], stats["tokens_before"])
+
+    def test_llm_compression(self):
+        """Test the LLM summary is used and falls back to extraction on errors."""
+        self.use_case.context_compression = "llm"
+        self.use_case.llm = MagicMock()
+        self.use_case.llm.invoke.return_value = "- Revenue +12% to $4.2M\n- Hedge 50% of EUR exposure"
+        output = SimpleNamespace(description="Analyze the market", raw_output=REPORT)
+        self.use_case.compress_output(output)
+        self.assertEqual(output.raw_output, "- Revenue +12% to $4.2M\n- Hedge 50% of EUR exposure")
+
+        self.use_case.llm.invoke.side_effect = RuntimeError("server unavailable")
+        output = SimpleNamespace(description="Analyze the market", raw_output=REPORT)
+        self.use_case.compress_output(output)
+        self.assertEqual(self.use_case.context_stats[-1]["method"], "extractive")
+        self.assertLessEqual(estimate_tokens(output.raw_output), 60)
+
+    def test_disabled_by_default(self):
+        """Test the base class leaves task outputs untouched."""
+        use_case = UseCase()
+        use_case.tasks = [self.upstream, self.downstream]
+        output = SimpleNamespace(description="Analyze the market", raw_output=REPORT)
+        use_case._handle_task_output(output)
+        self.assertEqual(output.raw_output, REPORT)
+        self.assertEqual(use_case.context_stats, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
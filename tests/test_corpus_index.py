@@ -0,0 +1,168 @@
+"""Unit tests for the literature review corpus index."""
+
+import sys
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Import the conftest fix before any project imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest
+
+from projects.research_use_cases.use_case_01_literature_review.corpus_index import (
+    CorpusIndex, load_documents, tokenize
+)
+
+
+PAPERS = [
+    {"id": "p1", "title": "Graph neural networks for molecules",
+     "abstract": "We apply graph neural networks to molecular property prediction."},
+    {"id": "p2", "title": "Transformers for protein folding",
+     "abstract": "Attention based transformers predict protein structure."},
+    {"id": "p3", "title": "A survey of reinforcement learning",
+     "abstract": "Policy gradients, value functions and exploration."},
+]
+
+
+class TestCorpusIndex(unittest.TestCase):
+    """Test cases for the CorpusIndex class."""
+
+    def setUp(self):
+        """Set up a temporary index directory."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.index_dir = os.path.join(self.tmp_dir.name, "index")
+
+    def tearDown(self):
+        """Remove the temporary index directory."""
+        self.tmp_dir.cleanup()
+
+    def test_tokenize(self):
+        """Test tokenization drops stopwords and punctuation."""
+        self.assertEqual(tokenize("The Graph-Neural networks, of 2024!"), ["graph", "neural", "networks", "2024"])
+
+    def test_search_ranks_relevant_paper_first(self):
+        """Test BM25 ranking returns the matching paper first."""
+        with CorpusIndex(self.index_dir) as index:
+            self.assertEqual(index.add_many(PAPERS), 3)
+            index.commit()
+            results = index.search("protein structure transformers", top_k=2)
+
+        self.assertEqual(results[0]["id"], "p2")
+        self.assertLessEqual(len(results), 2)
+        self.assertIn("score", results[0])
+
+    def test_incremental_add_and_reopen(self):
+        """Test documents added across commits survive reopening the index."""
+        with CorpusIndex(self.index_dir) as index:
+            index.add_many(PAPERS[:2])
+            index.commit()
+
+        with CorpusIndex(self.index_dir) as index:
+            # Already indexed ids are skipped
+            self.assertFalse(index.add(PAPERS[0]))
+            self.assertTrue(index.add(PAPERS[2]))
+            index.commit()
+            self.assertEqual(len(index), 3)
+            self.assertEqual(len(index.segments), 2)
+
+        with CorpusIndex(self.index_dir) as index:
+            self.assertEqual(index.search("reinforcement learning")[0]["id"], "p3")
+            self.assertEqual(index.search("molecules")[0]["id"], "p1")
+
+    def test_merge_keeps_results(self):
+        """Test merging segments preserves search results."""
+        with CorpusIndex(self.index_dir) as index:
+            for paper in PAPERS:
+                index.add(paper)
+                index.commit()
+            before = [doc["id"] for doc in index.search("networks protein learning", top_k=3)]
+            index.merge()
+            self.assertEqual(len(index.segments), 1)
+            after = [doc["id"] for doc in index.search("networks protein learning", top_k=3)]
+
+        self.assertEqual(before, after)
+
+    def test_load_documents(self):
+        """Test loading paper records from a library directory."""
+        library = os.path.join(self.tmp_dir.name, "library")
+        os.makedirs(library)
+        with open(os.path.join(library, "papers.jsonl"), "w", encoding="utf-8") as f:
+            for paper in PAPERS[:2]:
+                f.write(json.dumps(paper) + "\n")
+        with open(os.path.join(library, "notes.md"), "w", encoding="utf-8") as f:
+            f.write("# Exploration in RL\nCuriosity driven exploration.")
+
+        documents = list(load_documents(library))
+
+        self.assertEqual(len(documents), 3)
+        self.assertIn("Exploration in RL", [doc.get("title") for doc in documents])
+
+    def test_unchanged_library_files_are_not_read_again(self):
+        """Test files indexed before are skipped before extraction until they change."""
+        library = os.path.join(self.tmp_dir.name, "library")
+        os.makedirs(library)
+        notes = os.path.join(library, "notes.md")
+        with open(notes, "w", encoding="utf-8") as f:
+            f.write("# Exploration in RL\nCuriosity driven exploration.")
+
+        with CorpusIndex(self.index_dir) as index:
+            self.assertEqual(index.add_many(load_documents(library, skip=index.has_source)), 1)
+            index.commit()
+        with CorpusIndex(self.index_dir) as index:
+            self.assertEqual(list(load_documents(library, skip=index.has_source)), [])
+            with open(notes, "a", encoding="utf-8") as f:
+                f.write("\nMore notes.")
+            os.utime(notes, ns=(0, 10 ** 9))
+            self.assertEqual(len(list(load_documents(library, skip=index.has_source))), 1)
+
+    def test_changed_files_replace_their_documents(self):
+        """Test a library file edited after indexing is indexed again in place of its old version."""
+        library = os.path.join(self.tmp_dir.name, "library")
+        os.makedirs(library)
+        notes = os.path.join(library, "notes.md")
+        with open(notes, "w", encoding="utf-8") as f:
+            f.write("# Exploration in RL\nCuriosity driven exploration.")
+        with CorpusIndex(self.index_dir) as index:
+            index.add_many(load_documents(library, skip=index.has_source))
+            index.add_many(PAPERS)
+            index.commit()
+
+        with open(notes, "w", encoding="utf-8") as f:
+            f.write("# Exploration in RL\nCount based bonuses for sparse rewards.")
+        os.utime(notes, ns=(0, 10 ** 9))
+        with CorpusIndex(self.index_dir) as index:
+            self.assertEqual(index.add_many(load_documents(library, skip=index.has_source)), 1)
+            self.assertFalse(index.add(PAPERS[0]))
+            index.commit()
+
+        with CorpusIndex(self.index_dir) as index:
+            self.assertEqual(len(index), len(PAPERS) + 1)
+            self.assertEqual(index.search("curiosity"), [])
+            self.assertEqual(index.search("sparse rewards")[0]["id"], notes)
+            index.merge()
+            self.assertEqual(index.search("curiosity"), [])
+            self.assertEqual(len([doc for doc in index.iter_documents() if doc["id"] == notes]), 1)
+
+    def test_known_ids_come_from_sidecar(self):
+        """Test ids are loaded without parsing docs.jsonl, and the sidecar is rebuilt when missing."""
+        with CorpusIndex(self.index_dir) as index:
+            index.add_many(PAPERS)
+            index.commit()
+
+        with CorpusIndex(self.index_dir) as index:
+            with patch.object(CorpusIndex, "iter_documents", side_effect=AssertionError("docs.jsonl parsed")):
+                self.assertFalse(index.add(PAPERS[0]))
+
+        os.remove(os.path.join(self.index_dir, "docs.ids"))
+        with CorpusIndex(self.index_dir) as index:
+            self.assertFalse(index.add(PAPERS[1]))
+            self.assertTrue(index.add({"id": "p4", "title": "New paper"}))
+            index.commit()
+        with open(os.path.join(self.index_dir, "docs.ids"), encoding="utf-8") as f:
+            self.assertEqual([json.loads(line) for line in f], ["p1", "p2", "p3", "p4"])
+
+
+if __name__ == '__main__':
+    unittest.main()
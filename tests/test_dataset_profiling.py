@@ -0,0 +1,166 @@
+"""Unit tests for the data analysis dataset profiler."""
+
+import sys
+import os
+import csv
+import random
+import statistics
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Import the conftest fix before any project imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest
+
+from projects.utils import DiskCache
+from projects.research_use_cases.use_case_03_data_analysis.profiling import (
+    MAX_PROFILED_COLUMNS, DatasetProfiler, HyperLogLog, TDigest, is_profilable, profile_dataset, profile_file
+)
+from projects.research_use_cases.use_case_03_data_analysis.main import DataAnalysisUseCase
+
+
+def make_rows(count, seed=7):
+    """Build rows with a numeric, a correlated, a categorical and a sparse column."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        x = rng.gauss(50, 10)
+        rows.append({
+            "x": x,
+            "y": 3 * x + rng.gauss(0, 1),
+            "group": "abc"[i % 3],
+            "note": "" if i % 4 else "flag",
+        })
+    return rows
+
+
+class TestDatasetProfiler(unittest.TestCase):
+    """Test cases for the streaming dataset profiler."""
+
+    def test_column_statistics(self):
+        """Test numeric statistics, missingness and categorical summaries."""
+        rows = make_rows(2000)
+        profile = profile_dataset(rows)
+        x = profile["columns"]["x"]
+
+        self.assertEqual(profile["rows"], 2000)
+        self.assertEqual(x["type"], "numeric")
+        self.assertAlmostEqual(x["mean"], statistics.mean(row["x"] for row in rows), places=6)
+        self.assertAlmostEqual(x["std"], statistics.stdev(row["x"] for row in rows), places=4)
+        self.assertAlmostEqual(x["quantiles"]["p50"], statistics.median(row["x"] for row in rows), delta=0.5)
+        self.assertEqual(sum(x["histogram"]["counts"]), 2000)
+        self.assertEqual(profile["columns"]["group"]["distinct"], 3)
+        self.assertEqual(profile["columns"]["group"]["type"], "categorical")
+        self.assertEqual(profile["columns"]["note"]["missing_rate"], 0.75)
+        self.assertGreater(profile["correlations"]["x~y"], 0.99)
+
+    def test_merge_matches_single_pass(self):
+        """Test merging chunk profiles gives the single-pass result."""
+        rows = make_rows(3000)
+        merged = DatasetProfiler()
+        for start in range(0, 3000, 1000):
+            chunk = DatasetProfiler()
+            chunk.update(rows[start:start + 1000])
+            merged.merge(chunk)
+        single = profile_dataset(rows)
+
+        self.assertAlmostEqual(merged.profile()["columns"]["x"]["mean"], single["columns"]["x"]["mean"], places=6)
+        self.assertAlmostEqual(merged.profile()["correlations"]["x~y"], single["correlations"]["x~y"], places=3)
+
+    def test_column_dict_input(self):
+        """Test datasets given as a dictionary of columns."""
+        profile = profile_dataset({"a": [1, 2, 3, None], "b": ["x", "y", "x", "z"]})
+        self.assertEqual(profile["rows"], 4)
+        self.assertEqual(profile["columns"]["a"]["missing"], 1)
+        self.assertEqual(profile["columns"]["b"]["top_values"][0], ["x", 2])
+
+    def test_sketch_accuracy(self):
+        """Test HyperLogLog and t-digest estimates on larger streams."""
+        counter = HyperLogLog()
+        digest = TDigest()
+        for i in range(50000):
+            counter.add(str(i))
+            digest.add(float(i))
+        self.assertAlmostEqual(counter.count(), 50000, delta=2500)
+        self.assertAlmostEqual(digest.quantile(0.9), 45000, delta=500)
+
+    def test_csv_profile_is_cached(self):
+        """Test CSV files are streamed in chunks and cached by fingerprint."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "data.csv")
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=["x", "y", "group", "note"])
+                writer.writeheader()
+                writer.writerows(make_rows(500))
+            cache = DiskCache("profiles", tmp_dir)
+
+            profile = profile_file(path, cache=cache, chunk_rows=64)
+            self.assertEqual(profile["rows"], 500)
+            self.assertEqual(profile["columns"]["x"]["type"], "numeric")
+
+            # A cached profile is returned without reading the file again
+            self.assertEqual(profile_file(path, cache=cache), profile)
+
+    def test_wide_datasets_profile_the_first_columns(self):
+        """Test columns past MAX_PROFILED_COLUMNS are counted instead of profiled, also across merges."""
+        width = MAX_PROFILED_COLUMNS + 30
+        rows = [{f"c{j}": i * j for j in range(width)} for i in range(10)]
+        profile = profile_dataset(rows)
+        self.assertEqual(list(profile["columns"]), [f"c{j}" for j in range(MAX_PROFILED_COLUMNS)])
+        self.assertEqual(profile["columns_omitted"], 30)
+
+        first, second = DatasetProfiler(), DatasetProfiler()
+        first.update(rows[:5])
+        second.update([dict(reversed(list(row.items()))) for row in rows[5:]])
+        first.merge(second)
+        self.assertEqual(first.profile()["columns"].keys(), profile["columns"].keys())
+        self.assertEqual(first.profile()["columns_omitted"], 30)
+
+    def test_unprofilable_datasets(self):
+        """Test only file paths that exist, row lists and column dicts are profiled."""
+        for dataset in ("Monthly sales by region, 2019-2023", [1, 2, 3], ["a", {"x": 1}], [], {"rows": 10},
+                        {"a": 1, "b": 2}, 42):
+            with self.subTest(dataset=dataset):
+                self.assertFalse(is_profilable(dataset))
+                with self.assertRaises(ValueError):
+                    profile_dataset(dataset)
+
+
+class TestDataAnalysisDatasets(unittest.TestCase):
+    """Test cases for passing datasets to the data analysis crew."""
+
+    @patch('projects.utils.Ollama')
+    def setUp(self, mock_ollama):
+        self.use_case = DataAnalysisUseCase()
+        self.use_case.setup_agents()
+
+    def description(self, dataset):
+        with patch('projects.research_use_cases.use_case_03_data_analysis.main.Task', MagicMock()) as task:
+            self.use_case.setup_tasks({"query": "q", "dataset": dataset})
+        return task.call_args_list[0].kwargs["description"]
+
+    def test_free_form_datasets_are_passed_through(self):
+        """Test datasets that cannot be profiled are serialized within the model's input budget."""
+        for dataset in ("Monthly sales by region, 2019-2023", [1, 2, 3], {"rows": 10, "source": "crm"}):
+            with self.subTest(dataset=dataset):
+                description = self.description(dataset)
+                self.assertIn(f"Use this dataset for analysis: {self.use_case.format_input(dataset)}", description)
+                self.assertIsNone(self.use_case.dataset_profile)
+
+    def test_omitted_columns_are_noted(self):
+        """Test the description says how many columns were not profiled and leaves them out of example rows."""
+        width = MAX_PROFILED_COLUMNS + 5
+        description = self.description([{f"c{j}": i + j for j in range(width)} for i in range(3)])
+        self.assertIn(f"Only the first {MAX_PROFILED_COLUMNS} columns were profiled; 5 more columns", description)
+        self.assertNotIn(f'"c{width - 1}"', description)
+
+    def test_rows_are_profiled(self):
+        """Test row lists get a profile and example rows."""
+        description = self.description(make_rows(20))
+        self.assertIn("Use this dataset profile for analysis", description)
+        self.assertEqual(self.use_case.dataset_profile["rows"], 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
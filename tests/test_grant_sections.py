@@ -0,0 +1,74 @@
+"""Unit tests for the grant writing section planner."""
+
+import sys
+import os
+import unittest
+
+# Import the conftest fix before any project imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest
+
+from projects.research_use_cases.use_case_04_grant_writing.sections import (
+    SECTION_IDS, agency_requirements, assemble_proposal, normalize_agency, plan_sections
+)
+
+
+PROPOSAL = {
+    "query": "Coral reef resilience under marine heatwaves",
+    "funding_agency": "National Science Foundation",
+    "aims": "1. Map thermal refugia. 2. Test assisted evolution.",
+    "budget": "At most $600,000 total",
+    "duration_years": 3,
+}
+
+
+def keys(input_data, model_name="llama3"):
+    return {plan["id"]: plan["key"] for plan in plan_sections(input_data, model_name)}
+
+
+class TestGrantSections(unittest.TestCase):
+    """Test cases for section cache keys and agency requirements."""
+
+    def test_budget_change_only_invalidates_budget(self):
+        """Test a budget edit leaves every other section's key unchanged."""
+        before = keys(PROPOSAL)
+        after = keys(dict(PROPOSAL, budget="At most $450,000 total"))
+        self.assertEqual([name for name in SECTION_IDS if before[name] != after[name]], ["budget"])
+
+    def test_changes_propagate_downstream(self):
+        """Test edits invalidate the edited section and the sections built on it."""
+        before = keys(PROPOSAL)
+        duration = keys(dict(PROPOSAL, duration_years=4))
+        self.assertEqual([name for name in SECTION_IDS if before[name] != duration[name]], ["timeline", "budget"])
+        aims = keys(dict(PROPOSAL, aims="1. Map thermal refugia."))
+        self.assertTrue(all(before[name] != aims[name] for name in SECTION_IDS))
+        notes = keys(dict(PROPOSAL, notes={"broader_impacts": "Partner with local schools."}))
+        self.assertEqual([name for name in SECTION_IDS if before[name] != notes[name]], ["broader_impacts"])
+        self.assertNotEqual(keys(PROPOSAL, "mistral")["specific_aims"], before["specific_aims"])
+
+    def test_agency_requirements(self):
+        """Test agency aliases resolve and boilerplate is rendered once per agency."""
+        self.assertEqual(normalize_agency("NIH R01"), "NIH")
+        self.assertEqual(normalize_agency("the European Research Council"), "ERC")
+        self.assertIsNone(normalize_agency("Wellcome Trust"))
+
+        requirements = agency_requirements("NSF")
+        self.assertIn("15 pages", requirements["research_strategy"])
+        self.assertIs(agency_requirements("NSF"), requirements)
+        self.assertIn("Wellcome Trust", agency_requirements("Wellcome Trust")["general"])
+
+        prompts = {plan["id"]: plan["prompt"] for plan in plan_sections(PROPOSAL, "llama3")}
+        self.assertIn("4,600 characters", prompts["project_summary"])
+        self.assertNotIn("4,600 characters", prompts["budget"])
+        self.assertIn("$600,000", prompts["budget"])
+
+    def test_assemble_proposal(self):
+        """Test sections are joined in writing order and missing ones are reported."""
+        plans = plan_sections(None, "llama3")
+        proposal, missing = assemble_proposal(plans, {"budget": "Costs.", "specific_aims": "Aims."})
+        self.assertLess(proposal.index("## Specific Aims"), proposal.index("## Budget and Justification"))
+        self.assertEqual(missing, ["research_strategy", "project_summary", "broader_impacts", "timeline"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+"""Unit tests for the token-aware input serialization in projects.utils."""
+
+import sys
+import os
+import unittest
+
+# Import the conftest fix before any project imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest
+
+from projects.utils import UseCase, context_window, estimate_tokens, serialize_input
+
+
+TRANSACTIONS = [
+    {"date": f"2023-06-{i % 28 + 1:02d}", "amount": 50.0 + i, "merchant": f"Store {i % 7}"}
+    for i in range(5000)
+]
+
+
+class TestInputSerialization(unittest.TestCase):
+    """Test cases for compact rendering and budget enforcement."""
+
+    def test_records_render_as_csv(self):
+        """Test lists of records become CSV tables and dictionaries become key lines."""
+        text = serialize_input({"account": "12345", "transactions": TRANSACTIONS[:2], "tags": ["card", "web"]})
+        self.assertEqual(text, "account: 12345\n"
+                               "transactions (2 rows):\n"
+                               "  date,amount,merchant\n"
+                               "  2023-06-01,50,Store 0\n"
+                               "  2023-06-02,51,Store 1\n"
+                               "tags: [card, web]")
+
+    def test_large_tables_are_sampled_within_budget(self):
+        """Test oversized tables are sampled deterministically and summarized."""
+        text = serialize_input({"transactions": TRANSACTIONS}, max_tokens=500)
+
+        self.assertLessEqual(estimate_tokens(text), 500)
+        self.assertEqual(text, serialize_input({"transactions": TRANSACTIONS}, max_tokens=500))
+        self.assertIn("2023-06-01,50,Store 0", text)
+        self.assertIn("5049,Store 1", text)
+        self.assertIn("of 5000 rows shown", text)
+        self.assertIn("amount min 50, max 5049", text)
+
+    def test_long_text_is_shortened(self):
+        """Test long strings are cut and nothing ever exceeds the budget."""
+        text = serialize_input({"notes": "x" * 10000}, max_tokens=100)
+        self.assertLessEqual(estimate_tokens(text), 100)
+        self.assertIn("more chars]", text)
+        self.assertLessEqual(estimate_tokens(serialize_input([["y" * 50] * 10] * 50, max_tokens=20)), 30)
+
+    def test_context_windows(self):
+        """Test model names resolve to context windows and input budgets."""
+        self.assertEqual(context_window("llama3"), 8192)
+        self.assertEqual(context_window("llama3.1:70b"), 131072)
+        self.assertEqual(context_window("unknown-model"), 4096)
+
+        use_case = UseCase(model_name="llama3")
+        self.assertLessEqual(estimate_tokens(use_case.format_input({"transactions": TRANSACTIONS})), 2048)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,257 @@
+"""Unit tests for deadlines, retries, hedging and circuit breaking of LLM calls."""
+
+import sys
+import os
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch
+
+# Import the conftest fix before any project imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest
+
+from projects import resilience as resilience_module
+from projects.backends import BackendPool, Ollama
+from projects.resilience import (CircuitBreaker, CircuitOpenError, DeadlineExceeded, HostSelector, Resilience,
+                                 aresilient_stream, attach_response, resilience_settings, resilient_stream)
+
+FAST = {"retries": 2, "backoff": 0.0, "max_backoff": 0.0, "first_token_timeout": 1.0, "stall_timeout": 1.0,
+        "deadline": 5.0, "hedge_min_samples": 3}
+
+
+class ResilienceTestCase(unittest.TestCase):
+    """Base class isolating the process-wide breakers and metrics."""
+
+    def setUp(self):
+        patcher = patch.multiple(resilience_module, _breakers={}, _metrics={})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def policy(self, **overrides):
+        return Resilience("test", dict(FAST, **overrides))
+
+
+class TestSettings(ResilienceTestCase):
+    """Test cases for merging resilience settings."""
+
+    def test_overrides_environment_and_defaults(self):
+        """Test use case overrides win over CREW_AI_RESILIENCE, which wins over the defaults."""
+        with patch.dict(os.environ, {"CREW_AI_RESILIENCE": '{"retries": 5, "deadline": 10}'}):
+            settings = resilience_settings({"deadline": 20})
+        self.assertEqual((settings["retries"], settings["deadline"]), (5, 20))
+        self.assertEqual(settings["breaker_threshold"], resilience_module.RESILIENCE_DEFAULTS["breaker_threshold"])
+
+    def test_unknown_settings_are_rejected(self):
+        """Test a misspelt setting raises instead of being ignored."""
+        with self.assertRaises(ValueError):
+            resilience_settings({"dead_line": 5})
+
+
+class TestCircuitBreaker(ResilienceTestCase):
+    """Test cases for the circuit breaker."""
+
+    def test_opens_after_threshold_and_recovers_after_trial(self):
+        """Test the circuit opens, rejects calls during the cooldown and closes after a good trial."""
+        breaker = CircuitBreaker()
+        self.assertFalse(breaker.record_failure(2))
+        self.assertTrue(breaker.record_failure(2))
+        self.assertFalse(breaker.allow(60))
+
+        self.assertTrue(breaker.allow(0))
+        self.assertFalse(breaker.allow(0), "only one trial call runs while the circuit is open")
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+
+    def test_failed_trial_reopens(self):
+        """Test a failed trial call opens the circuit again."""
+        breaker = CircuitBreaker()
+        breaker.record_failure(1)
+        self.assertTrue(breaker.allow(0))
+        self.assertTrue(breaker.record_failure(1))
+        self.assertEqual(breaker.state, "open")
+
+    def test_open_circuit_fails_fast(self):
+        """Test a single host with an open circuit is not called at all."""
+        policy = self.policy(breaker_threshold=1, breaker_cooldown=60)
+        calls = []
+
+        def refused(url):
+            calls.append(url)
+            raise ConnectionRefusedError("refused")
+
+        with self.assertRaises(ConnectionRefusedError):
+            list(resilient_stream(refused, HostSelector(url="http://a"), self.policy(retries=0, breaker_threshold=1),
+                                  "m"))
+        with self.assertRaises(CircuitOpenError):
+            list(resilient_stream(refused, HostSelector(url="http://a"), policy, "m"))
+        self.assertEqual(calls, ["http://a"])
+        self.assertEqual(policy.metrics.snapshot()["breaker_rejections"], 1)
+
+
+class TestResilientStream(ResilienceTestCase):
+    """Test cases for streaming generations under a resilience policy."""
+
+    def test_streams_every_line(self):
+        """Test a healthy generation yields its lines and counts a success."""
+        policy = self.policy()
+        lines = list(resilient_stream(lambda url: iter(["a", "b"]), HostSelector(url="http://a"), policy, "m"))
+        self.assertEqual(lines, ["a", "b"])
+        self.assertEqual(policy.metrics.snapshot()["successes"], 1)
+
+    def test_retries_connection_errors(self):
+        """Test a host failure before any output is retried."""
+        policy = self.policy()
+        attempts = []
+
+        def flaky(url):
+            attempts.append(url)
+            if len(attempts) < 3:
+                raise ConnectionResetError("reset")
+            return iter(["ok"])
+
+        self.assertEqual(list(resilient_stream(flaky, HostSelector(url="http://a"), policy, "m")), ["ok"])
+        self.assertEqual(policy.metrics.snapshot()["retries"], 2)
+
+    def test_request_errors_are_not_retried(self):
+        """Test errors of the request itself are raised at once."""
+        policy = self.policy()
+        attempts = []
+
+        def invalid(url):
+            attempts.append(url)
+            raise ValueError("Ollama call failed with status code 400")
+
+        with self.assertRaises(ValueError):
+            list(resilient_stream(invalid, HostSelector(url="http://a"), policy, "m"))
+        self.assertEqual(len(attempts), 1)
+        self.assertEqual(policy.metrics.snapshot()["failures"], 1)
+
+    def test_first_token_timeout(self):
+        """Test a host that never answers raises DeadlineExceeded after the retries."""
+        policy = self.policy(first_token_timeout=0.05, retries=1)
+        gate = threading.Event()
+        self.addCleanup(gate.set)
+
+        def hung(url):
+            gate.wait(5)
+            yield "late"
+
+        with self.assertRaises(DeadlineExceeded):
+            list(resilient_stream(hung, HostSelector(url="http://a"), policy, "m"))
+        counts = policy.metrics.snapshot()
+        self.assertEqual((counts["timeouts"], counts["retries"]), (2, 1))
+
+    def test_stall_after_output_is_not_retried(self):
+        """Test a generation that stalls mid-response raises instead of starting over."""
+        policy = self.policy(stall_timeout=0.05)
+        gate = threading.Event()
+        self.addCleanup(gate.set)
+        attempts = []
+
+        def stalling(url):
+            attempts.append(url)
+            yield "partial"
+            gate.wait(5)
+
+        received = []
+        with self.assertRaises(DeadlineExceeded):
+            for line in resilient_stream(stalling, HostSelector(url="http://a"), policy, "m"):
+                received.append(line)
+        self.assertEqual((received, len(attempts)), (["partial"], 1))
+
+    def test_hedged_request_wins_over_slow_host(self):
+        """Test a duplicate request to a second host answers when the first is slower than usual."""
+        pool = BackendPool(["http://slow", "http://fast"])
+        policy = self.policy(hedge_percentile=50)
+        for _ in range(3):
+            policy.metrics.add_latency("m", 0.01)
+        gate = threading.Event()
+        self.addCleanup(gate.set)
+
+        def open_stream(url):
+            if url == "http://slow":
+                gate.wait(5)
+            yield url
+
+        with patch.object(pool, "acquire", side_effect=[pool.backends[0], pool.backends[1]]):
+            lines = list(resilient_stream(open_stream, HostSelector(pool), policy, "m"))
+        self.assertEqual(lines, ["http://fast"])
+        counts = policy.metrics.snapshot()
+        self.assertEqual((counts["hedges"], counts["hedge_wins"]), (1, 1))
+
+    def test_cancelled_attempt_closes_its_response(self):
+        """Test the losing attempt's response is closed and its host slot freed as soon as the hedge wins."""
+        pool = BackendPool(["http://slow", "http://fast"])
+        policy = self.policy(hedge_percentile=50)
+        for _ in range(3):
+            policy.metrics.add_latency("m", 0.01)
+        closed = threading.Event()
+        self.addCleanup(closed.set)
+
+        class Response:
+            def close(self):
+                closed.set()
+
+        def open_stream(url):
+            if url == "http://slow":
+                attach_response(Response())
+                closed.wait(5)
+            yield url
+
+        with patch.object(pool, "acquire", side_effect=[pool.backends[0], pool.backends[1]]), \
+                patch.object(pool, "release") as release:
+            lines = list(resilient_stream(open_stream, HostSelector(pool), policy, "m"))
+            released = [call.args[0] for call in release.call_args_list]
+        self.assertEqual(lines, ["http://fast"])
+        self.assertTrue(closed.is_set())
+        self.assertIn(pool.backends[0], released)
+
+    def test_ollama_attaches_the_streamed_response(self):
+        """Test the Ollama LLM hands the response behind langchain's line stream to its attempt."""
+        class Response:
+            def iter_lines(self, decode_unicode=False):
+                yield '{"response": "hi", "done": true}'
+
+            def close(self):
+                pass
+
+        response = Response()
+        llm = Ollama(model="m", base_url="http://attached:11434")
+        llm.coalesce = False
+        llm._create_stream = lambda **kwargs: response.iter_lines(decode_unicode=True)
+        with patch("projects.backends.attach_response") as attach:
+            self.assertEqual(len(list(llm._create_generate_stream("Prompt"))), 1)
+        attach.assert_called_once_with(response)
+
+    def test_no_hedging_without_latency_samples(self):
+        """Test hedging waits until enough first-line latencies were measured."""
+        policy = self.policy(hedge_percentile=50)
+        self.assertIsNone(policy.hedge_delay("m", 2))
+        self.assertIsNone(self.policy(hedge_percentile=None).hedge_delay("m", 2))
+
+    def test_async_retry_and_timeout(self):
+        """Test the asynchronous path retries host failures and enforces the first-token timeout."""
+        policy = self.policy(first_token_timeout=0.05)
+        attempts = []
+
+        async def flaky(url):
+            attempts.append(url)
+            if len(attempts) == 1:
+                raise ConnectionResetError("reset")
+            yield "ok"
+
+        async def hung(url):
+            await asyncio.sleep(5)
+            yield "late"
+
+        async def collect(open_stream):
+            return [line async for line in aresilient_stream(open_stream, HostSelector(url="http://a"), policy, "m")]
+
+        self.assertEqual(asyncio.run(collect(flaky)), ["ok"])
+        with self.assertRaises(DeadlineExceeded):
+            asyncio.run(collect(hung))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,290 @@
+"""Unit tests for priority scheduling and fair sharing of LLM capacity."""
+
+import sys
+import os
+import asyncio
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Import the conftest fix before any project imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest
+
+from crewai import Process
+from projects.backends import Ollama
+from projects.scheduling import (AdmissionRejected, LLMScheduler, format_stats, request_priority, request_user,
+                                 scheduler_for, scheduler_settings, scheduling)
+from projects.utils import UseCase
+
+
+def make_scheduler(**overrides):
+    return LLMScheduler(1, dict({"max_concurrent": 1, "interactive_reserve": 0, "shared_dir": None}, **overrides))
+
+
+def wait_until(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.001)
+
+
+class SchedulerTestCase(unittest.TestCase):
+    """Base class with helpers to queue requests on threads."""
+
+    def setUp(self):
+        self.order = []
+        self.threads = []
+
+    def queue(self, scheduler, priority, user):
+        """Start a thread that takes a slot, records its user and frees the slot; return once it waits."""
+        waiting = len(scheduler._waiting[priority])
+
+        def run():
+            request = scheduler.acquire(priority, user)
+            self.order.append(user)
+            scheduler.release(request)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        self.threads.append(thread)
+        wait_until(lambda: len(scheduler._waiting[priority]) > waiting)
+
+    def join(self):
+        for thread in self.threads:
+            thread.join(5)
+
+
+class TestSchedulerSettings(unittest.TestCase):
+    """Test cases for settings and the request context."""
+
+    def test_unknown_settings_are_rejected(self):
+        """Test a misspelt setting raises instead of being ignored."""
+        with patch.dict(os.environ, {"CREW_AI_SCHEDULER": '{"max_concurrent": 2}'}):
+            self.assertEqual(scheduler_settings()["max_concurrent"], 2)
+            with self.assertRaises(ValueError):
+                scheduler_settings({"max_concurent": 2})
+
+    def test_scheduling_sets_and_restores_context(self):
+        """Test scheduling() sets the class and user of the block only."""
+        with scheduling("batch", user="nightly"):
+            self.assertEqual((request_priority.get(), request_user.get()), ("batch", "nightly"))
+        self.assertEqual((request_priority.get(), request_user.get()), ("interactive", "default"))
+        with self.assertRaises(ValueError):
+            with scheduling("urgent"):
+                pass
+
+
+class TestPriorityAndFairness(SchedulerTestCase):
+    """Test cases for the order slots are granted in."""
+
+    def test_interactive_requests_go_first(self):
+        """Test a waiting interactive request gets the next slot before earlier batch requests."""
+        scheduler = make_scheduler()
+        holder = scheduler.acquire("batch", "nightly")
+        self.queue(scheduler, "batch", "nightly")
+        self.queue(scheduler, "interactive", "alice")
+        scheduler.release(holder)
+        self.join()
+        self.assertEqual(self.order, ["alice", "nightly"])
+
+    def test_reserved_slots_stay_free_for_interactive_requests(self):
+        """Test batch requests never take the reserved slots."""
+        scheduler = make_scheduler(max_concurrent=2, interactive_reserve=1, max_wait_batch=0.05)
+        batch = scheduler.acquire("batch", "nightly")
+        with self.assertRaises(AdmissionRejected):
+            scheduler.acquire("batch", "nightly")
+        interactive = scheduler.acquire("interactive", "alice")
+        for request in (batch, interactive):
+            scheduler.release(request)
+
+    def test_users_share_slots_fairly(self):
+        """Test a user queueing many requests does not hold back another user's request."""
+        scheduler = make_scheduler()
+        holder = scheduler.acquire("batch", "other")
+        for user in ("heavy", "heavy", "heavy", "light"):
+            self.queue(scheduler, "batch", user)
+        scheduler.release(holder)
+        self.join()
+        self.assertEqual(self.order, ["heavy", "light", "heavy", "heavy"])
+
+
+class TestAdmissionControl(unittest.TestCase):
+    """Test cases for rejecting requests instead of queueing them without bound."""
+
+    def test_full_queue_rejects_at_once(self):
+        """Test a request arriving at a full queue is rejected without waiting."""
+        scheduler = make_scheduler(max_queued_interactive=0)
+        holder = scheduler.acquire("interactive", "alice")
+        start = time.monotonic()
+        with self.assertRaises(AdmissionRejected) as raised:
+            scheduler.acquire("interactive", "bob")
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertIn("queued", raised.exception.reason)
+        scheduler.release(holder)
+        self.assertEqual(scheduler.snapshot()["classes"]["interactive"]["rejected"], 1)
+
+    def test_waiting_too_long_is_rejected(self):
+        """Test a request is dropped from the queue once it waited max_wait."""
+        scheduler = make_scheduler(max_wait_interactive=0.05)
+        holder = scheduler.acquire("interactive", "alice")
+        with self.assertRaises(AdmissionRejected):
+            scheduler.acquire("interactive", "bob")
+        scheduler.release(holder)
+
+        stats = scheduler.snapshot()["classes"]["interactive"]
+        self.assertEqual((stats["timed_out"], stats["queued"], stats["running"]), (1, 0, 0))
+        self.assertEqual(scheduler.acquire("interactive", "bob").user, "bob")
+
+
+class TestQueueWaitMetrics(unittest.TestCase):
+    """Test cases for the queue-wait metrics."""
+
+    def test_waits_are_measured_per_class_and_user(self):
+        """Test queue waits are recorded per class and per user and formatted."""
+        scheduler = make_scheduler()
+        holder = scheduler.acquire("batch", "nightly")
+        threading.Timer(0.05, scheduler.release, [holder]).start()
+        scheduler.release(scheduler.acquire("batch", "report"))
+
+        snapshot = scheduler.snapshot()
+        self.assertEqual(snapshot["classes"]["batch"]["granted"], 2)
+        self.assertGreaterEqual(snapshot["classes"]["batch"]["wait_max"], 0.04)
+        self.assertGreaterEqual(snapshot["users"]["report"]["wait_mean"], 0.04)
+        self.assertGreaterEqual(snapshot["users"]["nightly"]["service"], 0.04)
+        line = format_stats({"h": snapshot})[0]
+        self.assertTrue(line.startswith("h batch: 2 granted, 0 rejected"))
+
+
+class TestAsyncScheduling(unittest.TestCase):
+    """Test cases for waiting for a slot from asyncio code."""
+
+    def test_async_request_is_granted_on_release(self):
+        """Test an awaiting request gets the slot freed by another thread."""
+        scheduler = make_scheduler()
+        holder = scheduler.acquire("interactive", "alice")
+
+        async def main():
+            threading.Timer(0.02, scheduler.release, [holder]).start()
+            request = await scheduler.aacquire("interactive", "bob")
+            scheduler.release(request)
+
+        asyncio.run(main())
+        self.assertEqual(scheduler.snapshot()["classes"]["interactive"]["running"], 0)
+
+    def test_cancelled_request_leaves_the_queue(self):
+        """Test cancelling a waiting request removes it instead of leaking a slot."""
+        scheduler = make_scheduler()
+        holder = scheduler.acquire("interactive", "alice")
+
+        async def main():
+            task = asyncio.ensure_future(scheduler.aacquire("interactive", "bob"))
+            await asyncio.sleep(0.02)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(main())
+        scheduler.release(holder)
+        self.assertEqual(scheduler.snapshot()["classes"]["interactive"]["queued"], 0)
+        scheduler.release(scheduler.acquire("interactive", "carol"))
+
+
+class TestAcrossProcesses(unittest.TestCase):
+    """Test cases for batch processes yielding to interactive processes."""
+
+    def test_batch_yields_while_another_process_is_interactive(self):
+        """Test batch requests keep to busy_batch_concurrent while another process serves users."""
+        with tempfile.TemporaryDirectory() as directory:
+            scheduler = LLMScheduler(1, {"max_concurrent": 4, "interactive_reserve": 0, "shared_dir": directory,
+                                         "busy_batch_concurrent": 1, "max_wait_batch": 0.05})
+            first = scheduler.acquire("batch", "nightly")
+            second = scheduler.acquire("batch", "nightly")
+            scheduler.release(first)
+            scheduler.release(second)
+
+            open(os.path.join(directory, "interactive-1"), "w").close()
+            scheduler._others_checked = 0.0
+            first = scheduler.acquire("batch", "nightly")
+            with self.assertRaises(AdmissionRejected):
+                scheduler.acquire("batch", "nightly")
+            scheduler.release(first)
+
+    def test_interactive_requests_are_announced(self):
+        """Test a process serving interactive requests marks itself in the shared directory."""
+        with tempfile.TemporaryDirectory() as directory:
+            scheduler = LLMScheduler(1, {"shared_dir": directory})
+            scheduler.release(scheduler.acquire("interactive", "alice"))
+            self.assertIn(f"interactive-{os.getpid()}", os.listdir(directory))
+
+
+class TestOllamaScheduling(unittest.TestCase):
+    """Test cases for scheduling in the project's Ollama LLM."""
+
+    def test_generation_holds_a_slot_while_streaming(self):
+        """Test a generation takes a slot of its host before it is sent and frees it when it ends."""
+        llm = Ollama(model="llama3", base_url="http://scheduled:11434")
+        llm.coalesce = False
+        scheduler = scheduler_for(["http://scheduled:11434"])
+        running = []
+
+        def create_stream(**kwargs):
+            running.append(scheduler.snapshot()["classes"]["batch"]["running"])
+            yield '{"response": "hi", "done": true}'
+
+        llm._create_stream = create_stream
+        with scheduling("batch", user="nightly"):
+            lines = list(llm._create_generate_stream("Prompt"))
+
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(running, [1])
+        stats = scheduler.snapshot()
+        self.assertEqual((stats["classes"]["batch"]["running"], stats["users"]["nightly"]["requests"]), (0, 1))
+
+
+
+class AsyncTask:
+    """Stand-in for a crewAI 0.28 task, which runs asynchronous tasks on a plain thread."""
+
+    def __init__(self, async_execution):
+        self.description = "Review"
+        self.expected_output = "Text"
+        self.context = None
+        self.async_execution = async_execution
+        self.seen = None
+
+    def execute(self):
+        self.thread = threading.Thread(target=self._execute, args=("agent", self))
+        self.thread.start()
+        self.thread.join()
+
+    def _execute(self, agent, task):
+        self.seen = (request_priority.get(), request_user.get())
+
+
+class TestUseCaseScheduling(unittest.TestCase):
+    """Test cases for the scheduling class of use case runs."""
+
+    @patch('projects.utils.Crew')
+    @patch('projects.utils.Ollama')
+    def test_async_tasks_keep_the_request_context(self, mock_ollama, mock_crew):
+        """Test asynchronous tasks, which run on their own threads, are scheduled like the run that starts them."""
+        use_case = UseCase()
+        use_case.agents = [MagicMock()]
+        use_case.tasks = [AsyncTask(True), AsyncTask(True)]
+        use_case.setup_crew(Process.sequential)
+        use_case.crew = MagicMock()
+        use_case.crew.kickoff.side_effect = lambda: [task.execute() for task in use_case.tasks]
+
+        with scheduling("batch", user="nightly"):
+            use_case.kickoff()
+        self.assertEqual([task.seen for task in use_case.tasks], [("batch", "nightly")] * 2)
+
+        use_case.kickoff()
+        self.assertEqual(use_case.tasks[0].seen, ("interactive", "default"))
+
+if __name__ == "__main__":
+    unittest.main()
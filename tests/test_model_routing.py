@@ -0,0 +1,149 @@
+"""Unit tests for per-agent model routing and escalation."""
+
+import sys
+import os
+import asyncio
+import json
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# Import the conftest fix before any project imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest
+
+from projects.routing import (agenerate_with_escalation, check_agent_output, escalation_chain,
+                              generate_with_escalation, resolve_model, route_role, routing_policy)
+from projects.utils import UseCase
+
+POLICY = {
+    "tiers": {"small": "llama3.2:3b", "large": "llama3:70b"},
+    "roles": {"*formatter*": "small"},
+    "escalation": ["small", "default", "large"],
+}
+
+
+class TestRoutingPolicy(unittest.TestCase):
+    """Test cases for resolving roles to models."""
+
+    def test_resolve_model(self):
+        """Test tiers, "default" and plain model names resolve as documented."""
+        self.assertEqual(resolve_model("small", "llama3", POLICY), "llama3.2:3b")
+        self.assertEqual(resolve_model("default", "llama3", POLICY), "llama3")
+        self.assertEqual(resolve_model("medium", "llama3", POLICY), "llama3")
+        self.assertEqual(resolve_model("mistral", "llama3", POLICY), "mistral")
+
+    def test_route_role(self):
+        """Test policy patterns match case-insensitively and win over use case tiers."""
+        self.assertEqual(route_role("Citation Formatter", "llama3", POLICY), "llama3.2:3b")
+        self.assertEqual(route_role("Lead Analyst", "llama3", POLICY, {"lead*": "large"}), "llama3:70b")
+        self.assertEqual(route_role("Support", "llama3", {}, {"support": "small"}), "llama3")
+        self.assertEqual(route_role("Citation Formatter", "llama3", POLICY, {"citation*": "large"}),
+                         "llama3.2:3b")
+
+    def test_escalation_chain(self):
+        """Test generations escalate to every larger model in the ladder."""
+        self.assertEqual(escalation_chain("llama3.2:3b", "llama3", POLICY), ["llama3", "llama3:70b"])
+        self.assertEqual(escalation_chain("llama3:70b", "llama3", POLICY), [])
+        self.assertEqual(escalation_chain("mistral", "llama3", POLICY), [])
+        self.assertEqual(escalation_chain("llama3", "llama3", {}), [])
+
+    def test_policy_file(self):
+        """Test the policy is read from the file named by CREW_AI_MODEL_ROUTING."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "routing.json")
+            with open(path, "w") as f:
+                json.dump(POLICY, f)
+            with patch.dict(os.environ, {"CREW_AI_MODEL_ROUTING": path}):
+                self.assertEqual(routing_policy(), POLICY)
+        with patch.dict(os.environ, {"CREW_AI_MODEL_ROUTING": ""}):
+            self.assertEqual(routing_policy(), {})
+
+
+class TestEscalation(unittest.TestCase):
+    """Test cases for validating generations and escalating them."""
+
+    def test_check_agent_output(self):
+        """Test tool calls and final answers pass while malformed output fails."""
+        self.assertIsNone(check_agent_output("Thought: done\nFinal Answer: 42"))
+        self.assertIsNone(check_agent_output("Thought: search\nAction: Search\nAction Input: {\"q\": 1}"))
+        self.assertEqual(check_agent_output("Final Answer:  "), "empty final answer")
+        self.assertIsNotNone(check_agent_output("I think the answer is 42"))
+        self.assertEqual(check_agent_output(""), "empty output")
+
+    def test_escalates_until_valid(self):
+        """Test a failing generation moves up the chain and stops at the first valid one."""
+        small, medium, large = (MagicMock() for _ in range(3))
+        small.invoke.return_value = "rambling"
+        medium.invoke.return_value = "Final Answer: fixed"
+        escalations = []
+
+        text = generate_with_escalation([small, medium, large], ["s", "m", "l"], "prompt",
+                                        lambda prompt, text: check_agent_output(text),
+                                        lambda *args: escalations.append(args), stop=["\nObservation"])
+
+        self.assertEqual(text, "Final Answer: fixed")
+        medium.invoke.assert_called_once_with("prompt", stop=["\nObservation"])
+        large.invoke.assert_not_called()
+        self.assertEqual(escalations, [("s", "m", "missing 'Action:'/'Action Input:' or 'Final Answer:'")])
+
+    def test_async_escalation(self):
+        """Test the asynchronous path escalates the same way."""
+        small, large = MagicMock(), MagicMock()
+        small.ainvoke = AsyncMock(return_value="")
+        large.ainvoke = AsyncMock(return_value="Final Answer: ok")
+        text = asyncio.run(agenerate_with_escalation([small, large], ["s", "l"], "prompt",
+                                                     lambda prompt, text: check_agent_output(text)))
+        self.assertEqual(text, "Final Answer: ok")
+
+
+class TestUseCaseRouting(unittest.TestCase):
+    """Test cases for routing the agents of a use case."""
+
+    def setUp(self):
+        with patch("projects.utils.Ollama", side_effect=lambda model, base_url: SimpleNamespace(model=model)):
+            self.use_case = UseCase()
+            self.use_case.llm_for("llama3.2:3b")
+            self.use_case.llm_for("llama3:70b")
+
+    def agents(self):
+        return [SimpleNamespace(role="Citation Formatter", llm=self.use_case.llm),
+                SimpleNamespace(role="Lead Analyst", llm=self.use_case.llm),
+                SimpleNamespace(role="Custom", llm="custom llm")]
+
+    def test_route_without_escalation(self):
+        """Test routed agents get their model and others keep theirs."""
+        self.use_case.agents = self.agents()
+        policy = dict(POLICY, escalation=[])
+        with patch("projects.utils.routing_policy", return_value=policy):
+            self.use_case.route_agents()
+        formatter, analyst, custom = self.use_case.agents
+        self.assertEqual(formatter.llm.model, "llama3.2:3b")
+        self.assertIs(analyst.llm, self.use_case.llm)
+        self.assertEqual(custom.llm, "custom llm")
+
+    def test_route_with_escalation(self):
+        """Test agents below the top of the ladder get an escalating LLM."""
+        self.use_case.agents = self.agents()
+        with patch("projects.utils.routing_policy", return_value=POLICY), \
+                patch("projects.utils.EscalatingLLM") as escalating:
+            self.use_case.route_agents()
+        chains = [call.kwargs["models"] for call in escalating.call_args_list]
+        self.assertEqual(chains, [["llama3.2:3b", "llama3", "llama3:70b"], ["llama3", "llama3:70b"]])
+
+        on_escalate = escalating.call_args_list[0].kwargs["on_escalate"]
+        on_escalate("llama3.2:3b", "llama3", "empty output")
+        self.assertEqual(self.use_case.routing_stats, [{"role": "Citation Formatter", "from": "llama3.2:3b",
+                                                        "to": "llama3", "reason": "empty output"}])
+
+    def test_no_policy_changes_nothing(self):
+        """Test agents keep the use case's model without a policy."""
+        self.use_case.agents = self.agents()
+        with patch("projects.utils.routing_policy", return_value={}):
+            self.use_case.route_agents()
+        self.assertTrue(all(agent.llm is self.use_case.llm for agent in self.use_case.agents[:2]))
+
+
+if __name__ == "__main__":
+    unittest.main()
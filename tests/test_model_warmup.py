@@ -0,0 +1,112 @@
+"""Unit tests for preloading Ollama models and keeping them resident."""
+
+import sys
+import os
+import io
+import json
+import time
+import unittest
+from unittest.mock import patch
+
+# Import the conftest fix before any project imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest
+
+from projects.warmup import ModelWarmer, configured_models, format_report, keep_alive_seconds, load_model
+
+
+class FakeResponse(io.BytesIO):
+    """Response of a mocked urlopen call."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def fake_urlopen(requests, load_duration=12_500_000_000, fail_hosts=()):
+    """Build a urlopen replacement that records request bodies."""
+    def urlopen(request, timeout=None):
+        if any(request.full_url.startswith(host) for host in fail_hosts):
+            raise ConnectionRefusedError("refused")
+        requests.append((request.full_url, json.loads(request.data)))
+        return FakeResponse(json.dumps({"done": True, "load_duration": load_duration}).encode())
+    return urlopen
+
+
+class TestWarmup(unittest.TestCase):
+    """Test cases for the model warmer."""
+
+    def test_keep_alive_seconds(self):
+        """Test Ollama durations and seconds are parsed, and negative values mean forever."""
+        self.assertEqual(keep_alive_seconds("30m"), 1800)
+        self.assertEqual(keep_alive_seconds("1h30m"), 5400)
+        self.assertEqual(keep_alive_seconds(600), 600)
+        self.assertEqual(keep_alive_seconds("90"), 90)
+        self.assertIsNone(keep_alive_seconds(-1))
+        with self.assertRaises(ValueError):
+            keep_alive_seconds("soon")
+
+    def test_load_model(self):
+        """Test a load sends keep_alive without a prompt and reports the host's load time."""
+        requests = []
+        with patch("projects.warmup.urllib.request.urlopen", fake_urlopen(requests)):
+            report = load_model("http://a:11434", "llama3", "30m")
+        self.assertEqual(requests, [("http://a:11434/api/generate",
+                                     {"model": "llama3", "keep_alive": "30m", "stream": False})])
+        self.assertTrue(report["ok"])
+        self.assertEqual(report["load_seconds"], 12.5)
+
+    def test_warm_every_host_and_model(self):
+        """Test every model is loaded on every host and failures are reported, not raised."""
+        requests = []
+        warmer = ModelWarmer(["llama3", "phi3", "llama3"], hosts=["http://a:11434", "http://b:11434"],
+                             keep_alive="10m")
+        self.assertEqual(warmer.interval, 300)
+        with patch("projects.warmup.urllib.request.urlopen", fake_urlopen(requests, fail_hosts=("http://b",))):
+            reports = warmer.warm()
+
+        self.assertEqual(len(reports), 4)
+        self.assertEqual(sorted(body["model"] for _, body in requests), ["llama3", "phi3"])
+        failed = [report for report in warmer.report() if not report["ok"]]
+        self.assertEqual({report["host"] for report in failed}, {"http://b:11434"})
+        self.assertIn("failed", format_report(warmer.report()))
+        self.assertIn("loaded in 12.5s", format_report(warmer.report()))
+
+    def test_cold_load_time_is_kept(self):
+        """Test pings of resident models do not overwrite the cold load time."""
+        warmer = ModelWarmer(["llama3"], hosts=["http://a:11434"])
+        with patch("projects.warmup.urllib.request.urlopen", fake_urlopen([])):
+            warmer.warm()
+        with patch("projects.warmup.urllib.request.urlopen", fake_urlopen([], load_duration=2_000_000)):
+            warmer.warm()
+        report = warmer.report()[0]
+        self.assertEqual(report["load_seconds"], 0.002)
+        self.assertEqual(report["cold_load_seconds"], 12.5)
+
+    def test_start_pings_until_stopped(self):
+        """Test the warmer keeps pinging on its interval until stopped."""
+        requests = []
+        warmer = ModelWarmer(["llama3"], hosts=["http://a:11434"], interval=0.01)
+        with patch("projects.warmup.urllib.request.urlopen", fake_urlopen(requests)):
+            warmer.start(block=True)
+            time.sleep(0.1)
+            warmer.stop()
+            count = len(requests)
+            time.sleep(0.05)
+        self.assertGreater(count, 2)
+        self.assertLessEqual(len(requests), count + 1)
+
+    def test_configured_models(self):
+        """Test CREW_AI_WARM_MODELS wins over the default and routed models."""
+        policy = {"tiers": {"small": "phi3"}, "escalation": ["small", "default", "large"]}
+        with patch.dict(os.environ, {"CREW_AI_WARM_MODELS": ""}), \
+                patch("projects.warmup.routing_policy", return_value=policy):
+            self.assertEqual(configured_models("llama3"), ["llama3", "phi3"])
+        with patch.dict(os.environ, {"CREW_AI_WARM_MODELS": "mistral, llama3"}):
+            self.assertEqual(configured_models("llama3"), ["mistral", "llama3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""Unit tests for the experiment design power calculator."""
+
+import sys
+import os
+import json
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+# Import the conftest fix before any project imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest
+
+from projects.research_use_cases.use_case_02_experiment_design.power import (
+    power, run_power_tool, sample_size, simulate_power, sweep, t_quantile
+)
+
+try:
+    import numpy
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+class TestPowerCalculator(unittest.TestCase):
+    """Test cases for the analytic and simulated power calculations."""
+
+    def test_t_quantile(self):
+        """Test the t quantile approximation against tabulated values."""
+        self.assertAlmostEqual(t_quantile(0.975, 10), 2.2281, places=3)
+        self.assertAlmostEqual(t_quantile(0.95, 30), 1.6973, places=3)
+
+    def test_sample_sizes_match_reference_values(self):
+        """Test sample sizes against standard power tables."""
+        self.assertEqual(sample_size("two_sample_t", effect_size=0.5), 64)
+        self.assertEqual(sample_size("two_sample_t", effect_size=0.8), 26)
+        self.assertEqual(sample_size("paired_t", effect_size=0.5), 34)
+        self.assertAlmostEqual(sample_size("correlation", r=0.3), 84, delta=1)
+        self.assertAlmostEqual(power("two_sample_t", effect_size=0.5, n_per_group=64), 0.80, places=2)
+
+    def test_sweep(self):
+        """Test every combination of list parameters is evaluated."""
+        rows = sweep("power", "two_sample_t", effect_size=[0.2, 0.5, 0.8], n_per_group=[20, 50])
+        self.assertEqual(len(rows), 6)
+        by_size = [row["power"] for row in rows if row["n_per_group"] == 50]
+        self.assertEqual(by_size, sorted(by_size))
+
+    def test_tool_interface(self):
+        """Test the JSON tool interface and its error messages."""
+        result = json.loads(run_power_tool(json.dumps({
+            "calculation": "sample_size", "test": "two_proportions", "p1": 0.1, "p2": 0.15, "power": 0.8
+        })))
+        self.assertEqual(result[0]["n_per_group"], 686)
+        self.assertTrue(run_power_tool('{"calculation": "power", "test": "unknown"}').startswith("Error"))
+        self.assertTrue(run_power_tool("not json").startswith("Error"))
+
+    def test_degenerate_parameters_are_tool_errors(self):
+        """Test inputs the formulas are undefined for return an error message instead of raising."""
+        queries = [
+            {"calculation": "power", "test": "two_sample_t", "effect_size": 0.5, "n_per_group": 1},
+            {"calculation": "power", "test": "two_proportions", "p1": 0, "p2": 0, "n_per_group": 100},
+            {"calculation": "sample_size", "test": "two_proportions", "p1": 1, "p2": 0.5},
+            {"calculation": "power", "test": "correlation", "r": 1, "n": 50},
+            {"calculation": "power", "test": "two_sample_t", "effect_size": 0.5, "n_per_group": 20, "ratio": 0},
+            {"calculation": "simulate", "design": "two_sample", "n": 1, "effect": 0.5},
+            {"calculation": "simulate", "design": "anova", "n": 20, "effect": [0.5]},
+            {"calculation": "simulate", "design": "two_sample", "n": 20, "effect": 0.5, "simulations": 0},
+        ]
+        for query in queries:
+            with self.subTest(query=query):
+                self.assertTrue(run_power_tool(json.dumps(query)).startswith("Error"))
+
+    @unittest.skipUnless(HAS_NUMPY, "NumPy is not installed")
+    def test_simulation_agrees_with_analytic_power(self):
+        """Test simulated power is reproducible and close to the analytic value."""
+        first = simulate_power("two_sample", 64, 0.5, simulations=3000, seed=1, workers=1)
+        second = simulate_power("two_sample", 64, 0.5, simulations=3000, seed=1, workers=2)
+        self.assertEqual(first, second)
+        self.assertAlmostEqual(first["power"], 0.80, delta=0.04)
+
+
+    @unittest.skipUnless(HAS_NUMPY, "NumPy is not installed")
+    def test_tool_shares_one_pool_across_sizes(self):
+        """Test a simulation over several sizes starts one process pool, not one per size."""
+        pools = []
+
+        def pool(max_workers=None):
+            pools.append(ThreadPoolExecutor(max_workers=2))
+            return pools[-1]
+
+        module = "projects.research_use_cases.use_case_02_experiment_design.power.ProcessPoolExecutor"
+        with patch(module, side_effect=pool):
+            results = json.loads(run_power_tool(json.dumps({
+                "calculation": "simulate", "design": "two_sample", "n": [20, 40, 60], "effect": 0.5,
+                "simulations": 2000})))
+        self.assertEqual([result["n"] for result in results], [20, 40, 60])
+        self.assertEqual(len(pools), 1)
+
+if __name__ == '__main__':
+    unittest.main()
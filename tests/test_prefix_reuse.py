@@ -0,0 +1,124 @@
+"""Unit tests for prompt-prefix reuse and time-to-first-token measurement."""
+
+import sys
+import os
+import json
+import unittest
+from unittest.mock import MagicMock
+
+# Import the conftest fix before any project imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest
+
+from projects.backends import BackendPool, Ollama
+from projects.prefix_cache import PREFIX_TRACKER, PrefixTracker, format_report, prefix_key, stable_prefix
+from projects.resilience import Resilience
+
+AGENT_PROMPT = ("You are Fraud Analyst. You have years of experience.\nYour personal goal is: Find fraud"
+                "To give my best complete final answer to the task use the exact following format:\n"
+                "\nCurrent Task: {task}\n\nBegin!\n\nThought: ")
+
+
+def response(prompt_tokens):
+    return ['{"response": "Final"}', json.dumps({"done": True, "prompt_eval_count": prompt_tokens})]
+
+
+class TestPrefixKey(unittest.TestCase):
+    """Test cases for finding the stable prefix of a prompt."""
+
+    def test_prefix_ends_before_the_task(self):
+        """Test the prefix is everything before the task and is shared across tasks."""
+        first, second = AGENT_PROMPT.format(task="Check A"), AGENT_PROMPT.format(task="Check B")
+        self.assertTrue(first.startswith(stable_prefix(first)))
+        self.assertNotIn("Current Task", stable_prefix(first))
+        self.assertEqual(prefix_key("llama3", first), prefix_key("llama3", second))
+
+    def test_key_depends_on_model(self):
+        """Test the same prefix on another model is cached separately."""
+        prompt = AGENT_PROMPT.format(task="Check A")
+        self.assertNotEqual(prefix_key("llama3", prompt), prefix_key("mistral", prompt))
+
+    def test_prompts_without_marker_have_no_prefix(self):
+        """Test free-form prompts get no prefix key."""
+        self.assertIsNone(prefix_key("llama3", "Summarize this text."))
+
+
+class TestPrefixAffinity(unittest.TestCase):
+    """Test cases for routing prompts with the same prefix to the same host."""
+
+    def setUp(self):
+        self.pool = BackendPool(["http://a", "http://b", "http://c"])
+
+    def test_same_key_same_host(self):
+        """Test a key keeps going to one host while the hosts are equally busy."""
+        chosen = []
+        for _ in range(6):
+            backend = self.pool.acquire(affinity="agent-1")
+            chosen.append(backend)
+            self.pool.release(backend)
+        self.assertEqual(len(set(chosen)), 1)
+
+    def test_busy_preferred_host_is_skipped(self):
+        """Test load wins over affinity once the preferred host is AFFINITY_SLACK requests ahead."""
+        held = [self.pool.acquire(affinity="agent-1") for _ in range(3)]
+        preferred = held[0]
+        self.assertEqual(held, [preferred] * 3)
+        self.assertIsNot(self.pool.acquire(affinity="agent-1"), preferred)
+
+
+class TestPrefixTracker(unittest.TestCase):
+    """Test cases for measuring reused and fresh prefixes."""
+
+    def test_second_request_on_same_host_is_reused(self):
+        """Test a prefix counts as reused only on the host that saw it."""
+        tracker = PrefixTracker()
+        list(tracker.measure("http://a", "k", lambda: iter(response(900))))
+        list(tracker.measure("http://b", "k", lambda: iter(response(900))))
+        list(tracker.measure("http://a", "k", lambda: iter(response(40))))
+
+        report = tracker.report()
+        self.assertEqual((report["fresh"]["requests"], report["reused"]["requests"]), (2, 1))
+        self.assertEqual(report["reused"]["prompt_tokens_mean"], 40)
+        self.assertEqual(report["fresh"]["prompt_tokens_mean"], 900)
+        self.assertIn("reused: 1 requests", format_report(report))
+
+    def test_expired_prefix_is_fresh(self):
+        """Test a prefix unused for longer than the TTL counts as fresh again."""
+        tracker = PrefixTracker(ttl=0.0)
+        list(tracker.measure("http://a", "k", lambda: iter(response(900))))
+        list(tracker.measure("http://a", "k", lambda: iter(response(900))))
+        self.assertEqual(tracker.report()["reused"]["requests"], 0)
+
+    def test_abandoned_requests_are_not_measured(self):
+        """Test a request the caller stopped reading is left out of the report."""
+        tracker = PrefixTracker()
+        lines = tracker.measure("http://a", "k", lambda: iter(response(900)))
+        next(lines)
+        lines.close()
+        self.assertEqual(tracker.report()["fresh"]["requests"], 0)
+
+
+class TestOllamaPrefixReuse(unittest.TestCase):
+    """Test cases for prefix reuse in the project's Ollama LLM."""
+
+    def test_agent_calls_stick_to_one_host(self):
+        """Test every call of an agent goes to the same host of the pool and is measured."""
+        PREFIX_TRACKER.reset()
+        self.addCleanup(PREFIX_TRACKER.reset)
+        llm = Ollama(model="llama3", base_url="http://a")
+        llm.model, llm.base_url, llm.coalesce = "llama3", "http://a", False
+        llm.pool = BackendPool(["http://a", "http://b", "http://c"])
+        llm.resilience = Resilience("prefix-test", {"hedge_percentile": None})
+        llm._create_stream = MagicMock(side_effect=lambda **kwargs: iter(response(10)))
+
+        for task in ("Check A", "Check B", "Check C"):
+            list(llm._create_generate_stream(AGENT_PROMPT.format(task=task)))
+
+        urls = {call.kwargs["api_url"] for call in llm._create_stream.call_args_list}
+        self.assertEqual(len(urls), 1)
+        report = PREFIX_TRACKER.report()
+        self.assertEqual((report["fresh"]["requests"], report["reused"]["requests"]), (1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
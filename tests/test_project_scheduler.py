@@ -0,0 +1,135 @@
+"""Unit tests for the research project critical-path scheduler."""
+
+import sys
+import os
+import json
+import random
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Import the conftest fix before any project imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest
+
+from projects.research_use_cases.use_case_06_research_project_management.main import (
+    ResearchProjectManagementUseCase
+)
+from projects.research_use_cases.use_case_06_research_project_management.scheduler import (
+    critical_path, is_task_graph, level_resources, parse_tasks, run_scheduler_tool, schedule_project
+)
+
+
+PROJECT = {
+    "resources": {"postdoc": 1},
+    "tasks": [
+        {"id": "A", "duration": 3, "resources": ["postdoc"]},
+        {"id": "B", "duration": 2, "depends_on": "A", "resources": ["postdoc"]},
+        {"id": "C", "duration": 4, "depends_on": ["A"], "resources": {"postdoc": 1}},
+        {"id": "D", "duration": 1, "dependencies": "B, C"},
+    ],
+}
+
+
+class TestProjectScheduler(unittest.TestCase):
+    """Test cases for the critical path and resource levelling."""
+
+    def test_critical_path_and_slack(self):
+        """Test the forward and backward passes."""
+        tasks, _ = parse_tasks(PROJECT)
+        result = critical_path(tasks)
+
+        self.assertEqual(result["duration"], 8)
+        self.assertEqual(result["critical_path"], ["A", "C", "D"])
+        self.assertEqual(result["schedule"]["B"]["slack"], 2)
+        self.assertFalse(result["schedule"]["B"]["critical"])
+
+    def test_resource_levelling(self):
+        """Test tasks sharing a resource are serialized, least slack first."""
+        tasks, capacities = parse_tasks(PROJECT)
+        levelled = level_resources(tasks, capacities)
+
+        self.assertEqual(levelled["schedule"]["C"]["start"], 3)
+        self.assertEqual(levelled["schedule"]["B"]["start"], 7)
+        self.assertEqual(levelled["duration"], 10)
+        self.assertEqual(levelled["delayed"], ["B", "D"])
+
+    def test_invalid_graphs(self):
+        """Test cycles, unknown dependencies and oversized demands are rejected."""
+        with self.assertRaises(ValueError):
+            schedule_project([{"id": "A", "duration": 1, "depends_on": "B"},
+                              {"id": "B", "duration": 1, "depends_on": "A"}])
+        with self.assertRaises(ValueError):
+            schedule_project([{"id": "A", "duration": 1, "depends_on": "Z"}])
+        with self.assertRaises(ValueError):
+            schedule_project({"resources": {"lab": 1}, "tasks": [{"id": "A", "duration": 1, "resources": {"lab": 2}}]})
+
+    def test_large_project_is_feasible(self):
+        """Test a large random project respects dependencies and capacities."""
+        rng = random.Random(3)
+        tasks = [
+            {"id": f"T{i}", "duration": rng.randint(1, 9), "resources": {rng.choice("ab"): 1},
+             "depends_on": [f"T{j}" for j in rng.sample(range(max(0, i - 20), i), min(i, 2))]}
+            for i in range(2000)
+        ]
+        result = schedule_project({"tasks": tasks, "resources": {"a": 2, "b": 2}})
+        schedule = result["levelled"]["schedule"]
+
+        for task in tasks:
+            for dependency in task["depends_on"]:
+                self.assertLessEqual(schedule[dependency]["finish"], schedule[task["id"]]["start"])
+        for resource in "ab":
+            events = sorted((time, change) for task in tasks if resource in task["resources"]
+                            for time, change in ((schedule[task["id"]]["start"], 1),
+                                                 (schedule[task["id"]]["finish"], -1)))
+            usage = 0
+            for _, change in events:
+                usage += change
+                self.assertLessEqual(usage, 2)
+        self.assertGreaterEqual(result["levelled"]["duration"], result["cpm"]["duration"])
+
+    def test_what_if_tool(self):
+        """Test the tool applies what-if changes to the current project."""
+        summary = json.loads(run_scheduler_tool('{"durations": {"C": 1}, "resources": {"postdoc": 2}}', PROJECT))
+        self.assertEqual(summary["duration"], 6)
+        self.assertEqual(summary["critical_path"], ["A (A)", "B (B)", "D (D)"])
+        self.assertEqual(summary["resource_levelled"]["extension"], 0)
+        self.assertTrue(run_scheduler_tool('{"tasks": [{"id": "A", "depends_on": "A"}]}').startswith("Error"))
+
+
+
+class TestProjectManagementInputs(unittest.TestCase):
+    """Test cases for passing project details to the project management crew."""
+
+    @patch('projects.utils.Ollama')
+    def setUp(self, mock_ollama):
+        self.use_case = ResearchProjectManagementUseCase()
+        self.use_case.setup_agents()
+
+    def description(self, project_details):
+        with patch('projects.research_use_cases.use_case_06_research_project_management.main.Task',
+                   MagicMock()) as task:
+            self.use_case.setup_tasks({"project_details": project_details})
+        return task.call_args_list[0].kwargs["description"]
+
+    def test_free_form_tasks_are_passed_through(self):
+        """Test task lists the scheduler cannot use reach the agents as given instead of failing."""
+        for details in ({"tasks": ["Literature review", "Experiments"]},
+                        {"tasks": [{"id": "a", "duration": "2 weeks"}]},
+                        {"tasks": [{"id": "a", "duration": 1, "depends_on": "z"}]}):
+            with self.subTest(details=details):
+                description = self.description(details)
+                self.assertIn(f"Use the following project details: {self.use_case.format_input(details)}",
+                              description)
+                self.assertIsNone(self.use_case.schedule)
+        self.assertFalse(is_task_graph({"tasks": [{"id": "a", "duration": True}]}))
+
+    def test_task_graphs_are_scheduled(self):
+        """Test task graphs are scheduled and only their other details are passed through."""
+        description = self.description(dict(PROJECT, budget="50k"))
+        details = self.use_case.format_input({"resources": PROJECT["resources"], "budget": "50k"})
+        self.assertEqual(self.use_case.schedule["cpm"]["duration"], 8)
+        self.assertIn(f"Use the following project details: {details}", description)
+        self.assertIn("critical path method", description)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+"""Unit tests for the citation management reference index."""
+
+import sys
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Import the conftest fix before any project imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest
+
+from projects.research_use_cases.use_case_10_academic_citation_management.reference_index import (
+    ReferenceIndex, normalize_author, normalize_authors, normalize_doi, normalize_isbn, normalize_title
+)
+from projects.research_use_cases.use_case_10_academic_citation_management.main import (
+    AcademicCitationManagementUseCase
+)
+
+
+class TestNormalization(unittest.TestCase):
+    """Test cases for identifier and name normalization."""
+
+    def test_normalize_doi(self):
+        """Test DOI URLs and prefixes normalize to the bare lowercase DOI."""
+        self.assertEqual(normalize_doi("https://doi.org/10.1038/NATURE14539"), "10.1038/nature14539")
+        self.assertEqual(normalize_doi("doi:10.1145/3065386."), "10.1145/3065386")
+        self.assertIsNone(normalize_doi("not a doi"))
+
+    def test_normalize_isbn(self):
+        """Test ISBN-10 values are converted to ISBN-13."""
+        self.assertEqual(normalize_isbn("0-262-03384-4"), "9780262033848")
+        self.assertEqual(normalize_isbn("978-0-262-03384-8"), "9780262033848")
+
+    def test_normalize_authors(self):
+        """Test the different author name forms normalize identically."""
+        self.assertEqual(normalize_author("LeCun, Yann"), "lecun y")
+        self.assertEqual(normalize_author("Yann LeCun"), "lecun y")
+        self.assertEqual(normalize_authors("Y. Bengio and G. Hinton"), ["bengio y", "hinton g"])
+
+    def test_normalize_title(self):
+        """Test titles lose case, accents and punctuation."""
+        self.assertEqual(normalize_title("Détection: A  Survey!"), "detection a survey")
+
+
+class TestReferenceIndex(unittest.TestCase):
+    """Test cases for ReferenceIndex.resolve."""
+
+    def test_exact_identifier_duplicates_are_merged(self):
+        """Test references sharing a DOI merge and fill each other's gaps."""
+        result = ReferenceIndex([
+            {"title": "Deep learning", "authors": ["LeCun, Yann"], "year": 2015,
+             "doi": "https://doi.org/10.1038/nature14539"},
+            {"title": "Deep Learning.", "journal": "Nature", "doi": "10.1038/NATURE14539"},
+        ]).resolve()
+
+        self.assertEqual(len(result["references"]), 1)
+        self.assertEqual(result["references"][0]["journal"], "Nature")
+        self.assertEqual(result["duplicates"][0]["merged"], [1])
+        self.assertEqual(result["conflicts"], [])
+
+    def test_fuzzy_title_duplicates_are_merged(self):
+        """Test near-identical titles without identifiers are merged."""
+        result = ReferenceIndex([
+            {"title": "Attention is all you need for neural machine translation today", "year": 2017},
+            {"title": "Attention is all you need for neural machine translation", "year": 2017},
+            {"title": "A survey of graph neural networks", "year": 2020},
+        ]).resolve()
+
+        self.assertEqual(len(result["references"]), 2)
+        self.assertEqual(result["duplicates"][0]["reasons"], ["similar_title"])
+
+    def test_conflicts_are_reported(self):
+        """Test identical titles with different years are left for the agents."""
+        result = ReferenceIndex([
+            {"title": "Deep learning", "authors": "Goodfellow, Ian", "year": 2016},
+            {"title": "Deep learning", "authors": "LeCun, Yann", "year": 2015},
+        ]).resolve()
+
+        self.assertEqual(len(result["references"]), 2)
+        self.assertEqual(len(result["conflicts"]), 1)
+        self.assertEqual(result["conflicts"][0]["conflicting_fields"], ["year", "authors"])
+
+    def test_missing_metadata(self):
+        """Test references lacking required fields are listed."""
+        result = ReferenceIndex(["Smith J. 2019. A paper without a DOI"]).resolve()
+
+        self.assertEqual(result["missing_metadata"], [{"reference": 0, "missing": ["authors", "doi"]}])
+
+
+class TestReferencesContext(unittest.TestCase):
+    """Test cases for describing resolved references in the task description."""
+
+    @patch('projects.utils.Ollama')
+    def test_long_lists_are_capped(self, mock_ollama):
+        """Test conflicts and missing metadata are capped like the reference list, with counts for the rest."""
+        references = [f"Author{i} A. {2000 + i % 20}. Paper number {i}" for i in range(150)]
+        resolution = ReferenceIndex(references).resolve()
+        resolution["conflicts"] = [{"references": [i], "conflicting_fields": ["year"]} for i in range(150)]
+        context = AcademicCitationManagementUseCase()._references_context(resolution, 150)
+
+        self.assertEqual(len(resolution["missing_metadata"]), 150)
+        self.assertIn("50 more references with missing metadata not listed, 150 in total", context)
+        self.assertIn("50 more conflicts not listed", context)
+        self.assertNotIn('"reference": 149', context)
+        self.assertIn("too many to list in full", context)
+
+
+    @patch('projects.utils.Ollama')
+    def test_ambiguous_entries_are_capped(self, mock_ollama):
+        """Test flagged bibliography entries are capped and shortened in the task description."""
+        references = [{"title": f"Paper number {i} " + "with a very long title " * 10} for i in range(2000)]
+        use_case = AcademicCitationManagementUseCase()
+        use_case.setup_agents()
+        with patch('projects.research_use_cases.use_case_10_academic_citation_management.main.Task',
+                   MagicMock()) as task:
+            use_case.setup_tasks({"references": references})
+        description = task.call_args_list[2].kwargs["description"]
+
+        self.assertEqual(len(use_case.bibliography["ambiguous"]), 2000)
+        self.assertIn("1900 more ambiguous entries not listed, 2000 in total", description)
+        self.assertLess(len(description), 30000)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+"""Unit tests for coalescing identical concurrent LLM requests."""
+
+import sys
+import os
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+# Import the conftest fix before any project imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest
+
+from projects.backends import Ollama
+from projects.coalescing import COALESCER, StreamCoalescer, request_key
+
+
+def gated_stream(gate, lines, calls):
+    """Build an upstream that records its calls and waits for gate before its second line."""
+    def open_stream():
+        calls.append(1)
+        yield lines[0]
+        gate.wait(5)
+        yield from lines[1:]
+    return open_stream
+
+
+class TestStreamCoalescer(unittest.TestCase):
+    """Test cases for sharing one upstream stream between concurrent requests."""
+
+    def setUp(self):
+        self.coalescer = StreamCoalescer()
+
+    def run_concurrently(self, count, key, open_stream, gate):
+        """Start count readers of one key, release the upstream once all joined, and return their lines."""
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            futures = [executor.submit(lambda: list(self.coalescer.stream(key, open_stream)))
+                       for _ in range(count)]
+            while self.coalescer.leaders + self.coalescer.followers < count:
+                threading.Event().wait(0.001)
+            gate.set()
+            return [future.result() for future in futures]
+
+    def test_concurrent_requests_share_one_upstream(self):
+        """Test identical requests in flight get every line from a single upstream call."""
+        gate, calls = threading.Event(), []
+        results = self.run_concurrently(5, "k", gated_stream(gate, ["a", "b", "c"], calls), gate)
+
+        self.assertEqual(calls, [1])
+        self.assertEqual(results, [["a", "b", "c"]] * 5)
+        self.assertEqual((self.coalescer.leaders, self.coalescer.followers), (1, 4))
+
+    def test_finished_requests_are_sent_again(self):
+        """Test a request arriving after the response finished starts a new upstream call."""
+        calls = []
+        open_stream = lambda: calls.append(1) or iter(["x"])
+        self.assertEqual(list(self.coalescer.stream("k", open_stream)), ["x"])
+        self.assertEqual(list(self.coalescer.stream("k", open_stream)), ["x"])
+        self.assertEqual(len(calls), 2)
+
+    def test_different_keys_do_not_coalesce(self):
+        """Test requests with different keys each go upstream."""
+        first = self.coalescer.stream("a", lambda: iter(["1"]))
+        second = self.coalescer.stream("b", lambda: iter(["2"]))
+        self.assertEqual((next(first), next(second)), ("1", "2"))
+        self.assertEqual(self.coalescer.leaders, 2)
+
+    def test_errors_reach_every_follower(self):
+        """Test an upstream failure is raised in the leader and every follower."""
+        gate = threading.Event()
+
+        def failing():
+            yield "partial"
+            gate.wait(5)
+            raise ConnectionResetError("reset")
+
+        def read():
+            try:
+                list(self.coalescer.stream("k", failing))
+            except ConnectionResetError:
+                return "raised"
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [executor.submit(read) for _ in range(3)]
+            while self.coalescer.leaders + self.coalescer.followers < 3:
+                threading.Event().wait(0.001)
+            gate.set()
+            self.assertEqual([future.result() for future in futures], ["raised"] * 3)
+
+    def test_abandoned_leader_finishes_for_followers(self):
+        """Test a leader that stops reading still delivers the full response to followers."""
+        leader = self.coalescer.stream("k", lambda: iter(["a", "b", "c"]))
+        self.assertEqual(next(leader), "a")
+        follower = self.coalescer.stream("k", lambda: self.fail("followers never go upstream"))
+        self.assertEqual(next(follower), "a")
+        leader.close()
+        self.assertEqual(list(follower), ["b", "c"])
+
+    def test_async_requests_share_one_upstream(self):
+        """Test identical coroutines in one event loop share a single upstream call."""
+        calls = []
+
+        async def upstream():
+            calls.append(1)
+            for line in ["a", "b"]:
+                await asyncio.sleep(0.01)
+                yield line
+
+        async def read():
+            return [line async for line in self.coalescer.astream("k", upstream)]
+
+        async def main():
+            return await asyncio.gather(*(read() for _ in range(4)))
+
+        self.assertEqual(asyncio.run(main()), [["a", "b"]] * 4)
+        self.assertEqual(calls, [1])
+
+    def test_request_key(self):
+        """Test keys are stable across dictionary order and differ by content."""
+        self.assertEqual(request_key({"a": 1, "b": 2}, "p"), request_key({"b": 2, "a": 1}, "p"))
+        self.assertNotEqual(request_key({"a": 1}, "p"), request_key({"a": 1}, "q"))
+
+
+class TestOllamaCoalescing(unittest.TestCase):
+    """Test cases for coalescing in the project's Ollama LLM."""
+
+    def make_llm(self, model="llama3"):
+        llm = Ollama(model=model, base_url="http://localhost:11434")
+        llm._default_params = {"model": model, "options": {"temperature": 0.2}}
+        llm.stop = None
+        llm.coalesce = True
+        return llm
+
+    def test_identical_generations_share_one_request(self):
+        """Test two LLM instances generating the same prompt at once send one request."""
+        gate, calls = threading.Event(), []
+        first, second = self.make_llm(), self.make_llm()
+        for llm in (first, second):
+            llm._create_stream = MagicMock(side_effect=lambda **kwargs: gated_stream(
+                gate, ['{"response": "hi"}', '{"done": true}'], calls)())
+
+        followers = COALESCER.followers
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(lambda llm=llm: list(llm._create_generate_stream("Same prompt")))
+                       for llm in (first, second)]
+            while COALESCER.followers == followers:
+                threading.Event().wait(0.001)
+            gate.set()
+            results = [future.result() for future in futures]
+
+        self.assertEqual(calls, [1])
+        self.assertEqual(results[0], results[1])
+
+    def test_different_models_are_not_coalesced(self):
+        """Test requests for different models are never shared."""
+        llm, other = self.make_llm(), self.make_llm("mistral")
+        self.assertNotEqual(llm._request_key("p", None, None, {}), other._request_key("p", None, None, {}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,6 +2,8 @@
 
 import sys
 import os
+import asyncio
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch
 
@@ -15,6 +17,17 @@ from langchain_community.llms import Ollama
 
 # Now we can safely import modules
 from projects.research_use_cases.use_case_09_research_paper_summarization.main import ResearchPaperSummarizationUseCase, run
+from projects.research_use_cases.use_case_09_research_paper_summarization.chunking import (
+    ChunkedSummarizer, pack_chunks, split_sections
+)
+from projects.scheduling import request_priority, request_user, scheduling
+from projects.utils import DiskCache, estimate_tokens
+
+
+LONG_PAPER = "\n".join(
+    f"{number}. {title}\n" + " ".join([f"The {title.lower()} sentence number {i}." for i in range(150)])
+    for number, title in enumerate(["Introduction", "Methods", "Results", "Discussion"], start=1)
+)
 
 
 class TestResearchPaperSummarizationUseCase(unittest.TestCase):
@@ -68,13 +81,27 @@ class TestResearchPaperSummarizationUseCase(unittest.TestCase):
                 context_tasks.append(task)
         self.assertGreaterEqual(len(context_tasks), 1, "At least one task should have context dependencies")
     
+    def test_setup_tasks_condenses_long_paper(self):
+        """Test that long papers are summarized in chunks before being put into a task."""
+        self.use_case.agents = [MagicMock() for _ in range(3)]
+        self.use_case.content_analyst = self.use_case.agents[0]
+        self.use_case.literature_contextualizer = self.use_case.agents[1]
+        self.use_case.summary_writer = self.use_case.agents[2]
+        
+        with patch('projects.research_use_cases.use_case_09_research_paper_summarization.main.ChunkedSummarizer') as mock_summarizer:
+            mock_summarizer.return_value.summarize.return_value = "Condensed digest"
+            self.use_case.setup_tasks({"query": "Long paper", "paper_content": LONG_PAPER})
+        
+        mock_summarizer.return_value.summarize.assert_called_once_with(LONG_PAPER, "Long paper")
+        self.assertEqual(len(self.use_case.tasks), 3)
+    
     @patch('projects.research_use_cases.use_case_09_research_paper_summarization.main.ResearchPaperSummarizationUseCase')
     def test_run_function(self, mock_usecase_class):
         """Test the run function."""
         # Setup mock
         mock_instance = MagicMock()
         mock_usecase_class.return_value = mock_instance
-        mock_instance.crew.kickoff.return_value = "Test paper summarization result"
+        mock_instance.kickoff.return_value = "Test paper summarization result"
         
         # Call run function
         test_input = {"query": "AI ethics paper"}
@@ -85,9 +112,87 @@ class TestResearchPaperSummarizationUseCase(unittest.TestCase):
         mock_instance.setup_agents.assert_called_once()
         mock_instance.setup_tasks.assert_called_once_with(test_input)
         mock_instance.setup_crew.assert_called_once()
-        mock_instance.crew.kickoff.assert_called_once()
+        mock_instance.kickoff.assert_called_once()
         self.assertEqual(result, "Test paper summarization result")
 
 
+class TestChunkedSummarizer(unittest.TestCase):
+    """Test cases for the map-reduce chunked summarizer."""
+    
+    def setUp(self):
+        """Set up a summarizer with a temporary cache."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.llm = MagicMock()
+        self.llm.invoke.side_effect = lambda prompt: f"summary of {len(prompt)} chars"
+        self.summarizer = ChunkedSummarizer(self.llm, model_name="llama3", max_chunk_tokens=800,
+                                            cache=DiskCache("chunks", self.tmp_dir.name))
+        
+    def tearDown(self):
+        """Remove the temporary cache."""
+        self.tmp_dir.cleanup()
+        
+    def test_split_sections(self):
+        """Test splitting a paper on its numbered headings."""
+        titles = [title for title, _ in split_sections(LONG_PAPER)]
+        self.assertEqual(titles, ["1. Introduction", "2. Methods", "3. Results", "4. Discussion"])
+        
+    def test_numbered_list_items_are_not_headings(self):
+        """Test numbered lines starting in lower case stay in their section."""
+        text = ("1. Methods\nWe ran three steps:\n1. collect the samples\nwith swabs\n2. sequence them\nat depth\n"
+                "2. Results\nIt worked.")
+        self.assertEqual([title for title, _ in split_sections(text)], ["1. Methods", "2. Results"])
+        
+    def test_pack_chunks_respects_budget(self):
+        """Test that packed chunks stay within the token budget."""
+        chunks = pack_chunks(split_sections(LONG_PAPER), 800)
+        self.assertGreater(len(chunks), 1)
+        for _, text in chunks:
+            self.assertLessEqual(estimate_tokens(text), 800)
+            
+    def test_summarize_reuses_cached_chunks(self):
+        """Test that re-summarizing an edited paper only redoes the changed chunks."""
+        self.assertTrue(self.summarizer.summarize(LONG_PAPER, "Paper"))
+        first_calls = self.llm.invoke.call_count
+        self.assertGreater(first_calls, 1)
+        
+        edited = LONG_PAPER.replace("discussion sentence number 3.", "discussion sentence number three.")
+        self.summarizer.summarize(edited, "Paper")
+        
+        self.assertGreater(self.summarizer.cache_hits, 0)
+        self.assertLess(self.llm.invoke.call_count - first_calls, first_calls)
+        
+    def test_chunk_calls_keep_the_callers_context(self):
+        """Test chunk summaries run on worker threads are scheduled like the run that asked for them."""
+        seen = set()
+        
+        def invoke(prompt):
+            seen.add((request_priority.get(), request_user.get()))
+            return f"summary of {len(prompt)} chars"
+        
+        self.llm.invoke.side_effect = invoke
+        with scheduling("batch", user="nightly"):
+            self.summarizer.summarize(LONG_PAPER, "Paper")
+        self.assertEqual(seen, {("batch", "nightly")})
+        self.assertEqual(self.summarizer.llm_calls, self.llm.invoke.call_count)
+        
+    def test_asummarize_matches_summarize(self):
+        """Test the asyncio path produces the same digest with bounded concurrent calls."""
+        in_flight = []
+        
+        async def ainvoke(prompt):
+            in_flight.append(1)
+            self.assertLessEqual(len(in_flight), self.summarizer.max_workers)
+            await asyncio.sleep(0.001)
+            in_flight.pop()
+            return f"summary of {len(prompt)} chars"
+        
+        self.llm.ainvoke = ainvoke
+        digest = asyncio.run(self.summarizer.asummarize(LONG_PAPER, "Paper"))
+        
+        self.assertEqual(self.llm.invoke.call_count, 0)
+        self.assertEqual(digest, self.summarizer.summarize(LONG_PAPER, "Paper"))
+        self.assertEqual(self.llm.invoke.call_count, 0)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,191 @@
+"""Unit tests for per-run budgets and usage reports."""
+
+import sys
+import os
+import json
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Import the conftest fix before any project imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest
+
+from projects import budget as budget_module
+from projects.budget import BudgetExceeded, RunBudget, budget_settings, format_usage, usage_reports
+from projects.utils import UseCase
+
+
+def generation(tokens, prompt_eval_count=None):
+    """Build the response lines of an Ollama generation with one token per line."""
+    lines = [json.dumps({"response": "x", "done": False}) for _ in range(tokens)]
+    final = {"response": "", "done": True, "eval_count": tokens}
+    if prompt_eval_count is not None:
+        final["prompt_eval_count"] = prompt_eval_count
+    return lines + [json.dumps(final)]
+
+
+class BudgetTestCase(unittest.TestCase):
+    """Base class isolating the process-wide usage reports."""
+
+    def setUp(self):
+        patcher = patch.object(budget_module, "_reports", {})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestBudgetSettings(BudgetTestCase):
+    """Test cases for merging budget settings."""
+
+    def test_overrides(self):
+        """Test use case overrides win over CREW_AI_BUDGET, which wins over the defaults."""
+        with patch.dict(os.environ, {"CREW_AI_BUDGET": '{"max_tool_calls": 5, "max_tokens": 10}'}):
+            settings = budget_settings({"max_tokens": None})
+        self.assertEqual((settings["max_tool_calls"], settings["max_tokens"]), (5, None))
+
+    def test_unknown_settings_are_rejected(self):
+        """Test a misspelt limit raises instead of being ignored."""
+        with self.assertRaises(ValueError):
+            budget_settings({"max_token": 5})
+
+
+class TestRunBudget(BudgetTestCase):
+    """Test cases for metering a run."""
+
+    def test_meter_uses_ollama_counts(self):
+        """Test estimates are replaced by the counts Ollama reports."""
+        budget = RunBudget("test")
+        list(budget.meter("p" * 400, iter(generation(5, prompt_eval_count=30))))
+        usage = budget.finish()
+        self.assertEqual((usage["prompt_tokens"], usage["output_tokens"], usage["tokens"]), (30, 5, 35))
+        self.assertEqual(usage["llm_calls"], 1)
+
+    def test_runaway_generation_is_stopped_mid_stream(self):
+        """Test a generation is ended as soon as the run passes its output token limit."""
+        budget = RunBudget("test", {"max_output_tokens": 10})
+        received = []
+        with self.assertRaises(BudgetExceeded) as raised:
+            for line in budget.meter("prompt", iter(generation(1000))):
+                received.append(line)
+        self.assertEqual(len(received), 10)
+        self.assertEqual(raised.exception.counter, "output_tokens")
+        self.assertEqual(budget.finish()["terminated"], "output_tokens")
+
+    def test_oversized_prompt_is_never_sent(self):
+        """Test a prompt whose estimate passes the token limit fails before the request."""
+        budget = RunBudget("test", {"max_tokens": 100})
+        lines = MagicMock()
+        with self.assertRaises(BudgetExceeded):
+            next(budget.meter("p" * 1000, lines))
+        lines.__iter__.assert_not_called()
+
+    def test_tool_and_wall_time_limits(self):
+        """Test tool calls and wall time have hard limits too."""
+        budget = RunBudget("test", {"max_tool_calls": 2})
+        budget.add_tool_call()
+        budget.add_tool_call()
+        with self.assertRaises(BudgetExceeded):
+            budget.add_tool_call()
+
+        budget = RunBudget("test", {"max_wall_seconds": 0.01})
+        time.sleep(0.02)
+        with self.assertRaises(BudgetExceeded) as raised:
+            budget.begin_call("prompt")
+        self.assertEqual(raised.exception.counter, "wall_seconds")
+
+    def test_soft_warning_once_per_limit(self):
+        """Test usage near a limit is logged once and recorded with the run."""
+        budget = RunBudget("test", {"max_llm_calls": 10, "warn_at": 0.5})
+        with self.assertLogs("projects.budget", level="WARNING") as logs:
+            for _ in range(7):
+                budget.begin_call("p")
+        self.assertEqual(len(logs.output), 1)
+        self.assertEqual(budget.finish()["warnings"], ["llm_calls"])
+
+    def test_usage_report_aggregates_runs(self):
+        """Test finished runs are added to the use case's usage report."""
+        budget = RunBudget("Reported", {"max_output_tokens": 3})
+        list(budget.meter("p", iter(generation(2, prompt_eval_count=10))))
+        budget.finish()
+        budget.start()
+        with self.assertRaises(BudgetExceeded):
+            list(budget.meter("p", iter(generation(10))))
+        budget.finish()
+
+        report = usage_reports()["Reported"]
+        self.assertEqual(report["runs"], 2)
+        self.assertEqual(report["terminated"], {"output_tokens": 1})
+        self.assertEqual(report["peak"]["output_tokens"], 4)
+        self.assertIn("stopped: output_tokens x1", format_usage(usage_reports())[0])
+
+
+class TestUseCaseBudget(BudgetTestCase):
+    """Test cases for budgets of use case runs."""
+
+    @patch('projects.utils.Ollama')
+    def setUp(self, mock_ollama):
+        super().setUp()
+        self.use_case = UseCase()
+        self.use_case.crew = MagicMock()
+
+    def test_llms_share_the_run_budget(self):
+        """Test the use case's LLMs meter against its run budget."""
+        self.assertIs(self.use_case.llm.budget, self.use_case.run_budget)
+
+    def test_kickoff_reports_usage_even_when_stopped(self):
+        """Test every kickoff starts a fresh run and adds it to the usage report, even when stopped."""
+        def runaway():
+            while True:
+                self.use_case._handle_step([("action", "observation")])
+
+        self.use_case.run_budget.settings["max_tool_calls"] = 3
+        self.use_case.crew.kickoff.side_effect = runaway
+        with self.assertRaises(BudgetExceeded):
+            self.use_case.kickoff()
+        self.assertEqual(self.use_case.run_stats["tool_calls"], 4)
+
+        self.use_case.crew.kickoff.side_effect = None
+        self.use_case.crew.kickoff.return_value = "done"
+        self.assertEqual(self.use_case.kickoff(), "done")
+        report = self.use_case.usage_report()
+        self.assertEqual((report["runs"], report["terminated"]), (2, {"tool_calls": 1}))
+
+    def test_limits_passed_on_task_threads_stop_the_run(self):
+        """Test a limit passed on an asynchronous task's thread still fails the run once the crew is done."""
+        def crew_with_async_task():
+            def task_thread():
+                try:
+                    self.use_case._handle_step([("action", "observation")])
+                except BudgetExceeded:
+                    pass
+
+            thread = threading.Thread(target=task_thread)
+            thread.start()
+            thread.join()
+            return "incomplete"
+
+        self.use_case.run_budget.settings["max_tool_calls"] = 0
+        self.use_case.crew.kickoff.side_effect = crew_with_async_task
+        with self.assertRaises(BudgetExceeded) as raised:
+            self.use_case.kickoff()
+        self.assertEqual(raised.exception.counter, "tool_calls")
+        self.assertEqual(self.use_case.run_stats["terminated"], "tool_calls")
+
+    def test_calls_made_during_setup_count_toward_the_run(self):
+        """Test LLM calls made while the tasks were set up are kept when the crew starts."""
+        self.use_case.run_budget.begin_call("Summarize the first chunk")
+        self.use_case.crew.kickoff.return_value = "done"
+        self.use_case.kickoff()
+        self.assertEqual(self.use_case.run_stats["llm_calls"], 1)
+        self.use_case.kickoff()
+        self.assertEqual(self.use_case.run_stats["llm_calls"], 0)
+
+    def test_final_answers_are_not_tool_calls(self):
+        """Test agent steps that finish the task are not counted as tool calls."""
+        self.use_case._handle_step(MagicMock())
+        self.assertEqual(self.use_case.run_budget.usage["tool_calls"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
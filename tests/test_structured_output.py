@@ -0,0 +1,218 @@
+"""Unit tests for structured JSON results validated against an output schema."""
+
+import sys
+import os
+import glob
+import importlib
+import inspect
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Import the conftest fix before any project imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import conftest
+
+from projects.structured import (SchemaViolation, StreamingJSONValidator, extract_json, stream_validated,
+                                 validate_json)
+from projects.utils import UseCase
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "risk": {"enum": ["High", "Medium", "Low"]},
+        "score": {"type": "integer", "minimum": 0},
+        "cases": {
+            "type": "array",
+            "items": {"type": "object", "properties": {"id": {"type": "string"}}, "required": ["id"],
+                      "additionalProperties": False},
+        },
+    },
+    "required": ["risk", "cases"],
+}
+
+VALID = '{"risk": "High", "score": 3, "cases": [{"id": "a\\"1"}, {"id": "b"}]}'
+
+
+def feed(text, schema=SCHEMA):
+    """Feed text one character at a time and return the validator."""
+    validator = StreamingJSONValidator(schema)
+    for char in text:
+        validator.feed(char)
+    return validator
+
+
+class TestValidateJson(unittest.TestCase):
+    """Test cases for validating parsed values."""
+
+    def test_valid_value(self):
+        """Test a value matching the schema has no violation."""
+        self.assertIsNone(validate_json({"risk": "Low", "cases": [{"id": "1"}]}, SCHEMA))
+
+    def test_violations_name_the_path(self):
+        """Test violations point at the offending part of the value."""
+        self.assertIn("$.cases[0]", validate_json({"risk": "Low", "cases": [{}]}, SCHEMA))
+        self.assertIn("$.score", validate_json({"risk": "Low", "cases": [], "score": -1}, SCHEMA))
+        self.assertIn("'risk'", validate_json({"cases": []}, SCHEMA))
+
+
+class TestStreamingJSONValidator(unittest.TestCase):
+    """Test cases for validating a JSON document while it streams."""
+
+    def test_valid_document(self):
+        """Test a valid document completes and parses."""
+        validator = feed(VALID + "\n")
+        self.assertTrue(validator.complete)
+        self.assertEqual(validator.result()["cases"][0]["id"], 'a"1')
+
+    def test_violations_stop_at_the_first_bad_character(self):
+        """Test each kind of violation is raised as soon as it is certain."""
+        cases = {
+            'Here is the JSON: {': "H",
+            '{"risk": "Extreme"': '{"risk": "E',
+            '{"risk": "Low", "score": 1.5, "cases": []}': '{"risk": "Low", "score": 1.5,',
+            '{"risk": "Low", "cases": [{"id": "1", "note"': '{"risk": "Low", "cases": [{"id": "1", "note"',
+            '{"risk": "Low", "cases": [1': '{"risk": "Low", "cases": [1',
+            '{"risk": "Low", "cases": [],}': '{"risk": "Low", "cases": [],}',
+            '{"cases": []}': '{"cases": []}',
+        }
+        for text, failing_prefix in cases.items():
+            with self.subTest(text=text):
+                with self.assertRaises(SchemaViolation) as raised:
+                    feed(text)
+                self.assertEqual(raised.exception.text, failing_prefix)
+
+    def test_text_after_document_is_rejected(self):
+        """Test nothing but whitespace may follow the document."""
+        with self.assertRaises(SchemaViolation):
+            feed(VALID + " Let me know if you need more.")
+
+    def test_stream_stops_when_document_closes(self):
+        """Test reading stops at the end of the document and the stream is closed."""
+        read = []
+
+        def chunks():
+            for chunk in ['{"risk": "Low", ', '"cases": []}', "\n\n", "never read"]:
+                read.append(chunk)
+                yield chunk
+
+        value, length = stream_validated(chunks(), SCHEMA)
+        self.assertEqual(value, {"risk": "Low", "cases": []})
+        self.assertEqual(len(read), 2)
+        self.assertEqual(length, 28)
+
+    def test_stream_is_closed_on_violation(self):
+        """Test the generation is closed as soon as it violates the schema."""
+        stream = MagicMock()
+        stream.__iter__.return_value = iter(['{"risk": "None"', ', "cases": []}'])
+        with self.assertRaises(SchemaViolation):
+            stream_validated(stream, SCHEMA)
+        stream.close.assert_called_once()
+
+
+class TestExtractJson(unittest.TestCase):
+    """Test cases for finding a JSON document in a free-text answer."""
+
+    def test_code_fence_and_inline(self):
+        """Test documents are found in code fences and inline, and free text yields None."""
+        self.assertEqual(extract_json('Result:\n```json\n{"a": 1}\n```'), {"a": 1})
+        self.assertEqual(extract_json('The answer is [1, 2] as requested.'), [1, 2])
+        self.assertIsNone(extract_json("No JSON here."))
+
+
+class TestUseCaseStructuredOutput(unittest.TestCase):
+    """Test cases for use cases declaring an output schema."""
+
+    @patch('projects.utils.Ollama')
+    def setUp(self, mock_ollama):
+        self.use_case = UseCase()
+        self.use_case.output_schema = SCHEMA
+        self.json_llm = MagicMock()
+        self.use_case._json_llm = self.json_llm
+
+    def test_valid_final_answer_needs_no_conversion(self):
+        """Test a final answer holding a valid document is returned without another generation."""
+        value = self.use_case.structure_output('Final Answer: {"risk": "Low", "cases": []}')
+        self.assertEqual(value, {"risk": "Low", "cases": []})
+        self.json_llm.stream.assert_not_called()
+        self.assertEqual(self.use_case.output_stats[-1]["source"], "final_answer")
+
+    def test_invalid_conversion_is_retried_with_reason(self):
+        """Test a conversion violating the schema is cut short and retried with the violation."""
+        self.json_llm.stream.side_effect = [iter(['{"risk": "Critical", "cases": [', '{"id": "1"}]}']),
+                                            iter([VALID])]
+        value = self.use_case.structure_output("Risk is high, cases a and b.")
+
+        self.assertEqual(value["risk"], "High")
+        retry_prompt = self.json_llm.stream.call_args_list[1].args[0]
+        self.assertIn("$.risk: expected one of", retry_prompt)
+        self.assertEqual(self.use_case.output_stats[-1]["attempts"], 2)
+
+    def test_conversion_leaves_out_missing_optional_information(self):
+        """Test the conversion prompt asks to omit optional properties rather than set them to null."""
+        self.json_llm.stream.side_effect = [iter([VALID])]
+        self.use_case.structure_output("Risk is high, cases a and b.")
+
+        prompt = self.json_llm.stream.call_args.args[0]
+        self.assertIn("Leave out properties that are not required", prompt)
+        self.assertNotIn("use null for optional", prompt)
+        self.assertIsNotNone(validate_json({"risk": "Low", "cases": [], "score": None}, SCHEMA))
+        self.assertIsNone(validate_json({"risk": "Low", "cases": []}, SCHEMA))
+
+    def test_gives_up_after_attempts(self):
+        """Test SchemaViolation is raised once every conversion failed."""
+        self.use_case.output_attempts = 2
+        self.json_llm.stream.side_effect = lambda prompt: iter(["not json"])
+        with self.assertRaises(SchemaViolation):
+            self.use_case.structure_output("Free text")
+        self.assertEqual(self.json_llm.stream.call_count, 2)
+
+    def test_final_task_is_asked_for_json_once(self):
+        """Test the schema instructions are added to the final task's expected output only once."""
+        task = MagicMock(expected_output="A report.")
+        self.use_case.tasks = [MagicMock(), task]
+        self.use_case.request_output_schema()
+        self.use_case.request_output_schema()
+        self.assertEqual(task.expected_output.count("JSON Schema"), 1)
+
+    def test_kickoff_returns_structured_result(self):
+        """Test kickoff() returns the validated value instead of the crew's text."""
+        self.use_case.crew = MagicMock()
+        self.use_case.crew.kickoff.return_value = '{"risk": "Medium", "cases": [{"id": "7"}]}'
+        self.assertEqual(self.use_case.kickoff()["cases"], [{"id": "7"}])
+
+
+
+class TestUseCaseSchemas(unittest.TestCase):
+    """Test the output schemas declared by the use cases."""
+
+    # The grant proposal is assembled from the section texts, so it stays free text
+    FREE_TEXT = {"GrantWritingUseCase"}
+
+    def use_case_classes(self):
+        """Import every use case module and return the UseCase subclasses defined in them."""
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        classes = []
+        for path in sorted(glob.glob(os.path.join(root, "projects", "*", "use_case_*", "main.py"))):
+            module_name = os.path.relpath(path, root)[:-len(".py")].replace(os.sep, ".")
+            with patch("projects.utils.Ollama"):
+                module = importlib.import_module(module_name)
+            classes += [cls for _, cls in inspect.getmembers(module, inspect.isclass)
+                        if issubclass(cls, UseCase) and cls is not UseCase and cls.__module__ == module_name]
+        return classes
+
+    def test_use_cases_declare_consistent_schemas(self):
+        """Test each use case declares an output schema whose required properties are all defined."""
+        classes = self.use_case_classes()
+        self.assertGreaterEqual(len(classes), 18)
+        for cls in classes:
+            with self.subTest(use_case=cls.__name__):
+                if cls.__name__ in self.FREE_TEXT:
+                    self.assertIsNone(cls.output_schema)
+                    continue
+                schema = cls.output_schema
+                self.assertEqual(schema["type"], "object")
+                self.assertLessEqual(set(schema["required"]), set(schema["properties"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,7 +7,11 @@ import os
 import sys
 import time
 import json
+import uuid
 from core import UseCaseManager
+from projects.scheduling import format_stats, scheduler_stats, scheduling
+from projects.utils import default_model
+from projects.warmup import format_report, start_warmup
 
 # Configure Streamlit page
 st.set_page_config(
@@ -28,6 +32,12 @@ if "is_running" not in st.session_state:
     st.session_state.is_running = False
 if "input_data" not in st.session_state:
     st.session_state.input_data = {}
+# Sessions share LLM capacity fairly, so each needs its own id
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex[:12]
+# Preload the models once per server process so the first run does not pay their load time
+if "warmer" not in st.session_state and os.environ.get("CREW_AI_WARMUP", "1") != "0":
+    st.session_state.warmer = start_warmup(default_model=default_model.get())
 
 def reset_result():
     """Reset the result state."""
@@ -48,11 +58,13 @@ def run_use_case():
         # Get the use case manager from session state
         manager = st.session_state.use_case_manager
         
-        # Run the use case in session state to avoid recomputation
-        st.session_state.result = manager.run_use_case(
-            st.session_state.current_use_case,
-            st.session_state.input_data
-        )
+        # Run the use case in session state to avoid recomputation; a user is waiting, so its LLM
+        # requests go ahead of batch requests
+        with scheduling("interactive", user=st.session_state.session_id):
+            st.session_state.result = manager.run_use_case(
+                st.session_state.current_use_case,
+                st.session_state.input_data
+            )
         st.session_state.is_running = False
 
 # App header
@@ -81,6 +93,15 @@ for case_id, case_data in research_cases.items():
     if st.sidebar.button(f"🔬 {case_data['title']}", key=f"res_{case_id}"):
         set_use_case(case_id)
 
+# Model warm-up status
+if st.session_state.get("warmer"):
+    with st.sidebar.expander("Model Warm-up"):
+        st.text(format_report(st.session_state.warmer.report()) or "Loading models...")
+
+# LLM queue status
+with st.sidebar.expander("LLM Queue"):
+    st.text("\n".join(format_stats(scheduler_stats())) or "No LLM requests yet")
+
 # Main content area
 if st.session_state.current_use_case:
     # Get all use cases and find the current one
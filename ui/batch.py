@@ -0,0 +1,326 @@
+"""Headless batch execution of use cases over JSONL inputs."""
+
+import importlib
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Dict, List, Any, IO, Iterable, Iterator, Optional
+
+# Add the parent directory to sys.path to allow importing from projects
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from projects.utils import default_model, resume_id
+from projects.budget import format_usage, usage_reports
+from projects.prefix_cache import PREFIX_TRACKER, format_report as format_prefix_report
+from projects.scheduling import format_stats, scheduler_stats, scheduling
+from projects.warmup import ModelWarmer, format_report
+from ui.core import UseCaseManager
+
+# Records read ahead per worker, so records of models at their concurrency limit can be overtaken
+# without reading the whole input into memory
+READ_AHEAD_PER_WORKER = 4
+
+# Manager of the current worker process in process mode
+_process_manager: Optional[UseCaseManager] = None
+
+
+def read_records(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """Parse JSONL batch records of the form {"use_case_id": ..., "input_data": {...}, "model": ...}.
+
+    An optional "user" names who a record runs for; LLM capacity is shared fairly
+    between the users of a batch. An optional "resume_id" checkpoints the record's run
+    under that identifier, so rerunning a failed record with it skips finished tasks.
+    Lines that are blank are skipped. Lines that cannot be used are still yielded,
+    with an "error", so they show up in the results instead of stopping the batch.
+
+    Args:
+        lines: Lines of a JSONL file
+
+    Returns:
+        Iterator of records, each with its 1-based "line" number
+    """
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield {"line": number, "error": f"Invalid JSON: {e}"}
+            continue
+        if not isinstance(record, dict) or not record.get("use_case_id"):
+            yield {"line": number, "error": "Record must be an object with a use_case_id"}
+            continue
+        if record.get("input_data") is not None and not isinstance(record["input_data"], dict):
+            yield {"line": number, "use_case_id": record["use_case_id"], "error": "input_data must be an object"}
+            continue
+        yield dict(record, line=number)
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Linearly interpolated percentile of a list of values, with q between 0 and 100."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def run_record(manager: UseCaseManager, record: Dict[str, Any], concurrent_threads: bool = False) -> Dict[str, Any]:
+    """Run one batch record and time it.
+
+    Args:
+        manager: Manager used to run the use case
+        record: Parsed batch record
+        concurrent_threads: Whether other records run in threads of the same process,
+            in which case stdout is not captured and modules are not reloaded
+
+    Returns:
+        JSON-serializable result of the record
+    """
+    model = record.get("model") or default_model.get()
+    token = default_model.set(model)
+    resume_token = resume_id.set(record.get("resume_id"))
+    start = time.perf_counter()
+    try:
+        # Batch records yield LLM capacity to interactive users, in this process and in others
+        with scheduling("batch", user=record.get("user") or "batch"):
+            outcome = manager.run_use_case(record["use_case_id"], record.get("input_data"),
+                                           capture_output=not concurrent_threads, reload=not concurrent_threads)
+    except Exception as e:
+        outcome = {"error": str(e), "success": False}
+    finally:
+        resume_id.reset(resume_token)
+        default_model.reset(token)
+    latency = time.perf_counter() - start
+
+    result = {
+        "line": record["line"],
+        "id": record.get("id"),
+        "use_case_id": record["use_case_id"],
+        "model": model,
+        "success": bool(outcome.get("success")),
+        "latency": round(latency, 4),
+    }
+    if result["success"]:
+        value = outcome.get("result")
+        # Structured results of use cases with an output schema stay JSON, so consumers need not parse text
+        result["result"] = value if isinstance(value, (dict, list)) else str(value)
+    else:
+        result["error"] = outcome.get("error", "Unknown error")
+    return result
+
+
+def _init_process_worker():
+    global _process_manager
+    _process_manager = UseCaseManager()
+
+
+def _run_in_process(record: Dict[str, Any]) -> Dict[str, Any]:
+    return run_record(_process_manager, record)
+
+
+class BatchRunner:
+    """Run use case records on a worker pool with per-model concurrency limits."""
+
+    def __init__(self, workers: int = 4, mode: str = "thread", model_limits: Optional[Dict[str, int]] = None,
+                 manager: Optional[UseCaseManager] = None, warmup: bool = False):
+        """Initialize the runner.
+
+        Args:
+            workers: Maximum number of records running at once
+            mode: "thread" to run records in threads of this process, "process" to run them
+                in separate worker processes
+            model_limits: Maximum number of records running at once per model; models that
+                are not listed are only limited by the number of workers
+            manager: Manager used in thread mode, created if not given
+            warmup: Whether to load the batch's models on every Ollama host before the first
+                record starts, and keep them loaded until the batch ends
+        """
+        if mode not in ("thread", "process"):
+            raise ValueError("mode must be 'thread' or 'process'")
+        if workers < 1 or any(limit < 1 for limit in (model_limits or {}).values()):
+            raise ValueError("workers and model limits must be at least 1")
+        self.workers = workers
+        self.mode = mode
+        self.model_limits = dict(model_limits or {})
+        self.manager = manager
+        self.warmup = warmup
+
+    def _executor(self):
+        if self.mode == "process":
+            return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_process_worker)
+        if self.manager is None:
+            self.manager = UseCaseManager()
+        # Import every module once up front so worker threads never import or reload concurrently
+        for use_case in self.manager.get_all_use_cases().values():
+            try:
+                importlib.import_module(use_case["module_path"])
+            except Exception:
+                pass
+        return ThreadPoolExecutor(max_workers=self.workers)
+
+    def _submit(self, executor, record: Dict[str, Any]):
+        if self.mode == "process":
+            return executor.submit(_run_in_process, record)
+        return executor.submit(run_record, self.manager, record, True)
+
+    def run(self, records: Iterable[Dict[str, Any]], output: IO[str]) -> Dict[str, Any]:
+        """Run records and stream one JSON line per result to output as each one completes.
+
+        Records are read lazily and started in input order, except that a record whose
+        model is at its concurrency limit lets later records of other models go first;
+        at most READ_AHEAD_PER_WORKER records per worker are read ahead for this.
+
+        Args:
+            records: Records as produced by read_records
+            output: Text stream the JSONL results are written to
+
+        Returns:
+            Summary with counts, throughput and latency percentiles
+        """
+        records = iter(records)
+        pending = deque()
+        results = []
+        models_seen = set()
+
+        def emit(result):
+            results.append(result)
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            output.flush()
+
+        def read_ahead():
+            """Read records until the window is full, returning the models they are the first to use."""
+            models = []
+            while len(pending) < self.workers * READ_AHEAD_PER_WORKER:
+                record = next(records, None)
+                if record is None:
+                    break
+                if "error" in record:
+                    emit({"line": record["line"], "use_case_id": record.get("use_case_id"), "success": False,
+                          "error": record["error"], "latency": 0.0})
+                else:
+                    pending.append(dict(record, model=record.get("model") or default_model.get()))
+                    if pending[-1]["model"] not in models_seen:
+                        models_seen.add(pending[-1]["model"])
+                        models.append(pending[-1]["model"])
+            return models
+
+        warmer = None
+        warmup_seconds = 0.0
+        models = read_ahead()
+        if self.warmup and models:
+            # Load times would otherwise land on the first records and skew the latency percentiles;
+            # models first seen later in the batch are loaded in the background as they are read
+            warmer = ModelWarmer(models)
+            warmup_start = time.perf_counter()
+            warmer.start(block=True)
+            warmup_seconds = time.perf_counter() - warmup_start
+
+        start = time.perf_counter()
+        try:
+            self._run_pending(pending, read_ahead, warmer, emit)
+        finally:
+            if warmer:
+                warmer.stop()
+
+        summary = self.summarize(results, time.perf_counter() - start)
+        if warmer:
+            summary["warmup"] = {"seconds": round(warmup_seconds, 3), "models": warmer.report()}
+        if self.mode == "thread":
+            # Worker processes keep their own trackers, reports and schedulers, so only thread batches report them
+            summary["prefix_reuse"] = PREFIX_TRACKER.report()
+            summary["usage"] = usage_reports()
+            summary["scheduler"] = scheduler_stats()
+        return summary
+
+    def _run_pending(self, pending, read_ahead, warmer, emit):
+        running = {}
+        active: Dict[str, int] = {}
+        with self._executor() as executor:
+            while pending or running:
+                # Fill free workers with the first records whose model has capacity
+                for record in list(pending):
+                    if len(running) >= self.workers:
+                        break
+                    model = record["model"]
+                    if active.get(model, 0) >= self.model_limits.get(model, self.workers):
+                        continue
+                    pending.remove(record)
+                    active[model] = active.get(model, 0) + 1
+                    running[self._submit(executor, record)] = record
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    record = running.pop(future)
+                    active[record["model"]] -= 1
+                    try:
+                        emit(future.result())
+                    except Exception as e:
+                        emit({"line": record["line"], "id": record.get("id"), "use_case_id": record["use_case_id"],
+                              "model": record["model"], "success": False, "error": str(e), "latency": 0.0})
+
+                models = read_ahead()
+                if warmer and models:
+                    warmer.add(models)
+
+    @staticmethod
+    def summarize(results: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+        """Summarize results: counts, throughput and p50/p95 latency overall and per use case."""
+        latencies = [result["latency"] for result in results if result.get("success")]
+        per_use_case = {}
+        for use_case_id in sorted({result["use_case_id"] for result in results if result.get("use_case_id")}):
+            runs = [result for result in results if result.get("use_case_id") == use_case_id]
+            successful = [result["latency"] for result in runs if result["success"]]
+            per_use_case[use_case_id] = {
+                "records": len(runs),
+                "failed": len(runs) - len(successful),
+                "p50": percentile(successful, 50),
+                "p95": percentile(successful, 95),
+            }
+        return {
+            "records": len(results),
+            "succeeded": len(latencies),
+            "failed": len(results) - len(latencies),
+            "elapsed": round(elapsed, 3),
+            "throughput": round(len(results) / elapsed, 3) if elapsed > 0 else None,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "use_cases": per_use_case,
+        }
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    """Format a batch summary as a short text report."""
+    def seconds(value):
+        return "-" if value is None else f"{value:.2f}s"
+
+    lines = [
+        f"Records: {summary['records']} ({summary['succeeded']} succeeded, {summary['failed']} failed) "
+        f"in {summary['elapsed']:.1f}s",
+        f"Throughput: {summary['throughput'] or 0:.3f} records/s",
+        f"Latency: p50 {seconds(summary['p50'])}, p95 {seconds(summary['p95'])}",
+    ]
+    for use_case_id, stats in summary["use_cases"].items():
+        lines.append(f"  {use_case_id}: {stats['records']} records, {stats['failed']} failed, "
+                     f"p50 {seconds(stats['p50'])}, p95 {seconds(stats['p95'])}")
+    if summary.get("warmup"):
+        lines.append(f"Warm-up: {seconds(summary['warmup']['seconds'])}")
+        lines += [f"  {line}" for line in format_report(summary["warmup"]["models"]).splitlines()]
+    usage = format_usage(summary["usage"]) if summary.get("usage") else []
+    if usage:
+        lines.append("Usage per run:")
+        lines += [f"  {line}" for line in usage]
+    queue_wait = format_stats(summary["scheduler"]) if summary.get("scheduler") else []
+    if queue_wait:
+        lines.append("LLM queue wait:")
+        lines += [f"  {line}" for line in queue_wait]
+    prefix_report = format_prefix_report(summary["prefix_reuse"]) if summary.get("prefix_reuse") else ""
+    if prefix_report:
+        lines.append("Prompt prefix reuse:")
+        lines += [f"  {line}" for line in prefix_report.splitlines()]
+    return "\n".join(lines)
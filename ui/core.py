@@ -1,6 +1,7 @@
 """Core module for Crew AI Agents UI application."""
 
 import importlib
+import inspect
 import os
 import sys
 import json
@@ -63,10 +64,24 @@ class UseCaseManager:
         all_cases.update(self.research_use_cases)
         return all_cases
         
-    def run_use_case(self, use_case_id: str, input_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Run a specific use case with optional input data."""
+    def get_use_case(self, use_case_id: str) -> Optional[Dict[str, Any]]:
+        """Get the metadata of a use case from either category."""
+        return self.financial_use_cases.get(use_case_id) or self.research_use_cases.get(use_case_id)
+        
+    def run_use_case(self, use_case_id: str, input_data: Optional[Dict[str, Any]] = None,
+                     capture_output: bool = True, reload: bool = True) -> Dict[str, Any]:
+        """Run a specific use case with optional input data.
+        
+        Args:
+            use_case_id: Directory name of the use case
+            input_data: Optional input data passed to the module's run function
+            capture_output: Capture stdout into the "output" field; stdout is process-wide,
+                so concurrent runs in threads should disable this
+            reload: Reload the module first to reset module level state; concurrent runs
+                in threads should disable this
+        """
         # Find the use case in either category
-        use_case = self.financial_use_cases.get(use_case_id) or self.research_use_cases.get(use_case_id)
+        use_case = self.get_use_case(use_case_id)
         
         if not use_case:
             return {"error": f"Use case {use_case_id} not found"}
@@ -76,18 +91,19 @@ class UseCaseManager:
             module = importlib.import_module(use_case['module_path'])
             
             # Reset any module level state to ensure clean execution
-            importlib.reload(module)
+            if reload:
+                importlib.reload(module)
             
             # Execute the use case with input_data
             # Store current stdout to capture output
             import io
-            from contextlib import redirect_stdout
+            from contextlib import nullcontext, redirect_stdout
             
             # Create buffer to capture stdout
             buffer = io.StringIO()
             
             # Run with captured stdout
-            with redirect_stdout(buffer):
+            with redirect_stdout(buffer) if capture_output else nullcontext():
                 # Check if the module has a run function that accepts input_data
                 if hasattr(module, 'run') and callable(module.run):
                     result = module.run(input_data)
@@ -114,3 +130,41 @@ class UseCaseManager:
                 "traceback": traceback.format_exc(),
                 "success": False
             }
+            
+    async def arun_use_case(self, use_case_id: str, input_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run a specific use case from asyncio code without blocking the event loop.
+        
+        Modules that define an ``async def arun(input_data)`` are awaited directly;
+        the ``run`` function of other modules executes on the shared crew thread pool.
+        Stdout is not captured and modules are not reloaded, since both affect every
+        run in the process.
+        
+        Args:
+            use_case_id: Directory name of the use case
+            input_data: Optional input data passed to the module
+        """
+        from projects.utils import run_blocking
+        
+        use_case = self.get_use_case(use_case_id)
+        if not use_case:
+            return {"error": f"Use case {use_case_id} not found", "success": False}
+            
+        try:
+            module = importlib.import_module(use_case['module_path'])
+            if inspect.iscoroutinefunction(getattr(module, 'arun', None)):
+                result = await module.arun(input_data)
+            else:
+                result = await run_blocking(module.run, input_data)
+            return {
+                "result": result,
+                "output": "",
+                "success": True
+            }
+            
+        except Exception as e:
+            import traceback
+            return {
+                "error": str(e),
+                "traceback": traceback.format_exc(),
+                "success": False
+            }